@@ -32,6 +32,10 @@ class Settings(BaseSettings):
     jwt_secret_key: str
     jwt_access_token_expire_minutes: int = 30
     jwt_refresh_token_expire_days: int = 7
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
+    tenant_settings_ttl_seconds: int = 300
     
     # Encryption
     encryption_key: str  # Fernet key for AES-256
@@ -40,16 +44,24 @@ class Settings(BaseSettings):
     anthropic_api_key: str
     claude_model: str = "claude-sonnet-4-20250514"
     claude_max_tokens: int = 4096
+    claude_prompt_cache_enabled: bool = True
+    claude_fast_model: str = "claude-3-5-haiku-20241022"  # Summaries and other internal tasks
+    llm_usage_flush_interval_seconds: float = 10.0
     
     # OpenAI (Hybrid LLM)
     openai_api_key: Optional[str] = None
     openai_model: str = "gpt-4o"
+    openai_fast_model: str = "gpt-4o-mini"
     
     # Google APIs
     google_credentials_path: str = "credentials/gmail-credentials.json"
+    google_token_refresh_margin_seconds: int = 300
+    google_token_refresh_interval_seconds: int = 30
     gmail_webhook_url: str
     gmail_pubsub_topic: str
     gmail_pubsub_service_account: str
+    gmail_fingerprint_window_seconds: int = 86400
+    gmail_fingerprint_filter_capacity: int = 100000
     
     # Google OAuth (v4.0 SSO)
     google_oauth_client_id: Optional[str] = None
@@ -66,10 +78,56 @@ class Settings(BaseSettings):
     nova_api_url: Optional[str] = None
     eli_api_url: Optional[str] = None
     
+    # Email Idempotency
+    processed_cache_ttl_seconds: int = 3600
+    processed_cache_max_entries: int = 50000
+    
+    # Queue Workers (LISTEN/NOTIFY wakeups; polling is only a safety net)
+    worker_poll_interval_seconds: int = 300
+    worker_target_batch_seconds: float = 5.0
+    worker_metrics_port: int = 0
+    
+    # Email Retry Worker
+    email_retry_batch_size: int = 20
+    email_retry_concurrency: int = 4
+    
+    # Archivus Summary Worker
+    archivus_summary_debounce_seconds: int = 120  # Updates to a thread within this window coalesce
+    archivus_summary_max_delay_seconds: int = 900  # Debouncing never delays a summary longer than this
+    archivus_summary_batch_size: int = 20
+    archivus_summary_concurrency: int = 4
+    
+    # Archivus Profiles
+    archivus_profile_cache_ttl_seconds: int = 60  # Bounds staleness of profiles written by other processes
+    archivus_profile_cache_max_entries: int = 10000
+    
+    # Archivus Recall Index
+    archivus_index_dir: str = ""  # Per-tenant index files; empty = <tmp>/maya-archivus-index
+    archivus_index_dim: int = 512  # Embedding size (changing it rebuilds the index)
+    archivus_index_sync_seconds: int = 30  # How often a tenant's index pulls changes from Postgres
+    archivus_recall_results: int = 3  # Related past threads added to draft context (0 disables)
+    archivus_recall_min_score: float = 0.3
+    
+    # Payment Reminders
+    payment_reminder_batch_size: int = 200
+    payment_reminder_concurrency: int = 8
+    
+    # SMS Conversations
+    sms_conversation_cache_ttl_seconds: int = 120
+    
+    # Observability
+    metrics_bearer_token: Optional[str] = None
+    metrics_dashboard_refresh_seconds: int = 60
+    pipeline_slow_email_ms: int = 30000
+    pipeline_timeline_sample_rate: float = 0.01
+    
     # Rate Limiting
     rate_limit_per_minute: int = 100
     rate_limit_webhook_per_minute: int = 100
     rate_limit_calendar_per_minute: int = 50
+    rate_limit_shm_path: str = ""  # Shared bucket file; empty = /dev/shm/maya-rate-limits
+    rate_limit_slots: int = 4096  # Buckets in the shared table (tenant x route pairs)
+    rate_limit_reconcile_seconds: float = 0.0  # >0 enables cross-host reconciliation via Postgres
     
     # Safe Mode
     safe_mode_enabled: bool = False
@@ -78,6 +136,10 @@ class Settings(BaseSettings):
     # LLM Task Routing
     use_hybrid_llm: bool = True
     hybrid_llm_fallback_enabled: bool = True
+    llm_hedging_enabled: bool = True  # Fire a backup request when the first is slow
+    llm_hedge_percentile: float = 0.95  # Hedge after the provider's p95 latency
+    llm_hedge_min_samples: int = 20  # Calls seen before the percentile is trusted
+    llm_hedge_default_delay_seconds: float = 10.0  # Hedge delay until then
 
 
 @lru_cache()
@@ -3,6 +3,7 @@ Twilio Configuration for SMS
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Optional
 
 
 class TwilioSettings(BaseSettings):
@@ -10,6 +11,12 @@ class TwilioSettings(BaseSettings):
     twilio_auth_token: str
     twilio_phone_number: str  # Your Twilio number (e.g., +12345678900)
     
+    # Outbound queue (env: TWILIO_STATUS_CALLBACK_URL, TWILIO_MESSAGES_PER_SECOND, ...)
+    status_callback_url: Optional[str] = None  # e.g., https://.../api/sms/status
+    messages_per_second: float = 1.0  # Per sending number, across all processes on the host (long code default)
+    send_workers: int = 4
+    max_send_attempts: int = 5
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
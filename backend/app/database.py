@@ -2,15 +2,28 @@
 OMEGA Core v3.0 - Database Connection Management
 """
 import os
+import time
 import psycopg2
 from psycopg2 import pool, sql
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 from typing import Optional, Generator
+from app.utils.metrics import get_registry
 from app.config import get_settings
 
 settings = get_settings()
 
+POOL_WAIT_SECONDS = get_registry().histogram(
+    "db_pool_wait_seconds",
+    "Time get_cursor waits to check out a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+TRANSACTIONS = get_registry().counter(
+    "db_transactions_total",
+    "get_cursor transactions by outcome",
+    labelnames=("outcome",),
+)
+
 # Connection pool (thread-safe)
 _connection_pool: Optional[pool.ThreadedConnectionPool] = None
 
@@ -25,9 +38,19 @@ def init_db_pool():
             dsn=settings.database_url,
             cursor_factory=RealDictCursor
         )
+        get_registry().register_stats("db_pool", get_pool_stats, "Database connection pool")
     return _connection_pool
 
 
+def get_pool_stats() -> Optional[dict]:
+    """Connections in use / idle in the pool (None before the pool exists)"""
+    pool = _connection_pool
+    if pool is None:
+        return None
+    in_use = len(pool._used)
+    return {"in_use": in_use, "idle": len(pool._pool), "max": pool.maxconn}
+
+
 def get_db_pool():
     """Get database connection pool (initializes if needed)"""
     global _connection_pool
@@ -48,7 +71,9 @@ def get_cursor(tenant_id: Optional[str] = None) -> Generator[RealDictCursor, Non
         RealDictCursor: Database cursor
     """
     pool = get_db_pool()
+    started = time.perf_counter()
     conn = pool.getconn()
+    POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
     try:
         # Set tenant context for RLS
         if tenant_id:
@@ -58,13 +83,40 @@ def get_cursor(tenant_id: Optional[str] = None) -> Generator[RealDictCursor, Non
         cursor = conn.cursor()
         yield cursor
         conn.commit()
+        TRANSACTIONS.inc(outcome="commit")
     except Exception:
         conn.rollback()
+        TRANSACTIONS.inc(outcome="rollback")
         raise
     finally:
         pool.putconn(conn)
 
 
+# LISTEN/NOTIFY channels that wake background workers (see app.workers.runtime)
+EMAIL_RETRY_CHANNEL = "email_retry_queue"
+PAYMENT_REMINDER_CHANNEL = "payment_reminders"
+GUARDIAN_CHANNEL = "guardian_checks"
+ARCHIVUS_SUMMARY_CHANNEL = "archivus_summaries"
+
+# Tenant (or its safe_mode state) changed; payload is the tenant id (see app.services.tenant_settings)
+TENANT_SETTINGS_CHANNEL = "tenant_settings"
+
+# SMS conversation changed; payload is "<tenant_id>:<phone_number>" (see app.services.conversation_service)
+CONVERSATIONS_CHANNEL = "sms_conversations"
+
+
+def notify(cursor, channel: str, payload: str = "") -> None:
+    """
+    Queue a NOTIFY on the cursor's transaction (delivered on commit, dropped on rollback)
+    
+    Args:
+        cursor: Open cursor
+        channel: Channel name
+        payload: Optional payload (under 8000 bytes)
+    """
+    cursor.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+
+
 def get_db():
     """Get database connection (legacy compatibility)"""
     return get_db_pool().getconn()
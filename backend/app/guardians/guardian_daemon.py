@@ -5,14 +5,16 @@ Runs safety/self-checks every 30 minutes (configurable)
 Triggers SAFE MODE if any guardian check fails or Aegis detects critical risk
 """
 from __future__ import annotations
-import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
 from uuid import UUID
 
-from app.database import get_cursor
+from app.database import get_cursor, GUARDIAN_CHANNEL
 from app.services.audit_service import get_audit_service
+from app.workers.runtime import QueueWorker, run_worker
+from app.utils.metrics import get_registry
 
 # Guardian imports
 from app.guardians.solin_mcp import get_solin_mcp
@@ -36,17 +38,32 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# A tenant notified again within this window is not re-checked
+TENANT_RECHECK_MIN_SECONDS = 60
 
-class GuardianDaemon:
+GUARDIAN_CHECKS = get_registry().counter(
+    "guardian_checks_total",
+    "Guardian self-check results",
+    labelnames=("guardian", "status"),
+)
+
+
+class GuardianDaemon(QueueWorker):
     """
     Continuous monitoring daemon for all guardians.
     Runs safety/self-checks every 30 minutes (configurable).
     Triggers SAFE MODE if any guardian check fails or Aegis detects critical risk.
+    Safe Mode changes NOTIFY the daemon, which re-checks that tenant at once.
     """
 
+    name = "guardian-daemon"
+    channels = (GUARDIAN_CHANNEL,)
+
     def __init__(self, check_interval_minutes: int = 30):
         self.check_interval_minutes = check_interval_minutes
-        self.is_running = False
+        self._next_run_at = time.monotonic()
+        self._pending_tenants: List[str] = []
+        self._last_checked: Dict[str, float] = {}
 
     def get_all_tenant_ids(self) -> List[str]:
         """
@@ -84,10 +101,13 @@ class GuardianDaemon:
             # Fail-open: return empty list if query fails
             return []
 
-    def run_once(self) -> Dict[str, Any]:
+    def run_once(self, tenant_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Executes a single round of guardian checks and Aegis analysis for all active tenants.
         Returns a summary of the run.
+
+        Args:
+            tenant_ids: Check only these tenants (default: all active tenants)
         """
         start_time = datetime.now(timezone.utc)
         audit = get_audit_service(None)  # Use global audit for daemon events
@@ -95,7 +115,7 @@ class GuardianDaemon:
         tenant_results: List[Dict[str, Any]] = []
 
         try:
-            active_tenant_ids = self.get_all_tenant_ids()
+            active_tenant_ids = tenant_ids if tenant_ids is not None else self.get_all_tenant_ids()
             audit.log_event(
                 action="guardian_daemon.run_start",
                 resource_type="daemon",
@@ -273,6 +293,9 @@ class GuardianDaemon:
             else:
                 logger.debug("Aegis not available, skipping anomaly analysis")
 
+            for guardian, check in result["guardian_checks"].items():
+                GUARDIAN_CHECKS.inc(guardian=guardian, status=check.get("status", "unknown"))
+            
             result["completed_at"] = datetime.now(timezone.utc).isoformat()
             return result
         except Exception as e:
@@ -282,42 +305,53 @@ class GuardianDaemon:
             result["completed_at"] = datetime.now(timezone.utc).isoformat()
             return result
 
-    async def run_loop(self) -> None:
-        """
-        Async loop wrapper for continuous operation.
-        Runs guardian checks every check_interval_minutes.
+    def handle_notifications(self, payloads: List[str]) -> None:
+        """Queue notified tenants for an immediate re-check (debounced per tenant)"""
+        now = time.monotonic()
+        for tenant_id in payloads:
+            if not tenant_id or tenant_id in self._pending_tenants:
+                continue
+            if now - self._last_checked.get(tenant_id, float("-inf")) < TENANT_RECHECK_MIN_SECONDS:
+                continue
+            self._pending_tenants.append(tenant_id)
+
+    def process_batch(self, batch_size: int) -> int:
         """
-        self.is_running = True
-        logger.info(f"Guardian daemon started (interval: {self.check_interval_minutes} minutes)")
+        Run one unit of work: notified tenants first, otherwise the scheduled full run
 
-        while self.is_running:
-            try:
-                result = self.run_once()
-                logger.info(f"Guardian daemon run completed: {result.get('status')}")
-            except Exception as e:
-                logger.error(f"Guardian daemon run error: {e}", exc_info=True)
-
-            # Wait for next interval
-            await asyncio.sleep(self.check_interval_minutes * 60)
+        Returns:
+            1 if checks ran, 0 if nothing was due
+        """
+        if self._pending_tenants:
+            tenant_ids, self._pending_tenants = self._pending_tenants, []
+        elif time.monotonic() >= self._next_run_at:
+            tenant_ids = None
+            self._next_run_at = time.monotonic() + self.check_interval_minutes * 60
+        else:
+            return 0
+
+        result = self.run_once(tenant_ids)
+        checked_at = time.monotonic()
+        for tenant_result in result.get("tenant_results", []):
+            self._last_checked[tenant_result["tenant_id"]] = checked_at
+        logger.info(f"Guardian daemon run completed: {result.get('status')}")
+        return 1
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the next scheduled full run"""
+        return self._next_run_at - time.monotonic()
 
     @classmethod
     def run_forever(cls, check_interval_minutes: int = 30) -> None:
         """
         Class method for standalone execution.
-        Runs daemon continuously until interrupted.
+        Runs daemon continuously until SIGTERM/SIGINT.
         
         Args:
             check_interval_minutes: Minutes between daemon runs
         """
         daemon = cls(check_interval_minutes=check_interval_minutes)
-        try:
-            asyncio.run(daemon.run_loop())
-        except KeyboardInterrupt:
-            logger.info("Guardian daemon stopped by user")
-            daemon.is_running = False
-        except Exception as e:
-            logger.error(f"Guardian daemon crashed: {e}", exc_info=True)
-            raise
+        run_worker(daemon, poll_interval_seconds=check_interval_minutes * 60)
 
 
 def start_guardian_daemon(check_interval_minutes: int = 30) -> None:
@@ -8,6 +8,7 @@ from datetime import datetime, timezone
 from app.services.audit_service import get_audit_service
 from app.guardians.solin_mcp import get_solin_mcp
 from app.database import get_cursor
+from app.utils.text_safety import scan_text
 
 
 class SentraSafety:
@@ -180,74 +181,7 @@ class SentraSafety:
         Returns:
             Dict with violations found
         """
-        violations = []
-        
-        # Check for system prompt reveal
-        if self._check_system_prompt_reveal(email_text):
-            violations.append({
-                "type": "system_prompt_reveal",
-                "severity": "high",
-            })
-        
-        # Check for hallucination patterns
-        if self._check_hallucination(email_text):
-            violations.append({
-                "type": "ai_hallucination",
-                "severity": "high",
-            })
-        
-        # Check for external URLs
-        external_urls = self._check_external_urls(email_text)
-        if external_urls:
-            violations.append({
-                "type": "external_urls",
-                "severity": "medium",
-                "urls": external_urls,
-            })
-        
-        # Check for invented details
-        if self._check_invented_details(email_text):
-            violations.append({
-                "type": "invented_details",
-                "severity": "high",
-            })
-        
-        return {"violations": violations, "has_violations": len(violations) > 0}
-    
-    def _check_system_prompt_reveal(self, text: str) -> bool:
-        """Check for system prompt indicators"""
-        patterns = ["system prompt", "here is my system", "i am an ai assistant"]
-        text_lower = text.lower()
-        return any(pattern in text_lower for pattern in patterns)
-    
-    def _check_hallucination(self, text: str) -> bool:
-        """Check for hallucination patterns"""
-        patterns = ["i'm not sure but", "i believe", "probably"]
-        text_lower = text.lower()
-        return any(pattern in text_lower for pattern in patterns)
-    
-    def _check_external_urls(self, text: str) -> list[str]:
-        """Check for external URLs (excluding internal domains)"""
-        import re
-        url_pattern = r'https?://[^\s]+'
-        urls = re.findall(url_pattern, text)
-        internal_domains = ["skinnymanmusic.com", "levelthree.io"]
-        external_urls = [
-            url for url in urls
-            if not any(domain in url for domain in internal_domains)
-        ]
-        return external_urls
-    
-    def _check_invented_details(self, text: str) -> bool:
-        """Check for invented details (prices, times, venues)"""
-        # Simple heuristic: check for price patterns, time patterns, etc.
-        import re
-        price_pattern = r'\$\d+'
-        time_pattern = r'\d{1,2}:\d{2}\s*(AM|PM|am|pm)'
-        has_price = bool(re.search(price_pattern, text))
-        has_time = bool(re.search(time_pattern, text))
-        # This is a simplified check - real implementation would be more sophisticated
-        return has_price or has_time
+        return scan_text(email_text).to_dict()
     
     def _determine_severity(self, violation_type: str) -> str:
         """Determine severity level for violation"""
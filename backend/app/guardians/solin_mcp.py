@@ -8,11 +8,18 @@ from datetime import datetime, timedelta, timezone
 from app.services.audit_service import get_audit_service
 from app.guardians.sentra_safety import get_sentra_safety
 from app.guardians.vita_repair import get_vita_repair
-from app.database import get_cursor
+from app.database import get_cursor, notify, GUARDIAN_CHANNEL
+from app.utils.metrics import get_registry
 from app.config import get_settings
 
 settings = get_settings()
 
+SAFE_MODE_CHANGES = get_registry().counter(
+    "safe_mode_changes_total",
+    "Safe Mode activations and deactivations",
+    labelnames=("change",),
+)
+
 
 class SolinMCP:
     """
@@ -207,7 +214,10 @@ class SolinMCP:
                     """,
                     (self.tenant_id,),
                 )
+                # Guardian daemon re-runs this tenant's checks right away
+                notify(cur, GUARDIAN_CHANNEL, str(self.tenant_id))
                 cur.connection.commit()
+            SAFE_MODE_CHANGES.inc(change="activated")
             
             # Log activation
             self.audit.log_event(
@@ -247,7 +257,10 @@ class SolinMCP:
                     """,
                     (self.tenant_id,),
                 )
+                # Guardian daemon re-runs this tenant's checks right away
+                notify(cur, GUARDIAN_CHANNEL, str(self.tenant_id))
                 cur.connection.commit()
+            SAFE_MODE_CHANGES.inc(change="deactivated")
             
             # Log deactivation
             self.audit.log_event(
@@ -1,26 +1,33 @@
 """
 OMEGA Core v3.0 - FastAPI Application Entry Point
 """
+import logging
 import time
 import uuid
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 
 from app.config import get_settings
-from app.middleware.security import SecurityMiddleware
-from app.middleware.tenant_context import TenantContextMiddleware
+from app.middleware.request_context import RequestContextMiddleware
 from app.routers import gmail, calendar, health, auth, clients, agents, metrics, unsafe_threads, stripe, sms, bookings
 from app.database import init_db_pool, close_db_pool
+from app.services.conversation_service import flush_message_buffer, stop_conversation_listener
+from app.services.sms_queue import stop_sms_queue
+from app.services.gmail_webhook import flush_fingerprints
+from app.services.lock_manager import close_lock_manager
+from app.services.stripe_event_processor import get_stripe_event_processor, stop_stripe_event_processor
+from app.services.dashboard_metrics import stop_dashboard_metrics
+from app.services.llm_usage import stop_llm_usage_recorder
+from app.services.llm_gateway import stop_llm_gateway
+from app.services.password_hasher import stop_password_hasher
+from app.services.tenant_settings import stop_tenant_settings_cache
+from app.services.rate_limiter import stop_rate_limiter
+from app.services.archivus_index import stop_archivus_index
 
 settings = get_settings()
-
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+logger = logging.getLogger(__name__)
 
 # FastAPI app
 app = FastAPI(
@@ -31,18 +38,28 @@ app = FastAPI(
     redoc_url="/redoc" if settings.debug else None,
 )
 
-# Add rate limiter
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     init_db_pool()
+    get_stripe_event_processor().start_recovery()
     yield
     # Shutdown
+    stop_dashboard_metrics()
+    stop_sms_queue()
+    stop_stripe_event_processor()
+    flush_fingerprints()
+    close_lock_manager()
+    flush_message_buffer()
+    stop_conversation_listener()
+    stop_llm_gateway()
+    stop_llm_usage_recorder()
+    stop_password_hasher()
+    stop_tenant_settings_cache()
+    stop_rate_limiter()
+    stop_archivus_index()
     close_db_pool()
 
 
@@ -62,11 +79,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Security middleware
-app.add_middleware(SecurityMiddleware)
-
-# Tenant context middleware
-app.add_middleware(TenantContextMiddleware)
+# Trace ID, tenant context and security headers (outermost)
+app.add_middleware(RequestContextMiddleware)
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -95,6 +109,7 @@ app.include_router(calendar.router)
 app.include_router(clients.router)
 app.include_router(agents.router)
 app.include_router(metrics.router)
+app.include_router(metrics.prometheus_router)
 app.include_router(unsafe_threads.router)
 app.include_router(stripe.router)
 app.include_router(sms.router)
@@ -0,0 +1,54 @@
+"""
+OMEGA Core v3.0 - Request Context Middleware
+Trace ID, tenant context and security headers in one pure-ASGI layer
+"""
+import uuid
+from typing import Any, Awaitable, Callable, Dict, MutableMapping
+from app.middleware.security import SECURITY_HEADERS, TRACE_ID_HEADER
+from app.middleware.tenant_context import set_tenant_context
+
+Scope = Dict[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# Response headers this middleware owns (replaced if the app set them)
+_OWNED_HEADERS = frozenset(name for name, _ in SECURITY_HEADERS) | {TRACE_ID_HEADER}
+
+
+class RequestContextMiddleware:
+    """
+    Request tracing, tenant context and security headers
+
+    A plain ASGI middleware: it populates request.state (scope["state"]) and
+    rewrites only the http.response.start message, so it adds no task or
+    body-stream wrapping and streaming responses pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = str(uuid.uuid4())
+        state = scope.setdefault("state", {})
+        state["trace_id"] = trace_id
+        set_tenant_context(scope, state)
+        trace_header = (TRACE_ID_HEADER, trace_id.encode("latin-1"))
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    header for header in message.get("headers", ())
+                    if header[0].lower() not in _OWNED_HEADERS
+                ]
+                headers.extend(SECURITY_HEADERS)
+                headers.append(trace_header)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,11 +1,7 @@
 """
 OMEGA Core v3.0 - Security Middleware
 """
-import uuid
 import re
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
 
 
 def redact_tokens(data: dict) -> dict:
@@ -30,22 +26,14 @@ def redact_tokens(data: dict) -> dict:
     return redacted
 
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Security middleware for request tracing and headers"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Generate trace ID
-        trace_id = str(uuid.uuid4())
-        request.state.trace_id = trace_id
-        
-        # Add security headers
-        response: Response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["X-Trace-ID"] = trace_id
-        
-        return response
+# Security headers added to every HTTP response, as raw ASGI header pairs
+SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"content-security-policy", b"default-src 'self'"),
+)
 
+# Trace ID response header
+TRACE_ID_HEADER = b"x-trace-id"
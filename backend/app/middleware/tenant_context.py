@@ -1,27 +1,50 @@
 """
-OMEGA Core v3.0 - Tenant Context Middleware
+OMEGA Core v3.0 - Tenant Context
 """
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Any, Dict, MutableMapping, Optional
+import jwt
+from app.services.auth_service import decode_access_token
 from app.config import get_settings
 
 settings = get_settings()
 
 
-class TenantContextMiddleware(BaseHTTPMiddleware):
-    """Middleware to inject tenant context from session/JWT"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # Extract tenant_id from JWT or session
-        # For now, use default tenant from config
-        # TODO: Extract from JWT token in Authorization header
-        tenant_id = settings.default_tenant_id
-        
-        # Set tenant context
-        request.state.tenant_id = tenant_id
-        request.state.user_id = None  # TODO: Extract from JWT
-        request.state.user_role = None  # TODO: Extract from JWT
-        
-        response = await call_next(request)
-        return response
+def _bearer_token(scope: Dict[str, Any]) -> Optional[str]:
+    """Bearer token from the Authorization header, if any"""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token.strip()
+            return None
+    return None
+
 
+def set_tenant_context(scope: Dict[str, Any], state: MutableMapping[str, Any]) -> None:
+    """
+    Inject tenant context from the access token into the request state
+    
+    The token is verified locally (signature, expiry, type) without a
+    database lookup. Requests without a valid access token keep the
+    default tenant and no user; endpoints that require a user still reject
+    them via get_token_user / get_current_user.
+    
+    Args:
+        scope: ASGI connection scope
+        state: Request state (request.state) to populate
+    """
+    state["tenant_id"] = settings.default_tenant_id
+    state["user_id"] = None
+    state["user_role"] = None
+    
+    token = _bearer_token(scope)
+    if not token:
+        return
+    try:
+        claims = decode_access_token(token)
+    except jwt.InvalidTokenError:
+        return
+    if claims.get("sub") and claims.get("tenant_id"):
+        state["tenant_id"] = str(claims["tenant_id"])
+        state["user_id"] = str(claims["sub"])
+        state["user_role"] = claims.get("role")
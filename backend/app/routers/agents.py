@@ -7,14 +7,12 @@ from __future__ import annotations
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Request, Query, HTTPException, status, Path
 from pydantic import BaseModel
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.config import get_settings
+from app.services.rate_limiter import rate_limit
 
 settings = get_settings()
 router = APIRouter(prefix="/api/agents", tags=["agents"])
-limiter = Limiter(key_func=get_remote_address)
 
 # Request/Response Models
 class AgentResponse(BaseModel):
@@ -28,7 +26,7 @@ class AgentListResponse(BaseModel):
     agents: List[AgentResponse]
 
 @router.get("/", response_model=AgentListResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def list_agents(
     request: Request,
 ):
@@ -70,7 +68,7 @@ async def list_agents(
 
 
 @router.get("/{agent_id}", response_model=AgentResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def get_agent(
     request: Request,
     agent_id: str = Path(..., description="Agent ID"),
@@ -98,7 +96,7 @@ async def get_agent(
 
 
 @router.post("/{agent_id}/pause", response_model=AgentResponse)
-@limiter.limit("10/minute")
+@rate_limit("10/minute")
 async def pause_agent(
     request: Request,
     agent_id: str = Path(..., description="Agent ID"),
@@ -116,7 +114,7 @@ async def pause_agent(
 
 
 @router.post("/{agent_id}/resume", response_model=AgentResponse)
-@limiter.limit("10/minute")
+@rate_limit("10/minute")
 async def resume_agent(
     request: Request,
     agent_id: str = Path(..., description="Agent ID"),
@@ -19,6 +19,7 @@ from app.services.auth_service import (
     get_current_user,
     User,
 )
+from app.services.password_hasher import PasswordHasherBusy
 from app.services.sso_service import get_sso_service
 from app.services.tenant_resolution_service import get_tenant_resolution_service
 
@@ -53,10 +54,17 @@ async def login(
     Raises:
         HTTPException: If credentials are invalid
     """
-    user = authenticate_user(
-        email=form_data.username,
-        password=form_data.password
-    )
+    try:
+        user = await authenticate_user(
+            email=form_data.username,
+            password=form_data.password
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     
     if not user:
         raise HTTPException(
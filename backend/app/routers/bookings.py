@@ -2,13 +2,13 @@
 Bookings Router
 API endpoints for managing bookings
 """
-from fastapi import APIRouter, Request, HTTPException, Query
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
 from typing import Optional, List
 from pydantic import BaseModel
 from app.database import get_cursor
 from app.services.audit_service import get_audit_service
 from app.config import get_settings
-from app.routers.auth import get_current_user
+from app.services.auth_service import TokenUser, get_token_user
 
 settings = get_settings()
 router = APIRouter(prefix="/api/bookings", tags=["bookings"])
@@ -33,14 +33,14 @@ async def list_bookings(
     request: Request,
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    payment_status: Optional[str] = Query(None, description="Filter by payment status")
+    payment_status: Optional[str] = Query(None, description="Filter by payment status"),
+    user: TokenUser = Depends(get_token_user),
 ):
     """
     List bookings for the current tenant
     """
-    # Get current user (authenticated)
-    user = await get_current_user(request)
-    tenant_id = user.get("tenant_id") or settings.default_tenant_id
+    # Tenant from the caller's access token (decoded by middleware)
+    tenant_id = user.tenant_id
     
     # Build query
     query = """
@@ -96,14 +96,14 @@ async def list_bookings(
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     request: Request,
-    booking_id: str
+    booking_id: str,
+    user: TokenUser = Depends(get_token_user),
 ):
     """
     Get a specific booking by ID
     """
-    # Get current user
-    user = await get_current_user(request)
-    tenant_id = user.get("tenant_id") or settings.default_tenant_id
+    # Tenant from the caller's access token (decoded by middleware)
+    tenant_id = user.tenant_id
     
     # Query booking
     with get_cursor(tenant_id=tenant_id) as cursor:
@@ -6,15 +6,13 @@ from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, Request, Query, HTTPException, status, Path
 from pydantic import BaseModel
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.config import get_settings
 from app.services.calendar_service_v3 import CalendarServiceV3
+from app.services.rate_limiter import rate_limit
 
 settings = get_settings()
 router = APIRouter(prefix="/api/calendar", tags=["calendar"])
-limiter = Limiter(key_func=get_remote_address)
 
 # Request/Response Models
 class CreateEventRequest(BaseModel):
@@ -68,7 +66,7 @@ def to_iso_string(dt: Optional[datetime]) -> str:
     return dt.isoformat()
 
 @router.get("/events", response_model=CalendarEventListResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def list_events(
     request: Request,
     start_date: Optional[str] = Query(None),
@@ -131,7 +129,7 @@ async def list_events(
 
 
 @router.post("/events")
-@limiter.limit("50/minute")
+@rate_limit("50/minute")
 async def create_event(
     request: Request,
     event_request: CreateEventRequest,
@@ -192,7 +190,7 @@ async def create_event(
 
 
 @router.post("/block")
-@limiter.limit("50/minute")
+@rate_limit("50/minute")
 async def auto_block(
     request: Request,
     block_request: AutoBlockRequest,
@@ -256,7 +254,7 @@ async def auto_block(
 
 
 @router.get("/availability", response_model=AvailabilityResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def check_availability(
     request: Request,
     start_time: str = Query(..., description="ISO format datetime"),
@@ -304,7 +302,7 @@ async def check_availability(
 
 
 @router.delete("/event/{event_id}")
-@limiter.limit("50/minute")
+@rate_limit("50/minute")
 async def delete_event(
     request: Request,
     event_id: str = Path(..., description="Event ID (UUID)"),
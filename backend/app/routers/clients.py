@@ -6,8 +6,6 @@ Client management endpoints with encryption and hashing
 from typing import List, Optional
 from fastapi import APIRouter, Request, Query, HTTPException, status, Path
 from pydantic import BaseModel
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.config import get_settings
 from app.services.supabase_service import (
@@ -18,10 +16,10 @@ from app.services.supabase_service import (
     update_client as update_client_service,
     delete_client as delete_client_service,
 )
+from app.services.rate_limiter import rate_limit
 
 settings = get_settings()
 router = APIRouter(prefix="/api/clients", tags=["clients"])
-limiter = Limiter(key_func=get_remote_address)
 
 # Request/Response Models
 class CreateClientRequest(BaseModel):
@@ -49,7 +47,7 @@ class ClientListResponse(BaseModel):
     offset: int
 
 @router.post("/", response_model=ClientResponse)
-@limiter.limit("50/minute")
+@rate_limit("50/minute")
 async def create_client(
     request: Request,
     client_request: CreateClientRequest,
@@ -99,7 +97,7 @@ async def create_client(
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def get_client(
     request: Request,
     client_id: str = Path(..., description="Client ID (UUID)"),
@@ -135,7 +133,7 @@ async def get_client(
 
 
 @router.get("/", response_model=ClientListResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def list_clients_endpoint(
     request: Request,
     limit: int = Query(50, ge=1, le=1000),
@@ -178,7 +176,7 @@ async def list_clients_endpoint(
 
 
 @router.get("/search/by-email/", response_model=ClientResponse)
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def search_by_email(
     request: Request,
     email: str = Query(..., description="Email address to search"),
@@ -214,7 +212,7 @@ async def search_by_email(
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
-@limiter.limit("50/minute")
+@rate_limit("50/minute")
 async def update_client_endpoint(
     request: Request,
     client_id: str = Path(..., description="Client ID (UUID)"),
@@ -262,7 +260,7 @@ async def update_client_endpoint(
 
 
 @router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-@limiter.limit("50/minute")
+@rate_limit("50/minute")
 async def delete_client_endpoint(
     request: Request,
     client_id: str = Path(..., description="Client ID (UUID)"),
@@ -1,12 +1,12 @@
 """
 OMEGA Core v3.0 - Gmail Router
-Gmail webhook and watch subscription endpoints
+Gmail webhook, watch subscription and streaming draft endpoints
 """
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, Request, HTTPException, status, Header
+import json
+from typing import Dict, Any, Iterator, Optional
+from fastapi import APIRouter, Request, HTTPException, status, Header, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.config import get_settings
 from app.services.gmail_webhook import (
@@ -16,10 +16,12 @@ from app.services.gmail_webhook import (
 from app.services.gmail_service import setup_watch as gmail_setup_watch
 from app.services.email_processor_v3 import EmailProcessorV3
 from app.database import get_db
+from app.services.rate_limiter import rate_limit
+from app.services.auth_service import TokenUser, get_token_user
+from app.services.tenant_settings import TenantSettings, get_request_tenant_settings
 
 settings = get_settings()
 router = APIRouter(prefix="/api/gmail", tags=["gmail"])
-limiter = Limiter(key_func=get_remote_address)
 
 class WatchRequest(BaseModel):
     account_email: str
@@ -31,7 +33,7 @@ class WatchResponse(BaseModel):
     history_id: Optional[str] = None
 
 @router.post("/webhook")
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def gmail_webhook(
     request: Request,
     body: Dict[str, Any],
@@ -98,7 +100,7 @@ async def gmail_webhook(
 
 
 @router.post("/watch", response_model=WatchResponse)
-@limiter.limit("10/minute")
+@rate_limit("10/minute")
 async def setup_watch(
     request: Request,
     watch_request: WatchRequest,
@@ -132,3 +134,51 @@ async def setup_watch(
             detail=f"Failed to setup watch: {str(e)}"
         )
 
+
+def _sse(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Format events as server-sent events (event name = event type)"""
+    for event in events:
+        yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/emails/{email_id}/draft/stream")
+@rate_limit("10/minute")
+async def stream_draft(
+    request: Request,
+    email_id: str,
+    account_email: str = Query(..., description="Gmail account to save the draft in"),
+    user: TokenUser = Depends(get_token_user),
+    tenant_settings: TenantSettings = Depends(get_request_tenant_settings),
+):
+    """
+    Generate a reply draft and stream it as server-sent events
+    
+    Needs the tenant's "draft_streaming" feature flag (on unless disabled)
+    and is refused in Safe Mode before the stream opens.
+    
+    Events:
+    - delta: {"text": ...} sanitized text as Claude writes it
+    - done: {"text": ..., "violations": [...]} final sanitized reply
+    - draft: {"draft_id": ...} Gmail draft saved with the final text
+    - error: {"error": ...}
+    """
+    if not tenant_settings.is_enabled("draft_streaming", default=True):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Draft streaming is not enabled for this tenant"
+        )
+    if tenant_settings.safe_mode:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Draft generation blocked (Safe Mode)"
+        )
+    
+    trace_id = getattr(request.state, "trace_id", None)
+    processor = EmailProcessorV3(user.tenant_id)
+    
+    # Sync generator: Starlette iterates it on the threadpool
+    return StreamingResponse(
+        _sse(processor.stream_draft(email_id, account_email, trace_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
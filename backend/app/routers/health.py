@@ -53,3 +53,49 @@ async def encryption_health():
         "message": "Encryption service operational" if encryption_ok else "Encryption key missing"
     }
 
+
+
+@router.get("/google-credentials")
+async def google_credentials_health():
+    """Google delegated token refresh stats"""
+    from app.services.google_credentials import get_credential_manager
+    stats = get_credential_manager().get_stats()
+    return {
+        "status": "ok" if all(c["valid"] for c in stats["credentials"]) else "degraded",
+        **stats,
+    }
+
+
+@router.get("/sms-queue")
+async def sms_queue_health():
+    """Outbound SMS queue depth and send counters"""
+    from app.services.sms_queue import get_sms_queue
+    return {"status": "ok", **get_sms_queue().get_stats()}
+
+
+@router.get("/stripe-events")
+async def stripe_events_health():
+    """Stripe webhook event processor counters"""
+    from app.services.stripe_event_processor import get_stripe_event_processor
+    return {"status": "ok", **get_stripe_event_processor().get_stats()}
+
+
+@router.get("/webhook-fingerprints")
+async def webhook_fingerprints_health():
+    """Replay fingerprint filter counters"""
+    from app.services.gmail_webhook import get_fingerprint_store
+    return {"status": "ok", **get_fingerprint_store().get_stats()}
+
+
+@router.get("/google-jwt")
+async def google_jwt_health():
+    """Pub/Sub JWT verifier key cache and verification counters"""
+    from app.services.google_jwt import get_google_jwt_verifier
+    return {"status": "ok", **get_google_jwt_verifier().get_stats()}
+
+
+@router.get("/locks")
+async def advisory_locks_health():
+    """Advisory lock wait and contention metrics"""
+    from app.services.lock_manager import get_lock_manager
+    return {"status": "ok", **get_lock_manager().get_stats()}
@@ -4,19 +4,26 @@ Admin-only API for system metrics and dashboard data
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+import asyncio
+import hmac
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from pydantic import BaseModel
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_async_session
+from app.services.dashboard_metrics import get_dashboard_metrics
+from app.services.llm_usage import get_usage_report
 from app.services.auth_service import get_current_admin_user, User
+from app.utils.metrics import get_registry
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter(prefix="/api/metrics", tags=["metrics"])
 
+# Prometheus scrape endpoint, served at the conventional /metrics path
+prometheus_router = APIRouter(tags=["metrics"])
+
 class MetricsResponse(BaseModel):
     generated_at: str
     emails_processed_24h: int
@@ -24,82 +31,73 @@ class MetricsResponse(BaseModel):
     unsafe_threads: int
     repair_failures_24h: int
     vee_drafts_by_status: Dict[str, int] | None = None
+    email_pipeline_p95_seconds: float | None = None
 
 @router.get("/", response_model=MetricsResponse)
 async def get_metrics(
-    db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_admin_user),
 ):
     """
     System metrics for dashboard.
-    Aggregated across tenants for now.
+    Aggregated across tenants for now; served from a snapshot refreshed
+    every METRICS_DASHBOARD_REFRESH_SECONDS.
     """
-    now = datetime.now(timezone.utc)
-    d24 = now - timedelta(hours=24)
-    
-    async def scalar(q: str, params: dict[str, Any] | None = None) -> int:
-        res = await db.execute(text(q), params or {})
-        return int(res.scalar() or 0)
-    
-    emails_24h = await scalar(
-        """
-        SELECT COUNT(*)::int
-        FROM audit_log
-        WHERE action = 'email.processed'
-          AND created_at >= :since
-        """,
-        {"since": d24},
-    )
-    
-    retry_pending = await scalar(
-        """
-        SELECT COUNT(*)::int
-        FROM email_retry_queue
-        WHERE status = 'pending'
-        """
-    )
-    
-    unsafe_count = await scalar(
-        """
-        SELECT COUNT(*)::int
-        FROM unsafe_threads
-        """
-    )
-    
-    repairs_24h = await scalar(
-        """
-        SELECT COUNT(*)::int
-        FROM repair_log
-        WHERE success = FALSE
-          AND created_at >= :since
-        """,
-        {"since": d24},
-    )
+    snapshot = await asyncio.to_thread(get_dashboard_metrics().get_snapshot)
     
-    # Optional: Vee drafts by status
-    vee_drafts = None
-    try:
-        vee_q = text(
-            """
-            SELECT status, COUNT(*)::int AS c
-            FROM vee_drafts
-            GROUP BY status
-            """
-        )
-        vee_res = await db.execute(vee_q)
-        vee_rows = vee_res.fetchall()
-        if vee_rows:
-            vee_drafts = {row[0]: int(row[1]) for row in vee_rows}
-    except Exception:
-        # Table might not exist yet
-        pass
+    pipeline = get_registry().get("email_pipeline_seconds")
+    p95 = pipeline.quantile(0.95, status="success") if pipeline is not None else None
+    if p95 == float("inf"):
+        p95 = None  # Beyond the largest bucket; not JSON-serializable
     
     return MetricsResponse(
-        generated_at=now.isoformat(),
-        emails_processed_24h=emails_24h,
-        retry_queue_pending=retry_pending,
-        unsafe_threads=unsafe_count,
-        repair_failures_24h=repairs_24h,
-        vee_drafts_by_status=vee_drafts,
+        generated_at=snapshot["generated_at"],
+        emails_processed_24h=snapshot["emails_processed_24h"],
+        retry_queue_pending=snapshot["retry_queue_pending"],
+        unsafe_threads=snapshot["unsafe_threads"],
+        repair_failures_24h=snapshot["repair_failures_24h"],
+        vee_drafts_by_status=snapshot["vee_drafts_by_status"],
+        email_pipeline_p95_seconds=p95,
     )
 
+
+class LLMUsageRow(BaseModel):
+    tenant_id: str
+    model: str
+    operation: str
+    calls: int
+    failures: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_write_tokens: int
+    cost_usd: float | None = None
+    cache_hit_ratio: float | None = None
+    avg_latency_ms: float | None = None
+    p95_latency_ms: float | None = None
+    output_tokens_per_second: float | None = None
+
+@router.get("/llm-usage", response_model=List[LLMUsageRow])
+async def get_llm_usage(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    tenant_id: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user),
+):
+    """
+    LLM cost, prompt-cache effectiveness and latency per tenant, model and operation.
+    """
+    return await asyncio.to_thread(get_usage_report, hours, tenant_id)
+
+
+@prometheus_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authorization: Optional[str] = Header(None)):
+    """
+    In-process metrics in Prometheus text format.
+    Requires "Authorization: Bearer <METRICS_BEARER_TOKEN>" when that token is set.
+    """
+    token = settings.metrics_bearer_token
+    if token and not hmac.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(
+        content=get_registry().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -2,18 +2,17 @@
 SMS Router for Twilio Webhooks
 Handles incoming SMS messages and booking flow
 """
-from fastapi import APIRouter, Request, Form, HTTPException
+from fastapi import APIRouter, Request, Form, HTTPException, Response, status
 from typing import Optional, Dict, Any
 from datetime import datetime, date, time, timezone
 from twilio.request_validator import RequestValidator
 from twilio.twiml.messaging_response import MessagingResponse
 
-from app.services.sms_service import get_sms_service
+from app.services.sms_queue import enqueue_sms
 from app.services.conversation_service import ConversationService
 from app.services.booking_service import BookingService
 from app.config.twilio_config import get_twilio_settings
 from app.services.audit_service import get_audit_service
-from app.middleware.tenant_context import TenantContextMiddleware
 from app.config import get_settings
 
 settings = get_settings()
@@ -67,7 +66,6 @@ async def receive_sms(
     # Process message through booking flow
     conversation_service = ConversationService(tenant_id)
     booking_service = BookingService(tenant_id)
-    sms_service = get_sms_service(tenant_id)
     
     # Get or create conversation
     conversation = conversation_service.get_or_create_conversation(From)
@@ -78,7 +76,8 @@ async def receive_sms(
         phone_number=From,
         body=Body,
         direction="inbound",
-        message_sid=MessageSid
+        message_sid=MessageSid,
+        delivery_status="received"
     )
     
     # Process message based on conversation state
@@ -90,36 +89,19 @@ async def receive_sms(
         phone_number=From
     )
     
-    # Send response
-    try:
-        result = sms_service.send_sms(
-            to=From,
-            message=response_message,
-            tenant_id=tenant_id
-        )
-        
-        # Save outgoing message
-        conversation_service.save_message(
-            conversation_id=str(conversation["id"]),
-            phone_number=From,
-            body=response_message,
-            direction="outbound",
-            message_sid=result.get("message_sid")
-        )
-    except Exception as e:
-        # Log error but don't fail webhook
-        audit.log_event(
-            action="sms_response_failed",
-            resource_type="sms",
-            metadata={"error": str(e)},
-            trace_id=None
-        )
-        response_message = "Sorry, there was an error processing your message. Please try again later."
+    # Reply via TwiML: Twilio sends it, so the webhook never waits on the REST API
+    conversation_service.save_message(
+        conversation_id=str(conversation["id"]),
+        phone_number=From,
+        body=response_message,
+        direction="outbound",
+        delivery_status="twiml"
+    )
     
     # Return TwiML response (Twilio expects XML)
     response = MessagingResponse()
     response.message(response_message)
-    return str(response)
+    return Response(content=str(response), media_type="application/xml")
 
 
 def _process_booking_message(
@@ -243,25 +225,52 @@ def _process_booking_message(
         return "Thanks for your message! We'll get back to you soon."
 
 
-@router.post("/send")
+@router.post("/send", status_code=status.HTTP_202_ACCEPTED)
 async def send_sms_endpoint(
     request: Request,
     to: str = Form(...),
     message: str = Form(...)
 ):
     """
-    Send SMS message (admin endpoint)
+    Queue SMS message for sending (admin endpoint)
+    
+    Delivery progress is tracked on the returned sms_messages row.
     """
     tenant_id = getattr(request.state, "tenant_id", settings.default_tenant_id)
-    sms_service = get_sms_service(tenant_id)
     
     try:
-        result = sms_service.send_sms(
-            to=to,
-            message=message,
-            tenant_id=tenant_id
-        )
-        return {"status": "success", "data": result}
+        message_id = enqueue_sms(to=to, body=message, tenant_id=tenant_id)
+        return {"status": "queued", "data": {"message_id": message_id, "to": to}}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"SMS send failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"SMS enqueue failed: {str(e)}")
+
+
+@router.post("/status")
+async def sms_status_callback(request: Request):
+    """
+    Twilio delivery status callback
+    
+    Twilio sends POST with form data including MessageSid, MessageStatus
+    and (on failure) ErrorCode.
+    """
+    twilio_settings = get_twilio_settings()
+    validator = RequestValidator(twilio_settings.twilio_auth_token)
+    form_data = await request.form()
+    
+    signature = request.headers.get("X-Twilio-Signature", "")
+    if not validator.validate(str(request.url), dict(form_data), signature):
+        raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+    
+    message_sid = form_data.get("MessageSid")
+    message_status = form_data.get("MessageStatus")
+    if not message_sid or not message_status:
+        raise HTTPException(status_code=400, detail="Missing MessageSid or MessageStatus")
+    
+    tenant_id = getattr(request.state, "tenant_id", settings.default_tenant_id)
+    ConversationService(tenant_id).update_delivery_status(
+        message_sid=message_sid,
+        delivery_status=message_status,
+        error_code=form_data.get("ErrorCode")
+    )
+    return Response(status_code=204)
 
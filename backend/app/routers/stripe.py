@@ -4,21 +4,18 @@ Handles webhook callbacks and payment status checks
 """
 from fastapi import APIRouter, Request, Header, HTTPException, Depends
 from typing import Optional
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.services.stripe_service import get_stripe_service
-from app.middleware.tenant_context import TenantContextMiddleware
-from app.services.audit_service import get_audit_service
+from app.services.stripe_event_processor import get_stripe_event_processor
 from app.database import get_cursor
+from app.services.rate_limiter import rate_limit
 
 
 router = APIRouter(prefix="/api/stripe", tags=["stripe"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.post("/webhook")
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def stripe_webhook(
     request: Request,
     stripe_signature: Optional[str] = Header(None, alias="Stripe-Signature")
@@ -27,7 +24,8 @@ async def stripe_webhook(
     Stripe webhook endpoint
     Security: Verifies webhook signature
     
-    Handles:
+    Events are stored (deduplicated by event id) and applied by the
+    background event processor. Handles:
     - payment_intent.succeeded
     - payment_intent.payment_failed
     - charge.refunded
@@ -48,40 +46,17 @@ async def stripe_webhook(
     if not tenant_id:
         raise HTTPException(status_code=400, detail="Missing tenant_id in metadata")
     
-    # Process event
-    if event["type"] == "payment_intent.succeeded":
-        result = stripe_service.process_payment_success(event, tenant_id)
-        return {"status": "success", "data": result}
+    # Store event; Stripe redeliveries stop here without further work
+    if not stripe_service.store_event(event, tenant_id):
+        return {"status": "duplicate", "event_id": event["id"]}
     
-    elif event["type"] == "payment_intent.payment_failed":
-        # TODO: Handle failed payments
-        audit = get_audit_service(tenant_id)
-        audit.log_event(
-            action="payment_failed",
-            resource_type="payment",
-            metadata={"event_id": event["id"]},
-            trace_id=None
-        )
-        return {"status": "acknowledged", "event": "payment_failed"}
-    
-    elif event["type"] == "charge.refunded":
-        # TODO: Handle refunds
-        audit = get_audit_service(tenant_id)
-        audit.log_event(
-            action="charge_refunded",
-            resource_type="payment",
-            metadata={"event_id": event["id"]},
-            trace_id=None
-        )
-        return {"status": "acknowledged", "event": "charge_refunded"}
-    
-    else:
-        # Unknown event type
-        return {"status": "ignored", "event_type": event["type"]}
+    # Apply asynchronously (in order per booking) and acknowledge immediately
+    get_stripe_event_processor().submit(event, tenant_id)
+    return {"status": "queued", "event_id": event["id"]}
 
 
 @router.get("/payment-status/{booking_id}")
-@limiter.limit("100/minute")
+@rate_limit("100/minute")
 async def get_payment_status(
     request: Request,
     booking_id: str,
@@ -0,0 +1,353 @@
+"""
+OMEGA Core v3.0 - Archivus Recall Index
+Per-tenant local vector index over Archivus thread summaries and profile
+memories, so related past threads ("same venue, different spelling") can be
+found without an exact key
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.database import get_cursor
+from app.utils.metrics import get_registry
+from app.utils.vector_index import Entry, VectorIndex
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SEARCH_SECONDS = get_registry().histogram(
+    "archivus_recall_seconds",
+    "Archivus recall index search time",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.05, 0.25),
+)
+
+# Rows are synced by updated_at; re-reading a short overlap catches rows from
+# transactions that committed after a later updated_at was already synced
+SYNC_OVERLAP_SECONDS = 60
+SYNC_PAGE_SIZE = 500
+# Bound on rows embedded per sync (a cold index catches up over several syncs)
+SYNC_MAX_ROWS = 5000
+# Tenants not searched for this long are dropped from the background sync
+SYNC_IDLE_SECONDS = 3600
+
+# Memory types worth recalling (system notes are operational, not client context)
+RECALL_MEMORY_TYPES = ("client_profile", "venue_profile", "thread_summary")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_THREADS_PAGE = """
+    SELECT gmail_thread_id AS cursor_id, gmail_thread_id, summary, key_points, updated_at
+    FROM archivus_threads
+    WHERE tenant_id = %s AND (updated_at, gmail_thread_id) > (%s::timestamptz, %s)
+    ORDER BY updated_at, gmail_thread_id
+    LIMIT %s
+"""
+
+_MEMORIES_PAGE = """
+    SELECT id::text AS cursor_id, id::text AS memory_id, memory_type, key, value, updated_at
+    FROM archivus_memories
+    WHERE tenant_id = %s AND memory_type = ANY(%s)
+      AND (updated_at, id::text) > (%s::timestamptz, %s)
+    ORDER BY updated_at, id::text
+    LIMIT %s
+"""
+
+
+def _flatten(value: Any) -> str:
+    """Text content of a JSONB value"""
+    if isinstance(value, dict):
+        return " ".join(_flatten(item) for item in value.values())
+    if isinstance(value, list):
+        return " ".join(_flatten(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def thread_entry(thread_id: str, summary: Optional[str], key_points: Optional[Dict[str, Any]]) -> Optional[Entry]:
+    """Index entry for a thread summary (None if there is nothing to index)"""
+    if not summary:
+        return None
+    key_points = key_points or {}
+    details = " ".join(str(key_points[name]) for name in ("venue_name", "event_type", "event_date") if key_points.get(name))
+    return (
+        f"thread:{thread_id}",
+        "thread",
+        f"{details} {summary}".strip(),
+        {"thread_id": thread_id, "summary": summary, "key_points": key_points},
+    )
+
+
+def memory_entry(memory_id: str, memory_type: str, key: str, value: Any) -> Entry:
+    """Index entry for a profile memory"""
+    return (
+        f"memory:{memory_id}",
+        "memory",
+        f"{key} {_flatten(value)}",
+        {"memory_type": memory_type, "key": key, "value": value},
+    )
+
+
+class ArchivusIndex:
+    """
+    Archivus recall index
+
+    Each tenant has a VectorIndex under base_dir/<tenant_id>, shared by the
+    processes on the host. Summaries recorded in this process are indexed
+    immediately; everything else (the summary worker, other hosts, profile
+    memories) is pulled in incrementally by updated_at watermark by a
+    background thread, every sync_seconds for each tenant searched within
+    SYNC_IDLE_SECONDS. search() never touches Postgres: it serves what the
+    index has and wakes the sync thread when the tenant is due. Watermarks
+    live in the index directory, so a restart only catches up on what changed.
+    """
+
+    def __init__(self, base_dir: str, dim: int = 512, sync_seconds: float = 30.0):
+        self.base_dir = base_dir
+        self.dim = dim
+        self.sync_seconds = sync_seconds
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._last_search: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sync_thread: Optional[threading.Thread] = None
+        self._sync_wake = threading.Event()
+        self._sync_stop = threading.Event()
+        self._stats = {"searches": 0, "syncs": 0, "synced_items": 0, "indexed_items": 0, "sync_errors": 0}
+
+    def _index(self, tenant_id: str) -> VectorIndex:
+        """Open (once) the tenant's index"""
+        tenant_id = str(tenant_id)
+        index = self._indexes.get(tenant_id)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(tenant_id)
+                if index is None:
+                    directory = os.path.join(self.base_dir, re.sub(r"[^A-Za-z0-9-]", "_", tenant_id))
+                    index = VectorIndex(directory, dim=self.dim)
+                    self._indexes[tenant_id] = index
+        return index
+
+    def add_thread(self, tenant_id: str, thread_id: str, summary: Optional[str], key_points: Optional[Dict[str, Any]]) -> bool:
+        """
+        Index a thread summary as soon as it is written
+
+        Returns:
+            True if the index changed
+        """
+        entry = thread_entry(thread_id, summary, key_points)
+        if entry is None:
+            return False
+        written = self._index(tenant_id).add_many([entry])
+        self._stats["indexed_items"] += written
+        return bool(written)
+
+    def search(
+        self,
+        tenant_id: str,
+        query: str,
+        k: int = 5,
+        kind: Optional[str] = None,
+        exclude_ids: Sequence[str] = (),
+        min_score: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Most similar thread summaries / memories for a tenant
+
+        Args:
+            tenant_id: Tenant UUID
+            query: Free text (venue, subject, email excerpt, ...)
+            k: Maximum results
+            kind: "thread" or "memory" (default: both)
+            exclude_ids: Item ids to leave out (e.g. "thread:<gmail_thread_id>")
+            min_score: Minimum cosine similarity
+
+        Returns:
+            Item metadata dicts with a "score", best first
+        """
+        self._request_sync(tenant_id)
+        started = time.perf_counter()
+        results = self._index(tenant_id).search(query, k=k, kind=kind, exclude_ids=exclude_ids, min_score=min_score)
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        self._stats["searches"] += 1
+        return [
+            {"score": round(score, 4), **{key: value for key, value in item.items() if key not in ("row", "text_hash")}}
+            for score, item in results
+        ]
+
+    def related_threads(
+        self,
+        tenant_id: str,
+        query: str,
+        limit: int = 3,
+        exclude_thread_id: Optional[str] = None,
+        min_score: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Thread summaries most similar to query (excluding the current thread)"""
+        exclude = (f"thread:{exclude_thread_id}",) if exclude_thread_id else ()
+        return self.search(tenant_id, query, k=limit, kind="thread", exclude_ids=exclude, min_score=min_score)
+
+    # ------------------------------------------------------------------
+    # Incremental sync from Postgres
+    # ------------------------------------------------------------------
+
+    def _request_sync(self, tenant_id: str) -> None:
+        """Keep the tenant in the background sync and wake it if the tenant is due"""
+        tenant_id = str(tenant_id)
+        now = time.monotonic()
+        self._last_search[tenant_id] = now
+        self._ensure_sync_started()
+        if now - self._last_sync.get(tenant_id, float("-inf")) >= self.sync_seconds:
+            self._sync_wake.set()
+
+    def _ensure_sync_started(self) -> None:
+        """Start the background sync thread on first search"""
+        if self._sync_thread is not None:
+            return
+        with self._lock:
+            if self._sync_thread is not None or self._sync_stop.is_set():
+                return
+            self._sync_thread = threading.Thread(target=self._run_sync, name="archivus-index-sync", daemon=True)
+            self._sync_thread.start()
+
+    def _run_sync(self) -> None:
+        """Sync loop: every sync_seconds (or when woken), sync recently searched tenants"""
+        while not self._sync_stop.is_set():
+            self._sync_wake.wait(self.sync_seconds)
+            self._sync_wake.clear()
+            if self._sync_stop.is_set():
+                break
+            now = time.monotonic()
+            for tenant_id, searched_at in list(self._last_search.items()):
+                if now - searched_at > SYNC_IDLE_SECONDS:
+                    self._last_search.pop(tenant_id, None)
+                    continue
+                self.sync(tenant_id)
+
+    def sync(self, tenant_id: str, force: bool = False) -> int:
+        """
+        Pull thread summaries and memories changed since the last sync
+
+        Skipped when the tenant synced within sync_seconds or another thread
+        or process on the host is already syncing it. Fail-open: errors are
+        logged and the index keeps serving what it has.
+
+        Returns:
+            Number of items (re)indexed
+        """
+        tenant_id = str(tenant_id)
+        now = time.monotonic()
+        if not force and now - self._last_sync.get(tenant_id, float("-inf")) < self.sync_seconds:
+            return 0
+        self._last_sync[tenant_id] = now
+
+        index = self._index(tenant_id)
+        try:
+            with index.locked(blocking=False) as acquired:
+                if not acquired:
+                    return 0
+                state = index.read_state()
+                written = 0
+                budget = SYNC_MAX_ROWS
+                for name, query, params, to_entry in (
+                    ("threads", _THREADS_PAGE, (), lambda row: thread_entry(row["gmail_thread_id"], row["summary"], row["key_points"])),
+                    ("memories", _MEMORIES_PAGE, (list(RECALL_MEMORY_TYPES),), lambda row: memory_entry(row["memory_id"], row["memory_type"], row["key"], row["value"])),
+                ):
+                    rows, state[name] = self._fetch_changes(tenant_id, query, params, state.get(name), budget)
+                    budget -= len(rows)
+                    written += index.add_many(entry for entry in map(to_entry, rows) if entry is not None)
+                index.write_state(state)
+        except Exception as e:
+            self._stats["sync_errors"] += 1
+            logger.warning(f"Archivus index sync failed for tenant {tenant_id}: {e}")
+            return 0
+
+        self._stats["syncs"] += 1
+        self._stats["synced_items"] += written
+        return written
+
+    def _fetch_changes(
+        self,
+        tenant_id: str,
+        query: str,
+        params: Tuple,
+        watermark: Optional[str],
+        budget: int,
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Page through rows updated since watermark (keyset on updated_at, id)
+
+        Returns:
+            Tuple of (rows, new watermark)
+        """
+        rows: List[Dict[str, Any]] = []
+        latest = datetime.fromisoformat(watermark) if watermark else EPOCH
+        since = latest - timedelta(seconds=SYNC_OVERLAP_SECONDS) if watermark else EPOCH
+        cursor: Tuple[datetime, str] = (since, "")
+        with get_cursor(tenant_id=tenant_id) as cur:
+            while len(rows) < budget:
+                cur.execute(query, (tenant_id, *params, *cursor, min(SYNC_PAGE_SIZE, budget - len(rows))))
+                page = [dict(row) for row in cur.fetchall()]
+                rows.extend(page)
+                if page:
+                    cursor = (page[-1]["updated_at"], page[-1]["cursor_id"])
+                    latest = max(latest, cursor[0])
+                if len(page) < SYNC_PAGE_SIZE:
+                    break
+        return rows, latest.isoformat()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics
+
+        Returns:
+            Dict with counters, open tenant indexes and total items
+        """
+        indexes = list(self._indexes.values())
+        return {
+            **self._stats,
+            "tenants": len(indexes),
+            "sync_running": self._sync_thread is not None,
+            "items": sum(len(index) for index in indexes),
+            "dim": self.dim,
+        }
+
+    def close(self, timeout_seconds: float = 10.0) -> None:
+        """Stop the background sync, then flush and close every open index"""
+        self._sync_stop.set()
+        self._sync_wake.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout=timeout_seconds)
+            self._sync_thread = None
+        with self._lock:
+            indexes, self._indexes = list(self._indexes.values()), {}
+        for index in indexes:
+            index.close()
+
+
+_archivus_index: Optional[ArchivusIndex] = None
+_archivus_index_lock = threading.Lock()
+
+
+def get_archivus_index() -> ArchivusIndex:
+    """Get process-wide Archivus recall index"""
+    global _archivus_index
+    if _archivus_index is None:
+        with _archivus_index_lock:
+            if _archivus_index is None:
+                _archivus_index = ArchivusIndex(
+                    base_dir=settings.archivus_index_dir or os.path.join(tempfile.gettempdir(), "maya-archivus-index"),
+                    dim=settings.archivus_index_dim,
+                    sync_seconds=settings.archivus_index_sync_seconds,
+                )
+                get_registry().register_stats("archivus_index", _archivus_index.get_stats, "Archivus recall index")
+    return _archivus_index
+
+
+def stop_archivus_index() -> None:
+    """Flush and close tenant indexes if the index was created (called on shutdown)"""
+    if _archivus_index is not None:
+        _archivus_index.close()
@@ -3,15 +3,85 @@ OMEGA Core v3.0 - Archivus Service
 Long-term memory engine for thread summaries, client/venue profiles, and system notes
 """
 from __future__ import annotations
+import hashlib
+import logging
 import uuid
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timezone
-from app.database import get_cursor
+from psycopg2.extras import Json
+from app.database import get_cursor, notify, ARCHIVUS_SUMMARY_CHANNEL
+from app.services.archivus_index import get_archivus_index
 from app.services.audit_service import get_audit_service
 from app.services.claude_service import ClaudeService
+from app.utils.metrics import get_registry
+from app.utils.ttl_cache import TTLCache
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Only the start of a thread is summarized (and hashed)
+SUMMARY_BODY_CHARS = 2000
+SUMMARY_MAX_CHARS = 500
+
+KEY_POINT_FIELDS = ("client_id", "venue_name", "event_date", "event_type")
+
+# Profile type -> key_points field it is keyed on
+PROFILE_KEY_FIELDS = {"client": "client_id", "venue": "venue_name"}
+
+# Read-through cache of archivus_profiles rows keyed on (tenant_id, profile_type,
+# profile_key). Writes from this process invalidate it; writes from other
+# processes (the summary worker) show up within the TTL.
+_profile_cache = TTLCache(
+    max_entries=settings.archivus_profile_cache_max_entries,
+    ttl_seconds=settings.archivus_profile_cache_ttl_seconds,
+)
+get_registry().register_stats("archivus_profiles", _profile_cache.stats, "Archivus profile cache")
+
+
+def thread_content_hash(raw_email_body: str) -> str:
+    """
+    Hash of the thread text a summary is generated from
+
+    Args:
+        raw_email_body: Raw email body text
+
+    Returns:
+        Hex SHA-256 of the summarized prefix
+    """
+    return hashlib.sha256(raw_email_body[:SUMMARY_BODY_CHARS].encode("utf-8", "replace")).hexdigest()
+
+
+def build_summary_prompt(raw_email_body: str) -> str:
+    """Prompt asking for a 2-3 sentence thread summary"""
+    return f"""Summarize this email thread in 2-3 sentences. Focus on:
+- Main topic or request
+- Key details (dates, locations, people)
+- Any action items or decisions
+
+Email content:
+{raw_email_body[:SUMMARY_BODY_CHARS]}"""
+
+
+def trim_summary(summary: Optional[str]) -> Optional[str]:
+    """Limit summary length"""
+    if summary and len(summary) > SUMMARY_MAX_CHARS:
+        return summary[:SUMMARY_MAX_CHARS] + "..."
+    return summary
+
+
+def extract_key_points(structured_context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Key points stored with a summary (the fields profiles are looked up by)"""
+    if not structured_context:
+        return {}
+    return {name: structured_context[name] for name in KEY_POINT_FIELDS if structured_context.get(name)}
+
+
+def invalidate_profiles(tenant_id: str, key_points: Optional[Dict[str, Any]]) -> None:
+    """Drop cached profiles a thread's key points belong to"""
+    for profile_type, field in PROFILE_KEY_FIELDS.items():
+        if key_points and key_points.get(field):
+            _profile_cache.pop((tenant_id, profile_type, str(key_points[field])))
 
 
 class ArchivusService:
@@ -23,7 +93,7 @@ class ArchivusService:
     def __init__(self, tenant_id: str):
         self.tenant_id = tenant_id
         self.audit = get_audit_service(tenant_id)
-        self.claude = ClaudeService()
+        self.claude = ClaudeService(tenant_id)
     
     def record_thread_summary(
         self,
@@ -43,36 +113,9 @@ class ArchivusService:
             Thread summary ID or None if failed
         """
         try:
-            # Generate summary using Claude
-            summary_prompt = f"""Summarize this email thread in 2-3 sentences. Focus on:
-- Main topic or request
-- Key details (dates, locations, people)
-- Any action items or decisions
-
-Email content:
-{raw_email_body[:2000]}"""
-            
-            # Use Claude service with proper method signature
-            summary = self.claude.generate_response(
-                email_body=raw_email_body[:2000],
-                context={"summary_request": True, "prompt": summary_prompt},
-                trace_id=None,
-            )
-            # Limit summary length if needed
-            if summary and len(summary) > 500:
-                summary = summary[:500] + "..."
-            
-            # Extract key points from structured context
-            key_points = {}
-            if structured_context:
-                if structured_context.get("client_id"):
-                    key_points["client_id"] = structured_context["client_id"]
-                if structured_context.get("venue_name"):
-                    key_points["venue_name"] = structured_context["venue_name"]
-                if structured_context.get("event_date"):
-                    key_points["event_date"] = structured_context["event_date"]
-                if structured_context.get("event_type"):
-                    key_points["event_type"] = structured_context["event_type"]
+            # Summaries go to the fast-model route
+            summary = trim_summary(self.claude.generate_summary(build_summary_prompt(raw_email_body)))
+            key_points = extract_key_points(structured_context)
             
             # Store in database
             thread_summary_id = str(uuid.uuid4())
@@ -81,15 +124,16 @@ Email content:
                     """
                     INSERT INTO archivus_threads (
                         id, tenant_id, gmail_thread_id, summary, key_points,
-                        client_context, venue_context, created_at, updated_at
+                        client_context, venue_context, content_hash, created_at, updated_at
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
                     ON CONFLICT (tenant_id, gmail_thread_id)
                     DO UPDATE SET
                         summary = EXCLUDED.summary,
                         key_points = EXCLUDED.key_points,
                         client_context = EXCLUDED.client_context,
                         venue_context = EXCLUDED.venue_context,
+                        content_hash = EXCLUDED.content_hash,
                         updated_at = NOW()
                     """,
                     (
@@ -97,19 +141,25 @@ Email content:
                         self.tenant_id,
                         thread_id,
                         summary,
-                        key_points,
-                        structured_context.get("client_context") if structured_context else None,
-                        structured_context.get("venue_context") if structured_context else None,
+                        Json(key_points),
+                        Json(structured_context.get("client_context")) if structured_context else None,
+                        Json(structured_context.get("venue_context")) if structured_context else None,
+                        thread_content_hash(raw_email_body),
                     ),
                 )
                 cur.connection.commit()
+            invalidate_profiles(self.tenant_id, key_points)
+            try:
+                get_archivus_index().add_thread(self.tenant_id, thread_id, summary, key_points)
+            except Exception as e:
+                # Other processes pick the summary up on their next index sync
+                logger.warning(f"Archivus index update failed for thread {thread_id}: {e}")
             
             self.audit.log_event(
                 action="archivus.thread_summary.recorded",
                 resource_type="archivus",
                 resource_id=thread_summary_id,
                 metadata={"thread_id": thread_id},
-                tenant_id=self.tenant_id,
             )
             
             return thread_summary_id
@@ -119,84 +169,109 @@ Email content:
                 action="archivus.thread_summary.error",
                 resource_type="archivus",
                 metadata={"error": str(e), "thread_id": thread_id},
-                tenant_id=self.tenant_id,
             )
             return None
     
-    def get_client_profile(self, client_id: str) -> Dict[str, Any]:
+    def enqueue_thread_summary(
+        self,
+        thread_id: str,
+        raw_email_body: str,
+        structured_context: Optional[Dict[str, Any]] = None,
+        trace_id: Optional[str] = None,
+    ) -> bool:
         """
-        Aggregate client memories and thread summaries
+        Queue a thread summary for the Archivus summary worker
+        
+        There is one job per thread: updates arriving before it runs replace
+        its content and push it back by the debounce window (but never past
+        ARCHIVUS_SUMMARY_MAX_DELAY_SECONDS after the first). The worker skips
+        the LLM call when the content hash matches the stored summary.
         
         Args:
-            client_id: Client UUID
+            thread_id: Gmail thread ID
+            raw_email_body: Raw email body text
+            structured_context: Optional context (client_id, venue_name, event_details)
+            trace_id: Request trace ID
             
         Returns:
-            Aggregated client profile
+            True if queued
         """
         try:
             with get_cursor(tenant_id=self.tenant_id) as cur:
-                # Get thread summaries for this client
                 cur.execute(
                     """
-                    SELECT summary, key_points, created_at
-                    FROM archivus_threads
-                    WHERE tenant_id = %s
-                      AND key_points->>'client_id' = %s
-                    ORDER BY created_at DESC
-                    LIMIT 10
-                    """,
-                    (self.tenant_id, client_id),
-                )
-                threads = cur.fetchall()
-                
-                # Get client memories
-                cur.execute(
-                    """
-                    SELECT memory_type, key, value, confidence
-                    FROM archivus_memories
-                    WHERE tenant_id = %s
-                      AND memory_type = 'client_profile'
-                      AND key = %s
-                    ORDER BY updated_at DESC
-                    LIMIT 5
+                    INSERT INTO archivus_summary_jobs AS j (
+                        tenant_id, gmail_thread_id, content_hash, raw_email_body,
+                        structured_context, run_after, trace_id
+                    )
+                    VALUES (%s, %s, %s, %s, %s, NOW() + %s * INTERVAL '1 second', %s)
+                    ON CONFLICT (tenant_id, gmail_thread_id)
+                    DO UPDATE SET
+                        content_hash = EXCLUDED.content_hash,
+                        raw_email_body = EXCLUDED.raw_email_body,
+                        structured_context = EXCLUDED.structured_context,
+                        trace_id = EXCLUDED.trace_id,
+                        version = j.version + 1,
+                        -- A running job is re-queued by the worker when it finishes
+                        status = CASE WHEN j.status = 'processing' THEN 'processing' ELSE 'pending' END,
+                        attempts = CASE WHEN j.content_hash = EXCLUDED.content_hash THEN j.attempts ELSE 0 END,
+                        first_queued_at = CASE WHEN j.status = 'failed' THEN NOW() ELSE j.first_queued_at END,
+                        run_after = CASE
+                            WHEN j.status = 'failed' THEN EXCLUDED.run_after
+                            ELSE LEAST(EXCLUDED.run_after, j.first_queued_at + %s * INTERVAL '1 second')
+                        END,
+                        error_message = NULL,
+                        updated_at = NOW()
                     """,
-                    (self.tenant_id, client_id),
+                    (
+                        self.tenant_id,
+                        thread_id,
+                        thread_content_hash(raw_email_body),
+                        raw_email_body[:SUMMARY_BODY_CHARS],
+                        Json(structured_context) if structured_context else None,
+                        settings.archivus_summary_debounce_seconds,
+                        trace_id,
+                        settings.archivus_summary_max_delay_seconds,
+                    ),
                 )
-                memories = cur.fetchall()
-                
-                return {
-                    "client_id": client_id,
-                    "thread_summaries": [
-                        {
-                            "summary": t[0],
-                            "key_points": t[1],
-                            "created_at": t[2].isoformat() if t[2] else None,
-                        }
-                        for t in threads
-                    ],
-                    "memories": [
-                        {
-                            "type": m[0],
-                            "key": m[1],
-                            "value": m[2],
-                            "confidence": m[3],
-                        }
-                        for m in memories
-                    ],
-                }
+                # Wake the worker so it schedules itself for this job
+                notify(cur, ARCHIVUS_SUMMARY_CHANNEL, thread_id)
+            return True
+        except Exception as e:
+            # Fail-open: Archivus failures don't block email processing
+            self.audit.log_event(
+                action="archivus.thread_summary.enqueue_error",
+                resource_type="archivus",
+                metadata={"error": str(e), "thread_id": thread_id},
+                trace_id=trace_id,
+            )
+            return False
+    
+    def get_client_profile(self, client_id: str) -> Dict[str, Any]:
+        """
+        Client profile: latest thread summaries and client memories
+        
+        Args:
+            client_id: Client UUID
+            
+        Returns:
+            Aggregated client profile
+        """
+        try:
+            threads, memories = self._get_profile("client", client_id)
         except Exception as e:
             # Fail-open: return empty profile on error
             self.audit.log_event(
                 action="archivus.client_profile.error",
                 resource_type="archivus",
                 metadata={"error": str(e), "client_id": client_id},
-                tenant_id=self.tenant_id,
             )
-            return {"client_id": client_id, "thread_summaries": [], "memories": []}
+            threads, memories = [], []
+        return {"client_id": client_id, "thread_summaries": threads, "memories": memories}
     
     def get_venue_profile(self, venue_name: str) -> Dict[str, Any]:
         """
-        Aggregate venue memories and thread summaries
+        Venue profile: latest thread summaries and venue memories
         
         Args:
             venue_name: Venue name
@@ -205,65 +280,45 @@ Email content:
             Aggregated venue profile
         """
         try:
-            with get_cursor(tenant_id=self.tenant_id) as cur:
-                # Get thread summaries for this venue
-                cur.execute(
-                    """
-                    SELECT summary, key_points, created_at
-                    FROM archivus_threads
-                    WHERE tenant_id = %s
-                      AND key_points->>'venue_name' = %s
-                    ORDER BY created_at DESC
-                    LIMIT 10
-                    """,
-                    (self.tenant_id, venue_name),
-                )
-                threads = cur.fetchall()
-                
-                # Get venue memories
-                cur.execute(
-                    """
-                    SELECT memory_type, key, value, confidence
-                    FROM archivus_memories
-                    WHERE tenant_id = %s
-                      AND memory_type = 'venue_profile'
-                      AND key = %s
-                    ORDER BY updated_at DESC
-                    LIMIT 5
-                    """,
-                    (self.tenant_id, venue_name),
-                )
-                memories = cur.fetchall()
-                
-                return {
-                    "venue_name": venue_name,
-                    "thread_summaries": [
-                        {
-                            "summary": t[0],
-                            "key_points": t[1],
-                            "created_at": t[2].isoformat() if t[2] else None,
-                        }
-                        for t in threads
-                    ],
-                    "memories": [
-                        {
-                            "type": m[0],
-                            "key": m[1],
-                            "value": m[2],
-                            "confidence": m[3],
-                        }
-                        for m in memories
-                    ],
-                }
+            threads, memories = self._get_profile("venue", venue_name)
         except Exception as e:
             # Fail-open: return empty profile on error
             self.audit.log_event(
                 action="archivus.venue_profile.error",
                 resource_type="archivus",
                 metadata={"error": str(e), "venue_name": venue_name},
-                tenant_id=self.tenant_id,
             )
-            return {"venue_name": venue_name, "thread_summaries": [], "memories": []}
+            threads, memories = [], []
+        return {"venue_name": venue_name, "thread_summaries": threads, "memories": memories}
+    
+    def _get_profile(self, profile_type: str, profile_key: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Read-through lookup of a materialized profile row
+        
+        archivus_profiles rows are rebuilt by triggers whenever a thread
+        summary or profile memory for the key is written (migration 027) and
+        already hold the response lists, so a miss is one primary-key read.
+        
+        Returns:
+            Tuple of (thread summaries, memories); empty lists if no profile exists
+        """
+        cache_key = (self.tenant_id, profile_type, profile_key)
+        cached = _profile_cache.get(cache_key)
+        if cached is None:
+            with get_cursor(tenant_id=self.tenant_id) as cur:
+                cur.execute(
+                    """
+                    SELECT thread_summaries, memories
+                    FROM archivus_profiles
+                    WHERE tenant_id = %s AND profile_type = %s AND profile_key = %s
+                    """,
+                    (self.tenant_id, profile_type, profile_key),
+                )
+                row = cur.fetchone()
+            cached = (row["thread_summaries"], row["memories"]) if row else ([], [])
+            _profile_cache.set(cache_key, cached)
+        # Copies, so callers cannot edit the cached lists
+        return list(cached[0]), list(cached[1])
     
     def record_system_note(
         self,
@@ -309,7 +364,6 @@ Email content:
                 resource_type="archivus",
                 resource_id=note_id,
                 metadata={"category": category, "summary": summary},
-                tenant_id=self.tenant_id,
             )
             
             return note_id
@@ -319,7 +373,6 @@ Email content:
                 action="archivus.system_note.error",
                 resource_type="archivus",
                 metadata={"error": str(e), "category": category},
-                tenant_id=self.tenant_id,
             )
             return None
 
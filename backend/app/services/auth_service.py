@@ -3,17 +3,19 @@ OMEGA Core v3.0 - Authentication Service
 JWT-based authentication with brute force protection
 """
 from __future__ import annotations
+import asyncio
 import jwt
 import hashlib
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, Dict, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from app.config import get_settings
 from app.database import get_cursor
 from app.services.audit_service import get_audit_service
-from app.utils.password_policy import PasswordPolicyService, validate_password
+from app.services.password_hasher import PasswordHasherBusy, get_password_hasher
+from app.utils.password_policy import validate_password
 from app.models.user import User as UserModel
 from app.encryption import decrypt
 
@@ -33,119 +35,141 @@ def hash_email(email: str) -> str:
     return hashlib.sha256(email.lower().strip().encode()).hexdigest()
 
 
-def authenticate_user(email: str, password: str) -> Optional[UserModel]:
+def _load_login_row(email_hash: str) -> Optional[dict]:
+    """Load the user row needed for login (blocking; run off the event loop)"""
+    # Using users table, not users_v4
+    with get_cursor(tenant_id=None) as cur:
+        cur.execute(
+            """
+            SELECT id, tenant_id, email, email_hash, full_name, role, 
+                   password_hash, active, locked_until, failed_login_attempts,
+                   last_login, created_at, updated_at
+            FROM users
+            WHERE email_hash = %s
+            LIMIT 1
+            """,
+            (email_hash,),
+        )
+        row = cur.fetchone()
+        return dict(row) if row else None
+
+
+def _record_failed_login(user_id: str, failed_attempts: int) -> None:
+    """Count a failed attempt, locking the account after 5 (blocking)"""
+    locked_until = None
+    if failed_attempts >= 5:
+        # Lock account for 15 minutes
+        locked_until = datetime.now(timezone.utc) + timedelta(minutes=15)
+    
+    with get_cursor(tenant_id=None) as cur:
+        cur.execute(
+            """
+            UPDATE users
+            SET failed_login_attempts = %s,
+                locked_until = %s,
+                updated_at = NOW()
+            WHERE id = %s
+            """,
+            (failed_attempts, locked_until, user_id),
+        )
+
+
+def _record_successful_login(user_id: str, new_password_hash: Optional[str]) -> None:
+    """Reset failed attempts, update last_login and store a rehashed password (blocking)"""
+    with get_cursor(tenant_id=None) as cur:
+        cur.execute(
+            """
+            UPDATE users
+            SET failed_login_attempts = 0,
+                locked_until = NULL,
+                last_login = NOW(),
+                password_hash = COALESCE(%s, password_hash),
+                updated_at = NOW()
+            WHERE id = %s
+            """,
+            (new_password_hash, user_id),
+        )
+
+
+async def authenticate_user(email: str, password: str) -> Optional[UserModel]:
     """
     Authenticate user with email and password
     
+    Database access runs on worker threads and bcrypt on the bounded
+    password hasher pool, so logins never block the event loop. Hashes
+    made with a different BCRYPT_ROUNDS cost are rehashed on success.
+    
     Args:
         email: User email
         password: User password
         
     Returns:
         User object if authenticated, None otherwise
+        
+    Raises:
+        PasswordHasherBusy: If too many logins are already being verified
     """
-    password_service = PasswordPolicyService()
     email_hash = hash_email(email)
+    audit = get_audit_service(None)
     
     try:
-        # Get user from database (using users table, not users_v4)
-        with get_cursor(tenant_id=None) as cur:
-            cur.execute(
-                """
-                SELECT id, tenant_id, email, email_hash, full_name, role, 
-                       password_hash, active, locked_until, failed_login_attempts,
-                       last_login, created_at, updated_at
-                FROM users
-                WHERE email_hash = %s
-                LIMIT 1
-                """,
-                (email_hash,),
+        row = await asyncio.to_thread(_load_login_row, email_hash)
+        if not row:
+            return None
+        
+        # Check if account is locked
+        if row["locked_until"] and row["locked_until"] > datetime.now(timezone.utc):
+            audit.log_event(
+                action="auth.login.locked",
+                resource_type="user",
+                metadata={"email_hash": email_hash, "locked_until": row["locked_until"].isoformat()},
             )
-            row = cur.fetchone()
-            
-            if not row:
-                return None
-            
-            # Check if account is locked
-            if row[8] and row[8] > datetime.now(timezone.utc):
-                # Account is locked
-                audit = get_audit_service(None)
-                audit.log_event(
-                    action="auth.login.locked",
-                    resource_type="user",
-                    metadata={"email_hash": email_hash, "locked_until": row[8].isoformat()},
-                    tenant_id=None,
-                )
-                return None
-            
-            # Verify password
-            if not password_service.verify_password(password, row[6]):  # password_hash
-                # Increment failed attempts
-                failed_attempts = (row[9] or 0) + 1
-                locked_until = None
-                
-                if failed_attempts >= 5:
-                    # Lock account for 15 minutes
-                    locked_until = datetime.now(timezone.utc) + timedelta(minutes=15)
-                
-                cur.execute(
-                    """
-                    UPDATE users
-                    SET failed_login_attempts = %s,
-                        locked_until = %s,
-                        updated_at = NOW()
-                    WHERE id = %s
-                    """,
-                    (failed_attempts, locked_until, row[0]),
-                )
-                cur.connection.commit()
-                
-                audit = get_audit_service(None)
-                audit.log_event(
-                    action="auth.login.failed",
-                    resource_type="user",
-                    metadata={"email_hash": email_hash, "failed_attempts": failed_attempts},
-                    tenant_id=None,
-                )
-                return None
-            
-            # Successful login - reset failed attempts and update last_login
-            cur.execute(
-                """
-                UPDATE users
-                SET failed_login_attempts = 0,
-                    locked_until = NULL,
-                    last_login = NOW(),
-                    updated_at = NOW()
-                WHERE id = %s
-                """,
-                (row[0],),
+            return None
+        
+        # Verify password
+        valid, new_hash = await get_password_hasher().verify_and_update(password, row["password_hash"])
+        if not valid:
+            failed_attempts = (row["failed_login_attempts"] or 0) + 1
+            await asyncio.to_thread(_record_failed_login, row["id"], failed_attempts)
+            audit.log_event(
+                action="auth.login.failed",
+                resource_type="user",
+                metadata={"email_hash": email_hash, "failed_attempts": failed_attempts},
             )
-            cur.connection.commit()
-            
-            # Return User object (decrypt email and full_name)
-            return UserModel(
-                id=str(row[0]),
-                tenant_id=str(row[1]),
-                email=decrypt(row[2]) if row[2] else "",  # Decrypted email
-                email_hash=row[3],
-                full_name=decrypt(row[4]) if row[4] else None,  # Decrypted full_name
-                role=row[5],
-                active=row[7],
-                locked_until=row[8],
-                failed_login_attempts=row[9] or 0,
-                last_login=row[10],
-                created_at=row[11],
-                updated_at=row[12],
+            return None
+        
+        await asyncio.to_thread(_record_successful_login, row["id"], new_hash)
+        if new_hash:
+            audit.log_event(
+                action="auth.password.rehashed",
+                resource_type="user",
+                resource_id=str(row["id"]),
+                metadata={"bcrypt_rounds": settings.bcrypt_rounds},
             )
+        
+        # Return User object (decrypt email and full_name)
+        return UserModel(
+            id=str(row["id"]),
+            tenant_id=str(row["tenant_id"]),
+            email=decrypt(row["email"]) if row["email"] else "",  # Decrypted email
+            email_hash=row["email_hash"],
+            full_name=decrypt(row["full_name"]) if row["full_name"] else None,  # Decrypted full_name
+            role=row["role"],
+            active=row["active"],
+            locked_until=row["locked_until"],
+            failed_login_attempts=row["failed_login_attempts"] or 0,
+            last_login=row["last_login"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         # Fail-open: return None on error
-        audit = get_audit_service(None)
         audit.log_event(
             action="auth.login.error",
             resource_type="user",
             metadata={"error": str(e), "email_hash": email_hash},
-            tenant_id=None,
         )
         return None
 
@@ -194,6 +218,57 @@ def create_token_pair(user: UserModel) -> TokenPair:
     )
 
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and validate an access token (signature, expiry, type; no DB hit)
+    
+    Args:
+        token: Encoded JWT
+        
+    Returns:
+        Token claims
+        
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid, expired or not an access token
+    """
+    payload = jwt.decode(token, settings.jwt_secret_key, algorithms=["HS256"])
+    if payload.get("type") != "access":
+        raise jwt.InvalidTokenError("Invalid token type")
+    return payload
+
+
+class TokenUser(BaseModel):
+    """Identity carried by a verified access token"""
+    user_id: str
+    tenant_id: str
+    role: Optional[str] = None
+
+
+def get_token_user(request: Request) -> TokenUser:
+    """
+    Get the caller's identity from the access token decoded by the
+    request middleware (dependency; no DB hit)
+    
+    Use get_current_user instead when the handler needs the full, active
+    user record.
+    
+    Raises:
+        HTTPException: If the request carried no valid access token
+    """
+    user_id = getattr(request.state, "user_id", None)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return TokenUser(
+        user_id=user_id,
+        tenant_id=request.state.tenant_id,
+        role=getattr(request.state, "user_role", None),
+    )
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> UserModel:
@@ -213,14 +288,7 @@ def get_current_user(
     
     try:
         # Decode token
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=["HS256"])
-        
-        # Validate token type
-        if payload.get("type") != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type",
-            )
+        payload = decode_access_token(token)
         
         # Get user from database
         user_id = payload.get("sub")
@@ -247,18 +315,18 @@ def get_current_user(
                 )
             
             return UserModel(
-                id=str(row[0]),
-                tenant_id=str(row[1]),
-                email=decrypt(row[2]) if row[2] else "",  # Decrypted
-                email_hash=row[3],
-                full_name=decrypt(row[4]) if row[4] else None,  # Decrypted
-                role=row[5],
-                active=row[6],
-                locked_until=row[7],
-                failed_login_attempts=row[8] or 0,
-                last_login=row[9],
-                created_at=row[10],
-                updated_at=row[11],
+                id=str(row["id"]),
+                tenant_id=str(row["tenant_id"]),
+                email=decrypt(row["email"]) if row["email"] else "",  # Decrypted
+                email_hash=row["email_hash"],
+                full_name=decrypt(row["full_name"]) if row["full_name"] else None,  # Decrypted
+                role=row["role"],
+                active=row["active"],
+                locked_until=row["locked_until"],
+                failed_login_attempts=row["failed_login_attempts"] or 0,
+                last_login=row["last_login"],
+                created_at=row["created_at"],
+                updated_at=row["updated_at"],
             )
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -4,11 +4,12 @@ Google Calendar integration with auto-blocking, conflict detection, and tenant t
 """
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta, timezone
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from app.database import get_cursor
 from app.services.audit_service import get_audit_service
+from app.services.google_credentials import get_delegated_credentials, CALENDAR_SCOPES
+from app.services.tenant_settings import get_tenant_settings
 from app.services.supabase_service import create_calendar_event, delete_event, get_calendar_event_by_google_id
 from app.config import get_settings
 
@@ -21,11 +22,8 @@ _calendar_services = {}
 def _get_calendar_service(account_email: str):
     """Get or create Calendar API service instance"""
     if account_email not in _calendar_services:
-        credentials = service_account.Credentials.from_service_account_file(
-            settings.google_credentials_path,
-            scopes=['https://www.googleapis.com/auth/calendar']
-        )
-        delegated_credentials = credentials.with_subject(account_email)
+        # Shared credentials are refreshed ahead of expiry in the background
+        delegated_credentials = get_delegated_credentials(account_email, CALENDAR_SCOPES)
         _calendar_services[account_email] = build('calendar', 'v3', credentials=delegated_credentials)
     return _calendar_services[account_email]
 
@@ -40,17 +38,8 @@ class CalendarServiceV3:
         self.account_email = getattr(settings, 'maya_email', 'maya@skinnymanmusic.com')
     
     def _get_tenant_timezone(self) -> str:
-        """Get tenant timezone from database, default to UTC"""
-        try:
-            with get_cursor(tenant_id=self.tenant_id) as cur:
-                cur.execute(
-                    "SELECT timezone FROM tenants WHERE id = %s",
-                    (self.tenant_id,)
-                )
-                row = cur.fetchone()
-                return row[0] if row and row[0] else "UTC"
-        except Exception:
-            return "UTC"
+        """Get tenant timezone from the tenant settings cache, default to UTC"""
+        return get_tenant_settings(self.tenant_id).timezone
     
     def _check_safe_mode(self, trace_id: Optional[str] = None) -> bool:
         """Check if Safe Mode is enabled"""
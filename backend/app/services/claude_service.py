@@ -2,25 +2,24 @@
 OMEGA Core v3.0 - Claude AI Service
 Safe prompt enforcement, response generation, metadata redaction
 """
-import re
-from typing import Optional, Dict, Any, List
-from anthropic import Anthropic
+import time
+from typing import Optional, Dict, Any, Iterator, List
 from app.config import get_settings
 from app.services.audit_service import get_audit_service
+from app.services.llm_gateway import (
+    TASK_DRAFT,
+    TASK_SUMMARY,
+    LLMResult,
+    anthropic_system_blocks,
+    get_anthropic_client,
+    get_llm_gateway,
+)
+from app.services.llm_usage import LLM_TIME_TO_FIRST_TOKEN, get_llm_usage_recorder
+from app.utils.metrics import track_call
+from app.utils.text_safety import StreamingSanitizer, scan_text
 
 settings = get_settings()
 
-# Claude client
-_client = None
-
-
-def _get_client() -> Anthropic:
-    """Get or create Claude client"""
-    global _client
-    if _client is None:
-        _client = Anthropic(api_key=settings.anthropic_api_key)
-    return _client
-
 
 # Universal system prompt with safety rules
 MAYA_SYSTEM_PROMPT = """You are Maya Sinclair, a professional email assistant for DJ Skinny (Greg) at Skinny Man Entertainment and Level Three LLC.
@@ -48,9 +47,12 @@ class ClaudeService:
     
     def __init__(self, tenant_id: str):
         self.tenant_id = tenant_id
-        self.client = _get_client()
+        self.client = get_anthropic_client()
+        self.gateway = get_llm_gateway()
         self.system_prompt = MAYA_SYSTEM_PROMPT
+        self.system_blocks = anthropic_system_blocks(self.system_prompt)
         self.audit = get_audit_service(tenant_id)
+        self.usage = get_llm_usage_recorder()
     
     def generate_response(
         self,
@@ -73,29 +75,33 @@ class ClaudeService:
             # Build prompt with context (optimized, redacted)
             prompt = self._build_prompt(email_body, context)
             
-            # Generate response
-            response = self.client.messages.create(
-                model=settings.claude_model,
-                max_tokens=settings.claude_max_tokens,
-                system=self.system_prompt,
+            # Generate response (primary model; gateway hedges / fails over)
+            result = self._complete(
+                task=TASK_DRAFT,
+                operation="generate_response",
                 messages=[
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                trace_id=trace_id
             )
             
-            response_text = response.content[0].text if response.content else ""
+            response_text = result.text
             
-            # Sanitize response
-            response_text = self._sanitize_response(response_text)
+            # Sanitize response (same pass finds Sentra static-rule violations)
+            scan = scan_text(response_text)
             
             self.audit.log_event(
                 action="claude.response.generated",
                 resource_type="email",
-                metadata={"context_keys": list(context.keys())},
+                metadata={
+                    "context_keys": list(context.keys()),
+                    "safety_violations": scan.violation_types,
+                    "provider": result.provider,
+                },
                 trace_id=trace_id
             )
             
-            return response_text
+            return scan.text
             
         except Exception as e:
             self.audit.log_event(
@@ -106,6 +112,145 @@ class ClaudeService:
             )
             return None
     
+    def stream_response(
+        self,
+        email_body: str,
+        context: Dict[str, Any],
+        trace_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate email response using Claude, streaming sanitized text
+        
+        Args:
+            email_body: Original email body
+            context: Full context (intelligence results, client info, etc.)
+            trace_id: Request trace ID
+            
+        Yields:
+            {"type": "delta", "text": ...} as text arrives (already sanitized),
+            then {"type": "done", "text": ..., "violations": [...]} with the
+            fully sanitized response, or {"type": "error", "error": ...}
+        """
+        sanitizer = StreamingSanitizer()
+        try:
+            prompt = self._build_prompt(email_body, context)
+            for chunk in self._stream_message(
+                operation="generate_response",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                trace_id=trace_id
+            ):
+                preview = sanitizer.feed(chunk)
+                if preview:
+                    yield {"type": "delta", "text": preview}
+            
+            scan = sanitizer.finish()
+            self.audit.log_event(
+                action="claude.response.generated",
+                resource_type="email",
+                metadata={
+                    "context_keys": list(context.keys()),
+                    "safety_violations": scan.violation_types,
+                    "streamed": True,
+                },
+                trace_id=trace_id
+            )
+            yield {"type": "done", "text": scan.text, "violations": scan.violations}
+            
+        except Exception as e:
+            self.audit.log_event(
+                action="claude.response.error",
+                resource_type="email",
+                metadata={"error": str(e), "streamed": True},
+                trace_id=trace_id
+            )
+            yield {"type": "error", "error": "Response generation failed"}
+    
+    def _complete(
+        self,
+        task: str,
+        operation: str,
+        messages: List[Dict[str, Any]],
+        trace_id: Optional[str] = None
+    ) -> LLMResult:
+        """
+        Complete through the LLM gateway with the Maya system prompt
+        
+        Args:
+            task: Gateway route (TASK_DRAFT, TASK_SUMMARY)
+            operation: Call site name for usage reports
+            messages: Conversation messages
+            trace_id: Request trace ID
+            
+        Returns:
+            LLMResult (raises LLMGatewayError if every provider failed)
+        """
+        return self.gateway.complete(
+            task=task,
+            system=self.system_prompt,
+            messages=messages,
+            operation=operation,
+            tenant_id=self.tenant_id,
+            trace_id=trace_id
+        )
+    
+    def _stream_message(
+        self,
+        operation: str,
+        messages: List[Dict[str, Any]],
+        trace_id: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Stream a Claude completion (claude_model directly, no gateway)
+        
+        Records usage when the stream ends and time-to-first-token when the
+        first text arrives.
+        
+        Args:
+            operation: Call site name for usage reports
+            messages: Conversation messages
+            trace_id: Request trace ID
+            
+        Yields:
+            Raw text deltas
+        """
+        started = time.perf_counter()
+        first_token = False
+        final = None
+        try:
+            with track_call("anthropic"):
+                with self.client.messages.stream(
+                    model=settings.claude_model,
+                    max_tokens=settings.claude_max_tokens,
+                    system=self.system_blocks,
+                    messages=messages
+                ) as stream:
+                    for text in stream.text_stream:
+                        if not first_token:
+                            first_token = True
+                            LLM_TIME_TO_FIRST_TOKEN.observe(
+                                time.perf_counter() - started,
+                                model=settings.claude_model,
+                                operation=operation
+                            )
+                        yield text
+                    final = stream.get_final_message()
+        finally:
+            usage = getattr(final, "usage", None)
+            self.usage.record(
+                tenant_id=self.tenant_id,
+                model=getattr(final, "model", None) or settings.claude_model,
+                operation=operation,
+                input_tokens=getattr(usage, "input_tokens", 0) or 0,
+                output_tokens=getattr(usage, "output_tokens", 0) or 0,
+                cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+                cache_write_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                success=final is not None,
+                trace_id=trace_id
+            )
+    
     def _build_prompt(self, email_body: str, context: Dict[str, Any]) -> str:
         """Build optimized prompt with context"""
         # Truncate email body to 2000 chars
@@ -130,6 +275,10 @@ class ClaudeService:
         if context.get("equipment_needed"):
             context_parts.append(f"Equipment: {', '.join(context['equipment_needed'])}")
         
+        if context.get("related_threads"):
+            related = "\n".join(f"- {summary}" for summary in context["related_threads"])
+            context_parts.append(f"Related past threads:\n{related}")
+        
         context_str = "\n".join(context_parts) if context_parts else "No additional context"
         
         prompt = f"""Client Email:
@@ -142,22 +291,6 @@ Please write a professional, friendly response to this email. Ask for any missin
         
         return prompt
     
-    def _sanitize_response(self, response: str) -> str:
-        """Sanitize response to remove unsafe content"""
-        # Remove URLs
-        response = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+])+', '[URL_REMOVED]', response)
-        
-        # Remove email addresses (except in context)
-        response = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_REMOVED]', response)
-        
-        # Remove HTML tags
-        response = re.sub(r'<[^>]+>', '', response)
-        
-        # Remove scripts
-        response = re.sub(r'<script[^>]*>.*?</script>', '', response, flags=re.DOTALL | re.IGNORECASE)
-        
-        return response.strip()
-    
     def refine_response(
         self,
         draft_response: str,
@@ -176,25 +309,26 @@ Please write a professional, friendly response to this email. Ask for any missin
             Refined response or None
         """
         try:
-            response = self.client.messages.create(
-                model=settings.claude_model,
-                max_tokens=settings.claude_max_tokens,
-                system=self.system_prompt,
+            result = self._complete(
+                task=TASK_DRAFT,
+                operation="refine_response",
                 messages=[
                     {"role": "user", "content": f"Original response:\n{draft_response}\n\nFeedback: {feedback}\n\nPlease refine the response."}
-                ]
+                ],
+                trace_id=trace_id
             )
             
-            refined = response.content[0].text if response.content else ""
-            refined = self._sanitize_response(refined)
+            refined = result.text
+            scan = scan_text(refined)
             
             self.audit.log_event(
                 action="claude.response.refined",
                 resource_type="email",
+                metadata={"safety_violations": scan.violation_types},
                 trace_id=trace_id
             )
             
-            return refined
+            return scan.text
             
         except Exception as e:
             self.audit.log_event(
@@ -205,3 +339,38 @@ Please write a professional, friendly response to this email. Ask for any missin
             )
             return None
 
+    
+    def generate_summary(
+        self,
+        prompt: str,
+        trace_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Summarize text for internal use (fast model route)
+        
+        Args:
+            prompt: Summary instructions and the text to summarize
+            trace_id: Request trace ID
+            
+        Returns:
+            Sanitized summary or None
+        """
+        try:
+            result = self._complete(
+                task=TASK_SUMMARY,
+                operation="thread_summary",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                trace_id=trace_id
+            )
+            return scan_text(result.text).text
+            
+        except Exception as e:
+            self.audit.log_event(
+                action="claude.summary.error",
+                resource_type="email",
+                metadata={"error": str(e)},
+                trace_id=trace_id
+            )
+            return None
@@ -2,54 +2,422 @@
 Conversation Service for SMS Booking Flow
 Manages conversation state and message history
 """
-from typing import Optional, Dict, Any, List
+import logging
+import select
+import threading
+import uuid
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, date, time, timezone
-from app.database import get_cursor
+import psycopg2
+from psycopg2.extras import execute_values
+from app.database import get_cursor, CONVERSATIONS_CHANNEL
 from app.services.audit_service import get_audit_service
+from app.utils.lock_keys import advisory_lock_key
+from app.utils.metrics import get_registry
+from app.utils.ttl_cache import TTLCache
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Conversation states that end a conversation (a new one starts on next message)
+TERMINAL_STATES = ("completed", "cancelled")
+
+# Wait before re-opening a lost LISTEN connection (the TTL covers the gap)
+RECONNECT_DELAY_SECONDS = 5.0
+
+# Flushes a buffered message may fail before it is dropped (and audited);
+# after a failed flush the next one waits twice as long, up to the cap
+# (about two minutes of database outage in total)
+MESSAGE_FLUSH_MAX_ATTEMPTS = 8
+MESSAGE_FLUSH_RETRY_MAX_SECONDS = 30.0
+
+# Errors that say nothing about the rows (connection lost, deadlock,
+# serialization failure): the batch is retried as is on the next flush
+_TRANSIENT_ERRORS = (
+    psycopg2.OperationalError,
+    psycopg2.InterfaceError,
+    psycopg2.extensions.TransactionRollbackError,
+)
+
+# Write-through conversation cache keyed on (tenant_id, phone_number); entries
+# changed by other processes are dropped by ConversationCacheListener
+_conversation_cache = TTLCache(
+    max_entries=10000,
+    ttl_seconds=settings.sms_conversation_cache_ttl_seconds,
+)
+
+# Columns that update_conversation_state may write
+_UPDATABLE_FIELDS = (
+    "service_type",
+    "event_date",
+    "event_time",
+    "duration_hours",
+    "booking_id",
+    "client_email",
+    "client_name",
+)
+
+
+class MessageWriteBuffer:
+    """
+    Batches sms_messages inserts and flushes them from a background thread.
+
+    Webhook handlers enqueue rows and return immediately; rows are written
+    with one multi-row INSERT per tenant every flush interval (or sooner when
+    the buffer fills up), and the same transaction advances last_message_at
+    on their conversations.
+
+    Delivery statuses only move forward (sms_delivery_status_supersedes,
+    migration 030), so a late flush cannot undo a newer Twilio callback.
+    Outbound rows are written under a per-message_sid advisory lock shared
+    with update_delivery_status(), and the flush applies callbacks that
+    arrived (on any process) before the row existed.
+
+    A failed tenant batch is not dropped: after a transient error the rows go
+    back to the buffer as they are; after any other error the batch is
+    retried row by row, so one bad row (e.g. an FK violation) cannot take its
+    neighbours with it. A row that fails MESSAGE_FLUSH_MAX_ATTEMPTS flushes
+    is dropped and audited.
+    """
+
+    def __init__(self, flush_interval_seconds: float = 0.5, max_batch_size: int = 200):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple] = []
+        self._attempts: Dict[Tuple[str, str], int] = {}
+        self._retry_delay = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, row: Tuple) -> None:
+        """Queue a message row (tenant_id first) for the next flush"""
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self.max_batch_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Write all pending rows
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+
+            # Later rows for the same message (e.g. queued -> sent) supersede
+            # earlier ones; one statement cannot upsert the same id twice
+            by_tenant: Dict[str, Dict[str, Tuple]] = {}
+            for row in rows:
+                tenant_rows = by_tenant.setdefault(row[0], {})
+                previous = tenant_rows.get(row[1])
+                if previous is not None:
+                    row = row[:-1] + (previous[-1],)
+                tenant_rows[row[1]] = row
+
+            written = 0
+            retried = 0
+            for tenant_id, tenant_messages in by_tenant.items():
+                tenant_rows = list(tenant_messages.values())
+                try:
+                    self._write(tenant_id, tenant_rows)
+                    written += self._written(tenant_id, tenant_rows)
+                    continue
+                except Exception as e:
+                    if isinstance(e, _TRANSIENT_ERRORS):
+                        logger.warning(f"SMS message flush failed for tenant {tenant_id}, retrying: {e}")
+                        retried += self._requeue(tenant_id, [(row, e) for row in tenant_rows])
+                        continue
+                    logger.warning(f"SMS message batch failed for tenant {tenant_id}, writing rows one by one: {e}")
+
+                failed: List[Tuple[Tuple, Exception]] = []
+                for row in tenant_rows:
+                    try:
+                        self._write(tenant_id, [row])
+                        written += self._written(tenant_id, [row])
+                    except Exception as e:
+                        failed.append((row, e))
+                retried += self._requeue(tenant_id, failed)
+
+            if retried:
+                self._retry_delay = min(
+                    max(self._retry_delay * 2, self.flush_interval_seconds * 2),
+                    MESSAGE_FLUSH_RETRY_MAX_SECONDS,
+                )
+            else:
+                self._retry_delay = 0.0
+            return written
+
+    def _write(self, tenant_id: str, tenant_rows: List[Tuple]) -> None:
+        """Write one tenant's rows in one transaction (raises on failure)"""
+        last_message_at: Dict[str, datetime] = {}
+        for row in tenant_rows:
+            if row[2]:
+                last_message_at[row[2]] = max(last_message_at.get(row[2], row[-1]), row[-1])
+        sids = sorted({row[4] for row in tenant_rows if row[4] and row[5] == "outbound"})
+        with get_cursor(tenant_id=tenant_id) as cursor:
+            if sids:
+                # Sorted, so concurrent flushes cannot deadlock
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(key) FROM unnest(%s::bigint[]) AS k(key)",
+                    (sorted(_status_lock_key(tenant_id, sid) for sid in sids),),
+                )
+            execute_values(
+                cursor,
+                """
+                INSERT INTO sms_messages (
+                    tenant_id, id, conversation_id, phone_number, message_sid,
+                    direction, body, delivery_status, attempts, error_code, created_at
+                ) VALUES %s
+                ON CONFLICT (id) DO UPDATE SET
+                    message_sid = COALESCE(EXCLUDED.message_sid, sms_messages.message_sid),
+                    delivery_status = CASE
+                        WHEN sms_delivery_status_supersedes(EXCLUDED.delivery_status, sms_messages.delivery_status)
+                        THEN EXCLUDED.delivery_status ELSE sms_messages.delivery_status END,
+                    attempts = EXCLUDED.attempts,
+                    error_code = CASE
+                        WHEN sms_delivery_status_supersedes(EXCLUDED.delivery_status, sms_messages.delivery_status)
+                        THEN EXCLUDED.error_code ELSE sms_messages.error_code END,
+                    status_updated_at = NOW()
+                """,
+                tenant_rows,
+            )
+            if sids:
+                cursor.execute(
+                    """
+                    WITH applied AS (
+                        DELETE FROM sms_status_callbacks
+                        WHERE tenant_id = %s AND message_sid = ANY(%s)
+                        RETURNING message_sid, delivery_status, error_code
+                    )
+                    UPDATE sms_messages m
+                    SET delivery_status = applied.delivery_status,
+                        error_code = COALESCE(applied.error_code, m.error_code),
+                        status_updated_at = NOW()
+                    FROM applied
+                    WHERE m.tenant_id = %s AND m.message_sid = applied.message_sid
+                      AND sms_delivery_status_supersedes(applied.delivery_status, m.delivery_status)
+                    """,
+                    (tenant_id, sids, tenant_id),
+                )
+            if last_message_at:
+                execute_values(
+                    cursor,
+                    """
+                    UPDATE conversations c
+                    SET last_message_at = GREATEST(COALESCE(c.last_message_at, v.at), v.at)
+                    FROM (VALUES %s) AS v(tenant_id, id, at)
+                    WHERE c.id = v.id::uuid AND c.tenant_id = v.tenant_id::uuid
+                    """,
+                    [(tenant_id, conversation_id, at) for conversation_id, at in last_message_at.items()],
+                )
+
+    def _written(self, tenant_id: str, tenant_rows: List[Tuple]) -> int:
+        """Forget retry counts of rows that made it to the database"""
+        with self._lock:
+            for row in tenant_rows:
+                self._attempts.pop((tenant_id, row[1]), None)
+        return len(tenant_rows)
+
+    def _requeue(self, tenant_id: str, failed: List[Tuple[Tuple, Exception]]) -> int:
+        """
+        Put failed rows back ahead of newer ones; drop and audit those out of attempts
+
+        Returns:
+            Number of rows put back
+        """
+        retry: List[Tuple] = []
+        dropped: List[Tuple[Tuple, Exception]] = []
+        with self._lock:
+            for row, error in failed:
+                key = (tenant_id, row[1])
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= MESSAGE_FLUSH_MAX_ATTEMPTS:
+                    self._attempts.pop(key, None)
+                    dropped.append((row, error))
+                else:
+                    self._attempts[key] = attempts
+                    retry.append(row)
+            # Earlier rows first, so a newer status for the same message still wins
+            self._pending = retry + self._pending
+
+        for row, error in dropped:
+            logger.error(f"SMS message {row[1]} dropped after {MESSAGE_FLUSH_MAX_ATTEMPTS} failed flushes: {error}")
+            get_audit_service(tenant_id).log_event(
+                action="sms_message.save_failed",
+                resource_type="sms_message",
+                resource_id=row[1],
+                metadata={"error": str(error), "attempts": MESSAGE_FLUSH_MAX_ATTEMPTS, "message_sid": row[4]},
+            )
+        return len(retry)
+
+    def _ensure_thread(self) -> None:
+        """Start the background flusher on first use"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="sms-message-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Background flush loop"""
+        while True:
+            self._wakeup.wait(self._retry_delay or self.flush_interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"SMS message flusher error: {e}", exc_info=True)
+
+
+_message_buffer = MessageWriteBuffer()
+
+
+def _status_lock_key(tenant_id: str, message_sid: str) -> int:
+    """Advisory lock key serializing a message's flush with its status callbacks"""
+    return advisory_lock_key("sms_status", message_sid, tenant_id)
+
+
+def flush_message_buffer() -> int:
+    """Flush buffered SMS messages (called on shutdown)"""
+    return _message_buffer.flush()
+
+
+class ConversationCacheListener:
+    """
+    Drops cached conversations that another process changed
+
+    Conversation updates NOTIFY the 'sms_conversations' channel with
+    "<tenant_id>:<phone_number>" (migration 029); this thread LISTENs and
+    evicts the entry, so the next message in any worker reloads the state.
+    The cache TTL bounds staleness while the listener is reconnecting.
+    """
+
+    def __init__(self, dsn: Optional[str] = None):
+        self.dsn = dsn or settings.database_url
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._invalidations = 0
+
+    def ensure_started(self) -> None:
+        """Start the listener thread on first use"""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="sms-conversations", daemon=True)
+                self._thread.start()
+
+    def handle_notify(self, payload: str) -> None:
+        """Evict the conversation named by a NOTIFY payload"""
+        tenant_id, _, phone_number = payload.partition(":")
+        _conversation_cache.pop((tenant_id, phone_number))
+        self._invalidations += 1
+
+    def _listen(self) -> None:
+        """LISTEN for conversation changes until stopped, reconnecting on failure"""
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{CONVERSATIONS_CHANNEL}"')
+                # Anything cached before LISTEN took effect may be stale
+                _conversation_cache.clear()
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        for notify in conn.notifies:
+                            self.handle_notify(notify.payload)
+                        conn.notifies.clear()
+            except Exception as e:
+                logger.warning(f"SMS conversation listener error: {e}")
+                self._stop_event.wait(RECONNECT_DELAY_SECONDS)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache stats plus invalidation count"""
+        return {**_conversation_cache.stats(), "invalidations": self._invalidations}
+
+    def stop(self) -> None:
+        """Stop the listener thread"""
+        self._stop_event.set()
+
+
+_conversation_listener = ConversationCacheListener()
+get_registry().register_stats("sms_conversations", _conversation_listener.get_stats, "SMS conversation cache")
+
+
+def stop_conversation_listener() -> None:
+    """Stop the conversation cache listener (called on shutdown)"""
+    _conversation_listener.stop()
 
 
 class ConversationService:
     """Service for managing SMS conversations"""
-    
+
     def __init__(self, tenant_id: str):
         self.tenant_id = tenant_id
         self.audit = get_audit_service(tenant_id)
-    
+
     def get_or_create_conversation(self, phone_number: str, trace_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get existing conversation or create new one"""
+        """
+        Get existing conversation or create new one
+
+        Served from the write-through cache when possible (other processes'
+        changes evict it, see ConversationCacheListener); otherwise a single
+        upsert against the active-conversation unique index (migration 016)
+        both fetches and creates, and touches last_message_at.
+        """
+        cache_key = (self.tenant_id, phone_number)
+        cached = _conversation_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        _conversation_listener.ensure_started()
+
         with get_cursor(tenant_id=self.tenant_id) as cursor:
-            # Check for existing active conversation
-            cursor.execute("""
-                SELECT * FROM conversations
-                WHERE tenant_id = %s AND phone_number = %s
-                AND conversation_state NOT IN ('completed', 'cancelled')
-                ORDER BY created_at DESC
-                LIMIT 1
-            """, (self.tenant_id, phone_number))
-            existing = cursor.fetchone()
-            
-            if existing:
-                return dict(existing)
-            
-            # Create new conversation
             cursor.execute("""
                 INSERT INTO conversations (
                     tenant_id, phone_number, conversation_state, created_at, updated_at
                 ) VALUES (%s, %s, 'initial', NOW(), NOW())
-                RETURNING *
+                ON CONFLICT (tenant_id, phone_number)
+                    WHERE conversation_state NOT IN ('completed', 'cancelled')
+                DO UPDATE SET last_message_at = NOW()
+                RETURNING *, (xmax = 0) AS inserted
             """, (self.tenant_id, phone_number))
-            new_conv = cursor.fetchone()
-            
+            conversation = dict(cursor.fetchone())
+
+        inserted = conversation.pop("inserted", False)
+        if inserted:
             self.audit.log_event(
                 action="conversation.created",
                 resource_type="conversation",
-                resource_id=str(new_conv["id"]),
+                resource_id=str(conversation["id"]),
                 metadata={"phone_number": phone_number},
                 trace_id=trace_id
             )
-            
-            return dict(new_conv)
-    
+
+        _conversation_cache.set(cache_key, conversation)
+        return dict(conversation)
+
     def update_conversation_state(
         self,
         conversation_id: str,
@@ -57,44 +425,42 @@ class ConversationService:
         updates: Optional[Dict[str, Any]] = None,
         trace_id: Optional[str] = None
     ) -> bool:
-        """Update conversation state and optional fields"""
+        """Update conversation state and optional fields (write-through to cache)"""
         try:
             update_fields = ["conversation_state = %s", "updated_at = NOW()"]
-            params = [state, conversation_id, self.tenant_id]
-            
-            if updates:
-                if "service_type" in updates:
-                    update_fields.append("service_type = %s")
-                    params.insert(-2, updates["service_type"])
-                if "event_date" in updates:
-                    update_fields.append("event_date = %s")
-                    params.insert(-2, updates["event_date"])
-                if "event_time" in updates:
-                    update_fields.append("event_time = %s")
-                    params.insert(-2, updates["event_time"])
-                if "duration_hours" in updates:
-                    update_fields.append("duration_hours = %s")
-                    params.insert(-2, updates["duration_hours"])
-                if "booking_id" in updates:
-                    update_fields.append("booking_id = %s")
-                    params.insert(-2, updates["booking_id"])
-                if "client_email" in updates:
-                    update_fields.append("client_email = %s")
-                    params.insert(-2, updates["client_email"])
-                if "client_name" in updates:
-                    update_fields.append("client_name = %s")
-                    params.insert(-2, updates["client_name"])
-            
+            params: List[Any] = [state]
+            applied: Dict[str, Any] = {}
+
+            for field in _UPDATABLE_FIELDS:
+                if updates and field in updates:
+                    update_fields.append(f"{field} = %s")
+                    params.append(updates[field])
+                    applied[field] = updates[field]
+            params.extend([conversation_id, self.tenant_id])
+
             with get_cursor(tenant_id=self.tenant_id) as cursor:
                 cursor.execute(
                     f"""
                     UPDATE conversations
                     SET {', '.join(update_fields)}
                     WHERE id = %s AND tenant_id = %s
+                    RETURNING phone_number
                     """,
                     params
                 )
-            
+                row = cursor.fetchone()
+
+            if row:
+                cache_key = (self.tenant_id, row["phone_number"])
+                if state in TERMINAL_STATES:
+                    # Next message starts a fresh conversation
+                    _conversation_cache.pop(cache_key)
+                else:
+                    _conversation_cache.update(
+                        cache_key,
+                        lambda conv: {**conv, "conversation_state": state, **applied},
+                    )
+
             self.audit.log_event(
                 action="conversation.state_updated",
                 resource_type="conversation",
@@ -102,7 +468,7 @@ class ConversationService:
                 metadata={"new_state": state, "updates": updates or {}},
                 trace_id=trace_id
             )
-            
+
             return True
         except Exception as e:
             self.audit.log_event(
@@ -113,47 +479,99 @@ class ConversationService:
                 trace_id=trace_id
             )
             return False
-    
+
     def save_message(
         self,
-        conversation_id: str,
+        conversation_id: Optional[str],
         phone_number: str,
         body: str,
         direction: str,
         message_sid: Optional[str] = None,
-        trace_id: Optional[str] = None
+        trace_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        delivery_status: Optional[str] = None,
+        attempts: int = 0,
+        error_code: Optional[str] = None
     ) -> Optional[str]:
-        """Save SMS message to database"""
-        try:
-            with get_cursor(tenant_id=self.tenant_id) as cursor:
-                cursor.execute("""
-                    INSERT INTO sms_messages (
-                        tenant_id, conversation_id, phone_number, message_sid,
-                        direction, body, created_at
-                    ) VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                    RETURNING id
-                """, (self.tenant_id, conversation_id, phone_number, message_sid, direction, body))
-                message_id = cursor.fetchone()[0]
-                
-                # Update conversation last_message_at
-                cursor.execute("""
-                    UPDATE conversations
-                    SET last_message_at = NOW()
-                    WHERE id = %s AND tenant_id = %s
-                """, (conversation_id, self.tenant_id))
-            
-            return str(message_id)
-        except Exception as e:
-            self.audit.log_event(
-                action="sms_message.save_failed",
-                resource_type="sms_message",
-                metadata={"error": str(e), "conversation_id": conversation_id},
-                trace_id=trace_id
+        """
+        Queue SMS message for batched persistence
+
+        The row is written by the background flusher, which also advances
+        the conversation's last_message_at. Saving again with the same
+        message_id updates the delivery fields of the existing row.
+
+        Returns:
+            Message ID (assigned up front unless given)
+        """
+        message_id = message_id or str(uuid.uuid4())
+        _message_buffer.add((
+            self.tenant_id,
+            message_id,
+            conversation_id,
+            phone_number,
+            message_sid,
+            direction,
+            body,
+            delivery_status,
+            attempts,
+            error_code,
+            datetime.now(timezone.utc),
+        ))
+        return message_id
+
+    def update_delivery_status(
+        self,
+        message_sid: str,
+        delivery_status: str,
+        error_code: Optional[str] = None
+    ) -> bool:
+        """
+        Apply a Twilio delivery status callback
+
+        Statuses only move forward, so late, out-of-order callbacks are
+        no-ops. The message row may not be written yet (it can still be
+        buffered in this or another process); the callback is then parked in
+        sms_status_callbacks and applied by the flush that writes the row.
+        Both paths hold the message's advisory lock, so neither misses the
+        other.
+
+        Returns:
+            True if a message row was updated
+        """
+        with get_cursor(tenant_id=self.tenant_id) as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s)",
+                (_status_lock_key(self.tenant_id, message_sid),)
             )
-            return None
-    
+            cursor.execute("""
+                UPDATE sms_messages
+                SET delivery_status = %s,
+                    error_code = COALESCE(%s, error_code),
+                    status_updated_at = NOW()
+                WHERE message_sid = %s AND tenant_id = %s
+                  AND sms_delivery_status_supersedes(%s, delivery_status)
+            """, (delivery_status, error_code, message_sid, self.tenant_id, delivery_status))
+            if cursor.rowcount > 0:
+                return True
+
+            cursor.execute("""
+                INSERT INTO sms_status_callbacks (message_sid, tenant_id, delivery_status, error_code)
+                SELECT %s, %s, %s, %s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM sms_messages WHERE message_sid = %s AND tenant_id = %s
+                )
+                ON CONFLICT (message_sid) DO UPDATE SET
+                    delivery_status = EXCLUDED.delivery_status,
+                    error_code = COALESCE(EXCLUDED.error_code, sms_status_callbacks.error_code),
+                    received_at = NOW()
+                WHERE sms_delivery_status_supersedes(EXCLUDED.delivery_status, sms_status_callbacks.delivery_status)
+            """, (message_sid, self.tenant_id, delivery_status, error_code, message_sid, self.tenant_id))
+            return False
+
     def get_conversation_messages(self, conversation_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get message history for a conversation"""
+        # Read-your-writes: persist anything still buffered first
+        _message_buffer.flush()
         with get_cursor(tenant_id=self.tenant_id) as cursor:
             cursor.execute("""
                 SELECT * FROM sms_messages
@@ -163,4 +581,3 @@ class ConversationService:
             """, (conversation_id, self.tenant_id, limit))
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
-
@@ -0,0 +1,120 @@
+"""
+OMEGA Core v3.0 - Dashboard Metrics Snapshot
+Dashboard counts computed in the background instead of per request
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from app.database import get_cursor
+from app.utils.metrics import get_registry
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class DashboardMetrics:
+    """
+    Periodically recomputed dashboard counts.
+
+    The four counts are read in one round-trip by a background thread every
+    refresh_seconds, so GET /api/metrics/ never touches the database after
+    the first snapshot. Aggregated across tenants (no RLS context), as before.
+    """
+
+    def __init__(self, refresh_seconds: int = 60):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Dict[str, Any]:
+        """Recompute the snapshot now"""
+        with get_cursor(tenant_id=None) as cur:
+            cur.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM audit_log
+                     WHERE action = 'email.processed'
+                       AND created_at >= NOW() - INTERVAL '24 hours')::int AS emails_processed_24h,
+                    (SELECT COUNT(*) FROM email_retry_queue
+                     WHERE status = 'pending')::int AS retry_queue_pending,
+                    (SELECT COUNT(*) FROM unsafe_threads)::int AS unsafe_threads,
+                    (SELECT COUNT(*) FROM repair_log
+                     WHERE success = FALSE
+                       AND created_at >= NOW() - INTERVAL '24 hours')::int AS repair_failures_24h
+                """
+            )
+            snapshot = dict(cur.fetchone())
+
+        # Optional: Vee drafts by status
+        snapshot["vee_drafts_by_status"] = None
+        try:
+            with get_cursor(tenant_id=None) as cur:
+                cur.execute("SELECT status, COUNT(*)::int AS c FROM vee_drafts GROUP BY status")
+                rows = cur.fetchall()
+                if rows:
+                    snapshot["vee_drafts_by_status"] = {row["status"]: row["c"] for row in rows}
+        except Exception:
+            # Table might not exist yet
+            pass
+
+        snapshot["generated_at"] = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """Latest snapshot (computed synchronously on first use)"""
+        self._ensure_refresher()
+        with self._lock:
+            snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.refresh()
+
+    def _ensure_refresher(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dashboard-metrics", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot
+                logger.warning(f"Dashboard metrics refresh failed: {e}")
+
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """Numeric snapshot values (exported as gauges)"""
+        with self._lock:
+            return dict(self._snapshot) if self._snapshot else None
+
+    def stop(self) -> None:
+        """Stop the refresh thread"""
+        self._stop_event.set()
+
+
+_dashboard_metrics: Optional[DashboardMetrics] = None
+_dashboard_metrics_lock = threading.Lock()
+
+
+def get_dashboard_metrics() -> DashboardMetrics:
+    """Get process-wide dashboard metrics snapshot"""
+    global _dashboard_metrics
+    if _dashboard_metrics is None:
+        with _dashboard_metrics_lock:
+            if _dashboard_metrics is None:
+                _dashboard_metrics = DashboardMetrics(refresh_seconds=settings.metrics_dashboard_refresh_seconds)
+                get_registry().register_stats("dashboard", _dashboard_metrics.get_stats, "Dashboard snapshot")
+    return _dashboard_metrics
+
+
+def stop_dashboard_metrics() -> None:
+    """Stop the refresh thread if it was started (called on shutdown)"""
+    if _dashboard_metrics is not None:
+        _dashboard_metrics.stop()
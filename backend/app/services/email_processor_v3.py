@@ -2,27 +2,48 @@
 OMEGA Core v3.0 - Email Processing Pipeline v3.0
 Orchestrates all intelligence services, Nova pricing, Claude AI, and Gmail operations
 """
+import logging
+import random
 import traceback
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List
 from datetime import datetime, timezone
 import httpx
+from psycopg2.extras import Json
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.database import get_cursor
+from app.services.archivus_index import get_archivus_index
 from app.services.audit_service import get_audit_service
 from app.services.gmail_service import get_message_by_id, create_draft, send_email
-from app.services.supabase_service import get_email_by_id, mark_email_processed, get_client_by_email_hash, create_or_update_client, update_client_last_contact, get_thread_emails
+from app.services.supabase_service import mark_email_processed, create_or_update_client, update_client_last_contact
+from app.services.email_run_context import EmailRunContext
 from app.services.claude_service import ClaudeService
 from app.services.idempotency_service import get_idempotency_service
 from app.services.retry_queue_service import get_retry_queue_service
-from app.services.gmail_service import hash_email
+from app.utils.metrics import Timeline, get_registry, track_call
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Pipeline latency histograms (exported at /metrics)
+STAGE_SECONDS = get_registry().histogram(
+    "email_pipeline_stage_seconds",
+    "Time spent in each EmailProcessorV3 pipeline stage",
+    labelnames=("stage",),
+)
+PIPELINE_SECONDS = get_registry().histogram(
+    "email_pipeline_seconds",
+    "End-to-end EmailProcessorV3.process_email time by result status",
+    labelnames=("status",),
+)
 
 # Lazy-loaded intelligence services (to avoid circular imports)
 _intelligence_services = None
 
+# Services that read the thread / sender's client from the run context
+RUN_CONTEXT_SERVICES = frozenset({"thread_history", "context"})
+
 
 def _get_intelligence_services():
     """Lazy-load intelligence services"""
@@ -100,7 +121,9 @@ class EmailProcessorV3:
         self,
         email_id: str,
         account_email: str,
-        trace_id: Optional[str] = None
+        trace_id: Optional[str] = None,
+        enqueue_retry_on_error: bool = True,
+        idempotency_handled: bool = False
     ) -> Dict[str, Any]:
         """
         Main email processing pipeline
@@ -109,13 +132,40 @@ class EmailProcessorV3:
             email_id: Email ID (UUID string)
             account_email: Gmail account email
             trace_id: Request trace ID
+            enqueue_retry_on_error: Add failures to the retry queue (the retry
+                worker passes False and reschedules its own item instead)
+            idempotency_handled: The caller already dropped processed messages,
+                holds the processor lock and marks the message processed (the
+                retry worker does all three for its whole batch)
             
         Returns:
             Processing result dictionary
         """
+        timeline = Timeline(STAGE_SECONDS, trace_id)
+        result: Dict[str, Any] = {"status": "error"}
+        try:
+            result = self._process_email(
+                email_id, account_email, trace_id, enqueue_retry_on_error, idempotency_handled, timeline
+            )
+            return result
+        finally:
+            self._record_timeline(timeline, email_id, result)
+    
+    def _process_email(
+        self,
+        email_id: str,
+        account_email: str,
+        trace_id: Optional[str],
+        enqueue_retry_on_error: bool,
+        idempotency_handled: bool,
+        timeline: Timeline
+    ) -> Dict[str, Any]:
+        """Pipeline body; each stage is timed on the timeline"""
         # Check Safe Mode
-        solin = _get_solin_mcp(self.tenant_id)
-        if solin and solin.is_safe_mode_enabled():
+        with timeline.span("safe_mode"):
+            solin = _get_solin_mcp(self.tenant_id)
+            safe_mode = bool(solin and solin.is_safe_mode_enabled())
+        if safe_mode:
             self.audit.log_event(
                 action="email.processing.blocked.safe_mode",
                 resource_type="email",
@@ -129,15 +179,22 @@ class EmailProcessorV3:
                 "email_id": email_id
             }
         
-        # Get email from database
-        email = get_email_by_id(email_id, self.tenant_id)
-        if not email:
+        # Load the email, its thread and the sender's client once for the whole run
+        with timeline.span("fetch_email"):
+            try:
+                run = EmailRunContext.load(email_id, self.tenant_id)
+            except Exception:
+                run = None
+        if not run:
             return {"status": "error", "message": "Email not found", "email_id": email_id}
+        email = run.email
         
         gmail_message_id = email.get("gmail_message_id")
         
         # Check idempotency
-        if self.idempotency.is_processed(gmail_message_id):
+        with timeline.span("idempotency"):
+            already_processed = not idempotency_handled and self.idempotency.is_processed(gmail_message_id)
+        if already_processed:
             self.audit.log_event(
                 action="email.processing.skipped.idempotency",
                 resource_type="email",
@@ -148,7 +205,11 @@ class EmailProcessorV3:
             return {"status": "skipped", "message": "Already processed", "email_id": email_id}
         
         # Acquire processor lock
-        lock_acquired, lock_error = self.idempotency.acquire_processor_lock(gmail_message_id)
+        with timeline.span("lock"):
+            if idempotency_handled:
+                lock_acquired, lock_error = True, None
+            else:
+                lock_acquired, lock_error = self.idempotency.acquire_processor_lock(gmail_message_id)
         if not lock_acquired:
             self.audit.log_event(
                 action="email.processing.skipped.locked",
@@ -161,7 +222,9 @@ class EmailProcessorV3:
         
         try:
             # Check if Greg already replied
-            if self._check_greg_reply(email):
+            with timeline.span("greg_reply_check"):
+                greg_replied = self._check_greg_reply(run)
+            if greg_replied:
                 self.audit.log_event(
                     action="email.processing.skipped.greg_replied",
                     resource_type="email",
@@ -171,21 +234,24 @@ class EmailProcessorV3:
                 return {"status": "skipped", "message": "Greg already replied", "email_id": email_id}
             
             # Run all 8 intelligence services
-            analysis = self._run_intelligence_services(email)
+            with timeline.span("intelligence"):
+                analysis = self._run_intelligence_services(run)
             
             # Get pricing from Nova API (if conditions met)
             pricing = None
             if analysis.get("acceptance_detected") and analysis.get("acceptance_confidence", 0) > 0.85:
                 if not analysis.get("is_coordinator"):
-                    pricing = self._get_nova_pricing(analysis, trace_id)
+                    with timeline.span("nova"):
+                        pricing = self._get_nova_pricing(analysis, trace_id)
             
             # Generate Claude AI response
             context = self._build_context(email, analysis, pricing)
-            response_text = self.claude.generate_response(
-                email_body=email.get("body", ""),
-                context=context,
-                trace_id=trace_id
-            )
+            with timeline.span("claude"):
+                response_text = self.claude.generate_response(
+                    email_body=email.get("body", ""),
+                    context=context,
+                    trace_id=trace_id
+                )
             
             if not response_text:
                 raise Exception("Claude response generation failed")
@@ -194,139 +260,146 @@ class EmailProcessorV3:
             payment_link_url = None
             booking_id = None
             if analysis.get("acceptance_detected") and analysis.get("acceptance_confidence", 0) > 0.85:
-                try:
-                    # Get booking details from email and analysis
-                    booking_details = self._extract_booking_details(email, analysis)
+                with timeline.span("stripe"):
+                    try:
+                        # Get booking details from email and analysis
+                        booking_details = self._extract_booking_details(email, analysis)
                     
-                    # Get pricing (use Nova if available, otherwise use analysis pricing)
-                    nova_price = None
-                    if pricing and pricing.get("total_price"):
-                        nova_price = float(pricing["total_price"])
-                    else:
-                        # Fallback to default pricing
-                        nova_price = 500.00  # Default DJ service price
+                        # Get pricing (use Nova if available, otherwise use analysis pricing)
+                        nova_price = None
+                        if pricing and pricing.get("total_price"):
+                            nova_price = float(pricing["total_price"])
+                        else:
+                            # Fallback to default pricing
+                            nova_price = 500.00  # Default DJ service price
                     
-                    # Generate unique booking ID
-                    booking_id = f"booking-{email.get('gmail_thread_id', 'unknown')}-{int(time.time())}"
+                        # Generate unique booking ID
+                        booking_id = f"booking-{email.get('gmail_thread_id', 'unknown')}-{int(time.time())}"
                     
-                    # Create payment link via Stripe
-                    stripe_service = self._get_stripe_service()
-                    if stripe_service:
-                        payment_result = stripe_service.create_payment_link(
-                            amount=nova_price,
-                            description=f"DJ Services - {booking_details.get('event_type', 'Event')}",
-                            client_email=email.get("sender_email", ""),
-                            booking_id=booking_id,
-                            tenant_id=self.tenant_id
-                        )
-                        payment_link_url = payment_result.get("payment_link_url")
+                        # Create payment link via Stripe
+                        stripe_service = self._get_stripe_service()
+                        if stripe_service:
+                            payment_result = stripe_service.create_payment_link(
+                                amount=nova_price,
+                                description=f"DJ Services - {booking_details.get('event_type', 'Event')}",
+                                client_email=email.get("sender_email", ""),
+                                booking_id=booking_id,
+                                tenant_id=self.tenant_id
+                            )
+                            payment_link_url = payment_result.get("payment_link_url")
                         
-                        # Store booking in database
-                        self._create_booking_record(
-                            booking_id=booking_id,
-                            email=email,
-                            analysis=analysis,
-                            payment_link_id=payment_result.get("payment_link_id"),
-                            amount=nova_price,
-                            trace_id=trace_id
-                        )
+                            # Store booking in database
+                            self._create_booking_record(
+                                booking_id=booking_id,
+                                email=email,
+                                analysis=analysis,
+                                payment_link_id=payment_result.get("payment_link_id"),
+                                amount=nova_price,
+                                trace_id=trace_id
+                            )
                         
-                        # Add payment link to response text
-                        response_text += f"\n\n💳 **Secure Payment Link**: {payment_link_url}\n"
-                        response_text += f"Amount: ${nova_price:.2f}\n"
-                        response_text += f"This link is secure and expires in 30 days.\n"
+                            # Add payment link to response text
+                            response_text += f"\n\n💳 **Secure Payment Link**: {payment_link_url}\n"
+                            response_text += f"Amount: ${nova_price:.2f}\n"
+                            response_text += f"This link is secure and expires in 30 days.\n"
                         
-                        # Log payment link creation
+                            # Log payment link creation
+                            self.audit.log_event(
+                                action="payment_link_added_to_draft",
+                                resource_type="email",
+                                resource_id=email.get("gmail_message_id"),
+                                metadata={
+                                    "payment_link_id": payment_result.get("payment_link_id"),
+                                    "amount": nova_price,
+                                    "booking_id": booking_id
+                                },
+                                trace_id=trace_id
+                            )
+                    except Exception as e:
+                        # Log error but don't fail email processing
                         self.audit.log_event(
-                            action="payment_link_added_to_draft",
+                            action="payment_link_creation_failed",
                             resource_type="email",
-                            resource_id=email.get("gmail_message_id"),
-                            metadata={
-                                "payment_link_id": payment_result.get("payment_link_id"),
-                                "amount": nova_price,
-                                "booking_id": booking_id
-                            },
+                            metadata={"error": str(e), "booking_id": booking_id},
                             trace_id=trace_id
                         )
-                except Exception as e:
-                    # Log error but don't fail email processing
-                    self.audit.log_event(
-                        action="payment_link_creation_failed",
-                        resource_type="email",
-                        metadata={"error": str(e), "booking_id": booking_id},
-                        trace_id=trace_id
-                    )
             
             # Check for calendar conflicts (before auto-send)
             conflicts = None
             calendar_service = _get_calendar_service(self.tenant_id)
             if calendar_service and analysis.get("event_date"):
-                conflicts = calendar_service.detect_conflicts(
-                    start_time=analysis["event_date"],
-                    end_time=analysis.get("event_end_date") or analysis["event_date"],
-                    trace_id=trace_id
-                )
+                with timeline.span("calendar"):
+                    conflicts = calendar_service.detect_conflicts(
+                        start_time=analysis["event_date"],
+                        end_time=analysis.get("event_end_date") or analysis["event_date"],
+                        trace_id=trace_id
+                    )
             
             # Determine send behavior (auto-send vs draft)
             send_behavior = self._determine_send_behavior(email, analysis, conflicts)
             
             # Send or create draft
-            if send_behavior["auto_send"]:
-                message_id = send_email(
-                    account_email=account_email,
-                    to=email.get("sender_email", ""),
-                    subject=f"Re: {email.get('subject', '')}",
-                    body=response_text,
-                    thread_id=email.get("gmail_thread_id"),
-                    tenant_id=self.tenant_id,
-                    trace_id=trace_id
-                )
-                action = "email.sent"
-            else:
-                # Add conflict warning if needed
-                if conflicts and conflicts.get("has_conflict"):
-                    response_text = f"[CALENDAR CONFLICT WARNING: {conflicts.get('conflict_count', 0)} conflicting event(s) detected. Please review before sending.]\n\n{response_text}"
+            with timeline.span("draft_send"):
+                if send_behavior["auto_send"]:
+                    message_id = send_email(
+                        account_email=account_email,
+                        to=email.get("sender_email", ""),
+                        subject=f"Re: {email.get('subject', '')}",
+                        body=response_text,
+                        thread_id=email.get("gmail_thread_id"),
+                        tenant_id=self.tenant_id,
+                        trace_id=trace_id
+                    )
+                    action = "email.sent"
+                else:
+                    # Add conflict warning if needed
+                    if conflicts and conflicts.get("has_conflict"):
+                        response_text = f"[CALENDAR CONFLICT WARNING: {conflicts.get('conflict_count', 0)} conflicting event(s) detected. Please review before sending.]\n\n{response_text}"
                 
-                message_id = create_draft(
-                    account_email=account_email,
-                    to=email.get("sender_email", ""),
-                    subject=f"Re: {email.get('subject', '')}",
-                    body=response_text,
-                    thread_id=email.get("gmail_thread_id"),
-                    tenant_id=self.tenant_id,
-                    trace_id=trace_id
-                )
-                action = "email.draft.created"
+                    message_id = create_draft(
+                        account_email=account_email,
+                        to=email.get("sender_email", ""),
+                        subject=f"Re: {email.get('subject', '')}",
+                        body=response_text,
+                        thread_id=email.get("gmail_thread_id"),
+                        tenant_id=self.tenant_id,
+                        trace_id=trace_id
+                    )
+                    action = "email.draft.created"
             
             # Mark email as processed
-            mark_email_processed(email_id, self.tenant_id)
-            self.idempotency.mark_processed(gmail_message_id, trace_id)
+            with timeline.span("mark_processed"):
+                mark_email_processed(email_id, self.tenant_id)
+                if not idempotency_handled:
+                    self.idempotency.mark_processed(gmail_message_id, trace_id)
             
             # Update client record
             sender_email = email.get("sender_email", "")
             if sender_email:
-                email_hash = hash_email(sender_email)
-                client_id = create_or_update_client(
-                    email=sender_email,
-                    name=email.get("sender_name"),
-                    tenant_id=self.tenant_id,
-                    trace_id=trace_id
-                )
-                if client_id:
-                    update_client_last_contact(client_id, self.tenant_id)
+                with timeline.span("client_update"):
+                    client_id = create_or_update_client(
+                        email=sender_email,
+                        name=email.get("sender_name"),
+                        tenant_id=self.tenant_id,
+                        trace_id=trace_id,
+                        client_id=run.client_id
+                    )
+                    if client_id:
+                        update_client_last_contact(client_id, self.tenant_id)
             
             # Auto-block calendar on acceptance (if no conflicts)
             if analysis.get("acceptance_detected") and analysis.get("acceptance_confidence", 0) > 0.85:
                 if calendar_service and not (conflicts and conflicts.get("has_conflict")):
-                    calendar_service.auto_block_for_confirmed_gig(
-                        event_date=analysis.get("event_date"),
-                        client_name=analysis.get("client_name") or email.get("sender_name", "Client"),
-                        venue=analysis.get("venue"),
-                        location=analysis.get("location"),
-                        duration_hours=analysis.get("duration_hours", 6.0),
-                        client_id=client_id if sender_email else None,
-                        trace_id=trace_id
-                    )
+                    with timeline.span("calendar_block"):
+                        calendar_service.auto_block_for_confirmed_gig(
+                            event_date=analysis.get("event_date"),
+                            client_name=analysis.get("client_name") or email.get("sender_name", "Client"),
+                            venue=analysis.get("venue"),
+                            location=analysis.get("location"),
+                            duration_hours=analysis.get("duration_hours", 6.0),
+                            client_id=client_id if sender_email else None,
+                            trace_id=trace_id
+                        )
             
             # Audit log success
             self.audit.log_event(
@@ -355,13 +428,14 @@ class EmailProcessorV3:
             error_message = str(e)
             error_stack = traceback.format_exc()
             
-            self.retry_queue.enqueue_retry(
-                email_id=email_id,
-                gmail_message_id=gmail_message_id,
-                account_email=account_email,
-                error_message=error_message,
-                trace_id=trace_id
-            )
+            if enqueue_retry_on_error:
+                self.retry_queue.enqueue_retry(
+                    email_id=email_id,
+                    gmail_message_id=gmail_message_id,
+                    account_email=account_email,
+                    error_message=error_message,
+                    trace_id=trace_id
+                )
             
             # Log error
             self.audit.log_event(
@@ -381,21 +455,138 @@ class EmailProcessorV3:
                 "status": "error",
                 "message": error_message,
                 "email_id": email_id,
-                "retry_enqueued": True
+                "retry_enqueued": enqueue_retry_on_error
             }
         
         finally:
-            # Always release lock
-            self.idempotency.release_processor_lock(gmail_message_id)
+            # Always release lock (unless the caller holds it)
+            if not idempotency_handled:
+                with timeline.span("lock_release"):
+                    self.idempotency.release_processor_lock(gmail_message_id)
     
-    def _check_greg_reply(self, email: Dict[str, Any]) -> bool:
-        """Check if Greg already replied to this thread"""
+    def stream_draft(
+        self,
+        email_id: str,
+        account_email: str,
+        trace_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a reply draft for an email, streaming the text as it is written
+        
+        Runs the intelligence services and Claude like process_email, but
+        streams sanitized text for a live preview and always saves a Gmail
+        draft (never auto-sends, no payment link). The email is not marked
+        processed, so this can also regenerate a draft. The processor lock is
+        not taken: nothing here sends or changes processing state, and
+        holding it for the whole stream would make a concurrent Pub/Sub run
+        for the same message skip it with nothing left to retry it.
+        
+        Args:
+            email_id: Email ID (UUID string)
+            account_email: Gmail account email
+            trace_id: Request trace ID
+            
+        Yields:
+            ClaudeService.stream_response events, then
+            {"type": "draft", "draft_id": ...} once the draft is saved
+            (or {"type": "error", "error": ...})
+        """
+        solin = _get_solin_mcp(self.tenant_id)
+        if solin and solin.is_safe_mode_enabled():
+            yield {"type": "error", "error": "Safe Mode enabled"}
+            return
+        
         try:
-            thread_id = email.get("gmail_thread_id")
-            if not thread_id:
-                return False
+            run = EmailRunContext.load(email_id, self.tenant_id)
+        except Exception:
+            run = None
+        if not run:
+            yield {"type": "error", "error": "Email not found"}
+            return
+        email = run.email
+        gmail_message_id = email.get("gmail_message_id")
+        
+        analysis = self._run_intelligence_services(run)
+        context = self._build_context(email, analysis, None)
+        
+        response_text = None
+        for event in self.claude.stream_response(
+            email_body=email.get("body", ""),
+            context=context,
+            trace_id=trace_id
+        ):
+            if event["type"] == "done":
+                response_text = event["text"]
+            yield event
+        if not response_text:
+            return
+        
+        draft_id = create_draft(
+            account_email=account_email,
+            to=email.get("sender_email", ""),
+            subject=f"Re: {email.get('subject', '')}",
+            body=response_text,
+            thread_id=email.get("gmail_thread_id"),
+            tenant_id=self.tenant_id,
+            trace_id=trace_id
+        )
+        if not draft_id:
+            yield {"type": "error", "error": "Draft could not be saved"}
+            return
+        
+        self.audit.log_event(
+            action="email.draft.streamed",
+            resource_type="email",
+            resource_id=email_id,
+            metadata={"gmail_message_id": gmail_message_id, "message_id": draft_id},
+            trace_id=trace_id
+        )
+        yield {"type": "draft", "draft_id": draft_id}
+    
+    def _record_timeline(self, timeline: Timeline, email_id: str, result: Dict[str, Any]) -> None:
+        """
+        Record end-to-end latency and sample the timeline for slow-email forensics
+        
+        Every email slower than pipeline_slow_email_ms is stored, plus a random
+        pipeline_timeline_sample_rate fraction of the rest.
+        """
+        try:
+            total_seconds = timeline.elapsed()
+            status = result.get("status", "error")
+            PIPELINE_SECONDS.observe(total_seconds, status=status)
             
-            thread_emails = get_thread_emails(thread_id, self.tenant_id, limit=50)
+            total_ms = total_seconds * 1000
+            slow = total_ms >= settings.pipeline_slow_email_ms
+            if not slow and random.random() >= settings.pipeline_timeline_sample_rate:
+                return
+            if slow:
+                logger.warning(f"Slow email {email_id} ({total_ms:.0f} ms, trace {timeline.trace_id}): {timeline.spans}")
+            
+            with get_cursor(tenant_id=self.tenant_id) as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO email_pipeline_timelines (
+                        tenant_id, email_id, trace_id, status, total_ms, slow, spans
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    (
+                        self.tenant_id,
+                        email_id,
+                        timeline.trace_id,
+                        status,
+                        round(total_ms, 3),
+                        slow,
+                        Json(timeline.spans),
+                    )
+                )
+        except Exception as e:
+            # Fail-open: instrumentation never affects processing
+            logger.debug(f"Pipeline timeline recording failed: {e}")
+    
+    def _check_greg_reply(self, run: EmailRunContext) -> bool:
+        """Check if Greg already replied to this thread"""
+        try:
+            thread_emails = run.thread_emails
             
             # Check if any email in thread is from Greg's emails
             greg_emails = [
@@ -411,7 +602,7 @@ class EmailProcessorV3:
         except Exception:
             return False
     
-    def _run_intelligence_services(self, email: Dict[str, Any]) -> Dict[str, Any]:
+    def _run_intelligence_services(self, run: EmailRunContext) -> Dict[str, Any]:
         """Run all 8 intelligence services"""
         analysis = {}
         services = _get_intelligence_services()
@@ -419,7 +610,10 @@ class EmailProcessorV3:
         for service_name, service_class in services.items():
             try:
                 service = service_class(self.tenant_id)
-                result = service.analyze(email)
+                if service_name in RUN_CONTEXT_SERVICES:
+                    result = service.analyze(run.email, run=run)
+                else:
+                    result = service.analyze(run.email)
                 analysis.update(result)
             except Exception as e:
                 # Fail-open: intelligence service failures don't block processing
@@ -457,7 +651,7 @@ class EmailProcessorV3:
                 "location": analysis.get("location"),
             }
             
-            with httpx.Client(timeout=10.0) as client:
+            with track_call("nova"), httpx.Client(timeout=10.0) as client:
                 response = client.post(
                     f"{settings.nova_api_url}/api/pricing/calculate",
                     json=event_info,
@@ -499,8 +693,45 @@ class EmailProcessorV3:
         if pricing:
             context["pricing"] = pricing
         
+        related = self._recall_related_threads(email, analysis)
+        if related:
+            context["related_threads"] = related
+        
         return context
     
+    def _recall_related_threads(self, email: Dict[str, Any], analysis: Dict[str, Any]) -> List[str]:
+        """Summaries of similar past threads from the Archivus recall index (fail-open)"""
+        if settings.archivus_recall_results <= 0:
+            return []
+        query = " ".join(
+            str(part) for part in (
+                analysis.get("venue"),
+                analysis.get("location"),
+                analysis.get("event_type"),
+                email.get("subject"),
+                (email.get("body") or "")[:500],
+            ) if part
+        )
+        if not query:
+            return []
+        try:
+            results = get_archivus_index().related_threads(
+                tenant_id=self.tenant_id,
+                query=query,
+                limit=settings.archivus_recall_results,
+                exclude_thread_id=email.get("gmail_thread_id"),
+                min_score=settings.archivus_recall_min_score,
+            )
+        except Exception as e:
+            # Fail-open: recall is optional context
+            self.audit.log_event(
+                action="archivus.recall.error",
+                resource_type="email",
+                metadata={"error": str(e)}
+            )
+            return []
+        return [result["summary"] for result in results if result.get("summary")]
+    
     def _determine_send_behavior(
         self,
         email: Dict[str, Any],
@@ -605,18 +836,31 @@ class EmailProcessorV3:
         self,
         email_id: str,
         gmail_message_id: str,
-        account_email: str
+        account_email: str,
+        trace_id: Optional[str] = None,
+        idempotency_handled: bool = False
     ) -> Dict[str, Any]:
         """
         Retry processing a failed email (called by retry worker)
         
+        Failures are not re-enqueued; the worker reschedules its own queue item.
+        
         Args:
             email_id: Email ID
             gmail_message_id: Gmail message ID
             account_email: Account email
+            trace_id: Trace ID of the original attempt
+            idempotency_handled: The worker checked, locked and marks this
+                message as part of its batch
             
         Returns:
             Processing result
         """
-        return self.process_email(email_id, account_email, trace_id=None)
+        return self.process_email(
+            email_id,
+            account_email,
+            trace_id=trace_id,
+            enqueue_retry_on_error=False,
+            idempotency_handled=idempotency_handled
+        )
 
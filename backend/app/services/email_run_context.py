@@ -0,0 +1,129 @@
+"""
+OMEGA Core v3.0 - Email Run Context
+Per-run unit of work: the email, its thread and the sender's client, loaded once
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.database import get_cursor
+from app.services.supabase_service import decrypt_client
+
+# Thread emails loaded per run (same cap as get_thread_emails)
+THREAD_LIMIT = 50
+
+# Client timestamp columns (to_jsonb renders them as ISO strings)
+CLIENT_TIMESTAMP_FIELDS = ("created_at", "updated_at", "last_contact_at")
+
+# The email row plus its thread come back as native rows; the sender's client
+# rides along on the email row as JSON. The client is matched on the stored
+# emails.email_hash, falling back to hashing sender_email the way hash_email does.
+_LOAD_SQL = """
+    WITH target AS (
+        SELECT * FROM emails WHERE id = %(email_id)s AND tenant_id = %(tenant_id)s
+    )
+    SELECT t.*, TRUE AS is_target, 0::bigint AS thread_position,
+           (
+               SELECT to_jsonb(c) FROM clients c
+               WHERE c.tenant_id = t.tenant_id
+                 AND c.email_hash = COALESCE(
+                     t.email_hash,
+                     encode(sha256(convert_to(lower(btrim(t.sender_email)), 'UTF8')), 'hex')
+                 )
+               LIMIT 1
+           ) AS run_client
+    FROM target t
+    UNION ALL
+    SELECT th.*
+    FROM (
+        SELECT e.*, FALSE AS is_target,
+               ROW_NUMBER() OVER (ORDER BY e.received_at ASC) AS thread_position,
+               NULL::jsonb AS run_client
+        FROM emails e
+        JOIN target t ON e.tenant_id = t.tenant_id AND e.gmail_thread_id = t.gmail_thread_id
+        ORDER BY e.received_at ASC
+        LIMIT %(thread_limit)s
+    ) th
+    ORDER BY is_target DESC, thread_position ASC
+"""
+
+# Bookkeeping columns added by _LOAD_SQL
+_EXTRA_COLUMNS = ("is_target", "thread_position", "run_client")
+
+
+def _parse_timestamp(value: Any) -> Any:
+    """ISO string from JSON back to datetime (other values unchanged)"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+class EmailRunContext:
+    """
+    Data shared by every stage of one email processing run
+
+    Loaded with a single query (email, thread, sender's client) at the start of
+    the run; intelligence services and later pipeline stages read from here
+    instead of fetching the same rows again. Client PII is decrypted on first use.
+    """
+
+    def __init__(
+        self,
+        tenant_id: str,
+        email: Dict[str, Any],
+        thread_emails: List[Dict[str, Any]],
+        client_row: Optional[Dict[str, Any]] = None,
+    ):
+        self.tenant_id = tenant_id
+        self.email = email
+        self.thread_emails = thread_emails
+        self._client_row = client_row
+        self._client: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def load(cls, email_id: str, tenant_id: str, thread_limit: int = THREAD_LIMIT) -> Optional["EmailRunContext"]:
+        """
+        Load the run context in one round-trip
+
+        Args:
+            email_id: Email UUID
+            tenant_id: Tenant UUID
+            thread_limit: Max thread emails to load
+
+        Returns:
+            EmailRunContext, or None if the email does not exist
+        """
+        with get_cursor(tenant_id=tenant_id) as cur:
+            cur.execute(
+                _LOAD_SQL,
+                {"email_id": email_id, "tenant_id": tenant_id, "thread_limit": thread_limit},
+            )
+            rows = [dict(row) for row in cur.fetchall()]
+
+        if not rows or not rows[0]["is_target"]:
+            return None
+
+        client_row = rows[0]["run_client"]
+        for row in rows:
+            for column in _EXTRA_COLUMNS:
+                row.pop(column, None)
+
+        email = rows[0]
+        thread_emails = rows[1:] if email.get("gmail_thread_id") else []
+        return cls(tenant_id, email, thread_emails, client_row)
+
+    @property
+    def client(self) -> Optional[Dict[str, Any]]:
+        """Sender's client record (decrypted), or None if unknown"""
+        if self._client is None and self._client_row is not None:
+            client = dict(self._client_row)
+            for field in CLIENT_TIMESTAMP_FIELDS:
+                client[field] = _parse_timestamp(client.get(field))
+            self._client = decrypt_client(client)
+        return self._client
+
+    @property
+    def client_id(self) -> Optional[str]:
+        """Sender's client ID without decrypting anything"""
+        return self._client_row.get("id") if self._client_row else None
@@ -5,11 +5,11 @@ Gmail API integration for message retrieval, sending, and draft management
 import hashlib
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
-from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from app.database import get_cursor
 from app.services.audit_service import get_audit_service
+from app.services.google_credentials import get_delegated_credentials, GMAIL_SCOPES
 from app.config import get_settings
 
 settings = get_settings()
@@ -21,11 +21,8 @@ _gmail_services = {}
 def _get_gmail_service(account_email: str) -> Any:
     """Get or create Gmail API service instance"""
     if account_email not in _gmail_services:
-        credentials = service_account.Credentials.from_service_account_file(
-            settings.google_credentials_path,
-            scopes=['https://www.googleapis.com/auth/gmail.readonly', 'https://www.googleapis.com/auth/gmail.send', 'https://www.googleapis.com/auth/gmail.compose']
-        )
-        delegated_credentials = credentials.with_subject(account_email)
+        # Shared credentials are refreshed ahead of expiry in the background
+        delegated_credentials = get_delegated_credentials(account_email, GMAIL_SCOPES)
         _gmail_services[account_email] = build('gmail', 'v1', credentials=delegated_credentials)
     return _gmail_services[account_email]
 
@@ -5,26 +5,24 @@ Full Google JWT verification, SHA256 fingerprinting, database locking
 import base64
 import hashlib
 import json
-from typing import Dict, Any, Optional, Tuple
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 import jwt
-from jwt import PyJWKClient
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
 from app.database import get_cursor
 from app.services.audit_service import get_audit_service
+from app.services.google_jwt import GOOGLE_ISSUERS, get_google_jwt_verifier
+from app.services.lock_manager import get_lock_manager
+from app.utils.fingerprint_filter import RotatingBloomFilter
+from app.utils.metrics import get_registry
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-# Google JWKS client
-_jwks_client = None
-
-
-def _get_jwks_client() -> PyJWKClient:
-    """Get or create Google JWKS client"""
-    global _jwks_client
-    if _jwks_client is None:
-        _jwks_client = PyJWKClient("https://www.googleapis.com/oauth2/v3/certs")
-    return _jwks_client
+WEBHOOK_LOCK_NAMESPACE = "gmail_webhook"
 
 
 def verify_jwt_token(token: str, tenant_id: str) -> Tuple[bool, Optional[str]]:
@@ -38,106 +36,36 @@ def verify_jwt_token(token: str, tenant_id: str) -> Tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    audit = get_audit_service(tenant_id)
-    
     try:
-        # Decode without verification first to get header
-        unverified = jwt.decode(token, options={"verify_signature": False})
-        
-        # Validate issuer
-        iss = unverified.get("iss")
-        if iss not in ["https://accounts.google.com", "accounts.google.com"]:
-            error_msg = f"Invalid issuer: {iss}"
-            audit.log_event(
-                action="gmail.webhook.jwt.invalid",
-                resource_type="webhook",
-                metadata={"error": error_msg, "issuer": iss}
-            )
-            return False, error_msg
-        
-        # Validate audience
-        aud = unverified.get("aud")
-        if aud != settings.gmail_webhook_url:
-            error_msg = f"Invalid audience: {aud}"
-            audit.log_event(
-                action="gmail.webhook.jwt.invalid",
-                resource_type="webhook",
-                metadata={"error": error_msg, "audience": aud}
-            )
-            return False, error_msg
-        
-        # Validate subject (service account)
-        sub = unverified.get("sub")
-        if sub != settings.gmail_pubsub_service_account:
-            error_msg = f"Invalid subject: {sub}"
-            audit.log_event(
-                action="gmail.webhook.jwt.invalid",
-                resource_type="webhook",
-                metadata={"error": error_msg, "subject": sub}
-            )
-            return False, error_msg
-        
-        # Validate expiration with clock skew tolerance
-        now = datetime.now(timezone.utc)
-        exp = datetime.fromtimestamp(unverified.get("exp", 0), tz=timezone.utc)
-        iat = datetime.fromtimestamp(unverified.get("iat", 0), tz=timezone.utc)
-        
-        if exp < now - timedelta(minutes=5):  # 5-minute clock skew tolerance
-            error_msg = "Token expired"
-            audit.log_event(
-                action="gmail.webhook.jwt.invalid",
-                resource_type="webhook",
-                metadata={"error": error_msg, "exp": exp.isoformat(), "now": now.isoformat()}
-            )
-            return False, error_msg
-        
-        if iat > now + timedelta(minutes=5):  # Future-dated token
-            error_msg = "Token issued in future"
-            audit.log_event(
-                action="gmail.webhook.jwt.invalid",
-                resource_type="webhook",
-                metadata={"error": error_msg, "iat": iat.isoformat(), "now": now.isoformat()}
-            )
-            return False, error_msg
-        
-        # Verify signature using JWKS
-        jwks_client = _get_jwks_client()
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
-        
-        jwt.decode(
+        # One verified decode (cached JWKS keys; repeat tokens skip RSA entirely)
+        get_google_jwt_verifier().verify(
             token,
-            signing_key.key,
-            algorithms=["RS256"],
             audience=settings.gmail_webhook_url,
-            issuer=iss,
+            issuers=GOOGLE_ISSUERS,
+            subject=settings.gmail_pubsub_service_account,
         )
-        
         return True, None
         
     except jwt.ExpiredSignatureError:
         error_msg = "Token expired"
-        audit.log_event(
-            action="gmail.webhook.jwt.invalid",
-            resource_type="webhook",
-            metadata={"error": error_msg}
-        )
-        return False, error_msg
+        action = "gmail.webhook.jwt.invalid"
+    except jwt.InvalidAudienceError as e:
+        error_msg = f"Invalid audience: {str(e)}"
+        action = "gmail.webhook.jwt.invalid"
     except jwt.InvalidTokenError as e:
-        error_msg = f"Invalid token: {str(e)}"
-        audit.log_event(
-            action="gmail.webhook.jwt.invalid",
-            resource_type="webhook",
-            metadata={"error": error_msg}
-        )
-        return False, error_msg
+        # Issuer/subject/future-iat messages are already descriptive
+        error_msg = str(e) if str(e).startswith(("Invalid issuer", "Invalid subject", "Token issued")) else f"Invalid token: {str(e)}"
+        action = "gmail.webhook.jwt.invalid"
     except Exception as e:
         error_msg = f"JWT verification error: {str(e)}"
-        audit.log_event(
-            action="gmail.webhook.jwt.error",
-            resource_type="webhook",
-            metadata={"error": error_msg}
-        )
-        return False, error_msg
+        action = "gmail.webhook.jwt.error"
+    
+    get_audit_service(tenant_id).log_event(
+        action=action,
+        resource_type="webhook",
+        metadata={"error": error_msg}
+    )
+    return False, error_msg
 
 
 def compute_request_fingerprint(message_id: str, publish_time: str, data_length: int) -> str:
@@ -178,6 +106,244 @@ def parse_pubsub_message(message_data: str) -> Dict[str, Any]:
         raise ValueError(f"Failed to parse Pub/Sub message: {str(e)}")
 
 
+class FingerprintStore:
+    """
+    In-process replay pre-check in front of sync_log.
+
+    A rotating bloom filter (warmed from recent sync_log rows on first use)
+    answers "definitely new" without touching the database; only possible
+    hits fall through to the sync_log SELECT. New fingerprints are inserted
+    by a background flusher in batches.
+
+    Replay protection is therefore per process: the filter only knows
+    fingerprints seen by this process (plus the warm-up window), and sync_log
+    rows are written asynchronously, so a replay delivered to a different
+    worker is not rejected. It is only noticed by the sync_log unique
+    constraint at flush time (audited as gmail.webhook.replay.late) after it
+    was accepted. Duplicate processing of the email itself is prevented
+    downstream by the per-message idempotency check and processor lock.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 86400,
+        capacity: int = 100000,
+        flush_interval_seconds: float = 1.0,
+    ):
+        self.window_seconds = window_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.filter = RotatingBloomFilter(capacity=capacity, rotation_seconds=window_seconds)
+        self._pending: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self._warmed = False
+        self._flusher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._stats = {
+            "checks": 0,
+            "definite_new": 0,
+            "db_checks": 0,
+            "replays": 0,
+            "flushed": 0,
+            "late_duplicates": 0,
+        }
+
+    @staticmethod
+    def _key(fingerprint: str, tenant_id: str) -> str:
+        return f"{tenant_id}:{fingerprint}"
+
+    def warm(self) -> int:
+        """
+        Load fingerprints from the recent window of sync_log
+
+        Returns:
+            Number of fingerprints loaded
+        """
+        with self._warm_lock:
+            if self._warmed:
+                return 0
+            self._warmed = True
+            try:
+                with get_cursor(tenant_id=None) as cur:
+                    cur.execute(
+                        """
+                        SELECT tenant_id, fingerprint
+                        FROM sync_log
+                        WHERE sync_type = 'gmail_webhook'
+                        AND created_at > NOW() - (%s * INTERVAL '1 second')
+                        """,
+                        (self.window_seconds,)
+                    )
+                    rows = cur.fetchall()
+                return self.filter.add_many(
+                    self._key(row["fingerprint"], str(row["tenant_id"])) for row in rows
+                )
+            except Exception as e:
+                # Fail-open: an unwarmed filter just means more "new" answers
+                logger.warning(f"Fingerprint filter warm-up failed: {e}")
+                return 0
+
+    def check(self, fingerprint: str, tenant_id: str) -> bool:
+        """
+        Check if fingerprint was already seen by this process (replay detection)
+
+        Not definitive across processes: a fingerprint first seen by another
+        worker (after the warm-up, or still waiting for its flush) reads as
+        new here (see the class docstring).
+
+        Returns:
+            True if replay detected
+        """
+        if not self._warmed:
+            self.warm()
+
+        key = self._key(fingerprint, tenant_id)
+        with self._lock:
+            self._stats["checks"] += 1
+            if key in self._pending:
+                self._stats["replays"] += 1
+                return True
+
+        if not self.filter.might_contain(key):
+            with self._lock:
+                self._stats["definite_new"] += 1
+            return False
+
+        # Possible hit: confirm against sync_log
+        with self._lock:
+            self._stats["db_checks"] += 1
+        try:
+            with get_cursor(tenant_id=tenant_id) as cur:
+                cur.execute(
+                    "SELECT 1 FROM sync_log WHERE fingerprint = %s AND tenant_id = %s LIMIT 1",
+                    (fingerprint, tenant_id)
+                )
+                replay = cur.fetchone() is not None
+        except Exception:
+            # Fail-open: if check fails, allow processing
+            return False
+
+        if replay:
+            with self._lock:
+                self._stats["replays"] += 1
+        return replay
+
+    def store(self, fingerprint: str, tenant_id: str, metadata: Dict[str, Any]) -> None:
+        """Record fingerprint in the filter and queue its sync_log row"""
+        key = self._key(fingerprint, tenant_id)
+        self.filter.add(key)
+        with self._lock:
+            self._pending[key] = (
+                tenant_id,
+                "gmail_webhook",
+                fingerprint,
+                json.dumps(metadata),
+                datetime.now(timezone.utc),
+            )
+        self._ensure_flusher()
+
+    def flush(self) -> int:
+        """
+        Insert pending fingerprints into sync_log
+
+        Returns:
+            Number of rows inserted
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        by_tenant: Dict[str, List[Tuple]] = {}
+        for row in pending.values():
+            by_tenant.setdefault(row[0], []).append(row)
+
+        inserted = 0
+        for tenant_id, rows in by_tenant.items():
+            try:
+                with get_cursor(tenant_id=tenant_id) as cur:
+                    returned = execute_values(
+                        cur,
+                        """
+                        INSERT INTO sync_log (tenant_id, sync_type, fingerprint, metadata, created_at)
+                        VALUES %s
+                        ON CONFLICT (fingerprint) DO NOTHING
+                        RETURNING fingerprint
+                        """,
+                        rows,
+                        fetch=True,
+                    )
+                inserted += len(returned)
+                late_duplicates = len(rows) - len(returned)
+                if late_duplicates:
+                    # Replays that reached another process first
+                    with self._lock:
+                        self._stats["late_duplicates"] += late_duplicates
+                    get_audit_service(tenant_id).log_event(
+                        action="gmail.webhook.replay.late",
+                        resource_type="webhook",
+                        metadata={"count": late_duplicates}
+                    )
+            except Exception as e:
+                # Fail-open: fingerprint storage failure doesn't block processing
+                logger.warning(f"Fingerprint flush failed for tenant {tenant_id}: {e}")
+
+        with self._lock:
+            self._stats["flushed"] += inserted
+        return inserted
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flusher on first use"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name="fingerprint-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        """Background flush loop"""
+        while not self._stop_event.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Fingerprint flusher error: {e}", exc_info=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get filter hit/miss counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["filter"] = self.filter.stats()
+        return stats
+
+
+_fingerprint_store: Optional[FingerprintStore] = None
+_fingerprint_store_lock = threading.Lock()
+
+
+def get_fingerprint_store() -> FingerprintStore:
+    """Get process-wide fingerprint store"""
+    global _fingerprint_store
+    if _fingerprint_store is None:
+        with _fingerprint_store_lock:
+            if _fingerprint_store is None:
+                _fingerprint_store = FingerprintStore(
+                    window_seconds=settings.gmail_fingerprint_window_seconds,
+                    capacity=settings.gmail_fingerprint_filter_capacity,
+                )
+                get_registry().register_stats("webhook_fingerprints", _fingerprint_store.get_stats, "Gmail webhook replay fingerprint store")
+    return _fingerprint_store
+
+
+def flush_fingerprints() -> int:
+    """Flush pending fingerprints (called on shutdown)"""
+    if _fingerprint_store is None:
+        return 0
+    return _fingerprint_store.flush()
+
+
 def check_fingerprint(fingerprint: str, tenant_id: str) -> bool:
     """
     Check if fingerprint already exists (replay detection)
@@ -190,35 +356,16 @@ def check_fingerprint(fingerprint: str, tenant_id: str) -> bool:
         True if fingerprint exists (replay detected), False otherwise
     """
     try:
-        with get_cursor(tenant_id=tenant_id) as cur:
-            cur.execute(
-                "SELECT 1 FROM sync_log WHERE fingerprint = %s AND tenant_id = %s LIMIT 1",
-                (fingerprint, tenant_id)
-            )
-            return cur.fetchone() is not None
+        return get_fingerprint_store().check(fingerprint, tenant_id)
     except Exception:
         # Fail-open: if check fails, allow processing
         return False
 
 
 def store_fingerprint(fingerprint: str, tenant_id: str, metadata: Dict[str, Any]) -> None:
-    """Store fingerprint in sync_log table"""
+    """Store fingerprint (batched into sync_log by the background flusher)"""
     try:
-        with get_cursor(tenant_id=tenant_id) as cur:
-            cur.execute(
-                """
-                INSERT INTO sync_log (tenant_id, sync_type, fingerprint, metadata, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (fingerprint) DO NOTHING
-                """,
-                (
-                    tenant_id,
-                    "gmail_webhook",
-                    fingerprint,
-                    json.dumps(metadata),
-                    datetime.now(timezone.utc),
-                )
-            )
+        get_fingerprint_store().store(fingerprint, tenant_id, metadata)
     except Exception:
         # Fail-open: fingerprint storage failure doesn't block processing
         pass
@@ -236,17 +383,9 @@ def acquire_lock(gmail_message_id: str, tenant_id: str) -> Tuple[bool, Optional[
         Tuple of (lock_acquired, error_message)
     """
     try:
-        # Hash message ID to get lock key
-        lock_key = hash(gmail_message_id) & 0x7FFFFFFF  # Ensure positive integer
-        
-        with get_cursor(tenant_id=tenant_id) as cur:
-            cur.execute("SELECT pg_try_advisory_lock(%s)", (lock_key,))
-            acquired = cur.fetchone()[0]
-            
-            if not acquired:
-                return False, "Lock already exists (idempotency)"
-            
-            return True, None
+        if not get_lock_manager().try_acquire(WEBHOOK_LOCK_NAMESPACE, gmail_message_id, tenant_id):
+            return False, "Lock already exists (idempotency)"
+        return True, None
     except Exception as e:
         return False, f"Lock acquisition failed: {str(e)}"
 
@@ -254,9 +393,7 @@ def acquire_lock(gmail_message_id: str, tenant_id: str) -> Tuple[bool, Optional[
 def release_lock(gmail_message_id: str, tenant_id: str) -> None:
     """Release PostgreSQL advisory lock"""
     try:
-        lock_key = hash(gmail_message_id) & 0x7FFFFFFF
-        with get_cursor(tenant_id=tenant_id) as cur:
-            cur.execute("SELECT pg_advisory_unlock(%s)", (lock_key,))
+        get_lock_manager().release(WEBHOOK_LOCK_NAMESPACE, gmail_message_id, tenant_id)
     except Exception:
         # Fail-open: lock release failure is logged but doesn't crash
         pass
@@ -0,0 +1,219 @@
+"""
+OMEGA Core v3.0 - Google Credential Manager
+Delegated service account credentials with proactive background token refresh
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from google.oauth2 import service_account
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from app.utils.metrics import get_registry
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+GMAIL_SCOPES = [
+    'https://www.googleapis.com/auth/gmail.readonly',
+    'https://www.googleapis.com/auth/gmail.send',
+    'https://www.googleapis.com/auth/gmail.compose',
+]
+CALENDAR_SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+CredentialKey = Tuple[str, Tuple[str, ...]]
+
+
+class GoogleCredentialManager:
+    """
+    Tracks token expiry per delegated subject and refreshes tokens before they expire.
+
+    One credentials object is kept per (subject, scopes) pair and shared by every
+    API client built on it, so a token refreshed by the background thread is
+    immediately visible to all worker threads.
+    """
+
+    def __init__(
+        self,
+        credentials_path: str,
+        refresh_margin_seconds: int = 300,
+        check_interval_seconds: int = 30,
+    ):
+        self.credentials_path = credentials_path
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self.check_interval_seconds = check_interval_seconds
+        self._credentials: Dict[CredentialKey, service_account.Credentials] = {}
+        self._refresh_locks: Dict[CredentialKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._stats = {
+            "refresh_count": 0,
+            "refresh_failures": 0,
+            "refresh_latency_ms_total": 0.0,
+            "last_refresh_latency_ms": None,
+            "last_error": None,
+            "last_error_subject": None,
+        }
+
+    def get_credentials(self, subject: str, scopes: Sequence[str]) -> service_account.Credentials:
+        """
+        Get delegated credentials for subject, refreshing synchronously only on first use
+
+        Args:
+            subject: Workspace account to impersonate
+            scopes: OAuth scopes
+
+        Returns:
+            Shared delegated credentials object
+        """
+        key = (subject, tuple(sorted(scopes)))
+        credentials = self._credentials.get(key)
+        if credentials is None:
+            with self._lock:
+                credentials = self._credentials.get(key)
+                if credentials is None:
+                    base = service_account.Credentials.from_service_account_file(
+                        self.credentials_path,
+                        scopes=list(scopes),
+                    )
+                    credentials = base.with_subject(subject)
+                    self._credentials[key] = credentials
+                    self._refresh_locks[key] = threading.Lock()
+
+        self._ensure_refresher()
+
+        # Cold start (or the refresher fell behind): pay the round-trip once here
+        if not credentials.valid:
+            self._refresh(key, credentials)
+        return credentials
+
+    def refresh_due(self) -> int:
+        """
+        Refresh every tracked credential that expires within the refresh margin
+
+        Returns:
+            Number of credentials refreshed
+        """
+        with self._lock:
+            tracked = list(self._credentials.items())
+
+        refreshed = 0
+        for key, credentials in tracked:
+            if self._needs_refresh(credentials):
+                if self._refresh(key, credentials):
+                    refreshed += 1
+        return refreshed
+
+    def _needs_refresh(self, credentials: service_account.Credentials) -> bool:
+        """Check if token is missing or expires within the refresh margin"""
+        if not credentials.token or credentials.expiry is None:
+            return True
+        # google-auth stores expiry as naive UTC
+        return credentials.expiry - self.refresh_margin <= datetime.utcnow()
+
+    def _refresh(self, key: CredentialKey, credentials: service_account.Credentials) -> bool:
+        """Refresh a single credential under its per-key lock"""
+        lock = self._refresh_locks[key]
+        with lock:
+            # Another thread may have refreshed while we waited
+            if credentials.valid and not self._needs_refresh(credentials):
+                return False
+
+            started = time.perf_counter()
+            try:
+                credentials.refresh(GoogleAuthRequest())
+                latency_ms = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    self._stats["refresh_count"] += 1
+                    self._stats["refresh_latency_ms_total"] += latency_ms
+                    self._stats["last_refresh_latency_ms"] = latency_ms
+                return True
+            except Exception as e:
+                with self._lock:
+                    self._stats["refresh_failures"] += 1
+                    self._stats["last_error"] = str(e)
+                    self._stats["last_error_subject"] = key[0]
+                logger.warning(f"Google token refresh failed for {key[0]}: {e}")
+                return False
+
+    def _ensure_refresher(self) -> None:
+        """Start the background refresh thread on first use"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop_event.clear()
+            self._refresher = threading.Thread(
+                target=self._run_refresher,
+                name="google-credential-refresher",
+                daemon=True,
+            )
+            self._refresher.start()
+
+    def _run_refresher(self) -> None:
+        """Background loop refreshing tokens ahead of expiry"""
+        while not self._stop_event.wait(self.check_interval_seconds):
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logger.error(f"Google credential refresher error: {e}", exc_info=True)
+
+    def stop(self) -> None:
+        """Stop the background refresh thread"""
+        self._stop_event.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get refresh statistics
+
+        Returns:
+            Dict with refresh counts, failures, latency and per-subject expiry
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            tracked = list(self._credentials.items())
+
+        latency_total = stats.pop("refresh_latency_ms_total")
+        stats["avg_refresh_latency_ms"] = (
+            latency_total / stats["refresh_count"] if stats["refresh_count"] else None
+        )
+        stats["credentials"] = [
+            {
+                "subject": subject,
+                "scopes": list(scopes),
+                "expires_at": credentials.expiry.isoformat() + "Z" if credentials.expiry else None,
+                "valid": credentials.valid,
+            }
+            for (subject, scopes), credentials in tracked
+        ]
+        return stats
+
+
+_credential_manager: Optional[GoogleCredentialManager] = None
+_credential_manager_lock = threading.Lock()
+
+
+def get_credential_manager() -> GoogleCredentialManager:
+    """Get process-wide Google credential manager"""
+    global _credential_manager
+    if _credential_manager is None:
+        with _credential_manager_lock:
+            if _credential_manager is None:
+                _credential_manager = GoogleCredentialManager(
+                    credentials_path=settings.google_credentials_path,
+                    refresh_margin_seconds=settings.google_token_refresh_margin_seconds,
+                    check_interval_seconds=settings.google_token_refresh_interval_seconds,
+                )
+                get_registry().register_stats("google_credentials", _credential_manager.get_stats, "Google delegated credential refresh")
+    return _credential_manager
+
+
+def get_delegated_credentials(subject: str, scopes: List[str]) -> service_account.Credentials:
+    """Get shared delegated credentials for subject (proactively refreshed)"""
+    return get_credential_manager().get_credentials(subject, scopes)
@@ -0,0 +1,242 @@
+"""
+OMEGA Core v3.0 - Google JWT Verifier
+Pub/Sub push token verification with cached JWKS keys and verified-token cache
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+import httpx
+import jwt
+from jwt.algorithms import RSAAlgorithm
+from app.utils.ttl_cache import TTLCache
+from app.utils.metrics import get_registry, track_call
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleJWTVerifier:
+    """
+    Verifies Google-signed RS256 JWTs.
+
+    Signing keys are cached by kid and refreshed by a background thread ahead
+    of the Cache-Control expiry Google sends with the JWKS, so the request path
+    only fetches synchronously on a cold start or an unknown kid. Tokens that
+    have already passed verification are remembered by SHA-256 digest until
+    their exp, so Pub/Sub retries of the same push skip RSA verification.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str = GOOGLE_JWKS_URL,
+        leeway_seconds: int = 300,
+        refresh_ahead_seconds: int = 600,
+        default_max_age_seconds: int = 3600,
+        min_refetch_interval_seconds: float = 30.0,
+        verified_cache_size: int = 10000,
+    ):
+        self.jwks_url = jwks_url
+        self.leeway_seconds = leeway_seconds
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.default_max_age_seconds = default_max_age_seconds
+        self.min_refetch_interval_seconds = min_refetch_interval_seconds
+        self._keys: Dict[str, Any] = {}
+        self._max_age = float(default_max_age_seconds)
+        self._expires_at = 0.0
+        self._last_fetch_at = 0.0
+        self._fetch_lock = threading.Lock()
+        self._refresh_wakeup = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._verified = TTLCache(max_entries=verified_cache_size)
+        self._stats = {
+            "verified": 0,
+            "cache_hits": 0,
+            "jwks_fetches": 0,
+            "jwks_fetch_failures": 0,
+            "sync_fetches": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def load_jwks(self, jwks: Dict[str, Any], max_age_seconds: Optional[int] = None) -> int:
+        """
+        Replace cached keys with a JWKS document
+
+        Returns:
+            Number of keys loaded
+        """
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            kid = jwk.get("kid")
+            if kid and jwk.get("kty") == "RSA":
+                keys[kid] = RSAAlgorithm.from_jwk(json.dumps(jwk))
+        max_age = max_age_seconds if max_age_seconds is not None else self.default_max_age_seconds
+        self._keys = keys
+        self._max_age = float(max_age)
+        self._expires_at = time.monotonic() + max_age
+        return len(keys)
+
+    def _fetch(self) -> None:
+        """Fetch the JWKS document and honour its Cache-Control max-age"""
+        with self._fetch_lock:
+            self._last_fetch_at = time.monotonic()
+            try:
+                with track_call("google_jwks"):
+                    response = httpx.get(self.jwks_url, timeout=5.0)
+                    response.raise_for_status()
+                match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+                self.load_jwks(response.json(), int(match.group(1)) if match else None)
+                self._stats["jwks_fetches"] += 1
+            except Exception as e:
+                self._stats["jwks_fetch_failures"] += 1
+                logger.warning(f"Google JWKS fetch failed: {e}")
+                raise
+
+    def _get_key(self, kid: Optional[str]) -> Any:
+        """Get signing key for kid, fetching synchronously only if it is unknown"""
+        key = self._keys.get(kid)
+        if key is not None:
+            self._ensure_refresher()
+            return key
+
+        # Cold start or key rotation we have not seen yet; rate-limit refetches
+        # so garbage kids cannot hammer Google
+        if not self._keys or time.monotonic() - self._last_fetch_at >= self.min_refetch_interval_seconds:
+            self._stats["sync_fetches"] += 1
+            self._fetch()
+            self._ensure_refresher()
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return key
+
+    def _ensure_refresher(self) -> None:
+        """Start the background refresh thread on first use"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._fetch_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._run_refresher, name="google-jwks-refresher", daemon=True)
+            self._refresher.start()
+
+    def _next_refresh_delay(self) -> float:
+        """
+        Seconds until the next background refresh
+
+        Refreshes refresh_ahead_seconds before expiry, or at half the max-age
+        when that is shorter, and never sooner than min_refetch_interval_seconds
+        (a max-age of 0 or below the refresh-ahead margin would otherwise make
+        the refresher fetch in a tight loop).
+        """
+        ahead = min(self.refresh_ahead_seconds, self._max_age / 2)
+        delay = self._expires_at - ahead - time.monotonic()
+        return max(self.min_refetch_interval_seconds, delay)
+
+    def _run_refresher(self) -> None:
+        """Refresh keys ahead of the cached JWKS expiry (see _next_refresh_delay)"""
+        while True:
+            if self._refresh_wakeup.wait(self._next_refresh_delay()):
+                return
+            try:
+                self._fetch()
+            except Exception:
+                # Keep serving cached keys; try again shortly
+                if self._refresh_wakeup.wait(self.min_refetch_interval_seconds):
+                    return
+
+    def stop(self) -> None:
+        """Stop the background refresh thread"""
+        self._refresh_wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------------
+
+    def verify(
+        self,
+        token: str,
+        audience: str,
+        issuers: Sequence[str] = GOOGLE_ISSUERS,
+        subject: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Verify a token's signature and claims
+
+        Args:
+            token: JWT string
+            audience: Expected aud claim
+            issuers: Accepted iss values
+            subject: Expected sub claim (optional)
+
+        Returns:
+            Verified claims
+
+        Raises:
+            jwt.InvalidTokenError: If the token is invalid (subclass gives the reason)
+        """
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self._verified.get(digest)
+        if cached is not None and cached["aud"] == audience and (subject is None or cached.get("sub") == subject):
+            self._stats["cache_hits"] += 1
+            return cached
+
+        header = jwt.get_unverified_header(token)
+        key = self._get_key(header.get("kid"))
+
+        # Single verified decode: signature, exp, iat, aud with clock skew leeway
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=audience,
+            leeway=self.leeway_seconds,
+            options={"require": ["exp", "iat", "iss", "aud"]},
+        )
+
+        if claims["iss"] not in issuers:
+            raise jwt.InvalidIssuerError(f"Invalid issuer: {claims['iss']}")
+        if subject is not None and claims.get("sub") != subject:
+            raise jwt.InvalidTokenError(f"Invalid subject: {claims.get('sub')}")
+        if claims["iat"] > time.time() + self.leeway_seconds:
+            raise jwt.ImmatureSignatureError("Token issued in future")
+
+        self._stats["verified"] += 1
+        ttl = claims["exp"] - time.time()
+        if ttl > 0:
+            self._verified.set(digest, claims, ttl_seconds=ttl)
+        return claims
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get verification and key refresh counters"""
+        return {
+            **self._stats,
+            "cached_keys": sorted(self._keys),
+            "jwks_expires_in_seconds": max(0.0, self._expires_at - time.monotonic()) if self._keys else None,
+            "verified_tokens_cached": len(self._verified),
+        }
+
+
+_verifier: Optional[GoogleJWTVerifier] = None
+_verifier_lock = threading.Lock()
+
+
+def get_google_jwt_verifier() -> GoogleJWTVerifier:
+    """Get process-wide Google JWT verifier"""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = GoogleJWTVerifier()
+                get_registry().register_stats("google_jwt", _verifier.get_stats, "Pub/Sub JWT verifier")
+    return _verifier
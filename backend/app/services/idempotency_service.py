@@ -3,14 +3,26 @@ OMEGA Core v3.0 - Idempotency Service
 Global idempotency layer and processor locks
 """
 import uuid
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Set, Tuple
 from datetime import datetime, timezone
+from psycopg2.extras import execute_values
 from app.database import get_cursor
 from app.services.audit_service import get_audit_service
+from app.services.lock_manager import get_lock_manager
+from app.utils.ttl_cache import TTLCache
 from app.config import get_settings
 
 settings = get_settings()
 
+PROCESSOR_LOCK_NAMESPACE = "email_processor"
+
+# Recently processed (tenant_id, gmail_message_id) pairs. Processing is
+# permanent, so only positive answers are cached.
+_recently_processed = TTLCache(
+    max_entries=settings.processed_cache_max_entries,
+    ttl_seconds=settings.processed_cache_ttl_seconds,
+)
+
 
 class IdempotencyService:
     """Idempotency checks and processor locks"""
@@ -29,16 +41,71 @@ class IdempotencyService:
         Returns:
             True if already processed, False otherwise
         """
+        if (self.tenant_id, gmail_message_id) in _recently_processed:
+            return True
         try:
             with get_cursor(tenant_id=self.tenant_id) as cur:
                 cur.execute(
                     "SELECT 1 FROM processed_messages WHERE gmail_message_id = %s AND tenant_id = %s LIMIT 1",
                     (gmail_message_id, self.tenant_id)
                 )
-                return cur.fetchone() is not None
+                processed = cur.fetchone() is not None
         except Exception:
             # Fail-open: if check fails, allow processing
             return False
+        if processed:
+            _recently_processed.set((self.tenant_id, gmail_message_id), True)
+        return processed
+    
+    def processed_ids(self, gmail_message_ids: Sequence[str]) -> Set[str]:
+        """
+        Check many messages in one query
+        
+        Args:
+            gmail_message_ids: Gmail message IDs
+            
+        Returns:
+            Subset of IDs that have already been processed
+        """
+        processed = {
+            message_id for message_id in gmail_message_ids
+            if (self.tenant_id, message_id) in _recently_processed
+        }
+        unknown = list({message_id for message_id in gmail_message_ids if message_id not in processed})
+        if not unknown:
+            return processed
+        
+        try:
+            with get_cursor(tenant_id=self.tenant_id) as cur:
+                cur.execute(
+                    """
+                    SELECT gmail_message_id FROM processed_messages
+                    WHERE tenant_id = %s AND gmail_message_id = ANY(%s)
+                    """,
+                    (self.tenant_id, unknown)
+                )
+                rows = cur.fetchall()
+        except Exception:
+            # Fail-open: if check fails, allow processing
+            return processed
+        
+        for row in rows:
+            processed.add(row["gmail_message_id"])
+            _recently_processed.set((self.tenant_id, row["gmail_message_id"]), True)
+        return processed
+    
+    def filter_unprocessed(self, gmail_message_ids: Sequence[str]) -> List[str]:
+        """
+        Drop already-processed messages from a batch (order preserved)
+        
+        Args:
+            gmail_message_ids: Gmail message IDs
+            
+        Returns:
+            IDs still to be processed
+        """
+        processed = self.processed_ids(gmail_message_ids)
+        return [message_id for message_id in gmail_message_ids if message_id not in processed]
     
     def mark_processed(self, gmail_message_id: str, trace_id: Optional[str] = None) -> None:
         """
@@ -65,6 +132,8 @@ class IdempotencyService:
                     )
                 )
             
+            _recently_processed.set((self.tenant_id, gmail_message_id), True)
+            
             self.audit.log_event(
                 action="idempotency.marked_processed",
                 resource_type="email",
@@ -80,6 +149,55 @@ class IdempotencyService:
                 trace_id=trace_id
             )
     
+    def mark_processed_many(self, gmail_message_ids: Sequence[str], trace_id: Optional[str] = None) -> int:
+        """
+        Mark many messages as processed with one multi-row insert
+        
+        Args:
+            gmail_message_ids: Gmail message IDs
+            trace_id: Request trace ID
+            
+        Returns:
+            Number of messages newly marked
+        """
+        unique_ids = list(dict.fromkeys(gmail_message_ids))
+        if not unique_ids:
+            return 0
+        now = datetime.now(timezone.utc)
+        try:
+            with get_cursor(tenant_id=self.tenant_id) as cur:
+                inserted = execute_values(
+                    cur,
+                    """
+                    INSERT INTO processed_messages (id, tenant_id, gmail_message_id, processed_at, created_at)
+                    VALUES %s
+                    ON CONFLICT (gmail_message_id) DO NOTHING
+                    RETURNING gmail_message_id
+                    """,
+                    [(str(uuid.uuid4()), self.tenant_id, message_id, now, now) for message_id in unique_ids],
+                    fetch=True,
+                )
+            
+            for message_id in unique_ids:
+                _recently_processed.set((self.tenant_id, message_id), True)
+            
+            self.audit.log_event(
+                action="idempotency.marked_processed_batch",
+                resource_type="email",
+                metadata={"requested": len(unique_ids), "inserted": len(inserted)},
+                trace_id=trace_id
+            )
+            return len(inserted)
+        except Exception as e:
+            # Fail-open: idempotency marking failure doesn't block processing
+            self.audit.log_event(
+                action="idempotency.mark.error",
+                resource_type="email",
+                metadata={"error": str(e), "batch_size": len(unique_ids)},
+                trace_id=trace_id
+            )
+            return 0
+    
     def acquire_processor_lock(self, gmail_message_id: str) -> Tuple[bool, Optional[str]]:
         """
         Acquire processor lock on gmail_message_id
@@ -91,20 +209,32 @@ class IdempotencyService:
             Tuple of (lock_acquired, error_message)
         """
         try:
-            # Hash message ID to get lock key
-            lock_key = hash(gmail_message_id) & 0x7FFFFFFF  # Ensure positive integer
-            
-            with get_cursor(tenant_id=self.tenant_id) as cur:
-                cur.execute("SELECT pg_try_advisory_lock(%s)", (lock_key,))
-                acquired = cur.fetchone()[0]
-                
-                if not acquired:
-                    return False, "Lock already exists (idempotency)"
-                
-                return True, None
+            if not get_lock_manager().try_acquire(PROCESSOR_LOCK_NAMESPACE, gmail_message_id, self.tenant_id):
+                return False, "Lock already exists (idempotency)"
+            return True, None
         except Exception as e:
             return False, f"Lock acquisition failed: {str(e)}"
     
+    def acquire_processor_locks(self, gmail_message_ids: List[str]) -> List[str]:
+        """
+        Acquire processor locks for a batch of messages in one round-trip
+        
+        Args:
+            gmail_message_ids: Gmail message IDs
+            
+        Returns:
+            Message IDs that were locked (others are being processed elsewhere)
+        """
+        try:
+            return get_lock_manager().try_acquire_many(PROCESSOR_LOCK_NAMESPACE, gmail_message_ids, self.tenant_id)
+        except Exception as e:
+            self.audit.log_event(
+                action="idempotency.lock.error",
+                resource_type="email",
+                metadata={"error": str(e), "batch_size": len(gmail_message_ids)}
+            )
+            return []
+    
     def release_processor_lock(self, gmail_message_id: str) -> None:
         """
         Release processor lock
@@ -113,12 +243,18 @@ class IdempotencyService:
             gmail_message_id: Gmail message ID
         """
         try:
-            lock_key = hash(gmail_message_id) & 0x7FFFFFFF
-            with get_cursor(tenant_id=self.tenant_id) as cur:
-                cur.execute("SELECT pg_advisory_unlock(%s)", (lock_key,))
+            get_lock_manager().release(PROCESSOR_LOCK_NAMESPACE, gmail_message_id, self.tenant_id)
         except Exception:
             # Fail-open: lock release failure is logged but doesn't crash
             pass
+    
+    def release_processor_locks(self, gmail_message_ids: List[str]) -> None:
+        """Release processor locks for a batch of messages in one round-trip"""
+        try:
+            get_lock_manager().release_many(PROCESSOR_LOCK_NAMESPACE, gmail_message_ids, self.tenant_id)
+        except Exception:
+            # Fail-open: a dropped lock connection releases its locks server-side
+            pass
 
 
 def get_idempotency_service(tenant_id: Optional[str] = None) -> IdempotencyService:
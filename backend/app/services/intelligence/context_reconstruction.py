@@ -5,6 +5,7 @@ Client context building from database history
 from typing import Dict, Any, Optional
 from app.services.supabase_service import get_client_by_email_hash
 from app.services.gmail_service import hash_email
+from app.services.email_run_context import EmailRunContext
 
 
 class ContextReconstructionService:
@@ -13,12 +14,13 @@ class ContextReconstructionService:
     def __init__(self, tenant_id: str):
         self.tenant_id = tenant_id
     
-    def analyze(self, email: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze(self, email: Dict[str, Any], run: Optional[EmailRunContext] = None) -> Dict[str, Any]:
         """
         Analyze email and build client context
         
         Args:
             email: Email dictionary
+            run: Run context with the client already loaded (skips the query)
             
         Returns:
             Analysis dictionary with client_context, client_preferences
@@ -28,9 +30,11 @@ class ContextReconstructionService:
             return {"client_context": None}
         
         try:
-            # Get client from database
-            email_hash = hash_email(sender_email)
-            client = get_client_by_email_hash(email_hash, self.tenant_id)
+            # Get client (preloaded for this run, else from database)
+            if run is not None:
+                client = run.client
+            else:
+                client = get_client_by_email_hash(hash_email(sender_email), self.tenant_id)
             
             if not client:
                 return {"client_context": None}
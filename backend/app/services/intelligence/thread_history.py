@@ -2,9 +2,10 @@
 OMEGA Core v3.0 - Thread History Service
 Thread reconstruction from database with chronological ordering
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from app.services.supabase_service import get_thread_emails
+from app.services.email_run_context import EmailRunContext
 
 
 class ThreadHistoryService:
@@ -13,12 +14,13 @@ class ThreadHistoryService:
     def __init__(self, tenant_id: str):
         self.tenant_id = tenant_id
     
-    def analyze(self, email: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze(self, email: Dict[str, Any], run: Optional[EmailRunContext] = None) -> Dict[str, Any]:
         """
         Analyze email thread history
         
         Args:
             email: Email dictionary
+            run: Run context with the thread already loaded (skips the query)
             
         Returns:
             Analysis dictionary with thread_history
@@ -28,8 +30,11 @@ class ThreadHistoryService:
             return {"thread_history": []}
         
         try:
-            # Get thread emails from database
-            thread_emails = get_thread_emails(thread_id, self.tenant_id, limit=50)
+            # Get thread emails (preloaded for this run, else from database)
+            if run is not None:
+                thread_emails = run.thread_emails
+            else:
+                thread_emails = get_thread_emails(thread_id, self.tenant_id, limit=50)
             
             # Build thread history (chronological)
             thread_history = [
@@ -0,0 +1,452 @@
+"""
+OMEGA Core v3.0 - LLM Gateway
+Provider-agnostic completions with per-task routing, latency hedging and
+failover across Anthropic and OpenAI models
+"""
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence
+from anthropic import Anthropic
+from app.services.llm_usage import LLMUsageRecorder, get_llm_usage_recorder
+from app.utils.metrics import get_registry, track_call
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LLM_HEDGES = get_registry().counter(
+    "llm_gateway_hedges_total",
+    "Backup LLM requests fired because the first exceeded its latency percentile",
+    labelnames=("task",),
+)
+LLM_FAILOVERS = get_registry().counter(
+    "llm_gateway_failovers_total",
+    "LLM requests that failed and moved on to the next provider",
+    labelnames=("task", "provider"),
+)
+
+# Latencies kept per provider for percentiles
+LATENCY_WINDOW = 200
+
+# Tasks: "draft" = client-facing replies (primary models), "summary" = internal summaries (fast models)
+TASK_DRAFT = "draft"
+TASK_SUMMARY = "summary"
+
+_anthropic_client: Optional[Anthropic] = None
+
+
+def get_anthropic_client() -> Anthropic:
+    """Get or create the shared Anthropic client"""
+    global _anthropic_client
+    if _anthropic_client is None:
+        _anthropic_client = Anthropic(api_key=settings.anthropic_api_key)
+    return _anthropic_client
+
+
+def anthropic_system_blocks(system_prompt: str) -> List[Dict[str, Any]]:
+    """
+    System prompt as content blocks, marked as a prompt-cache breakpoint
+
+    The system prompt is identical for every call, so the provider can serve
+    it from its prompt cache instead of re-processing it (prompts shorter
+    than the model's minimum cacheable length are simply not cached).
+    """
+    block: Dict[str, Any] = {"type": "text", "text": system_prompt}
+    if settings.claude_prompt_cache_enabled:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+class LLMGatewayError(Exception):
+    """Raised when every provider for a task failed"""
+
+
+@dataclass
+class LLMResult:
+    """One completed LLM call"""
+    text: str
+    provider: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency_ms: float = 0.0
+    fallback: bool = False  # answered by a provider other than the task's first
+
+
+class LLMProvider(ABC):
+    """A model behind one vendor API"""
+
+    vendor = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @property
+    def name(self) -> str:
+        return f"{self.vendor}:{self.model}"
+
+    @abstractmethod
+    def complete(self, system: str, messages: List[Dict[str, Any]], max_tokens: int) -> LLMResult:
+        """
+        Run one completion (blocking)
+
+        Args:
+            system: System prompt
+            messages: Conversation messages ({"role", "content"})
+            max_tokens: Output token limit
+
+        Returns:
+            LLMResult (latency filled in by the gateway)
+        """
+
+
+class AnthropicProvider(LLMProvider):
+    """Claude via the Messages API (system prompt cached)"""
+
+    vendor = "anthropic"
+
+    def __init__(self, model: str, client: Optional[Anthropic] = None):
+        super().__init__(model)
+        self.client = client or get_anthropic_client()
+
+    def complete(self, system: str, messages: List[Dict[str, Any]], max_tokens: int) -> LLMResult:
+        with track_call("anthropic"):
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=anthropic_system_blocks(system),
+                messages=messages,
+            )
+        usage = response.usage
+        return LLMResult(
+            text=response.content[0].text if response.content else "",
+            provider=self.name,
+            model=response.model or self.model,
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+            cache_write_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        )
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions (prompt caching is automatic on their side)"""
+
+    vendor = "openai"
+
+    def __init__(self, model: str, api_key: str):
+        super().__init__(model)
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key)
+
+    def complete(self, system: str, messages: List[Dict[str, Any]], max_tokens: int) -> LLMResult:
+        with track_call("openai"):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=[{"role": "system", "content": system}, *messages],
+            )
+        usage = response.usage
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        return LLMResult(
+            text=(response.choices[0].message.content or "") if response.choices else "",
+            provider=self.name,
+            model=response.model or self.model,
+            input_tokens=prompt_tokens - cached,
+            output_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cache_read_tokens=cached,
+        )
+
+
+class LatencyTracker:
+    """Rolling per-provider latencies and error counts"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self.calls += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency at quantile q (0..1) of the window, or None if empty"""
+        with self._lock:
+            ordered = sorted(self._latencies)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMGateway:
+    """
+    Routes each task to an ordered list of providers
+
+    The first provider gets the request. If it has not answered by its
+    hedge_percentile latency (default_hedge_delay until min_samples calls
+    have been seen), the next provider is asked too and the first answer
+    wins; the slower call is left to finish in the background (and is still
+    billed and recorded). A provider that errors hands over to the next one
+    immediately. At most two requests for one call are in flight.
+    """
+
+    def __init__(
+        self,
+        routes: Dict[str, Sequence[LLMProvider]],
+        hedge_percentile: float = 0.95,
+        min_samples: int = 20,
+        default_hedge_delay: float = 10.0,
+        hedging_enabled: bool = True,
+        max_workers: int = 8,
+        usage: Optional[LLMUsageRecorder] = None,
+    ):
+        self.routes = {task: list(providers) for task, providers in routes.items()}
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.hedging_enabled = hedging_enabled
+        self.usage = usage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-gateway")
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._trackers_lock = threading.Lock()
+        self._stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "failovers": 0, "failures": 0}
+
+    def _tracker(self, provider: LLMProvider) -> LatencyTracker:
+        tracker = self._trackers.get(provider.name)
+        if tracker is None:
+            with self._trackers_lock:
+                tracker = self._trackers.setdefault(provider.name, LatencyTracker())
+        return tracker
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """Seconds to wait on a provider before hedging"""
+        tracker = self._tracker(provider)
+        if tracker.samples < self.min_samples:
+            return self.default_hedge_delay
+        return tracker.quantile(self.hedge_percentile) or self.default_hedge_delay
+
+    def complete(
+        self,
+        task: str,
+        system: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: Optional[int] = None,
+        operation: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        trace_id: Optional[str] = None,
+    ) -> LLMResult:
+        """
+        Complete a prompt on the task's providers
+
+        Args:
+            task: Route name (TASK_DRAFT, TASK_SUMMARY)
+            system: System prompt
+            messages: Conversation messages
+            max_tokens: Output token limit (default claude_max_tokens)
+            operation: Call site for usage reports (default: task)
+            tenant_id: Tenant UUID for usage accounting
+            trace_id: Request trace ID
+
+        Returns:
+            LLMResult from the first provider to answer successfully
+
+        Raises:
+            LLMGatewayError: If every provider failed
+        """
+        queue = list(self.routes.get(task) or self.routes[TASK_DRAFT])
+        max_tokens = max_tokens or settings.claude_max_tokens
+        operation = operation or task
+        self._stats["calls"] += 1
+
+        pending: Dict[Future, LLMProvider] = {}
+        launched_at: Dict[Future, float] = {}
+        errors: List[str] = []
+        first = queue[0]
+
+        def launch(provider: LLMProvider) -> None:
+            future = self._executor.submit(
+                self._call, provider, system, messages, max_tokens, operation, tenant_id, trace_id
+            )
+            pending[future] = provider
+            launched_at[future] = time.perf_counter()
+
+        launch(queue.pop(0))
+        while pending:
+            timeout = None
+            if self.hedging_enabled and queue and len(pending) == 1:
+                (future, provider), = pending.items()
+                timeout = max(0.0, self.hedge_delay(provider) - (time.perf_counter() - launched_at[future]))
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self._stats["hedges"] += 1
+                LLM_HEDGES.inc(task=task)
+                launch(queue.pop(0))
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    continue
+                if provider is not first:
+                    result.fallback = True
+                    if not errors:
+                        self._stats["hedge_wins"] += 1
+                return result
+
+            # Everything that finished failed: move on unless a hedge is still running
+            if not pending and queue:
+                self._stats["failovers"] += 1
+                LLM_FAILOVERS.inc(task=task, provider=queue[0].name)
+                launch(queue.pop(0))
+
+        self._stats["failures"] += 1
+        raise LLMGatewayError(f"All providers failed for {task}: {'; '.join(errors)}")
+
+    def _call(
+        self,
+        provider: LLMProvider,
+        system: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        operation: str,
+        tenant_id: Optional[str],
+        trace_id: Optional[str],
+    ) -> LLMResult:
+        """Run one provider call, tracking latency and recording usage"""
+        tracker = self._tracker(provider)
+        started = time.perf_counter()
+        result = None
+        try:
+            result = provider.complete(system, messages, max_tokens)
+            elapsed = time.perf_counter() - started
+            result.latency_ms = elapsed * 1000
+            tracker.record(elapsed)
+            return result
+        except Exception:
+            tracker.record_error()
+            raise
+        finally:
+            if self.usage is not None and tenant_id:
+                self.usage.record(
+                    tenant_id=tenant_id,
+                    model=result.model if result else provider.model,
+                    operation=operation,
+                    input_tokens=result.input_tokens if result else 0,
+                    output_tokens=result.output_tokens if result else 0,
+                    cache_read_tokens=result.cache_read_tokens if result else 0,
+                    cache_write_tokens=result.cache_write_tokens if result else 0,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    success=result is not None,
+                    trace_id=trace_id,
+                )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gateway counters, routes and per-provider latency percentiles"""
+        providers = {}
+        for name, tracker in list(self._trackers.items()):
+            p50, p99 = tracker.quantile(0.50), tracker.quantile(0.99)
+            providers[name] = {
+                "calls": tracker.calls,
+                "errors": tracker.errors,
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            }
+        return {
+            **self._stats,
+            "routes": {task: [route.name for route in route_providers] for task, route_providers in self.routes.items()},
+            "providers": providers,
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting calls (in-flight calls finish in the background)"""
+        self._executor.shutdown(wait=False)
+
+
+def build_routes() -> Dict[str, List[LLMProvider]]:
+    """
+    Task routes from settings
+
+    Drafts go to claude_model. With use_hybrid_llm, summaries go to the fast
+    models first. hybrid_llm_fallback_enabled adds backups (OpenAI when
+    openai_api_key is set; the primary Claude model for summaries).
+    """
+    cache: Dict[str, LLMProvider] = {}
+
+    def anthropic(model: str) -> LLMProvider:
+        return cache.setdefault(f"anthropic:{model}", AnthropicProvider(model))
+
+    def openai(model: str) -> LLMProvider:
+        if f"openai:{model}" not in cache:
+            cache[f"openai:{model}"] = OpenAIProvider(model, settings.openai_api_key)
+        return cache[f"openai:{model}"]
+
+    use_openai = bool(settings.openai_api_key)
+    draft = [anthropic(settings.claude_model)]
+    if use_openai:
+        draft.append(openai(settings.openai_model))
+
+    if settings.use_hybrid_llm:
+        summary = [anthropic(settings.claude_fast_model)]
+        if use_openai:
+            summary.append(openai(settings.openai_fast_model))
+        summary.append(anthropic(settings.claude_model))
+    else:
+        summary = list(draft)
+
+    routes = {TASK_DRAFT: draft, TASK_SUMMARY: summary}
+    if not settings.hybrid_llm_fallback_enabled:
+        routes = {task: providers[:1] for task, providers in routes.items()}
+    return routes
+
+
+_llm_gateway: Optional[LLMGateway] = None
+_llm_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get process-wide LLM gateway"""
+    global _llm_gateway
+    if _llm_gateway is None:
+        with _llm_gateway_lock:
+            if _llm_gateway is None:
+                _llm_gateway = LLMGateway(
+                    build_routes(),
+                    hedge_percentile=settings.llm_hedge_percentile,
+                    min_samples=settings.llm_hedge_min_samples,
+                    default_hedge_delay=settings.llm_hedge_default_delay_seconds,
+                    hedging_enabled=settings.llm_hedging_enabled,
+                    usage=get_llm_usage_recorder(),
+                )
+                get_registry().register_stats("llm_gateway", _llm_gateway.get_stats, "LLM gateway routing and latency")
+    return _llm_gateway
+
+
+def stop_llm_gateway() -> None:
+    """Stop the gateway if it was created (called on shutdown)"""
+    if _llm_gateway is not None:
+        _llm_gateway.shutdown()
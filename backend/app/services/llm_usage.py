@@ -0,0 +1,239 @@
+"""
+OMEGA Core v3.0 - LLM Usage Accounting
+Per-call token, cache and latency records with per-tenant cost reports
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from psycopg2.extras import execute_values
+from app.database import get_cursor
+from app.utils.llm_pricing import cache_hit_ratio, estimate_cost_usd
+from app.utils.metrics import get_registry
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LLM_TOKENS = get_registry().counter(
+    "llm_tokens_total",
+    "LLM tokens by model and kind (input, output, cache_read, cache_write)",
+    labelnames=("model", "kind"),
+)
+LLM_COST = get_registry().counter(
+    "llm_cost_usd_total",
+    "Estimated LLM spend in USD",
+    labelnames=("model",),
+)
+LLM_CALL_SECONDS = get_registry().histogram(
+    "llm_call_seconds",
+    "LLM call latency by operation",
+    labelnames=("model", "operation"),
+)
+LLM_TIME_TO_FIRST_TOKEN = get_registry().histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from request to first streamed text for streaming LLM calls",
+    labelnames=("model", "operation"),
+)
+
+# Buffered rows are written once this many are pending (or every flush interval)
+FLUSH_BATCH_SIZE = 50
+
+
+class LLMUsageRecorder:
+    """
+    Records one row per LLM call into llm_usage
+
+    record() only updates metrics and appends to a buffer, so it adds nothing
+    to draft latency; a background thread writes the buffer with one INSERT
+    every flush_interval_seconds (sooner when FLUSH_BATCH_SIZE rows pile up).
+    """
+
+    def __init__(self, flush_interval_seconds: float = 10.0):
+        self.flush_interval_seconds = flush_interval_seconds
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"recorded": 0, "written": 0, "write_errors": 0}
+
+    def record(
+        self,
+        tenant_id: str,
+        model: str,
+        operation: str,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        latency_ms: float = 0.0,
+        success: bool = True,
+        trace_id: Optional[str] = None,
+    ) -> None:
+        """
+        Record one LLM call (never raises)
+
+        Args:
+            tenant_id: Tenant UUID
+            model: Model ID
+            operation: Call site (e.g. "generate_response")
+            input_tokens: Uncached input tokens
+            output_tokens: Output tokens
+            cache_read_tokens: Input tokens served from the prompt cache
+            cache_write_tokens: Input tokens written to the prompt cache
+            latency_ms: Call latency
+            success: Whether the call returned a response
+            trace_id: Request trace ID
+        """
+        try:
+            cost = estimate_cost_usd(model, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+            LLM_TOKENS.inc(input_tokens, model=model, kind="input")
+            LLM_TOKENS.inc(output_tokens, model=model, kind="output")
+            LLM_TOKENS.inc(cache_read_tokens, model=model, kind="cache_read")
+            LLM_TOKENS.inc(cache_write_tokens, model=model, kind="cache_write")
+            if cost:
+                LLM_COST.inc(cost, model=model)
+            LLM_CALL_SECONDS.observe(latency_ms / 1000, model=model, operation=operation)
+
+            row = (
+                tenant_id, model, operation, input_tokens, output_tokens, cache_read_tokens,
+                cache_write_tokens, cost, round(latency_ms, 3), success, trace_id,
+                datetime.now(timezone.utc),
+            )
+            with self._lock:
+                self._buffer.append(row)
+                self._stats["recorded"] += 1
+                pending = len(self._buffer)
+            self._ensure_started()
+            if pending >= FLUSH_BATCH_SIZE:
+                self._flush_event.set()
+        except Exception as e:
+            # Fail-open: accounting never affects the call
+            logger.debug(f"LLM usage record failed: {e}")
+
+    def flush(self) -> int:
+        """
+        Write buffered rows
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            with get_cursor(tenant_id=None) as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO llm_usage (
+                        tenant_id, model, operation, input_tokens, output_tokens,
+                        cache_read_tokens, cache_write_tokens, cost_usd, latency_ms,
+                        success, trace_id, created_at
+                    ) VALUES %s
+                    """,
+                    rows,
+                )
+        except Exception as e:
+            self._stats["write_errors"] += 1
+            logger.warning(f"LLM usage flush failed ({len(rows)} rows dropped): {e}")
+            return 0
+        self._stats["written"] += len(rows)
+        return len(rows)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-usage", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._flush_event.wait(self.flush_interval_seconds)
+            self._flush_event.clear()
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Recorder counters and current buffer size"""
+        with self._lock:
+            return {**self._stats, "pending": len(self._buffer)}
+
+    def stop(self) -> None:
+        """Stop the flush thread and write what is left"""
+        self._stop_event.set()
+        self._flush_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        self.flush()
+
+
+def get_usage_report(hours: int = 24, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Per-tenant, per-model LLM cost and throughput over a window
+
+    Args:
+        hours: Window size
+        tenant_id: Restrict to one tenant (None = all tenants)
+
+    Returns:
+        One dict per (tenant, model, operation) with calls, token totals,
+        cost, cache hit ratio, latency (avg/p95) and output tokens/second
+    """
+    with get_cursor(tenant_id=tenant_id) as cur:
+        cur.execute(
+            """
+            SELECT tenant_id::text AS tenant_id, model, operation,
+                   COUNT(*)::int AS calls,
+                   COUNT(*) FILTER (WHERE NOT success)::int AS failures,
+                   COALESCE(SUM(input_tokens), 0)::bigint AS input_tokens,
+                   COALESCE(SUM(output_tokens), 0)::bigint AS output_tokens,
+                   COALESCE(SUM(cache_read_tokens), 0)::bigint AS cache_read_tokens,
+                   COALESCE(SUM(cache_write_tokens), 0)::bigint AS cache_write_tokens,
+                   SUM(cost_usd)::float AS cost_usd,
+                   AVG(latency_ms)::float AS avg_latency_ms,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY latency_ms)::float AS p95_latency_ms,
+                   SUM(latency_ms)::float AS total_latency_ms
+            FROM llm_usage
+            WHERE created_at >= NOW() - (%s * INTERVAL '1 hour')
+              AND (%s::uuid IS NULL OR tenant_id = %s::uuid)
+            GROUP BY tenant_id, model, operation
+            ORDER BY cost_usd DESC NULLS LAST
+            """,
+            (hours, tenant_id, tenant_id),
+        )
+        rows = [dict(row) for row in cur.fetchall()]
+
+    for row in rows:
+        row["cache_hit_ratio"] = cache_hit_ratio(
+            row["input_tokens"], row["cache_read_tokens"], row["cache_write_tokens"]
+        )
+        total_seconds = (row.pop("total_latency_ms") or 0) / 1000
+        row["output_tokens_per_second"] = row["output_tokens"] / total_seconds if total_seconds else None
+    return rows
+
+
+_llm_usage_recorder: Optional[LLMUsageRecorder] = None
+_llm_usage_recorder_lock = threading.Lock()
+
+
+def get_llm_usage_recorder() -> LLMUsageRecorder:
+    """Get process-wide LLM usage recorder"""
+    global _llm_usage_recorder
+    if _llm_usage_recorder is None:
+        with _llm_usage_recorder_lock:
+            if _llm_usage_recorder is None:
+                _llm_usage_recorder = LLMUsageRecorder(
+                    flush_interval_seconds=settings.llm_usage_flush_interval_seconds
+                )
+                get_registry().register_stats("llm_usage", _llm_usage_recorder.get_stats, "LLM usage recorder")
+    return _llm_usage_recorder
+
+
+def stop_llm_usage_recorder() -> None:
+    """Flush and stop the recorder if it was started (called on shutdown)"""
+    if _llm_usage_recorder is not None:
+        _llm_usage_recorder.stop()
@@ -0,0 +1,216 @@
+"""
+OMEGA Core v3.0 - Advisory Lock Manager
+Session-level PostgreSQL advisory locks on one dedicated connection
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import psycopg2
+from app.utils.lock_keys import advisory_lock_key
+from app.utils.metrics import get_registry
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class AdvisoryLockManager:
+    """
+    Process-wide advisory lock manager.
+
+    Session-level advisory locks belong to the connection that took them, so
+    they are held on a single dedicated autocommit connection rather than on
+    pooled connections (which go back to the pool, and a later unlock may run
+    on a different session). Keys held by this process are tracked locally:
+    advisory locks are re-entrant per session, so without the local set two
+    threads of the same process could both "acquire" the same key. Many keys
+    are acquired or released in one round-trip via unnest().
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        self._held: Dict[int, str] = {}
+        self._stats = {
+            "attempts": 0,
+            "acquired": 0,
+            "contended_local": 0,
+            "contended_remote": 0,
+            "released": 0,
+            "errors": 0,
+            "round_trips": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    def _connection(self):
+        """Get the dedicated connection, reconnecting if it was lost (conn lock held)"""
+        if self._conn is None or self._conn.closed:
+            if self._held:
+                # Locks died with the old session
+                logger.warning(f"Advisory lock connection lost; dropping {len(self._held)} held lock(s)")
+                self._held.clear()
+            self._conn = psycopg2.connect(self.dsn)
+            self._conn.autocommit = True
+        return self._conn
+
+    def _record_wait(self, started: float) -> None:
+        """Record time spent waiting for and running one round-trip (conn lock held)"""
+        wait_ms = (time.perf_counter() - started) * 1000
+        self._stats["round_trips"] += 1
+        self._stats["wait_ms_total"] += wait_ms
+        self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], wait_ms)
+
+    def try_acquire_many(
+        self,
+        namespace: str,
+        resources: Sequence[str],
+        tenant_id: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Try to lock many resources in one round-trip (non-blocking)
+
+        Args:
+            namespace: Lock namespace
+            resources: Resource IDs to lock
+            tenant_id: Tenant ID
+
+        Returns:
+            Resources that were locked (the rest are held elsewhere)
+        """
+        keys = {advisory_lock_key(namespace, resource, tenant_id): resource for resource in resources}
+        started = time.perf_counter()
+        with self._conn_lock:
+            self._stats["attempts"] += len(keys)
+            candidates = [key for key in keys if key not in self._held]
+            self._stats["contended_local"] += len(keys) - len(candidates)
+            if not candidates:
+                self._record_wait(started)
+                return []
+
+            try:
+                with self._connection().cursor() as cur:
+                    cur.execute(
+                        "SELECT k, pg_try_advisory_lock(k) FROM unnest(%s::bigint[]) AS k",
+                        (candidates,)
+                    )
+                    rows = cur.fetchall()
+            except Exception:
+                self._stats["errors"] += 1
+                self._reset_connection()
+                raise
+            finally:
+                self._record_wait(started)
+
+            acquired = []
+            for key, ok in rows:
+                if ok:
+                    self._held[key] = keys[key]
+                    acquired.append(keys[key])
+            self._stats["acquired"] += len(acquired)
+            self._stats["contended_remote"] += len(candidates) - len(acquired)
+            return acquired
+
+    def release_many(
+        self,
+        namespace: str,
+        resources: Sequence[str],
+        tenant_id: Optional[str] = None,
+    ) -> int:
+        """
+        Release many locks held by this process in one round-trip
+
+        Returns:
+            Number of locks released
+        """
+        started = time.perf_counter()
+        with self._conn_lock:
+            keys = [
+                key for key in (advisory_lock_key(namespace, resource, tenant_id) for resource in resources)
+                if key in self._held
+            ]
+            if not keys:
+                return 0
+            for key in keys:
+                del self._held[key]
+
+            try:
+                with self._connection().cursor() as cur:
+                    cur.execute(
+                        "SELECT count(*) FILTER (WHERE pg_advisory_unlock(k)) FROM unnest(%s::bigint[]) AS k",
+                        (keys,)
+                    )
+                    released = cur.fetchone()[0]
+            except Exception:
+                self._stats["errors"] += 1
+                self._reset_connection()
+                raise
+            finally:
+                self._record_wait(started)
+
+            self._stats["released"] += released
+            return released
+
+    def try_acquire(self, namespace: str, resource: str, tenant_id: Optional[str] = None) -> bool:
+        """Try to lock one resource (non-blocking)"""
+        return bool(self.try_acquire_many(namespace, [resource], tenant_id))
+
+    def release(self, namespace: str, resource: str, tenant_id: Optional[str] = None) -> bool:
+        """Release one lock held by this process"""
+        return self.release_many(namespace, [resource], tenant_id) > 0
+
+    def _reset_connection(self) -> None:
+        """Drop a broken connection; its locks are released server-side (conn lock held)"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def close(self) -> None:
+        """Close the dedicated connection, releasing every lock it holds"""
+        with self._conn_lock:
+            self._reset_connection()
+            self._held.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get lock statistics
+
+        Returns:
+            Dict with attempt/acquire/contention counters, wait times and held lock count
+        """
+        with self._conn_lock:
+            stats = dict(self._stats)
+            stats["held"] = len(self._held)
+        round_trips = stats["round_trips"]
+        stats["wait_ms_avg"] = stats["wait_ms_total"] / round_trips if round_trips else None
+        attempts = stats["attempts"]
+        stats["contention_ratio"] = (
+            (stats["contended_local"] + stats["contended_remote"]) / attempts if attempts else None
+        )
+        return stats
+
+
+_lock_manager: Optional[AdvisoryLockManager] = None
+_lock_manager_lock = threading.Lock()
+
+
+def get_lock_manager() -> AdvisoryLockManager:
+    """Get process-wide advisory lock manager"""
+    global _lock_manager
+    if _lock_manager is None:
+        with _lock_manager_lock:
+            if _lock_manager is None:
+                _lock_manager = AdvisoryLockManager(settings.database_url)
+                get_registry().register_stats("advisory_locks", _lock_manager.get_stats, "Advisory lock manager")
+    return _lock_manager
+
+
+def close_lock_manager() -> None:
+    """Close the lock connection if it was opened (called on shutdown)"""
+    if _lock_manager is not None:
+        _lock_manager.close()
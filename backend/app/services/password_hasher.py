@@ -0,0 +1,143 @@
+"""
+OMEGA Core v3.0 - Password Hasher Pool
+Runs bcrypt off the event loop on a small, bounded thread pool
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.utils.metrics import get_registry
+from app.utils.password_policy import PasswordPolicyService, make_crypt_context
+from app.config import get_settings
+
+settings = get_settings()
+
+HASH_SECONDS = get_registry().histogram(
+    "password_hash_seconds",
+    "bcrypt CPU time per operation",
+    labelnames=("operation",),
+)
+HASH_QUEUE_SECONDS = get_registry().histogram(
+    "password_hash_queue_seconds",
+    "Time password operations wait for a hasher thread",
+    labelnames=("operation",),
+)
+HASH_REJECTED = get_registry().counter(
+    "password_hash_rejected_total",
+    "Password operations rejected because the hasher queue was full",
+    labelnames=("operation",),
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already queued"""
+
+
+class PasswordHasher:
+    """
+    Bounded pool for bcrypt verify/hash
+
+    bcrypt releases the GIL, so a few threads give real parallelism without
+    blocking the event loop. At most max_workers operations run at once and
+    at most max_pending are admitted in total; beyond that callers get
+    PasswordHasherBusy immediately instead of queueing without bound (a burst
+    of logins would otherwise delay every one of them past the client timeout).
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, bcrypt_rounds: int = 12):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.policy = PasswordPolicyService(make_crypt_context(bcrypt_rounds))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hasher")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"verified": 0, "hashed": 0, "rehashed": 0, "rejected": 0}
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password on the pool, rehashing outdated hashes
+
+        Returns:
+            Tuple of (is_valid, new_hash); new_hash is set when the stored hash
+            used a different cost and should be replaced
+
+        Raises:
+            PasswordHasherBusy: If the queue is full
+        """
+        valid, new_hash = await self._submit("verify", self.policy.verify_and_update, plain_password, hashed_password)
+        with self._lock:
+            self._stats["verified"] += 1
+            if new_hash:
+                self._stats["rehashed"] += 1
+        return valid, new_hash
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password on the pool
+
+        Raises:
+            PasswordHasherBusy: If the queue is full
+        """
+        hashed = await self._submit("hash", self.policy.get_password_hash, password)
+        with self._lock:
+            self._stats["hashed"] += 1
+        return hashed
+
+    async def _submit(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                HASH_REJECTED.inc(operation=operation)
+                raise PasswordHasherBusy(f"{self._pending} password operations pending")
+            self._pending += 1
+
+        queued_at = time.perf_counter()
+
+        def run() -> Any:
+            started = time.perf_counter()
+            HASH_QUEUE_SECONDS.observe(started - queued_at, operation=operation)
+            try:
+                return fn(*args)
+            finally:
+                HASH_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus current queue depth"""
+        with self._lock:
+            return {**self._stats, "pending": self._pending, "max_pending": self.max_pending}
+
+    def shutdown(self) -> None:
+        """Finish running operations and stop the pool"""
+        self._executor.shutdown(wait=True)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+_password_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get process-wide password hasher pool"""
+    global _password_hasher
+    if _password_hasher is None:
+        with _password_hasher_lock:
+            if _password_hasher is None:
+                _password_hasher = PasswordHasher(
+                    max_workers=settings.password_hash_workers,
+                    max_pending=settings.password_hash_max_pending,
+                    bcrypt_rounds=settings.bcrypt_rounds,
+                )
+                get_registry().register_stats("password_hasher", _password_hasher.get_stats, "Password hasher pool")
+    return _password_hasher
+
+
+def stop_password_hasher() -> None:
+    """Stop the pool if it was started (called on shutdown)"""
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
@@ -0,0 +1,272 @@
+"""
+OMEGA Core v3.0 - Rate Limiter
+Per-tenant (or, for anonymous requests, per-client), per-route limits enforced across all worker processes on a host,
+with optional cross-host reconciliation through Postgres
+"""
+import functools
+import inspect
+import logging
+import math
+import os
+import socket
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException, Request, status
+from psycopg2.extras import execute_values
+from app.database import get_cursor
+from app.utils.metrics import get_registry
+from app.utils.shared_rate_limiter import SharedRateLimiter, parse_rate
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = get_registry().counter(
+    "rate_limit_rejected_total",
+    "Requests rejected by the rate limiter",
+    labelnames=("route",),
+)
+
+# Rows from hosts that have not reported for this long are dropped
+REMOTE_USAGE_RETENTION = "1 day"
+
+
+def limit_key(request: Request) -> str:
+    """
+    Bucket owner for a request
+
+    Only an authenticated user's tenant is trusted: requests without a valid
+    access token all carry the default tenant, so they are keyed by client
+    address (as slowapi did) rather than sharing one bucket.
+    """
+    if getattr(request.state, "user_id", None):
+        return f"tenant:{request.state.tenant_id}"
+    client = request.client
+    return f"ip:{client.host if client else 'unknown'}"
+
+
+def _default_path() -> str:
+    """Shared-memory file in /dev/shm when available (tmpfs), else the temp dir"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "maya-rate-limits")
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter keyed on tenant and route
+
+    Buckets live in a SharedRateLimiter file, so every uvicorn/gunicorn
+    worker on the host draws from the same bucket and a check costs a few
+    microseconds (no network hop). The engine is opened on first use, i.e.
+    after workers have forked.
+
+    With reconcile_seconds > 0 one process per host periodically pushes the
+    host's consumption to rate_limit_usage (migration 025) and charges local
+    buckets for what other hosts consumed, so limits hold approximately
+    across hosts too (within one reconcile interval).
+
+    If the shared file cannot be opened, requests are allowed (fail-open).
+    """
+
+    def __init__(self, path: Optional[str] = None, slots: int = 4096, reconcile_seconds: float = 0.0):
+        self.path = path or _default_path()
+        self.slots = slots
+        self.reconcile_seconds = reconcile_seconds
+        self.host = socket.gethostname()
+        self._engine: Optional[SharedRateLimiter] = None
+        self._engine_failed = False
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"allowed": 0, "rejected": 0, "errors": 0, "reconciles": 0, "remote_debits": 0}
+
+    def _get_engine(self) -> Optional[SharedRateLimiter]:
+        if self._engine is not None or self._engine_failed:
+            return self._engine
+        with self._lock:
+            if self._engine is None and not self._engine_failed:
+                try:
+                    self._engine = SharedRateLimiter(self.path, slots=self.slots)
+                except Exception as e:
+                    self._engine_failed = True
+                    logger.error(f"Rate limiter disabled, cannot open {self.path}: {e}")
+                    return None
+                if self.reconcile_seconds > 0:
+                    self._thread = threading.Thread(target=self._run, name="rate-limit-reconcile", daemon=True)
+                    self._thread.start()
+        return self._engine
+
+    def check(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        Take tokens for a key
+
+        Args:
+            key: Bucket key
+            rate: Refill rate in tokens per second
+            capacity: Bucket size
+            cost: Tokens to take
+
+        Returns:
+            0 if allowed, otherwise seconds until the request would be allowed
+        """
+        engine = self._get_engine()
+        if engine is None:
+            return 0.0
+        try:
+            wait = engine.hit(key, rate, capacity, cost)
+        except Exception as e:
+            # Fail-open: a limiter fault never rejects traffic
+            self._stats["errors"] += 1
+            logger.warning(f"Rate limit check failed for {key}: {e}")
+            return 0.0
+        self._stats["rejected" if wait else "allowed"] += 1
+        return wait
+
+    def limit(self, rate: str, cost: float = 1.0) -> Callable:
+        """
+        Decorator limiting an async endpoint per tenant (see limit_key)
+
+        The endpoint must take a `request: Request` parameter (as with the
+        previous slowapi decorators). Over the limit it raises 429 with a
+        Retry-After header.
+
+        Args:
+            rate: Limit as "N/second|minute|hour|day"
+            cost: Tokens per request
+        """
+        refill, capacity = parse_rate(rate)
+
+        def decorator(func: Callable) -> Callable:
+            route = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                request: Optional[Request] = kwargs.get("request")
+                if request is not None:
+                    wait = self.check(f"{limit_key(request)}:{route}", refill, capacity, cost)
+                    if wait:
+                        RATE_LIMITED.inc(route=route)
+                        raise HTTPException(
+                            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail=f"Rate limit exceeded: {rate}",
+                            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                        )
+                return await func(*args, **kwargs)
+
+            # Resolve annotations against the endpoint's module, not this one
+            wrapper.__signature__ = inspect.signature(func, eval_str=True)
+            return wrapper
+
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Cross-host reconciliation
+    # ------------------------------------------------------------------
+
+    def reconcile(self) -> int:
+        """
+        Exchange consumption with other hosts through Postgres
+
+        Pushes this host's tokens taken since the last run, then debits local
+        buckets by what other hosts took since then.
+
+        Returns:
+            Number of local buckets debited
+        """
+        engine = self._get_engine()
+        if engine is None:
+            return 0
+        taken = engine.take_pending()
+        active = engine.active_keys()
+        with get_cursor(tenant_id=None) as cur:
+            if taken:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO rate_limit_usage (key_hash, host, consumed_total)
+                    VALUES %s
+                    ON CONFLICT (key_hash, host) DO UPDATE
+                    SET consumed_total = rate_limit_usage.consumed_total + EXCLUDED.consumed_total,
+                        updated_at = NOW()
+                    """,
+                    [(key, self.host, amount) for key, amount in taken.items()],
+                )
+            remote: Dict[int, float] = {}
+            if active:
+                cur.execute(
+                    """
+                    SELECT key_hash, SUM(consumed_total)::float AS consumed
+                    FROM rate_limit_usage
+                    WHERE host <> %s AND key_hash = ANY(%s)
+                    GROUP BY key_hash
+                    """,
+                    (self.host, active),
+                )
+                remote = {row["key_hash"]: row["consumed"] for row in cur.fetchall()}
+            cur.execute(
+                f"DELETE FROM rate_limit_usage WHERE updated_at < NOW() - INTERVAL '{REMOTE_USAGE_RETENTION}'"
+            )
+        debited = engine.debit_remote(remote)
+        self._stats["reconciles"] += 1
+        self._stats["remote_debits"] += debited
+        return debited
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.reconcile_seconds):
+            try:
+                if self._engine is not None and self._engine.claim_reconcile(self.reconcile_seconds):
+                    self.reconcile()
+            except Exception as e:
+                logger.warning(f"Rate limit reconcile failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Check counters and shared table occupancy"""
+        engine = self._engine
+        return {
+            **self._stats,
+            "path": self.path,
+            "active_buckets": len(engine.active_keys()) if engine is not None else 0,
+            "slots": self.slots,
+        }
+
+    def stop(self) -> None:
+        """Stop reconciliation and unmap the table"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+        with self._lock:
+            if self._engine is not None:
+                self._engine.close()
+                self._engine = None
+            self._engine_failed = True
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get process-wide rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(
+                    path=settings.rate_limit_shm_path or None,
+                    slots=settings.rate_limit_slots,
+                    reconcile_seconds=settings.rate_limit_reconcile_seconds,
+                )
+                get_registry().register_stats("rate_limiter", _rate_limiter.get_stats, "Shared rate limiter")
+    return _rate_limiter
+
+
+def rate_limit(rate: str, cost: float = 1.0) -> Callable:
+    """Limit an endpoint per tenant and route (see RateLimiter.limit)"""
+    return get_rate_limiter().limit(rate, cost)
+
+
+def stop_rate_limiter() -> None:
+    """Stop the limiter if it was created (called on shutdown)"""
+    if _rate_limiter is not None:
+        _rate_limiter.stop()
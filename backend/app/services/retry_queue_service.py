@@ -5,7 +5,7 @@ Retry queue management for failed email processing
 import uuid
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta, timezone
-from app.database import get_cursor
+from app.database import get_cursor, notify, EMAIL_RETRY_CHANNEL
 from app.services.audit_service import get_audit_service
 from app.config import get_settings
 
@@ -51,8 +51,8 @@ class RetryQueueService:
                     """
                     INSERT INTO email_retry_queue (
                         id, tenant_id, email_id, gmail_message_id, account_email,
-                        retry_count, max_retries, status, error_message, scheduled_at, created_at
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        retry_count, max_retries, status, error_message, trace_id, scheduled_at, created_at
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                     (
                         retry_id,
@@ -64,10 +64,13 @@ class RetryQueueService:
                         max_retries,
                         'pending',
                         error_message[:1024] if error_message else None,
+                        trace_id,
                         scheduled_at,
                         datetime.now(timezone.utc),
                     )
                 )
+                # Wake the retry worker so it schedules itself for this item
+                notify(cur, EMAIL_RETRY_CHANNEL, retry_id)
             
             self.audit.log_event(
                 action="retry_queue.enqueued",
@@ -0,0 +1,322 @@
+"""
+Outbound SMS Queue
+Worker pool that sends SMS through Twilio off the request path, with per-number
+rate limiting, retries with backoff and delivery status tracking
+"""
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from twilio.base.exceptions import TwilioRestException
+from app.config.twilio_config import get_twilio_settings
+from app.services.sms_service import get_sms_service
+from app.services.conversation_service import ConversationService
+from app.services.audit_service import get_audit_service
+from app.services.rate_limiter import get_rate_limiter
+from app.utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 300.0
+
+
+@dataclass
+class OutboundSMS:
+    """A queued outbound message"""
+    message_id: str
+    tenant_id: Optional[str]
+    to: str
+    body: str
+    from_number: str
+    conversation_id: Optional[str] = None
+    trace_id: Optional[str] = None
+    attempts: int = 0
+
+
+class SMSQueue:
+    """
+    In-process outbound SMS queue.
+
+    Jobs sit in a heap ordered by the time they become ready. Workers pop the
+    next ready job, wait on the sending number's token bucket (Twilio long
+    codes accept roughly one message per second) and send. The bucket lives
+    in the shared rate limiter (app.services.rate_limiter), so the per-number
+    cap holds across every process on the host, not per process. Retryable failures
+    (429, 5xx, network errors) are rescheduled with exponential backoff; every
+    state change is persisted on sms_messages.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        messages_per_second: float = 1.0,
+        max_attempts: int = 5,
+        status_callback_url: Optional[str] = None,
+    ):
+        self.workers = workers
+        self.messages_per_second = messages_per_second
+        self.max_attempts = max_attempts
+        self.status_callback_url = status_callback_url
+        self._heap: List[Tuple[float, int, OutboundSMS]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._in_flight = 0
+        self._stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "rate_limited_waits": 0,
+        }
+
+    def enqueue(
+        self,
+        to: str,
+        body: str,
+        tenant_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        trace_id: Optional[str] = None,
+        from_number: Optional[str] = None,
+    ) -> str:
+        """
+        Queue an SMS for sending
+
+        Args:
+            to: Phone number (E.164 format)
+            body: Message body
+            tenant_id: Tenant ID
+            conversation_id: Conversation the message belongs to (optional)
+            trace_id: Trace ID for audit logging
+            from_number: Sending number (defaults to the configured Twilio number)
+
+        Returns:
+            Message ID of the sms_messages row tracking this send
+        """
+        job = OutboundSMS(
+            message_id=str(uuid.uuid4()),
+            tenant_id=tenant_id,
+            to=to,
+            body=body,
+            from_number=from_number or get_twilio_settings().twilio_phone_number,
+            conversation_id=conversation_id,
+            trace_id=trace_id,
+        )
+        self._record(job, "queued")
+        self._ensure_started()
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic(), next(self._seq), job))
+            self._stats["enqueued"] += 1
+            self._cond.notify()
+        return job.message_id
+
+    def _next_job(self) -> Optional[OutboundSMS]:
+        """Block until a job is ready and its sending number has a token"""
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                ready_at, _, job = self._heap[0]
+                if ready_at > now:
+                    self._cond.wait(ready_at - now)
+                    continue
+                heapq.heappop(self._heap)
+                wait = get_rate_limiter().check(f"sms:{job.from_number}", self.messages_per_second, 1.0)
+                if wait > 0:
+                    # Requeue behind the number's next token; other numbers keep flowing
+                    heapq.heappush(self._heap, (now + wait, next(self._seq), job))
+                    self._stats["rate_limited_waits"] += 1
+                    continue
+                self._in_flight += 1
+                return job
+            return None
+
+    def _run_worker(self) -> None:
+        """Worker loop"""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._send(job)
+            except Exception as e:
+                logger.error(f"SMS queue worker error: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _send(self, job: OutboundSMS) -> None:
+        """Attempt one send and record the outcome"""
+        job.attempts += 1
+        try:
+            result = get_sms_service(job.tenant_id).send_sms(
+                to=job.to,
+                message=job.body,
+                tenant_id=job.tenant_id,
+                from_number=job.from_number,
+                status_callback=self.status_callback_url,
+            )
+        except Exception as e:
+            error_code = str(e.code) if isinstance(e, TwilioRestException) and e.code else None
+            if self._is_retryable(e) and job.attempts < self.max_attempts:
+                delay = self._backoff(job.attempts)
+                self._record(job, "retrying", error_code=error_code)
+                with self._cond:
+                    heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+                    self._stats["retried"] += 1
+                    self._cond.notify()
+                return
+
+            self._record(job, "failed", error_code=error_code)
+            with self._cond:
+                self._stats["failed"] += 1
+            get_audit_service(job.tenant_id).log_event(
+                action="sms_queue.send_failed",
+                resource_type="sms",
+                resource_id=job.message_id,
+                metadata={"to": job.to, "attempts": job.attempts, "error": str(e)},
+                trace_id=job.trace_id,
+            )
+            return
+
+        self._record(job, result.get("status") or "sent", message_sid=result.get("message_sid"))
+        with self._cond:
+            self._stats["sent"] += 1
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Twilio 429/5xx and transport errors are retried; other 4xx are final"""
+        if isinstance(error, TwilioRestException):
+            return error.status == 429 or error.status >= 500
+        return True
+
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _record(
+        self,
+        job: OutboundSMS,
+        delivery_status: str,
+        message_sid: Optional[str] = None,
+        error_code: Optional[str] = None,
+    ) -> None:
+        """Persist the message row (batched via the conversation message buffer)"""
+        ConversationService(job.tenant_id).save_message(
+            conversation_id=job.conversation_id,
+            phone_number=job.to,
+            body=job.body,
+            direction="outbound",
+            message_sid=message_sid,
+            trace_id=job.trace_id,
+            message_id=job.message_id,
+            delivery_status=delivery_status,
+            attempts=job.attempts,
+            error_code=error_code,
+        )
+
+    def _ensure_started(self) -> None:
+        """Start worker threads on first use"""
+        if self._running:
+            return
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(target=self._run_worker, name=f"sms-queue-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, drain_timeout_seconds: float = 10.0) -> None:
+        """
+        Stop workers, first waiting up to drain_timeout_seconds for ready jobs to send
+        """
+        deadline = time.monotonic() + drain_timeout_seconds
+        with self._cond:
+            while (self._in_flight or any(ready_at <= time.monotonic() for ready_at, _, _ in self._heap)):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    break
+                self._cond.wait(min(remaining, 0.5))
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._heap:
+            logger.warning(f"SMS queue stopped with {len(self._heap)} unsent message(s)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics
+
+        Returns:
+            Dict with counters, queue depth and in-flight sends
+        """
+        with self._cond:
+            return {
+                **self._stats,
+                "queued": len(self._heap),
+                "in_flight": self._in_flight,
+                "workers": self.workers,
+                "messages_per_second": self.messages_per_second,
+            }
+
+
+_sms_queue: Optional[SMSQueue] = None
+_sms_queue_lock = threading.Lock()
+
+
+def get_sms_queue() -> SMSQueue:
+    """Get process-wide outbound SMS queue"""
+    global _sms_queue
+    if _sms_queue is None:
+        with _sms_queue_lock:
+            if _sms_queue is None:
+                twilio_settings = get_twilio_settings()
+                _sms_queue = SMSQueue(
+                    workers=twilio_settings.send_workers,
+                    messages_per_second=twilio_settings.messages_per_second,
+                    max_attempts=twilio_settings.max_send_attempts,
+                    status_callback_url=twilio_settings.status_callback_url,
+                )
+                get_registry().register_stats("sms_queue", _sms_queue.get_stats, "Outbound SMS queue")
+    return _sms_queue
+
+
+def stop_sms_queue() -> None:
+    """Drain and stop the process-wide queue if it was started (called on shutdown)"""
+    if _sms_queue is not None:
+        _sms_queue.stop()
+
+
+def enqueue_sms(
+    to: str,
+    body: str,
+    tenant_id: Optional[str] = None,
+    conversation_id: Optional[str] = None,
+    trace_id: Optional[str] = None,
+) -> str:
+    """Queue an SMS on the process-wide queue (returns message ID)"""
+    return get_sms_queue().enqueue(
+        to=to,
+        body=body,
+        tenant_id=tenant_id,
+        conversation_id=conversation_id,
+        trace_id=trace_id,
+    )
@@ -24,7 +24,9 @@ class SMSService:
         self,
         to: str,
         message: str,
-        tenant_id: Optional[str] = None
+        tenant_id: Optional[str] = None,
+        from_number: Optional[str] = None,
+        status_callback: Optional[str] = None
     ) -> Dict:
         """
         Send SMS message
@@ -33,6 +35,8 @@ class SMSService:
             to: Phone number (E.164 format: +12345678900)
             message: Message body (160 chars max for single SMS)
             tenant_id: Tenant ID for audit logging
+            from_number: Sending number (defaults to configured Twilio number)
+            status_callback: URL Twilio posts delivery status updates to
         
         Returns:
             Dict with message_sid, status
@@ -40,11 +44,14 @@ class SMSService:
         tenant_id = tenant_id or self.tenant_id
         try:
             # Send via Twilio
-            twilio_message = self.client.messages.create(
-                to=to,
-                from_=self.settings.twilio_phone_number,
-                body=message
-            )
+            create_kwargs = {
+                "to": to,
+                "from_": from_number or self.settings.twilio_phone_number,
+                "body": message,
+            }
+            if status_callback:
+                create_kwargs["status_callback"] = status_callback
+            twilio_message = self.client.messages.create(**create_kwargs)
             
             # Log success
             audit = get_audit_service(tenant_id)
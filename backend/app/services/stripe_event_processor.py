@@ -0,0 +1,284 @@
+"""
+Stripe Event Processor
+Applies stored Stripe webhook events off the request path, in order per booking
+"""
+import logging
+import queue
+import threading
+import zlib
+from typing import Any, Dict, List, Optional
+from app.database import get_cursor
+from app.services.stripe_service import get_stripe_service
+from app.services.audit_service import get_audit_service
+from app.utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+# How often each process sweeps the event store for events to (re)process
+RECOVERY_INTERVAL_SECONDS = 30
+RECOVERY_BATCH_SIZE = 100
+
+# Unclaimed 'pending' events older than this are orphaned (stored before
+# events were claimed on receipt)
+RECOVERY_AGE_SECONDS = 60
+
+# Events still 'processing' after this long belong to a dead process
+STALE_PROCESSING_SECONDS = 300
+
+# Failed events are retried with exponential backoff, then left 'failed'
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+
+_STOP = object()
+
+
+class StripeEventProcessor:
+    """
+    Sharded event processor.
+
+    Every booking hashes to one shard, and each shard is a single thread
+    draining a FIFO queue, so events for the same booking are applied in the
+    order they were received while different bookings proceed in parallel.
+    Events that still arrive out of order are neutralised by the
+    last_stripe_event_at guard in StripeService.
+
+    Every event is claimed before it is queued: the webhook stores new events
+    already claimed, and the recovery sweep (every RECOVERY_INTERVAL_SECONDS,
+    in every process) claims orphaned, stale and due-for-retry events with
+    FOR UPDATE SKIP LOCKED, so each one is applied by a single process.
+    Events that raise or come back with an 'error' outcome (e.g. the booking
+    row is not there yet) are retried with backoff until MAX_ATTEMPTS.
+    """
+
+    def __init__(self, shards: int = 4):
+        self.shards = shards
+        self._queues: List[queue.Queue] = [queue.Queue() for _ in range(shards)]
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._recovery_thread: Optional[threading.Thread] = None
+        self._recovery_stop = threading.Event()
+        self._stats = {
+            "submitted": 0, "processed": 0, "ignored": 0, "failed": 0, "retries_scheduled": 0,
+            "recovered": 0, "recovery_errors": 0,
+        }
+
+    def submit(self, event: Dict, tenant_id: str, attempts: int = 1) -> None:
+        """
+        Queue a claimed event for processing
+
+        Args:
+            event: Stripe event payload
+            tenant_id: Tenant ID
+            attempts: Attempt number of this claim (drives the retry backoff)
+        """
+        self._ensure_started()
+        self._queues[self._shard_for(event)].put((event, tenant_id, attempts))
+        with self._lock:
+            self._stats["submitted"] += 1
+
+    def _shard_for(self, event: Dict) -> int:
+        """Shard by booking (falls back to payment intent, then event id)"""
+        event_object = event["data"]["object"]
+        key = (
+            (event_object.get("metadata") or {}).get("booking_id")
+            or event_object.get("payment_intent")
+            or event_object.get("id")
+            or event["id"]
+        )
+        return zlib.crc32(str(key).encode("utf-8")) % self.shards
+
+    def _run_shard(self, shard_queue: queue.Queue) -> None:
+        """Shard worker loop"""
+        while True:
+            item = shard_queue.get()
+            if item is _STOP:
+                return
+            event, tenant_id, attempts = item
+            try:
+                self._process(event, tenant_id, attempts)
+            except Exception as e:
+                logger.error(f"Stripe event processor error: {e}", exc_info=True)
+
+    def _process(self, event: Dict, tenant_id: str, attempts: int = 1) -> None:
+        """Apply one event and record its outcome"""
+        stripe_service = get_stripe_service(tenant_id)
+        try:
+            result = stripe_service.process_event(event, tenant_id)
+            error = None
+            if result.get("status") == "error":
+                # Not applied (e.g. booking not found yet): retried like an
+                # exception rather than recorded as processed
+                error = result.get("message") or "Event not applied"
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+        if error is not None:
+            retry_in = retry_delay_seconds(attempts)
+            stripe_service.mark_event(event["id"], tenant_id, "failed", error=error, retry_in_seconds=retry_in)
+            with self._lock:
+                self._stats["failed"] += 1
+                if retry_in is not None:
+                    self._stats["retries_scheduled"] += 1
+            get_audit_service(tenant_id).log_event(
+                action="stripe_event_failed",
+                resource_type="payment",
+                resource_id=event["id"],
+                metadata={
+                    "event_type": event["type"],
+                    "error": error,
+                    "attempts": attempts,
+                    "retry_in_seconds": retry_in
+                },
+                trace_id=None
+            )
+            return
+
+        status = "ignored" if result.get("status") == "ignored" else "processed"
+        stripe_service.mark_event(event["id"], tenant_id, status)
+        with self._lock:
+            self._stats[status] += 1
+
+    def recover_pending(self, batch_size: int = RECOVERY_BATCH_SIZE) -> int:
+        """
+        Claim and queue events that need (re)processing
+
+        Claims, oldest first: pending events nobody claimed, events left
+        'processing' by a dead process, and failed events whose retry is due.
+
+        Returns:
+            Number of events claimed
+        """
+        total = 0
+        while True:
+            with get_cursor(tenant_id=None) as cursor:
+                cursor.execute(
+                    """
+                    UPDATE stripe_events e
+                    SET status = 'processing', claimed_at = NOW(), attempts = e.attempts + 1
+                    FROM (
+                        SELECT event_id
+                        FROM stripe_events
+                        WHERE (status = 'pending' AND received_at < NOW() - (%s * INTERVAL '1 second'))
+                           OR (status = 'processing' AND claimed_at < NOW() - (%s * INTERVAL '1 second'))
+                           OR (status = 'failed' AND next_attempt_at <= NOW())
+                        ORDER BY received_at ASC
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    ) due
+                    WHERE e.event_id = due.event_id
+                    RETURNING e.payload, e.tenant_id::text, e.attempts, e.received_at
+                    """,
+                    (RECOVERY_AGE_SECONDS, STALE_PROCESSING_SECONDS, batch_size)
+                )
+                rows = sorted(cursor.fetchall(), key=lambda row: row["received_at"])
+
+            for row in rows:
+                self.submit(row["payload"], row["tenant_id"], attempts=row["attempts"])
+            total += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        with self._lock:
+            self._stats["recovered"] += total
+        return total
+
+    def start_recovery(self, interval_seconds: float = RECOVERY_INTERVAL_SECONDS) -> None:
+        """Sweep the event store now and then every interval_seconds (idempotent)"""
+        with self._lock:
+            if self._recovery_thread is not None:
+                return
+            self._recovery_stop.clear()
+            self._recovery_thread = threading.Thread(
+                target=self._run_recovery,
+                args=(interval_seconds,),
+                name="stripe-events-recovery",
+                daemon=True,
+            )
+            self._recovery_thread.start()
+
+    def _run_recovery(self, interval_seconds: float) -> None:
+        """Recovery loop (fail-open: errors are logged and retried next sweep)"""
+        while not self._recovery_stop.is_set():
+            try:
+                recovered = self.recover_pending()
+                if recovered:
+                    logger.info(f"Stripe event recovery claimed {recovered} event(s)")
+            except Exception as e:
+                with self._lock:
+                    self._stats["recovery_errors"] += 1
+                logger.error(f"Stripe event recovery failed: {e}")
+            self._recovery_stop.wait(interval_seconds)
+
+    def _ensure_started(self) -> None:
+        """Start shard threads on first use"""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._threads = [
+                threading.Thread(target=self._run_shard, args=(q,), name=f"stripe-events-{i}", daemon=True)
+                for i, q in enumerate(self._queues)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._started = True
+
+    def stop(self, timeout_seconds: float = 10.0) -> None:
+        """Stop the recovery sweep, drain queued events and stop shard threads"""
+        self._recovery_stop.set()
+        if self._recovery_thread is not None:
+            self._recovery_thread.join(timeout=timeout_seconds)
+            self._recovery_thread = None
+        if not self._started:
+            return
+        for shard_queue in self._queues:
+            shard_queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout=timeout_seconds)
+        self._threads = []
+        self._started = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get processor statistics"""
+        with self._lock:
+            return {
+                **self._stats,
+                "queued": sum(q.qsize() for q in self._queues),
+                "shards": self.shards,
+                "recovery_running": self._recovery_thread is not None,
+            }
+
+
+def retry_delay_seconds(attempts: int) -> Optional[int]:
+    """
+    Backoff before retrying an event that failed on its attempts-th try
+
+    Returns:
+        Seconds to wait, or None once MAX_ATTEMPTS is reached
+    """
+    if attempts >= MAX_ATTEMPTS:
+        return None
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (max(attempts, 1) - 1))
+
+
+_processor: Optional[StripeEventProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def get_stripe_event_processor() -> StripeEventProcessor:
+    """Get process-wide Stripe event processor"""
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                _processor = StripeEventProcessor()
+                get_registry().register_stats("stripe_event_processor", _processor.get_stats, "Stripe webhook event processor")
+    return _processor
+
+
+def stop_stripe_event_processor() -> None:
+    """Stop the processor if it was started (called on shutdown)"""
+    if _processor is not None:
+        _processor.stop()
@@ -2,6 +2,7 @@
 Stripe Payment Service
 Handles payment link creation, webhook processing, and payment status
 """
+import json
 import stripe
 from typing import Dict, Optional, List
 from datetime import datetime, timezone
@@ -146,6 +147,89 @@ class StripeService:
         except stripe.error.SignatureVerificationError:
             raise HTTPException(status_code=400, detail="Invalid signature")
     
+    def store_event(self, event: Dict, tenant_id: str) -> bool:
+        """
+        Record a verified webhook event in the event store
+        
+        Stripe redelivers events; the event id is the idempotency key. A new
+        event is stored already claimed by the receiving process (first
+        attempt), so the recovery sweep leaves it alone unless that process
+        dies before recording an outcome.
+        
+        Returns:
+            True if the event is new, False if it was already received
+        """
+        event_object = event["data"]["object"]
+        with get_cursor(tenant_id=tenant_id) as cursor:
+            cursor.execute(
+                """
+                INSERT INTO stripe_events (
+                    event_id, tenant_id, event_type, booking_id, stripe_created_at, payload,
+                    status, attempts, claimed_at
+                ) VALUES (%s, %s, %s, %s, %s, %s, 'processing', 1, NOW())
+                ON CONFLICT (event_id) DO NOTHING
+                RETURNING event_id
+                """,
+                (
+                    event["id"],
+                    tenant_id,
+                    event["type"],
+                    event_object.get("metadata", {}).get("booking_id"),
+                    _event_created_at(event),
+                    json.dumps(event),
+                )
+            )
+            return cursor.fetchone() is not None
+    
+    def mark_event(
+        self,
+        event_id: str,
+        tenant_id: str,
+        status: str,
+        error: Optional[str] = None,
+        retry_in_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Record the processing outcome of a stored event
+        
+        Args:
+            event_id: Stripe event id
+            tenant_id: Tenant ID
+            status: 'processed', 'ignored' or 'failed'
+            error: Failure detail
+            retry_in_seconds: For a failed event, when to retry it (None = no more retries)
+        """
+        with get_cursor(tenant_id=tenant_id) as cursor:
+            cursor.execute(
+                """
+                UPDATE stripe_events
+                SET status = %s,
+                    error = %s,
+                    processed_at = NOW(),
+                    claimed_at = NULL,
+                    next_attempt_at = NOW() + (%s::float8 * INTERVAL '1 second')
+                WHERE event_id = %s
+                """,
+                (status, error, retry_in_seconds, event_id)
+            )
+    
+    def process_event(self, event: Dict, tenant_id: str) -> Dict:
+        """
+        Apply a stored webhook event
+        
+        Handles:
+        - payment_intent.succeeded
+        - payment_intent.payment_failed
+        - charge.refunded
+        """
+        if event["type"] == "payment_intent.succeeded":
+            return self.process_payment_success(event, tenant_id)
+        elif event["type"] == "payment_intent.payment_failed":
+            return self.process_payment_failed(event, tenant_id)
+        elif event["type"] == "charge.refunded":
+            return self.process_charge_refunded(event, tenant_id)
+        return {"status": "ignored", "event_type": event["type"]}
+    
     def process_payment_success(
         self,
         event: Dict,
@@ -176,23 +260,19 @@ class StripeService:
                 )
                 return {"status": "error", "message": "No booking_id in metadata"}
             
-            # Update booking in database
-            with get_cursor(tenant_id=tenant_id) as cursor:
-                cursor.execute(
-                    """
-                    UPDATE bookings
-                    SET 
-                        payment_status = 'paid',
-                        payment_amount = %s,
-                        payment_timestamp = NOW(),
-                        stripe_payment_intent_id = %s,
-                        updated_at = NOW()
-                    WHERE booking_id = %s AND tenant_id = %s
-                    RETURNING booking_id, payment_status, payment_amount
-                    """,
-                    (amount_paid, payment_intent["id"], booking_id, tenant_id)
-                )
-                update_result = cursor.fetchone()
+            # Update booking in database (no-op for events older than the last applied one)
+            update_result = self._apply_booking_event(
+                event,
+                tenant_id,
+                booking_id,
+                """
+                payment_status = 'paid',
+                payment_amount = %s,
+                payment_timestamp = NOW(),
+                stripe_payment_intent_id = %s
+                """,
+                (amount_paid, payment_intent["id"])
+            )
             
             if not update_result:
                 audit = get_audit_service(tenant_id)
@@ -201,11 +281,12 @@ class StripeService:
                     resource_type="payment",
                     metadata={
                         "booking_id": booking_id,
-                        "payment_intent_id": payment_intent["id"]
+                        "payment_intent_id": payment_intent["id"],
+                        "event_id": event["id"]
                     },
                     trace_id=None
                 )
-                return {"status": "error", "message": "Booking not found"}
+                return {"status": "error", "message": "Booking not found or newer event already applied"}
             
             # Log success
             audit = get_audit_service(tenant_id)
@@ -238,6 +319,120 @@ class StripeService:
                 trace_id=None
             )
             raise HTTPException(status_code=500, detail=f"Payment processing failed: {str(e)}")
+    
+    def process_payment_failed(self, event: Dict, tenant_id: str) -> Dict:
+        """
+        Process failed payment webhook
+        
+        Records the payment intent on a still-pending booking. payment_status
+        stays 'pending' so the booking keeps its reminder schedule (the
+        bookings_schedule_reminder trigger clears it for any other status);
+        paid bookings are left alone.
+        """
+        payment_intent = event["data"]["object"]
+        booking_id = payment_intent["metadata"].get("booking_id")
+        
+        updated = None
+        if booking_id:
+            updated = self._apply_booking_event(
+                event,
+                tenant_id,
+                booking_id,
+                "stripe_payment_intent_id = %s",
+                (payment_intent["id"],),
+                extra_where="AND COALESCE(payment_status, 'pending') = 'pending'"
+            )
+        
+        audit = get_audit_service(tenant_id)
+        audit.log_event(
+            action="payment_failed",
+            resource_type="payment",
+            resource_id=payment_intent["id"],
+            metadata={
+                "event_id": event["id"],
+                "booking_id": booking_id,
+                "booking_updated": bool(updated),
+                "failure_message": (payment_intent.get("last_payment_error") or {}).get("message")
+            },
+            trace_id=None
+        )
+        return {"status": "success" if updated else "acknowledged", "booking_id": booking_id}
+    
+    def process_charge_refunded(self, event: Dict, tenant_id: str) -> Dict:
+        """
+        Process refund webhook
+        
+        Full refunds mark the booking refunded; partial refunds are only audited.
+        """
+        charge = event["data"]["object"]
+        booking_id = charge["metadata"].get("booking_id")
+        fully_refunded = bool(charge.get("refunded"))
+        
+        updated = None
+        if booking_id and fully_refunded:
+            updated = self._apply_booking_event(
+                event,
+                tenant_id,
+                booking_id,
+                "payment_status = 'refunded'",
+                ()
+            )
+        
+        audit = get_audit_service(tenant_id)
+        audit.log_event(
+            action="charge_refunded",
+            resource_type="payment",
+            resource_id=charge["id"],
+            metadata={
+                "event_id": event["id"],
+                "booking_id": booking_id,
+                "amount_refunded": (charge.get("amount_refunded") or 0) / 100,
+                "fully_refunded": fully_refunded,
+                "booking_updated": bool(updated)
+            },
+            trace_id=None
+        )
+        return {"status": "success" if updated else "acknowledged", "booking_id": booking_id}
+    
+    def _apply_booking_event(
+        self,
+        event: Dict,
+        tenant_id: str,
+        booking_id: str,
+        set_clause: str,
+        params: tuple,
+        extra_where: str = ""
+    ) -> Optional[Dict]:
+        """
+        Apply a payment event to a booking unless a newer event was already applied
+        
+        The ordering check is part of the UPDATE itself, so stale and
+        out-of-order events cost no extra query.
+        
+        Returns:
+            Updated booking row, or None if not found / stale
+        """
+        event_created_at = _event_created_at(event)
+        with get_cursor(tenant_id=tenant_id) as cursor:
+            cursor.execute(
+                f"""
+                UPDATE bookings
+                SET {set_clause},
+                    last_stripe_event_at = %s,
+                    updated_at = NOW()
+                WHERE booking_id = %s AND tenant_id = %s
+                AND (last_stripe_event_at IS NULL OR last_stripe_event_at <= %s)
+                {extra_where}
+                RETURNING booking_id, payment_status, payment_amount
+                """,
+                (*params, event_created_at, booking_id, tenant_id, event_created_at)
+            )
+            return cursor.fetchone()
+
+
+def _event_created_at(event: Dict) -> datetime:
+    """Stripe event creation time (unix seconds) as an aware datetime"""
+    return datetime.fromtimestamp(event["created"], tz=timezone.utc)
 
 
 # Singleton factory
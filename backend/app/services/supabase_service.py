@@ -12,6 +12,9 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Client columns stored encrypted
+CLIENT_PII_FIELDS = ("name", "email", "phone", "company")
+
 
 def get_email_by_id(email_id: str, tenant_id: str) -> Optional[Dict[str, Any]]:
     """Get email by ID"""
@@ -42,6 +45,14 @@ def mark_email_processed(email_id: str, tenant_id: str) -> bool:
         return False
 
 
+def decrypt_client(client: Dict[str, Any]) -> Dict[str, Any]:
+    """Decrypt a client row's PII fields in place"""
+    for field in CLIENT_PII_FIELDS:
+        if client.get(field):
+            client[field] = decrypt(client[field])
+    return client
+
+
 def get_client_by_email_hash(email_hash: str, tenant_id: str) -> Optional[Dict[str, Any]]:
     """Get client by email hash"""
     try:
@@ -52,17 +63,7 @@ def get_client_by_email_hash(email_hash: str, tenant_id: str) -> Optional[Dict[s
             )
             row = cur.fetchone()
             if row:
-                client = dict(row)
-                # Decrypt PII fields
-                if client.get('name'):
-                    client['name'] = decrypt(client['name'])
-                if client.get('email'):
-                    client['email'] = decrypt(client['email'])
-                if client.get('phone'):
-                    client['phone'] = decrypt(client['phone'])
-                if client.get('company'):
-                    client['company'] = decrypt(client['company'])
-                return client
+                return decrypt_client(dict(row))
             return None
     except Exception:
         return None
@@ -74,9 +75,14 @@ def create_or_update_client(
     phone: Optional[str] = None,
     company: Optional[str] = None,
     tenant_id: str = None,
-    trace_id: Optional[str] = None
+    trace_id: Optional[str] = None,
+    client_id: Optional[str] = None
 ) -> Optional[str]:
-    """Create or update client record"""
+    """
+    Create or update client record
+
+    Pass client_id when the caller already loaded the client (skips the lookup).
+    """
     from app.services.gmail_service import hash_email
     
     tenant_id = tenant_id or settings.default_tenant_id
@@ -86,14 +92,15 @@ def create_or_update_client(
     try:
         with get_cursor(tenant_id=tenant_id) as cur:
             # Check if exists
-            cur.execute(
-                "SELECT id FROM clients WHERE email_hash = %s AND tenant_id = %s",
-                (email_hash, tenant_id)
-            )
-            existing = cur.fetchone()
+            if not client_id:
+                cur.execute(
+                    "SELECT id FROM clients WHERE email_hash = %s AND tenant_id = %s",
+                    (email_hash, tenant_id)
+                )
+                existing = cur.fetchone()
+                client_id = existing["id"] if existing else None
             
-            if existing:
-                client_id = existing[0]
+            if client_id:
                 # Update
                 updates = []
                 params = []
@@ -325,17 +332,7 @@ def get_client_by_id(client_id: str, tenant_id: str) -> Optional[Dict[str, Any]]
             )
             row = cur.fetchone()
             if row:
-                client = dict(row)
-                # Decrypt PII fields
-                if client.get('name'):
-                    client['name'] = decrypt(client['name'])
-                if client.get('email'):
-                    client['email'] = decrypt(client['email'])
-                if client.get('phone'):
-                    client['phone'] = decrypt(client['phone'])
-                if client.get('company'):
-                    client['company'] = decrypt(client['company'])
-                return client
+                return decrypt_client(dict(row))
             return None
     except Exception:
         return None
@@ -354,20 +351,7 @@ def list_clients(tenant_id: str, limit: int = 100, offset: int = 0) -> List[Dict
                 """,
                 (tenant_id, limit, offset)
             )
-            clients = []
-            for row in cur.fetchall():
-                client = dict(row)
-                # Decrypt PII fields
-                if client.get('name'):
-                    client['name'] = decrypt(client['name'])
-                if client.get('email'):
-                    client['email'] = decrypt(client['email'])
-                if client.get('phone'):
-                    client['phone'] = decrypt(client['phone'])
-                if client.get('company'):
-                    client['company'] = decrypt(client['company'])
-                clients.append(client)
-            return clients
+            return [decrypt_client(dict(row)) for row in cur.fetchall()]
     except Exception:
         return []
 
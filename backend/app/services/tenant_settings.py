@@ -0,0 +1,208 @@
+"""
+OMEGA Core v3.0 - Tenant Settings Cache
+Per-tenant settings (timezone, safe mode, feature flags) loaded once and
+refreshed when the tenant changes
+"""
+import asyncio
+import logging
+import select
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import psycopg2
+from fastapi import Request
+from app.database import get_cursor, TENANT_SETTINGS_CHANNEL
+from app.utils.metrics import get_registry
+from app.utils.ttl_cache import TTLCache
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Wait before re-opening a lost LISTEN connection (the TTL covers the gap)
+RECONNECT_DELAY_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class TenantSettings:
+    """
+    Settings a request handler may need for its tenant
+
+    Feature flags (tenants.feature_flags):
+        draft_streaming: /api/gmail/emails/{id}/draft/stream (default on)
+    """
+    tenant_id: str
+    timezone: str = "UTC"
+    safe_mode: bool = False
+    feature_flags: Dict[str, Any] = field(default_factory=dict)
+
+    def is_enabled(self, flag: str, default: bool = False) -> bool:
+        """Check a feature flag"""
+        return bool(self.feature_flags.get(flag, default))
+
+
+class TenantSettingsCache:
+    """
+    Lazily loaded, change-invalidated tenant settings
+
+    Settings are loaded on first use per tenant (one query joining tenants
+    and the safe_mode system_state row) and kept for ttl_seconds. Changes to
+    either table NOTIFY the 'tenant_settings' channel (migration 024); a
+    background thread LISTENs and drops the tenant's entry, so other
+    processes see the change on their next read. The TTL bounds staleness
+    while the listener is reconnecting.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 10000, dsn: Optional[str] = None):
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.dsn = dsn or settings.database_url
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._invalidations = 0
+
+    def get(self, tenant_id: str) -> TenantSettings:
+        """
+        Get settings for a tenant (loads on miss; defaults if the lookup fails)
+
+        Args:
+            tenant_id: Tenant UUID
+
+        Returns:
+            TenantSettings
+        """
+        tenant_id = str(tenant_id)
+        cached = self._cache.get(tenant_id)
+        if cached is not None:
+            return cached
+        self._ensure_listener()
+        try:
+            loaded = self._load(tenant_id)
+        except Exception as e:
+            # Fail-open: defaults, not cached, so the next call retries
+            logger.warning(f"Tenant settings load failed for {tenant_id}: {e}")
+            return TenantSettings(tenant_id=tenant_id)
+        self._cache.set(tenant_id, loaded)
+        return loaded
+
+    def get_cached(self, tenant_id: str) -> Optional[TenantSettings]:
+        """Cached settings without touching the database (None on miss)"""
+        return self._cache.get(str(tenant_id))
+
+    def invalidate(self, tenant_id: str) -> None:
+        """Drop a tenant's cached settings"""
+        self._cache.pop(str(tenant_id))
+        self._invalidations += 1
+
+    def _load(self, tenant_id: str) -> TenantSettings:
+        with get_cursor(tenant_id=tenant_id) as cur:
+            cur.execute(
+                """
+                SELECT t.timezone,
+                       COALESCE(t.feature_flags, '{}'::jsonb) AS feature_flags,
+                       (SELECT s.state_value FROM system_state s
+                        WHERE s.tenant_id = t.id AND s.state_key = 'safe_mode') AS safe_mode
+                FROM tenants t
+                WHERE t.id = %s
+                """,
+                (tenant_id,),
+            )
+            row = cur.fetchone()
+        if not row:
+            return TenantSettings(tenant_id=tenant_id)
+        return TenantSettings(
+            tenant_id=tenant_id,
+            timezone=row["timezone"] or "UTC",
+            safe_mode=row["safe_mode"] == "true",
+            feature_flags=dict(row["feature_flags"] or {}),
+        )
+
+    # ------------------------------------------------------------------
+    # Change notifications
+    # ------------------------------------------------------------------
+
+    def _ensure_listener(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="tenant-settings", daemon=True)
+                self._thread.start()
+
+    def _listen(self) -> None:
+        """LISTEN for tenant changes until stopped, reconnecting on failure"""
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{TENANT_SETTINGS_CHANNEL}"')
+                # Anything cached before LISTEN took effect may be stale
+                self._cache.clear()
+                while not self._stop_event.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        for notify in conn.notifies:
+                            self.invalidate(notify.payload)
+                        conn.notifies.clear()
+            except Exception as e:
+                logger.warning(f"Tenant settings listener error: {e}")
+                self._stop_event.wait(RECONNECT_DELAY_SECONDS)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache stats plus invalidation count"""
+        return {**self._cache.stats(), "invalidations": self._invalidations}
+
+    def stop(self) -> None:
+        """Stop the listener thread"""
+        self._stop_event.set()
+
+
+_tenant_settings_cache: Optional[TenantSettingsCache] = None
+_tenant_settings_cache_lock = threading.Lock()
+
+
+def get_tenant_settings_cache() -> TenantSettingsCache:
+    """Get process-wide tenant settings cache"""
+    global _tenant_settings_cache
+    if _tenant_settings_cache is None:
+        with _tenant_settings_cache_lock:
+            if _tenant_settings_cache is None:
+                _tenant_settings_cache = TenantSettingsCache(ttl_seconds=settings.tenant_settings_ttl_seconds)
+                get_registry().register_stats("tenant_settings", _tenant_settings_cache.get_stats, "Tenant settings cache")
+    return _tenant_settings_cache
+
+
+def get_tenant_settings(tenant_id: str) -> TenantSettings:
+    """Get (cached) settings for a tenant"""
+    return get_tenant_settings_cache().get(tenant_id)
+
+
+async def get_request_tenant_settings(request: Request) -> TenantSettings:
+    """
+    Settings for the request's tenant (dependency)
+
+    Served from memory once loaded; a cold load runs off the event loop.
+    The result is also kept on request.state.tenant_settings.
+    """
+    cached = getattr(request.state, "tenant_settings", None)
+    if cached is not None:
+        return cached
+    cache = get_tenant_settings_cache()
+    tenant_id = request.state.tenant_id
+    tenant_settings = cache.get_cached(tenant_id) or await asyncio.to_thread(cache.get, tenant_id)
+    request.state.tenant_settings = tenant_settings
+    return tenant_settings
+
+
+def stop_tenant_settings_cache() -> None:
+    """Stop the listener if the cache was created (called on shutdown)"""
+    if _tenant_settings_cache is not None:
+        _tenant_settings_cache.stop()
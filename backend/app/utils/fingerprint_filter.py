@@ -0,0 +1,115 @@
+"""
+OMEGA Core v3.0 - Rotating Bloom Filter
+Time-windowed probabilistic set for replay-fingerprint pre-checks
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+
+class BloomFilter:
+    """Fixed-size bloom filter backed by a bytearray"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _indexes(self, key: str) -> Iterable[int]:
+        """Bit positions for key (double hashing over one SHA-256 digest)"""
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        """Add key"""
+        for index in self._indexes(key):
+            self.bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(key))
+
+
+class RotatingBloomFilter:
+    """
+    Bloom filter covering a sliding time window.
+
+    Keys go into the newest generation; lookups check every generation. Every
+    rotation_seconds the oldest generation is dropped, so a key is remembered
+    for between (generations - 1) and generations rotation periods. A negative
+    answer is definite; a positive answer must be confirmed elsewhere.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100000,
+        error_rate: float = 0.01,
+        rotation_seconds: float = 3600.0,
+        generations: int = 2,
+    ):
+        if generations < 2:
+            raise ValueError("generations must be at least 2")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rotation_seconds = rotation_seconds
+        self.generations = generations
+        self._filters: List[BloomFilter] = [BloomFilter(capacity, error_rate)]
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._rotations = 0
+
+    def _maybe_rotate(self) -> None:
+        """Start a new generation when the current one is old or full (lock held)"""
+        now = time.monotonic()
+        current = self._filters[-1]
+        if now - self._rotated_at < self.rotation_seconds and current.count < self.capacity:
+            return
+        self._filters.append(BloomFilter(self.capacity, self.error_rate))
+        if len(self._filters) > self.generations:
+            self._filters.pop(0)
+        self._rotated_at = now
+        self._rotations += 1
+
+    def add(self, key: str) -> None:
+        """Add key to the current generation"""
+        with self._lock:
+            self._maybe_rotate()
+            self._filters[-1].add(key)
+
+    def add_many(self, keys: Iterable[str]) -> int:
+        """Add keys (used for warm-up); returns number added"""
+        added = 0
+        with self._lock:
+            for key in keys:
+                self._maybe_rotate()
+                self._filters[-1].add(key)
+                added += 1
+        return added
+
+    def might_contain(self, key: str) -> bool:
+        """False means key was definitely not added within the window"""
+        with self._lock:
+            self._maybe_rotate()
+            return any(key in bloom for bloom in self._filters)
+
+    def __contains__(self, key: str) -> bool:
+        return self.might_contain(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get generation sizes and rotation count"""
+        with self._lock:
+            return {
+                "generations": [bloom.count for bloom in self._filters],
+                "rotations": self._rotations,
+                "bits_per_generation": self._filters[-1].num_bits,
+                "num_hashes": self._filters[-1].num_hashes,
+            }
@@ -0,0 +1,78 @@
+"""
+OMEGA Core v3.0 - LLM Pricing
+Per-model token prices for usage cost estimates
+"""
+from typing import Optional, Tuple
+
+# USD per million tokens: (input, output), matched by model-name prefix
+# (longest prefix wins, so dated model IDs resolve to their family)
+MODEL_PRICES_PER_MTOK = {
+    "claude-opus-4": (15.00, 75.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-opus": (15.00, 75.00),
+    "claude-3-haiku": (0.25, 1.25),
+}
+
+# Prompt-cache multipliers on the input price (5-minute cache)
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.10
+
+
+def get_model_prices(model: str) -> Optional[Tuple[float, float]]:
+    """
+    Look up (input, output) USD per million tokens for a model
+
+    Returns:
+        Prices, or None for unknown models
+    """
+    best = None
+    for prefix, prices in MODEL_PRICES_PER_MTOK.items():
+        if model.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, prices)
+    return best[1] if best else None
+
+
+def estimate_cost_usd(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> Optional[float]:
+    """
+    Estimate the cost of one call
+
+    Args:
+        model: Model ID
+        input_tokens: Uncached input tokens
+        output_tokens: Output tokens
+        cache_read_tokens: Input tokens served from the prompt cache
+        cache_write_tokens: Input tokens written to the prompt cache
+
+    Returns:
+        Cost in USD, or None for unknown models
+    """
+    prices = get_model_prices(model)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (
+        input_tokens * input_price
+        + cache_write_tokens * input_price * CACHE_WRITE_MULTIPLIER
+        + cache_read_tokens * input_price * CACHE_READ_MULTIPLIER
+        + output_tokens * output_price
+    ) / 1_000_000
+
+
+def cache_hit_ratio(input_tokens: int, cache_read_tokens: int, cache_write_tokens: int = 0) -> Optional[float]:
+    """
+    Share of prompt tokens served from the cache
+
+    Returns:
+        Ratio in [0, 1], or None when there were no prompt tokens
+    """
+    total = input_tokens + cache_read_tokens + cache_write_tokens
+    return cache_read_tokens / total if total else None
@@ -0,0 +1,25 @@
+"""
+OMEGA Core v3.0 - Advisory Lock Keys
+Stable 64-bit PostgreSQL advisory lock keys
+"""
+import hashlib
+from typing import Optional
+
+
+def advisory_lock_key(namespace: str, resource: str, tenant_id: Optional[str] = None) -> int:
+    """
+    Derive a stable signed 64-bit advisory lock key
+
+    Unlike hash(), the result is identical in every process and Python
+    version, and the 64-bit space makes collisions negligible.
+
+    Args:
+        namespace: Lock namespace (e.g. "email_processor")
+        resource: Locked resource ID (e.g. Gmail message ID)
+        tenant_id: Tenant ID (keys are per tenant)
+
+    Returns:
+        Signed 64-bit integer accepted by pg_advisory_lock(bigint)
+    """
+    material = f"{namespace}\x1f{tenant_id or ''}\x1f{resource}".encode("utf-8")
+    return int.from_bytes(hashlib.sha256(material).digest()[:8], "big", signed=True)
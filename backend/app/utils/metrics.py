@@ -0,0 +1,404 @@
+"""
+OMEGA Core v3.0 - In-Process Metrics
+Thread-safe counters, gauges, histograms and stats collectors, a span/timer
+API and Prometheus text exposition
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond DB lookups through multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _metric_name(name: str) -> str:
+    """Turn a stats key into a valid metric name"""
+    return _INVALID_NAME_CHARS.sub("_", name)
+
+
+class _Metric:
+    """Shared label handling for labelled metrics"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels: Any) -> float:
+        """Current value of one series (0 if never set)"""
+        with self._lock:
+            return self._series.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        """Render in Prometheus text exposition format"""
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in series:
+            lines.append(f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic counter keyed by label values"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add amount (must be >= 0)"""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, keyed by label values"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class StatsCollector:
+    """
+    Exposes a component's get_stats() dict at scrape time.
+
+    Every numeric (or boolean) top-level value becomes an untyped sample
+    named <prefix>_<key>; strings, lists and None are skipped. A failing
+    stats function renders nothing rather than breaking the scrape.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], Optional[Dict[str, Any]]]):
+        self.name = name
+        self.help_text = help_text
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            stats = self.fn() or {}
+        except Exception as e:
+            logger.debug(f"Stats collector {self.name} failed: {e}")
+            return []
+        lines: List[str] = []
+        for key, value in sorted(stats.items()):
+            if isinstance(value, bool):
+                value = int(value)
+            if not isinstance(value, (int, float)):
+                continue
+            metric = f"{self.name}_{_metric_name(str(key))}"
+            lines.append(f"# HELP {metric} {self.help_text} ({key})")
+            lines.append(f"# TYPE {metric} untyped")
+            lines.append(f"{metric} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram keyed by label values.
+
+    observe() costs one bisect and a few integer increments under a lock, so
+    it is cheap enough for every pipeline stage of every email.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the with-block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, Any]]:
+        """
+        Get a consistent copy of every series
+
+        Returns:
+            Dict of label values -> {"buckets": cumulative counts, "sum", "count"}
+        """
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        result = {}
+        for key, (counts, total, count) in series.items():
+            cumulative, running = [], 0
+            for n in counts:
+                running += n
+                cumulative.append(running)
+            result[key] = {"buckets": cumulative, "sum": total, "count": count}
+        return result
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimate a quantile from the buckets (upper bound of the bucket it falls in)"""
+        series = self.snapshot().get(self._key(labels))
+        if not series or not series["count"]:
+            return None
+        rank = q * series["count"]
+        for bound, cumulative in zip(self.buckets + (float("inf"),), series["buckets"]):
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        """Render in Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (float("inf"),)
+        for key, series in sorted(self.snapshot().items()):
+            pairs = list(zip(self.labelnames, key))
+            for bound, cumulative in zip(bounds, series["buckets"]):
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge"""
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def register_stats(self, prefix: str, fn: Callable[[], Optional[Dict[str, Any]]], help_text: str) -> None:
+        """
+        Expose a get_stats()-style function under prefix (replaces a previous registration)
+
+        Args:
+            prefix: Metric name prefix, e.g. "sms_queue"
+            fn: Returns a stats dict (evaluated on every scrape, so keep it cheap)
+            help_text: Description of the component
+        """
+        with self._lock:
+            self._metrics[prefix] = StatsCollector(prefix, help_text, fn)
+
+    def unregister(self, name: str) -> None:
+        """Remove a metric or stats collector"""
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional[Any]:
+        """Get a registered metric by name"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines: List[str] = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Timeline:
+    """
+    Per-operation span recorder.
+
+    Each span() records the stage's offset and duration on the timeline (for
+    forensics on one slow operation) and, if a histogram is given, observes
+    the duration under the stage label (for aggregate latency).
+    """
+
+    def __init__(self, histogram: Optional[Histogram] = None, trace_id: Optional[str] = None):
+        self.histogram = histogram
+        self.trace_id = trace_id
+        self.spans: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the with-block as one stage (recorded even if it raises)"""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            self.spans.append({
+                "stage": stage,
+                "offset_ms": round((started - self._started) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                "error": error,
+            })
+            if self.histogram is not None:
+                self.histogram.observe(duration, stage=stage)
+
+    def elapsed(self) -> float:
+        """Seconds since the timeline started"""
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view (for logging or storage)"""
+        return {
+            "trace_id": self.trace_id,
+            "total_ms": round(self.elapsed() * 1000, 3),
+            "spans": list(self.spans),
+        }
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    return _registry
+
+
+# Shared by outbound HTTP integrations (Nova, Claude, Google JWKS, ...)
+HTTP_CLIENT_SECONDS = _registry.histogram(
+    "http_client_request_seconds",
+    "Outbound API call time by service and outcome",
+    labelnames=("service", "outcome"),
+)
+
+
+@contextmanager
+def track_call(service: str) -> Iterator[None]:
+    """Time an outbound call into HTTP_CLIENT_SECONDS (outcome "ok", or "error" if it raises)"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        HTTP_CLIENT_SECONDS.observe(time.perf_counter() - started, service=service, outcome=outcome)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, registry: Optional[MetricsRegistry] = None, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve /metrics from a daemon thread (for processes without the web app, e.g. workers)
+
+    Returns:
+        The server (call shutdown() to stop it)
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or _registry
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -11,8 +11,28 @@ COMMON_PASSWORDS = {
     "letmein", "welcome", "admin", "root", "passw0rd"
 }
 
+# Default bcrypt cost factor (log2 rounds)
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+def make_crypt_context(bcrypt_rounds: int = DEFAULT_BCRYPT_ROUNDS) -> CryptContext:
+    """
+    Build the password hashing context
+    
+    Hashes made with a different cost report needs_update(), so logins
+    transparently rehash them when the cost is tuned up or down.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+    )
+
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_crypt_context()
 
 
 def validate_password(password: str) -> Tuple[bool, Optional[str]]:
@@ -49,11 +69,24 @@ def validate_password(password: str) -> Tuple[bool, Optional[str]]:
 class PasswordPolicyService:
     """Password policy service with hashing"""
     
+    def __init__(self, context: Optional[CryptContext] = None):
+        self.context = context or pwd_context
+    
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify password against hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return self.context.verify(plain_password, hashed_password)
+    
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify password and rehash it if the stored hash is outdated
+        
+        Returns:
+            Tuple of (is_valid, new_hash); new_hash is set only when the
+            password is valid and the hash needs updating
+        """
+        return self.context.verify_and_update(plain_password, hashed_password)
     
     def get_password_hash(self, password: str) -> str:
         """Hash password"""
-        return pwd_context.hash(password)
+        return self.context.hash(password)
 
@@ -0,0 +1,248 @@
+"""
+OMEGA Core v3.0 - Shared-Memory Rate Limiter
+Token buckets in an mmap'd file shared by every worker process on a host
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# File layout: header, then a fixed open-addressing table of bucket slots
+_HEADER = struct.Struct("<8sIId")  # magic, version, slot count, last reconcile (monotonic)
+_SLOT = struct.Struct("<Qddddd")   # key hash, tokens, updated_at, capacity, pending local use, remote use seen
+_MAGIC = b"MAYARL01"
+_VERSION = 1
+
+# Slots probed per key before evicting the stalest one
+MAX_PROBES = 8
+
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(second|minute|hour|day)\s*$")
+_PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """
+    Parse "N/period" (as used by the previous slowapi limits)
+
+    Returns:
+        Tuple of (tokens per second, bucket capacity)
+
+    Raises:
+        ValueError: If the rate string is malformed
+    """
+    match = _RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    count = int(match.group(1))
+    return count / _PERIOD_SECONDS[match.group(2)], float(count)
+
+
+def key_hash(key: str) -> int:
+    """Stable non-zero 63-bit hash of a bucket key (0 marks an empty slot; fits BIGINT)"""
+    value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") >> 1
+    return value or 1
+
+
+class SharedRateLimiter:
+    """
+    Token buckets shared across processes through an mmap'd file
+
+    Every worker process on the host maps the same file, so a limit of
+    100/minute is 100/minute for the host rather than per process. Each
+    check hashes the key, probes a few slots and updates the bucket under a
+    byte-range lock on that slot (plus a thread lock, since fcntl locks are
+    per process). That is a couple of syscalls and no network hop.
+
+    Keys that collide on every probed slot evict the stalest bucket, which
+    then starts full again: under pressure the limiter errs on allowing.
+
+    For optional cross-host enforcement each bucket also accumulates the
+    tokens taken on this host since the last take_pending(), and remembers
+    how much of the other hosts' usage it has already been charged
+    (debit_remote()); app.services.rate_limiter exchanges both via Postgres.
+    """
+
+    def __init__(self, path: str, slots: int = 4096):
+        self.path = path
+        self.slots = slots
+        self._size = _HEADER.size + slots * _SLOT.size
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._init_file()
+        self._mm = mmap.mmap(self._fd, self._size)
+
+    def _init_file(self) -> None:
+        """Create or reset the table (first process wins; others see it initialised)"""
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            valid = (
+                len(header) == _HEADER.size
+                and _HEADER.unpack(header)[:3] == (_MAGIC, _VERSION, self.slots)
+                and os.fstat(self._fd).st_size == self._size
+            )
+            if not valid:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, self.slots, 0.0), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _lock(self, offset: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, offset)
+
+    def _unlock(self, offset: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    def _find_slot(self, hashed: int) -> int:
+        """
+        Find the slot for a key: its own, else an empty one, else the stalest probed
+
+        Returns:
+            Byte offset of the slot (the caller holds no lock yet)
+        """
+        start = hashed % self.slots
+        stalest_offset, stalest_at = 0, None
+        for probe in range(MAX_PROBES):
+            offset = self._offset((start + probe) % self.slots)
+            slot_key, _, updated_at, _, _, _ = _SLOT.unpack_from(self._mm, offset)
+            if slot_key == hashed or slot_key == 0:
+                return offset
+            if stalest_at is None or updated_at < stalest_at:
+                stalest_offset, stalest_at = offset, updated_at
+        return stalest_offset
+
+    def hit(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        Take cost tokens from the key's bucket
+
+        Args:
+            key: Bucket key (e.g. "tenant:route")
+            rate: Refill rate in tokens per second
+            capacity: Bucket size (burst)
+            cost: Tokens to take
+
+        Returns:
+            0 if allowed, otherwise seconds until enough tokens are available
+        """
+        hashed = key_hash(key)
+        now = time.monotonic()
+        with self._thread_lock:
+            offset = self._find_slot(hashed)
+            self._lock(offset)
+            try:
+                slot_key, tokens, updated_at, _, pending, remote_seen = _SLOT.unpack_from(self._mm, offset)
+                if slot_key != hashed:
+                    # New (or evicted) bucket starts full; remote usage not yet known
+                    tokens, updated_at, pending, remote_seen = capacity, now, 0.0, -1.0
+                tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+                if tokens >= cost:
+                    tokens -= cost
+                    pending += cost
+                    wait = 0.0
+                else:
+                    wait = (cost - tokens) / rate if rate > 0 else float("inf")
+                _SLOT.pack_into(self._mm, offset, hashed, tokens, now, capacity, pending, remote_seen)
+            finally:
+                self._unlock(offset)
+        return wait
+
+    def take_pending(self) -> Dict[int, float]:
+        """
+        Collect and reset the tokens taken on this host since the last call
+
+        Returns:
+            Key hash -> tokens taken
+        """
+        taken: Dict[int, float] = {}
+        with self._thread_lock:
+            for index in range(self.slots):
+                offset = self._offset(index)
+                if not _SLOT.unpack_from(self._mm, offset)[4]:
+                    continue
+                self._lock(offset)
+                try:
+                    slot_key, tokens, updated_at, capacity, pending, remote_seen = _SLOT.unpack_from(self._mm, offset)
+                    if slot_key and pending:
+                        taken[slot_key] = taken.get(slot_key, 0.0) + pending
+                        _SLOT.pack_into(self._mm, offset, slot_key, tokens, updated_at, capacity, 0.0, remote_seen)
+                finally:
+                    self._unlock(offset)
+        return taken
+
+    def active_keys(self) -> List[int]:
+        """Key hashes of occupied slots (unlocked snapshot)"""
+        return [
+            slot_key
+            for slot_key in (_SLOT.unpack_from(self._mm, self._offset(i))[0] for i in range(self.slots))
+            if slot_key
+        ]
+
+    def debit_remote(self, remote_totals: Dict[int, float]) -> int:
+        """
+        Charge buckets for tokens other hosts took since the last call
+
+        The first total seen for a bucket only sets its baseline, as does a
+        total that went down (expired rows on other hosts). Debt is
+        capped at one bucket, so a burst elsewhere cannot lock a key out for
+        longer than one refill period.
+
+        Args:
+            remote_totals: Key hash -> cumulative tokens taken by other hosts
+
+        Returns:
+            Number of buckets debited
+        """
+        debited = 0
+        with self._thread_lock:
+            for index in range(self.slots):
+                offset = self._offset(index)
+                if _SLOT.unpack_from(self._mm, offset)[0] not in remote_totals:
+                    continue
+                self._lock(offset)
+                try:
+                    slot_key, tokens, updated_at, capacity, pending, remote_seen = _SLOT.unpack_from(self._mm, offset)
+                    remote_total = remote_totals.get(slot_key)
+                    if remote_total is None or remote_total == remote_seen:
+                        continue
+                    if 0 <= remote_seen < remote_total:
+                        tokens = max(tokens - (remote_total - remote_seen), -capacity)
+                        debited += 1
+                    _SLOT.pack_into(self._mm, offset, slot_key, tokens, updated_at, capacity, pending, remote_total)
+                finally:
+                    self._unlock(offset)
+        return debited
+
+    def claim_reconcile(self, interval_seconds: float) -> bool:
+        """
+        Claim the host-wide reconcile turn (at most one process per interval)
+
+        Returns:
+            True if this process should reconcile now
+        """
+        now = time.monotonic()
+        with self._thread_lock:
+            self._lock(0)
+            try:
+                magic, version, slots, last = _HEADER.unpack_from(self._mm, 0)
+                if last and now - last < interval_seconds:
+                    return False
+                _HEADER.pack_into(self._mm, 0, magic, version, slots, now)
+                return True
+            finally:
+                self._unlock(0)
+
+    def close(self) -> None:
+        """Unmap and close the file (the table persists for other processes)"""
+        try:
+            self._mm.close()
+        finally:
+            os.close(self._fd)
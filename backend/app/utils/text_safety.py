@@ -0,0 +1,258 @@
+"""
+OMEGA Core v3.0 - Text Safety Scanner
+Precompiled scans over LLM output: one pass sanitizes it (URLs, email
+addresses, HTML, scripts), another finds Sentra static-rule violations
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+URL_PLACEHOLDER = "[URL_REMOVED]"
+EMAIL_PLACEHOLDER = "[EMAIL_REMOVED]"
+
+# URLs on these domains are not reported as external (they are still removed)
+INTERNAL_URL_DOMAINS = ("skinnymanmusic.com", "levelthree.io")
+
+# Sentra static rules: violation type -> severity
+RULE_SEVERITY = {
+    "system_prompt_reveal": "high",
+    "ai_hallucination": "high",
+    "external_urls": "medium",
+    "invented_details": "high",
+}
+
+# Every branch is linear per start position (tags stop at the next '<',
+# domains are bounded by the DNS label limits), so the scans stay linear on
+# adversarial input. The leading lookahead lists every branch's first
+# character so most positions are rejected with one test. Emails are matched
+# from their '@' (see _email_span) rather than from every letter of every
+# word.
+_URL = r"https?://[^\s<>\"'`{}|\\^]+"
+_SANITIZE = re.compile(
+    rf"""
+    (?=[<@hH])
+    (?:
+      (?P<script>(?i:<script\b)[^<>]*>)
+    | (?P<tag></?[A-Za-z!/?][^<>]*>)
+    | (?P<url>{_URL})
+    | (?P<at>@)
+    )
+    """,
+    re.VERBOSE,
+)
+# Findings are lookaheads over the whole original text, so text the sanitizer
+# removes (tag attributes such as href/src, script bodies) is still checked
+_FINDINGS = re.compile(
+    rf"""
+    (?=[$0-9hHsSiIpP])
+    (?=
+      (?P<url>{_URL})
+    | (?P<system_prompt_reveal>(?i:system\ prompt|here\ is\ my\ system|i\ am\ an\ ai\ assistant))
+    | (?P<ai_hallucination>(?i:i'm\ not\ sure\ but|i\ believe|probably))
+    | (?P<invented_details>\$\d|\d{{1,2}}:\d{{2}}[ \t]{{0,8}}(?:AM|PM|am|pm))
+    )
+    """,
+    re.VERBOSE,
+)
+_SCRIPT_OPEN = re.compile(r"<script\b", re.IGNORECASE)
+_SCRIPT_CLOSE = re.compile(r"</script\s*>", re.IGNORECASE)
+_EMAIL_DOMAIN = re.compile(r"[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){0,8}\.[A-Za-z]{2,24}\b")
+_EMAIL_LOCAL_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-"
+
+
+def _email_span(text: str, at: int, floor: int) -> Optional[Tuple[int, int]]:
+    """
+    Expand an '@' into the surrounding email address
+
+    The local part is found by stripping local-part characters backwards in
+    64-character windows (never past floor, the end of the previous
+    replacement), so each character is looked at once.
+
+    Returns:
+        (start, end) of the address, or None if the '@' is not part of one
+    """
+    start = at
+    while start > floor:
+        window = text[max(floor, start - 64):start]
+        kept = len(window.rstrip(_EMAIL_LOCAL_CHARS))
+        start -= len(window) - kept
+        if kept:
+            break
+    if start == at:
+        return None
+    domain = _EMAIL_DOMAIN.match(text, at + 1)
+    if domain is None:
+        return None
+    return start, domain.end()
+
+
+@dataclass
+class TextSafetyResult:
+    """Sanitized text plus Sentra static-rule violations found in the input"""
+    text: str
+    violations: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def has_violations(self) -> bool:
+        return bool(self.violations)
+
+    @property
+    def violation_types(self) -> List[str]:
+        return [violation["type"] for violation in self.violations]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sentra check_static_safety_rules() shape"""
+        return {"violations": self.violations, "has_violations": self.has_violations}
+
+
+def _sanitize(text: str) -> str:
+    """Single pass replacing URLs and emails and removing tags and script blocks"""
+    out: List[str] = []
+    emit_from = 0
+    search_from = 0
+    length = len(text)
+
+    while search_from <= length:
+        match = _SANITIZE.search(text, search_from)
+        if match is None:
+            break
+        kind = match.lastgroup
+        start, end = match.span()
+
+        if kind == "at":
+            span = _email_span(text, start, emit_from)
+            if span is None:
+                search_from = end
+                continue
+            start, end = span
+
+        out.append(text[emit_from:start])
+        if kind == "at":
+            out.append(EMAIL_PLACEHOLDER)
+        elif kind == "script":
+            close = _SCRIPT_CLOSE.search(text, end)
+            end = close.end() if close else length
+        elif kind == "url":
+            out.append(URL_PLACEHOLDER)
+        emit_from = search_from = end
+
+    out.append(text[emit_from:])
+    return "".join(out)
+
+
+def _findings(text: str) -> Tuple[Set[str], List[str]]:
+    """
+    Rule findings over the full text (including markup the sanitizer drops)
+
+    Returns:
+        Tuple of (rule names found, URLs found)
+    """
+    found: Set[str] = set()
+    urls: List[str] = []
+    for match in _FINDINGS.finditer(text):
+        kind = match.lastgroup
+        if kind == "url":
+            urls.append(match.group("url"))
+        else:
+            found.add(kind)
+    return found, urls
+
+
+def scan_text(text: str) -> TextSafetyResult:
+    """
+    Sanitize text and check it against the Sentra static rules
+
+    Sanitizing removes <script> blocks (an unclosed one removes the rest of
+    the text), strips HTML tags, and replaces URLs and email addresses with
+    placeholders. Findings are taken from the whole original text, including
+    tag attributes and script bodies that sanitizing removes.
+
+    Args:
+        text: LLM output or email text
+
+    Returns:
+        TextSafetyResult
+    """
+    sanitized = _sanitize(text)
+    found, urls = _findings(text)
+
+    external_urls = [url for url in urls if not any(domain in url for domain in INTERNAL_URL_DOMAINS)]
+    if external_urls:
+        found.add("external_urls")
+
+    violations: List[Dict[str, Any]] = []
+    for rule, severity in RULE_SEVERITY.items():
+        if rule in found:
+            violation: Dict[str, Any] = {"type": rule, "severity": severity}
+            if rule == "external_urls":
+                violation["urls"] = external_urls
+            violations.append(violation)
+
+    return TextSafetyResult(text=sanitized.strip(), violations=violations)
+
+
+class StreamingSanitizer:
+    """
+    Incremental scan_text for streamed LLM output
+
+    feed() returns the sanitized form of the text that can no longer change:
+    everything up to the last whitespace, except an unfinished tag or an
+    unclosed <script> block, which are held back until they complete. URLs
+    and emails end at whitespace, so previews never leak a partial address.
+
+    finish() rescans the whole text; its result is authoritative (findings
+    that span chunks are only seen there).
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._pending = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add streamed text
+
+        Returns:
+            Sanitized text ready to display (may be empty)
+        """
+        self._chunks.append(chunk)
+        self._pending += chunk
+        cut = self._safe_cut(self._pending)
+        if not cut:
+            return ""
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        sanitized = _sanitize(ready)
+        if not self._started:
+            sanitized = sanitized.lstrip()
+            self._started = bool(sanitized)
+        return sanitized
+
+    def finish(self) -> TextSafetyResult:
+        """Scan the complete text"""
+        return scan_text("".join(self._chunks))
+
+    @staticmethod
+    def _safe_cut(text: str) -> int:
+        """Length of the prefix of text that later input cannot change"""
+        cut = max(text.rfind(" "), text.rfind("\n"), text.rfind("\t")) + 1
+        # Not inside a tag that may still be closed
+        open_tag = text.rfind("<", 0, cut)
+        if open_tag > text.rfind(">", 0, cut):
+            cut = open_tag
+        # Not past the start of an unclosed script
+        position = 0
+        while True:
+            script = _SCRIPT_OPEN.search(text, position, cut)
+            if script is None:
+                break
+            close = _SCRIPT_CLOSE.search(text, script.end())
+            if close is None or close.end() > cut:
+                return script.start()
+            position = close.end()
+        return cut
+
+
+def sanitize_text(text: str) -> str:
+    """Sanitized text only (see scan_text)"""
+    return scan_text(text).text
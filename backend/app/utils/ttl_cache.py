@@ -0,0 +1,98 @@
+"""
+OMEGA Core v3.0 - In-Process TTL Cache
+Thread-safe, size-bounded LRU cache with per-entry expiry
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after ttl_seconds.
+
+    Safe to share across request and worker threads. Values are stored as-is;
+    callers that mutate cached dicts should copy on read.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get value for key, or default if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store value for key, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, key: Hashable, fn: Callable[[Any], Any]) -> bool:
+        """
+        Apply fn to the cached value in place of a read-modify-write
+
+        Returns:
+            True if key was present and updated
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                return False
+            self._entries[key] = (fn(entry[0]), entry[1])
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else default
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / total if total else None,
+            }
+
+
+_MISSING = object()
@@ -0,0 +1,332 @@
+"""
+OMEGA Core v3.0 - Local Vector Index
+Hashed n-gram embeddings and vectorized top-k cosine search over a
+memory-mapped NumPy array shared by every process on a host
+"""
+import fcntl
+import json
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+DEFAULT_DIM = 512
+INITIAL_CAPACITY = 1024
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# An entry to index: (item_id, kind, text, metadata)
+Entry = Tuple[str, str, str, Dict[str, Any]]
+
+
+def _features(text: str) -> List[str]:
+    """Character trigrams (across word boundaries) plus whole words"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return []
+    padded = f" {' '.join(words)} "
+    grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return grams + [f"w:{word}" for word in words]
+
+
+def embed_text(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    Deterministic, offline text embedding (signed feature hashing)
+
+    Each trigram and word is hashed with CRC32 into one of dim buckets, with
+    the hash's top bit choosing +1/-1 so collisions tend to cancel. Trigrams
+    make near-identical spellings ("The Loft" / "the loft nyc" / "Loft")
+    land close together. The result is L2-normalized, so a dot product is
+    the cosine similarity.
+
+    Args:
+        text: Text to embed
+        dim: Vector size
+
+    Returns:
+        float32 vector of length dim (all zeros for text without words)
+    """
+    features = _features(text)
+    if not features:
+        return np.zeros(dim, dtype=np.float32)
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode("utf-8")) for feature in features),
+        dtype=np.uint32,
+        count=len(features),
+    )
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    vector = np.bincount((hashes % dim).astype(np.intp), weights=signs, minlength=dim).astype(np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def _text_hash(text: str) -> str:
+    return format(zlib.crc32(text.encode("utf-8")), "08x")
+
+
+class VectorIndex:
+    """
+    Append-mostly vector index persisted in one directory
+
+    vectors.f32 is a raw float32 matrix (capacity x dim) mapped with
+    np.memmap; items.jsonl is an append-only log of row assignments and item
+    metadata, and is the commit record: a vector row is written before its
+    log line. Every process on the host maps the same files. Writers
+    serialize on an flock (plus a thread lock, since flock is per open file),
+    readers pick up other processes' writes by replaying the log tail before
+    each search. Re-adding an item id overwrites its row in place.
+
+    state.json holds caller state (sync watermarks) plus the dimension; an
+    index opened with a different dimension is discarded and starts empty.
+    """
+
+    def __init__(self, directory: str, dim: int = DEFAULT_DIM):
+        self.directory = directory
+        self.dim = dim
+        self._row_bytes = dim * np.dtype(np.float32).itemsize
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._log_path = os.path.join(directory, "items.jsonl")
+        self._state_path = os.path.join(directory, "state.json")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        # Writers (thread + process); held across a whole sync
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        # In-memory view (held briefly)
+        self._view_lock = threading.RLock()
+        self._items: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._kinds: Dict[str, int] = {}
+        self._codes = np.zeros(INITIAL_CAPACITY, dtype=np.int16)
+        self._log_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+
+        with self.locked():
+            if self.read_state().get("dim") != dim:
+                for path in (self._vectors_path, self._log_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.write_state({})
+            if not os.path.exists(self._vectors_path) or os.path.getsize(self._vectors_path) < self._row_bytes:
+                with open(self._vectors_path, "wb") as f:
+                    f.truncate(INITIAL_CAPACITY * self._row_bytes)
+            self.refresh()
+
+    # ------------------------------------------------------------------
+    # Locking and state
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def locked(self, blocking: bool = True) -> Iterator[bool]:
+        """
+        Hold the index write lock (reentrant within a thread)
+
+        Yields:
+            False if blocking is False and another thread or process holds it
+        """
+        if not self._write_lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            if self._write_depth == 0:
+                try:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+            self._write_depth += 1
+            try:
+                yield True
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        finally:
+            self._write_lock.release()
+
+    def read_state(self) -> Dict[str, Any]:
+        """Caller state saved with the index ({} if none)"""
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_state(self, state: Dict[str, Any]) -> None:
+        """Replace the saved state (call while holding locked())"""
+        tmp_path = f"{self._state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**state, "dim": self.dim}, f)
+        os.replace(tmp_path, self._state_path)
+
+    # ------------------------------------------------------------------
+    # Log replay
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> None:
+        """Apply log records written since the last refresh (by any process)"""
+        try:
+            size = os.path.getsize(self._log_path)
+        except OSError:
+            size = 0
+        with self._view_lock:
+            if size > self._log_offset:
+                with open(self._log_path, "rb") as f:
+                    f.seek(self._log_offset)
+                    data = f.read(size - self._log_offset)
+                # A line still being appended is picked up next time
+                end = data.rfind(b"\n") + 1
+                for line in data[:end].splitlines():
+                    if line:
+                        self._apply(json.loads(line))
+                self._log_offset += end
+            if self._vectors is None or len(self._items) > self._capacity:
+                self._map()
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        row = record["row"]
+        if row >= len(self._items):
+            self._items.extend([{}] * (row + 1 - len(self._items)))
+        self._items[row] = record
+        self._rows[record["id"]] = row
+        if row >= len(self._codes):
+            self._codes = np.concatenate([self._codes, np.zeros(max(row + 1, len(self._codes)), dtype=np.int16)])
+        self._codes[row] = self._kinds.setdefault(record["kind"], len(self._kinds) + 1)
+
+    def _map(self) -> None:
+        """(Re)map the vector file at its current size"""
+        capacity = os.path.getsize(self._vectors_path) // self._row_bytes
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add(self, item_id: str, kind: str, text: str, **metadata: Any) -> bool:
+        """
+        Index one item (see add_many)
+
+        Returns:
+            True if the item was new or changed
+        """
+        return self.add_many([(item_id, kind, text, metadata)]) == 1
+
+    def add_many(self, entries: Iterable[Entry]) -> int:
+        """
+        Index items, overwriting earlier versions with the same id
+
+        Items whose kind, text and metadata are unchanged are skipped without
+        re-embedding.
+
+        Returns:
+            Number of items written
+        """
+        written = 0
+        with self.locked():
+            self.refresh()
+            lines: List[bytes] = []
+            for item_id, kind, text, metadata in entries:
+                record = {"id": item_id, "kind": kind, "text_hash": _text_hash(text), **metadata}
+                row = self._rows.get(item_id)
+                if row is not None and {k: v for k, v in self._items[row].items() if k != "row"} == record:
+                    continue
+                if row is None:
+                    row = len(self._items)
+                record["row"] = row
+                if row >= self._capacity:
+                    self._grow(row + 1)
+                self._vectors[row] = embed_text(text, self.dim)
+                with self._view_lock:
+                    self._apply(record)
+                lines.append(json.dumps(record, separators=(",", ":"), default=str).encode("utf-8") + b"\n")
+                written += 1
+            if lines:
+                # Vectors first, then the log lines that make them visible
+                data = b"".join(lines)
+                with open(self._log_path, "ab") as f:
+                    f.write(data)
+                with self._view_lock:
+                    self._log_offset += len(data)
+        return written
+
+    def _grow(self, rows: int) -> None:
+        """Double the vector file until it holds rows"""
+        capacity = max(self._capacity, INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(capacity * self._row_bytes)
+        with self._view_lock:
+            self._map()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        kind: Optional[str] = None,
+        exclude_ids: Sequence[str] = (),
+        min_score: Optional[float] = None,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Top-k items by cosine similarity to query
+
+        Args:
+            query: Query text
+            k: Maximum results
+            kind: Only items of this kind
+            exclude_ids: Item ids to leave out (e.g. the current thread)
+            min_score: Drop results scoring below this
+
+        Returns:
+            List of (score, item metadata) tuples, best first
+        """
+        self.refresh()
+        with self._view_lock:
+            count = len(self._items)
+            if count == 0:
+                return []
+            vectors = self._vectors[:count]
+            codes = self._codes[:count]
+            items = self._items[:count]
+            kind_code = self._kinds.get(kind) if kind else None
+            excluded = [self._rows[item_id] for item_id in exclude_ids if item_id in self._rows]
+        if kind and kind_code is None:
+            return []
+
+        query_vector = embed_text(query, self.dim)
+        if not query_vector.any():
+            return []
+        scores = np.asarray(vectors @ query_vector)
+        if kind_code is not None:
+            scores = np.where(codes == kind_code, scores, -np.inf)
+        if excluded:
+            scores[excluded] = -np.inf
+
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        floor = -np.inf if min_score is None else min_score
+        return [(float(scores[row]), items[row]) for row in top if scores[row] > -np.inf and scores[row] >= floor]
+
+    def __len__(self) -> int:
+        with self._view_lock:
+            return len(self._items)
+
+    def close(self) -> None:
+        """Flush the vector file and release the mapping"""
+        with self._view_lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+        os.close(self._lock_fd)
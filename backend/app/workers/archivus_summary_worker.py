@@ -0,0 +1,331 @@
+"""
+OMEGA Core v3.0 - Archivus Summary Worker
+Background worker that summarizes queued Archivus threads in batches
+"""
+from __future__ import annotations
+import logging
+import random
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from psycopg2.extras import Json, execute_values
+from app.database import get_cursor, ARCHIVUS_SUMMARY_CHANNEL
+from app.services.archivus_service import build_summary_prompt, extract_key_points, trim_summary
+from app.services.audit_service import get_audit_service
+from app.services.claude_service import ClaudeService
+from app.services.llm_usage import stop_llm_usage_recorder
+from app.utils.metrics import get_registry
+from app.workers.runtime import QueueWorker, run_worker
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SUMMARIES = get_registry().counter(
+    "archivus_summaries_total",
+    "Archivus summary jobs by outcome",
+    labelnames=("outcome",),
+)
+
+# Jobs stuck in 'processing' this long belong to a dead worker and are reclaimed
+STALE_PROCESSING_SECONDS = 900
+
+# LLM failures are retried with backoff, then the job is parked as 'failed'
+# until the thread is updated again
+MAX_ATTEMPTS = 5
+
+# Outcomes
+SUMMARIZED = "summarized"
+UNCHANGED = "unchanged"
+RETRY = "retry"
+
+
+class ArchivusSummaryWorker(QueueWorker):
+    """
+    Archivus Summary Worker
+    Processes due jobs from archivus_summary_jobs
+
+    ArchivusService.enqueue_thread_summary() keeps one job per thread and
+    pushes it back while the thread keeps changing, so a burst of updates
+    costs one summary. Due jobs are claimed atomically (FOR UPDATE SKIP
+    LOCKED); jobs whose content hash matches the stored summary only refresh
+    its key points, the rest are summarized on a thread pool and written back
+    with one upsert per tenant. A job updated while it was being summarized
+    is re-queued instead of deleted.
+    """
+
+    name = "archivus-summary-worker"
+    channels = (ARCHIVUS_SUMMARY_CHANNEL,)
+
+    def __init__(self, batch_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.batch_size = batch_size or settings.archivus_summary_batch_size
+        self.min_batch_size = max(1, self.batch_size // 4)
+        self.max_batch_size = self.batch_size * 4
+        self.concurrency = concurrency or settings.archivus_summary_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="archivus-summary")
+        self._claude: Dict[str, ClaudeService] = {}
+
+    def process_batch(self, batch_size: Optional[int] = None) -> int:
+        """
+        Claim and process one batch of due summary jobs
+
+        Args:
+            batch_size: Jobs to claim (defaults to the configured batch size)
+
+        Returns:
+            Number of jobs claimed
+        """
+        try:
+            jobs = self._claim_batch(batch_size or self.batch_size)
+        except Exception as e:
+            logger.error(f"Archivus summary worker claim error: {e}", exc_info=True)
+            return 0
+        if not jobs:
+            return 0
+
+        try:
+            stored = self._stored_hashes(jobs)
+        except Exception as e:
+            # Summarize everything rather than stall the queue
+            logger.warning(f"Archivus summary worker hash lookup failed: {e}")
+            stored = set()
+
+        changed = [job for job in jobs if (job["tenant_id"], job["gmail_thread_id"], job["content_hash"]) not in stored]
+        summaries = dict(zip(
+            [(job["tenant_id"], job["gmail_thread_id"]) for job in changed],
+            self._executor.map(self._summarize, changed),
+        ))
+
+        outcomes: List[Tuple[Dict[str, Any], str, Optional[str]]] = []
+        for job in jobs:
+            key = (job["tenant_id"], job["gmail_thread_id"])
+            if key not in summaries:
+                outcomes.append((job, UNCHANGED, None))
+            elif summaries[key]:
+                outcomes.append((job, SUMMARIZED, summaries[key]))
+            else:
+                outcomes.append((job, RETRY, None))
+
+        try:
+            self._apply_outcomes(outcomes)
+        except Exception as e:
+            # Jobs stay 'processing' and are reclaimed once stale; the hash
+            # check keeps the rerun from calling the LLM again
+            logger.error(f"Archivus summary worker outcome update error: {e}", exc_info=True)
+
+        return len(jobs)
+
+    def _claim_batch(self, batch_size: int) -> List[Dict[str, Any]]:
+        """Atomically claim due (or abandoned) jobs across tenants"""
+        with get_cursor(tenant_id=None) as cur:
+            cur.execute(
+                """
+                UPDATE archivus_summary_jobs j
+                SET status = 'processing', started_at = NOW(), attempts = j.attempts + 1, updated_at = NOW()
+                FROM (
+                    SELECT tenant_id, gmail_thread_id
+                    FROM archivus_summary_jobs
+                    WHERE (status = 'pending' AND run_after <= NOW())
+                       OR (status = 'processing' AND started_at < NOW() - (%s * INTERVAL '1 second'))
+                    ORDER BY run_after ASC
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ) due
+                WHERE j.tenant_id = due.tenant_id AND j.gmail_thread_id = due.gmail_thread_id
+                RETURNING j.tenant_id::text, j.gmail_thread_id, j.content_hash, j.raw_email_body,
+                          j.structured_context, j.version, j.attempts, j.trace_id
+                """,
+                (STALE_PROCESSING_SECONDS, batch_size),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+    def _stored_hashes(self, jobs: List[Dict[str, Any]]) -> Set[Tuple[str, str, str]]:
+        """(tenant_id, gmail_thread_id, content_hash) of the summaries already stored for these threads"""
+        with get_cursor(tenant_id=None) as cur:
+            cur.execute(
+                """
+                SELECT t.tenant_id::text, t.gmail_thread_id, t.content_hash
+                FROM archivus_threads t
+                JOIN UNNEST(%s::uuid[], %s::text[]) AS k(tenant_id, gmail_thread_id)
+                  ON t.tenant_id = k.tenant_id AND t.gmail_thread_id = k.gmail_thread_id
+                WHERE t.content_hash IS NOT NULL
+                """,
+                ([job["tenant_id"] for job in jobs], [job["gmail_thread_id"] for job in jobs]),
+            )
+            return {(row["tenant_id"], row["gmail_thread_id"], row["content_hash"]) for row in cur.fetchall()}
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the earliest pending job is due (or a processing job goes stale)"""
+        with get_cursor(tenant_id=None) as cur:
+            cur.execute(
+                """
+                SELECT EXTRACT(EPOCH FROM LEAST(
+                    (SELECT MIN(run_after) FROM archivus_summary_jobs WHERE status = 'pending'),
+                    (SELECT MIN(started_at) FROM archivus_summary_jobs WHERE status = 'processing')
+                        + (%s * INTERVAL '1 second')
+                ) - NOW()) AS due_in
+                """,
+                (STALE_PROCESSING_SECONDS,),
+            )
+            row = cur.fetchone()
+        due_in = row["due_in"] if row else None
+        return float(due_in) if due_in is not None else None
+
+    def _get_claude(self, tenant_id: str) -> ClaudeService:
+        """Per-tenant Claude service (built once per worker)"""
+        claude = self._claude.get(tenant_id)
+        if claude is None:
+            claude = ClaudeService(tenant_id)
+            self._claude[tenant_id] = claude
+        return claude
+
+    def _summarize(self, job: Dict[str, Any]) -> Optional[str]:
+        """Generate one summary (runs on the pool; None on failure)"""
+        try:
+            summary = self._get_claude(job["tenant_id"]).generate_summary(
+                build_summary_prompt(job["raw_email_body"]),
+                trace_id=job.get("trace_id"),
+            )
+        except Exception as e:
+            logger.warning(f"Archivus summary failed for thread {job['gmail_thread_id']}: {e}")
+            return None
+        return trim_summary(summary)
+
+    @staticmethod
+    def _backoff_seconds(attempts: int) -> int:
+        """Exponential backoff: 2^attempts minutes (max 32), with jitter"""
+        base = min(2 ** attempts, 32) * 60
+        return int(base * random.uniform(0.9, 1.1))
+
+    def _apply_outcomes(self, outcomes: List[Tuple[Dict[str, Any], str, Optional[str]]]) -> None:
+        """Write summaries per tenant, then settle the jobs in bulk"""
+        by_tenant: Dict[str, List[Tuple]] = defaultdict(list)
+        done: List[Tuple[str, str, int]] = []
+        retried: List[Tuple[str, str, int, str]] = []
+
+        for job, outcome, summary in outcomes:
+            if outcome == RETRY:
+                status = "failed" if job["attempts"] >= MAX_ATTEMPTS else "pending"
+                retried.append((job["tenant_id"], job["gmail_thread_id"], self._backoff_seconds(job["attempts"]), status))
+                SUMMARIES.inc(outcome="failed" if status == "failed" else RETRY)
+                continue
+            context = job["structured_context"] or {}
+            by_tenant[job["tenant_id"]].append((
+                str(uuid.uuid4()),
+                job["tenant_id"],
+                job["gmail_thread_id"],
+                summary,  # None keeps the stored summary
+                Json(extract_key_points(context)),
+                Json(context.get("client_context")),
+                Json(context.get("venue_context")),
+                job["content_hash"],
+            ))
+            done.append((job["tenant_id"], job["gmail_thread_id"], job["version"]))
+            SUMMARIES.inc(outcome=outcome)
+
+        for tenant_id, rows in by_tenant.items():
+            with get_cursor(tenant_id=tenant_id) as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO archivus_threads AS t (
+                        id, tenant_id, gmail_thread_id, summary, key_points,
+                        client_context, venue_context, content_hash
+                    )
+                    VALUES %s
+                    ON CONFLICT (tenant_id, gmail_thread_id)
+                    DO UPDATE SET
+                        summary = COALESCE(EXCLUDED.summary, t.summary),
+                        key_points = EXCLUDED.key_points,
+                        client_context = EXCLUDED.client_context,
+                        venue_context = EXCLUDED.venue_context,
+                        content_hash = EXCLUDED.content_hash,
+                        updated_at = NOW()
+                    """,
+                    rows,
+                    template="(%s::uuid, %s::uuid, %s, %s, %s, %s, %s, %s)",
+                )
+
+        with get_cursor(tenant_id=None) as cur:
+            if done:
+                # Delete jobs nobody touched while they ran; re-queue the rest
+                execute_values(
+                    cur,
+                    """
+                    DELETE FROM archivus_summary_jobs j
+                    USING (VALUES %s) AS v(tenant_id, gmail_thread_id, version)
+                    WHERE j.tenant_id = v.tenant_id AND j.gmail_thread_id = v.gmail_thread_id
+                      AND j.version = v.version
+                    """,
+                    done,
+                    template="(%s::uuid, %s::text, %s::int)",
+                )
+                execute_values(
+                    cur,
+                    """
+                    UPDATE archivus_summary_jobs j
+                    SET status = 'pending', started_at = NULL, attempts = 0, updated_at = NOW()
+                    FROM (VALUES %s) AS v(tenant_id, gmail_thread_id, version)
+                    WHERE j.tenant_id = v.tenant_id AND j.gmail_thread_id = v.gmail_thread_id
+                      AND j.status = 'processing'
+                    """,
+                    done,
+                    template="(%s::uuid, %s::text, %s::int)",
+                )
+            if retried:
+                execute_values(
+                    cur,
+                    """
+                    UPDATE archivus_summary_jobs j
+                    SET status = v.status,
+                        started_at = NULL,
+                        run_after = NOW() + v.delay_seconds * INTERVAL '1 second',
+                        error_message = 'Summary generation failed',
+                        updated_at = NOW()
+                    FROM (VALUES %s) AS v(tenant_id, gmail_thread_id, delay_seconds, status)
+                    WHERE j.tenant_id = v.tenant_id AND j.gmail_thread_id = v.gmail_thread_id
+                    """,
+                    retried,
+                    template="(%s::uuid, %s::text, %s::int, %s::text)",
+                )
+
+        for job, outcome, _ in outcomes:
+            if outcome == UNCHANGED:
+                continue
+            if outcome == SUMMARIZED:
+                action = "archivus.thread_summary.recorded"
+            elif job["attempts"] >= MAX_ATTEMPTS:
+                action = "archivus.thread_summary.error"
+            else:
+                continue
+            get_audit_service(job["tenant_id"]).log_event(
+                action=action,
+                resource_type="archivus",
+                metadata={
+                    "thread_id": job["gmail_thread_id"],
+                    "updates": job["version"],
+                    "attempts": job["attempts"],
+                },
+                trace_id=job.get("trace_id"),
+            )
+
+    def close(self) -> None:
+        """Let in-flight summaries finish, then stop the pool and flush LLM usage"""
+        self._executor.shutdown(wait=True)
+        stop_llm_usage_recorder()
+
+    @classmethod
+    def run_forever(cls) -> None:
+        """Class method for standalone execution (stops cleanly on SIGTERM/SIGINT)"""
+        run_worker(cls())
+
+
+def start_archivus_summary_worker() -> None:
+    """Helper function to start the Archivus summary worker"""
+    ArchivusSummaryWorker.run_forever()
+
+
+if __name__ == "__main__":
+    # Standalone execution
+    start_archivus_summary_worker()
@@ -3,205 +3,318 @@ OMEGA Core v3.0 - Email Retry Worker
 Background worker to process failed email processing retries
 """
 from __future__ import annotations
-import asyncio
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Optional
-from app.database import get_cursor
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from psycopg2.extras import execute_values
+from app.database import get_cursor, EMAIL_RETRY_CHANNEL
 from app.services.audit_service import get_audit_service
 from app.services.email_processor_v3 import EmailProcessorV3
+from app.services.llm_usage import stop_llm_usage_recorder
+from app.workers.runtime import QueueWorker, run_worker
+from app.config import get_settings
 
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Worker configuration
-MAX_BATCH_SIZE = 10
-POLL_INTERVAL_SECONDS = 30
+# Items stuck in 'processing' this long belong to a dead worker and are reclaimed
+STALE_PROCESSING_SECONDS = 900
 
+# Reschedule delays that do not consume a retry attempt
+LOCKED_DELAY_SECONDS = 60
+SAFE_MODE_DELAY_SECONDS = 300
 
-class EmailRetryWorker:
+# Outcomes
+COMPLETED = "completed"
+RETRY = "retry"
+DEFER = "defer"
+FAILED = "failed"
+
+
+class EmailRetryWorker(QueueWorker):
     """
     Email Retry Worker
     Processes pending items from email_retry_queue
+
+    Due items are claimed atomically (UPDATE ... FROM (SELECT ... FOR UPDATE
+    SKIP LOCKED) ... RETURNING), so any number of worker replicas can run
+    without double-processing. Idempotency is settled per tenant for the whole
+    batch: one query drops already-processed messages, one round-trip takes
+    the processor locks, and one insert marks the processed ones before the
+    locks are released. Claimed emails are processed on a thread pool and
+    outcomes are written back with one statement per outcome type.
+    Enqueues NOTIFY the worker, which then sleeps until the earliest
+    scheduled_at instead of polling.
     """
-    
-    def __init__(self):
-        self.is_running = False
-    
-    def process_batch(self) -> int:
+
+    name = "email-retry-worker"
+    channels = (EMAIL_RETRY_CHANNEL,)
+
+    def __init__(self, batch_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.batch_size = batch_size or settings.email_retry_batch_size
+        self.min_batch_size = max(1, self.batch_size // 4)
+        self.max_batch_size = self.batch_size * 4
+        self.concurrency = concurrency or settings.email_retry_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="email-retry")
+        self._processors: Dict[str, EmailProcessorV3] = {}
+
+    def process_batch(self, batch_size: Optional[int] = None) -> int:
         """
-        Process one batch of pending retry items
-        
+        Claim and process one batch of due retry items
+
+        Args:
+            batch_size: Items to claim (defaults to the configured batch size)
+
         Returns:
-            Number of items processed
+            Number of items claimed
         """
-        processed_count = 0
-        
         try:
-            with get_cursor(tenant_id=None) as cur:
-                # Fetch pending items ready for retry
-                cur.execute(
-                    """
-                    SELECT id, tenant_id, email_id, gmail_message_id, retry_count, max_retries
+            items = self._claim_batch(batch_size or self.batch_size)
+        except Exception as e:
+            logger.error(f"Email retry worker claim error: {e}", exc_info=True)
+            return 0
+        if not items:
+            return 0
+
+        outcomes, runnable, locked = self._check_idempotency(items)
+        try:
+            ran = list(self._executor.map(self._process_item, runnable))
+            outcomes.extend(ran)
+            self._mark_processed(ran)
+        finally:
+            for tenant_id, gmail_message_ids in locked.items():
+                self._get_processor(tenant_id).idempotency.release_processor_locks(gmail_message_ids)
+
+        try:
+            self._apply_outcomes(outcomes)
+        except Exception as e:
+            # Items stay 'processing' and are reclaimed once stale
+            logger.error(f"Email retry worker outcome update error: {e}", exc_info=True)
+
+        return len(items)
+
+    def _claim_batch(self, batch_size: int) -> List[Dict[str, Any]]:
+        """Atomically claim due (or abandoned) items across tenants"""
+        with get_cursor(tenant_id=None) as cur:
+            cur.execute(
+                """
+                UPDATE email_retry_queue q
+                SET status = 'processing', started_at = NOW(), updated_at = NOW()
+                FROM (
+                    SELECT id
                     FROM email_retry_queue
-                    WHERE status = 'pending'
-                      AND scheduled_at <= NOW()
+                    WHERE (status = 'pending' AND scheduled_at <= NOW())
+                       OR (status = 'processing' AND started_at < NOW() - (%s * INTERVAL '1 second'))
                     ORDER BY scheduled_at ASC
                     LIMIT %s
-                    """,
-                    (MAX_BATCH_SIZE,),
-                )
-                items = cur.fetchall()
-            
-            for item in items:
-                item_id, tenant_id, email_id, gmail_message_id, retry_count, max_retries = item
-                
-                try:
-                    # Mark as processing
-                    self._mark_started(item_id, tenant_id)
-                    
-                    # Process email (async, but we'll run it in sync context for now)
-                    # TODO: Make this properly async
-                    processor = EmailProcessorV3(db=None, tenant_id=tenant_id)
-                    # Note: This is a placeholder - actual processing would be async
-                    # For now, we'll just mark as completed
-                    
-                    # Mark as completed
-                    self._mark_completed(item_id, tenant_id)
-                    processed_count += 1
-                    
-                    audit = get_audit_service(tenant_id)
-                    audit.log_event(
-                        action="email.retry.completed",
-                        resource_type="email",
-                        resource_id=str(email_id),
-                        metadata={
-                            "gmail_message_id": gmail_message_id,
-                            "retry_count": retry_count,
-                        },
-                        tenant_id=tenant_id,
-                    )
-                except Exception as e:
-                    # Check if max retries reached
-                    if retry_count >= max_retries:
-                        self._mark_failed(item_id, tenant_id, str(e))
-                        audit = get_audit_service(tenant_id)
-                        audit.log_event(
-                            action="email.retry.failed",
-                            resource_type="email",
-                            resource_id=str(email_id),
-                            metadata={
-                                "gmail_message_id": gmail_message_id,
-                                "retry_count": retry_count,
-                                "error": str(e),
-                            },
-                            tenant_id=tenant_id,
-                        )
-                    else:
-                        # Increment retry and reschedule
-                        self._increment_retry(item_id, tenant_id, retry_count)
-        except Exception as e:
-            logger.error(f"Email retry worker batch error: {e}", exc_info=True)
-        
-        return processed_count
-    
-    def _mark_started(self, item_id: str, tenant_id: str) -> None:
-        """Mark retry item as processing"""
-        try:
-            with get_cursor(tenant_id=None) as cur:
-                cur.execute(
-                    """
-                    UPDATE email_retry_queue
-                    SET status = 'processing', started_at = NOW(), updated_at = NOW()
-                    WHERE id = %s
-                    """,
-                    (item_id,),
-                )
-                cur.connection.commit()
-        except Exception:
-            pass
-    
-    def _mark_completed(self, item_id: str, tenant_id: str) -> None:
-        """Mark retry item as completed"""
+                    FOR UPDATE SKIP LOCKED
+                ) due
+                WHERE q.id = due.id
+                RETURNING q.id::text, q.tenant_id::text, q.email_id::text, q.gmail_message_id,
+                          q.account_email, q.retry_count, q.max_retries, q.trace_id
+                """,
+                (STALE_PROCESSING_SECONDS, batch_size),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the earliest pending item is due (or a processing item goes stale)"""
+        with get_cursor(tenant_id=None) as cur:
+            cur.execute(
+                """
+                SELECT EXTRACT(EPOCH FROM LEAST(
+                    (SELECT MIN(scheduled_at) FROM email_retry_queue WHERE status = 'pending'),
+                    (SELECT MIN(started_at) FROM email_retry_queue WHERE status = 'processing')
+                        + (%s * INTERVAL '1 second')
+                ) - NOW()) AS due_in
+                """,
+                (STALE_PROCESSING_SECONDS,),
+            )
+            row = cur.fetchone()
+        due_in = row["due_in"] if row else None
+        return float(due_in) if due_in is not None else None
+
+    def _get_processor(self, tenant_id: str) -> EmailProcessorV3:
+        """Per-tenant processor (built once per worker)"""
+        processor = self._processors.get(tenant_id)
+        if processor is None:
+            processor = EmailProcessorV3(tenant_id=tenant_id)
+            self._processors[tenant_id] = processor
+        return processor
+
+    def _check_idempotency(
+        self,
+        items: List[Dict[str, Any]],
+    ) -> Tuple[List[Tuple[Dict[str, Any], str, Optional[str]]], List[Dict[str, Any]], Dict[str, List[str]]]:
+        """
+        Drop processed messages and lock the rest, one round-trip each per tenant
+
+        Returns:
+            Tuple of (outcomes for items that will not run, items to run,
+            locked gmail_message_ids by tenant)
+        """
+        by_tenant: Dict[str, List[Dict[str, Any]]] = {}
+        for item in items:
+            by_tenant.setdefault(item["tenant_id"], []).append(item)
+
+        outcomes: List[Tuple[Dict[str, Any], str, Optional[str]]] = []
+        runnable: List[Dict[str, Any]] = []
+        locked: Dict[str, List[str]] = {}
+        for tenant_id, tenant_items in by_tenant.items():
+            idempotency = self._get_processor(tenant_id).idempotency
+            unprocessed = idempotency.filter_unprocessed([item["gmail_message_id"] for item in tenant_items])
+            acquired = set(idempotency.acquire_processor_locks(list(dict.fromkeys(unprocessed)))) if unprocessed else set()
+            if acquired:
+                locked[tenant_id] = list(acquired)
+            unprocessed_set = set(unprocessed)
+            for item in tenant_items:
+                gmail_message_id = item["gmail_message_id"]
+                if gmail_message_id not in unprocessed_set:
+                    outcomes.append((item, COMPLETED, "Already processed"))
+                elif gmail_message_id in acquired:
+                    # A duplicate queue row for the same message waits for this one
+                    acquired.discard(gmail_message_id)
+                    runnable.append(item)
+                else:
+                    outcomes.append((item, DEFER, "Lock already exists (idempotency)"))
+        return outcomes, runnable, locked
+
+    def _mark_processed(self, outcomes: List[Tuple[Dict[str, Any], str, Optional[str]]]) -> None:
+        """Mark the messages the pipeline processed, one insert per tenant (locks still held)"""
+        by_tenant: Dict[str, List[str]] = {}
+        for item, outcome, error in outcomes:
+            # COMPLETED with a message is a skip (e.g. Greg already replied), not a processed email
+            if outcome == COMPLETED and error is None:
+                by_tenant.setdefault(item["tenant_id"], []).append(item["gmail_message_id"])
+        for tenant_id, gmail_message_ids in by_tenant.items():
+            self._get_processor(tenant_id).idempotency.mark_processed_many(gmail_message_ids)
+
+    def _process_item(self, item: Dict[str, Any]) -> Tuple[Dict[str, Any], str, Optional[str]]:
+        """
+        Run the email pipeline for one claimed item (runs on the pool)
+
+        Returns:
+            Tuple of (item, outcome, error_message)
+        """
         try:
-            with get_cursor(tenant_id=None) as cur:
+            result = self._get_processor(item["tenant_id"]).retry_email(
+                email_id=item["email_id"],
+                gmail_message_id=item["gmail_message_id"],
+                account_email=item["account_email"],
+                trace_id=item.get("trace_id"),
+                idempotency_handled=True,
+            )
+        except Exception as e:
+            return item, RETRY, str(e)
+
+        status = result.get("status")
+        message = result.get("message")
+        if status == "success":
+            return item, COMPLETED, None
+        if status == "skipped":
+            # Another processor holds the lock: try again shortly
+            if message and "Lock" in message:
+                return item, DEFER, message
+            # Already processed / Greg replied: nothing left to do
+            return item, COMPLETED, message
+        if status == "blocked":
+            return item, DEFER, message
+        if message == "Email not found":
+            return item, FAILED, message
+        return item, RETRY, message
+
+    @staticmethod
+    def _backoff_seconds(retry_count: int) -> int:
+        """Exponential backoff: 2^(retry_count + 1) minutes (max 32), with jitter"""
+        base = min(2 ** (retry_count + 1), 32) * 60
+        return int(base * random.uniform(0.9, 1.1))
+
+    def _apply_outcomes(self, outcomes: List[Tuple[Dict[str, Any], str, Optional[str]]]) -> None:
+        """Write all outcomes back in bulk"""
+        completed: List[str] = []
+        rescheduled: List[Tuple[str, int, int, Optional[str]]] = []
+        failed: List[Tuple[str, str]] = []
+
+        for item, outcome, error in outcomes:
+            if outcome == COMPLETED:
+                completed.append(item["id"])
+            elif outcome == DEFER:
+                delay = SAFE_MODE_DELAY_SECONDS if error and "Safe Mode" in error else LOCKED_DELAY_SECONDS
+                rescheduled.append((item["id"], 0, delay, error))
+            elif outcome == RETRY and item["retry_count"] + 1 < item["max_retries"]:
+                rescheduled.append((item["id"], 1, self._backoff_seconds(item["retry_count"]), error))
+            else:
+                failed.append((item["id"], (error or f"Max retries reached ({item['max_retries']})")[:500]))
+
+        with get_cursor(tenant_id=None) as cur:
+            if completed:
                 cur.execute(
                     """
                     UPDATE email_retry_queue
                     SET status = 'completed', completed_at = NOW(), updated_at = NOW()
-                    WHERE id = %s
+                    WHERE id = ANY(%s::uuid[])
                     """,
-                    (item_id,),
+                    (completed,),
                 )
-                cur.connection.commit()
-        except Exception:
-            pass
-    
-    def _mark_failed(self, item_id: str, tenant_id: str, error_message: str) -> None:
-        """Mark retry item as failed"""
-        try:
-            with get_cursor(tenant_id=None) as cur:
-                cur.execute(
+            if rescheduled:
+                execute_values(
+                    cur,
                     """
-                    UPDATE email_retry_queue
-                    SET status = 'failed', error_message = %s, updated_at = NOW()
-                    WHERE id = %s
+                    UPDATE email_retry_queue q
+                    SET status = 'pending',
+                        retry_count = q.retry_count + v.increment,
+                        scheduled_at = NOW() + v.delay_seconds * INTERVAL '1 second',
+                        error_message = COALESCE(v.error_message, q.error_message),
+                        updated_at = NOW()
+                    FROM (VALUES %s) AS v(id, increment, delay_seconds, error_message)
+                    WHERE q.id = v.id
                     """,
-                    (error_message[:500], item_id),  # Limit error message length
+                    rescheduled,
+                    template="(%s::uuid, %s::int, %s::int, %s::text)",
                 )
-                cur.connection.commit()
-        except Exception:
-            pass
-    
-    def _increment_retry(self, item_id: str, tenant_id: str, current_retry_count: int) -> None:
-        """Increment retry count and reschedule with exponential backoff"""
-        try:
-            # Exponential backoff: 2^min(retry_count + 1, 5) minutes (max 32 minutes)
-            backoff_minutes = min(2 ** (current_retry_count + 1), 32)
-            scheduled_at = datetime.now(timezone.utc) + timedelta(minutes=backoff_minutes)
-            
-            with get_cursor(tenant_id=None) as cur:
-                cur.execute(
+            if failed:
+                execute_values(
+                    cur,
                     """
-                    UPDATE email_retry_queue
-                    SET retry_count = retry_count + 1,
-                        status = 'pending',
-                        scheduled_at = %s,
-                        updated_at = NOW()
-                    WHERE id = %s
+                    UPDATE email_retry_queue q
+                    SET status = 'failed', error_message = v.error_message, updated_at = NOW()
+                    FROM (VALUES %s) AS v(id, error_message)
+                    WHERE q.id = v.id
                     """,
-                    (scheduled_at, item_id),
+                    failed,
+                    template="(%s::uuid, %s::text)",
                 )
-                cur.connection.commit()
-        except Exception:
-            pass
-    
-    async def run_loop(self) -> None:
-        """Continuous loop for processing retries"""
-        self.is_running = True
-        logger.info("Email retry worker started")
-        
-        while self.is_running:
-            try:
-                processed = self.process_batch()
-                if processed > 0:
-                    logger.info(f"Processed {processed} retry items")
-            except Exception as e:
-                logger.error(f"Email retry worker error: {e}", exc_info=True)
-            
-            await asyncio.sleep(POLL_INTERVAL_SECONDS)
-    
+
+        failed_ids = {item_id for item_id, _ in failed}
+        for item, outcome, error in outcomes:
+            if outcome == COMPLETED:
+                action = "email.retry.completed"
+            elif item["id"] in failed_ids:
+                action = "email.retry.failed"
+            else:
+                continue
+            get_audit_service(item["tenant_id"]).log_event(
+                action=action,
+                resource_type="email",
+                resource_id=item["email_id"],
+                metadata={
+                    "gmail_message_id": item["gmail_message_id"],
+                    "retry_count": item["retry_count"],
+                    "error": error,
+                },
+                trace_id=item.get("trace_id"),
+            )
+
+    def close(self) -> None:
+        """Let in-flight emails finish, then stop the pool and flush LLM usage"""
+        self._executor.shutdown(wait=True)
+        stop_llm_usage_recorder()
+
     @classmethod
     def run_forever(cls) -> None:
-        """Class method for standalone execution"""
-        worker = cls()
-        try:
-            asyncio.run(worker.run_loop())
-        except KeyboardInterrupt:
-            logger.info("Email retry worker stopped by user")
-            worker.is_running = False
-        except Exception as e:
-            logger.error(f"Email retry worker crashed: {e}", exc_info=True)
-            raise
+        """Class method for standalone execution (stops cleanly on SIGTERM/SIGINT)"""
+        run_worker(cls())
 
 
 def start_email_retry_worker() -> None:
@@ -212,4 +325,3 @@ def start_email_retry_worker() -> None:
 if __name__ == "__main__":
     # Standalone execution
     start_email_retry_worker()
-
@@ -2,228 +2,305 @@
 Payment Reminder Worker
 Sends automated payment reminders for unpaid bookings
 """
-import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional
-from app.database import get_cursor
+from typing import List, Dict, Optional, Tuple
+from psycopg2.extras import execute_values
+from app.database import get_cursor, PAYMENT_REMINDER_CHANNEL
 from app.services.gmail_service import send_email
 from app.services.audit_service import get_audit_service
+from app.workers.runtime import QueueWorker, run_worker
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
+# Reminder stage -> days after booking creation
+REMINDER_OFFSETS = {1: 3, 2: 7, 3: 14}
+FINAL_STAGE = 3
 
-class PaymentReminderWorker:
-    """Background worker for sending payment reminders"""
-    
-    def __init__(self, tenant_id: Optional[str] = None):
-        self.tenant_id = tenant_id or settings.default_tenant_id
-        self.audit = get_audit_service(self.tenant_id)
-    
-    def run(self):
-        """
-        Main worker loop
-        Checks for unpaid bookings and sends reminders
-        """
-        while True:
-            try:
-                # Get all unpaid bookings
-                unpaid_bookings = self._get_unpaid_bookings()
-                
-                for booking in unpaid_bookings:
-                    days_since_created = (datetime.now(timezone.utc) - booking['created_at']).days
-                    
-                    # Day 3: Friendly reminder
-                    if days_since_created == 3 and not booking.get('reminder_1_sent'):
-                        self._send_reminder_1(booking)
-                    
-                    # Day 7: Second reminder with urgency
-                    elif days_since_created == 7 and not booking.get('reminder_2_sent'):
-                        self._send_reminder_2(booking)
-                    
-                    # Day 14: Final notice
-                    elif days_since_created == 14 and not booking.get('reminder_3_sent'):
-                        self._send_reminder_3(booking)
-                
-                # Sleep for 1 hour before next check
-                time.sleep(3600)
-                
-            except Exception as e:
-                self.audit.log_event(
-                    action="payment_reminder_worker_error",
-                    resource_type="worker",
-                    metadata={"error": str(e)},
-                    trace_id=None
-                )
-                time.sleep(60)  # Sleep 1 minute on error
-    
-    def _get_unpaid_bookings(self) -> List[Dict]:
-        """Get all unpaid bookings"""
-        with get_cursor(tenant_id=self.tenant_id) as cursor:
-            cursor.execute("""
-                SELECT 
-                    booking_id, tenant_id, client_email, service_description,
-                    event_date, payment_status, payment_amount,
-                    stripe_payment_link_id, created_at,
-                    reminder_1_sent, reminder_2_sent, reminder_3_sent
-                FROM bookings
-                WHERE payment_status = 'pending'
-                AND created_at > NOW() - INTERVAL '30 days'
-                ORDER BY created_at ASC
-            """)
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-    
-    def _send_reminder_1(self, booking: Dict):
-        """Send friendly reminder (Day 3)"""
-        try:
-            subject = f"Payment reminder for your upcoming event"
-            body = f"""Hi there!
+# Reminders are not sent for bookings older than this
+REMINDER_WINDOW = timedelta(days=30)
+
+# A claimed reminder becomes due again after this long if the worker dies mid-send
+CLAIM_LEASE = timedelta(minutes=10)
+
+REMINDER_SUBJECTS = {
+    1: "Payment reminder for your upcoming event",
+    2: "URGENT: Payment still pending for your event",
+    3: "FINAL NOTICE: Payment required to confirm your booking",
+}
+
+REMINDER_BODIES = {
+    1: """Hi there!
 
-Just a friendly reminder that we're still waiting for payment for your upcoming event on {booking['event_date'].strftime('%B %d, %Y') if booking.get('event_date') else 'your scheduled date'}.
+Just a friendly reminder that we're still waiting for payment for your upcoming event on {event_date}.
 
 You can complete your payment securely here:
-{self._get_payment_link(booking)}
+{payment_link}
 
 If you have any questions, just reply to this email!
 
 Thanks,
 Maya
-"""
-            
-            send_email(
-                account_email=settings.maya_email,
-                to=booking['client_email'],
-                subject=subject,
-                body=body,
-                tenant_id=self.tenant_id,
-                trace_id=None
-            )
-            
-            # Mark reminder sent
-            with get_cursor(tenant_id=self.tenant_id) as cursor:
-                cursor.execute("""
-                    UPDATE bookings
-                    SET reminder_1_sent = TRUE, reminder_1_sent_at = NOW()
-                    WHERE booking_id = %s AND tenant_id = %s
-                """, (booking['booking_id'], self.tenant_id))
-            
-            self.audit.log_event(
-                action="payment_reminder_1_sent",
-                resource_type="booking",
-                resource_id=booking['booking_id'],
-                metadata={"client_email": booking['client_email']},
-                trace_id=None
-            )
-        except Exception as e:
-            self.audit.log_event(
-                action="payment_reminder_1_failed",
-                resource_type="booking",
-                resource_id=booking['booking_id'],
-                metadata={"error": str(e)},
-                trace_id=None
-            )
-    
-    def _send_reminder_2(self, booking: Dict):
-        """Send urgent reminder (Day 7)"""
-        try:
-            subject = f"URGENT: Payment still pending for your event"
-            body = f"""Hi there,
+""",
+    2: """Hi there,
 
-This is a reminder that payment for your upcoming event on {booking['event_date'].strftime('%B %d, %Y') if booking.get('event_date') else 'your scheduled date'} is still pending.
+This is a reminder that payment for your upcoming event on {event_date} is still pending.
 
 Please complete your payment as soon as possible:
-{self._get_payment_link(booking)}
+{payment_link}
 
 If you've already paid, please let us know and we'll update your booking status.
 
 Thanks,
 Maya
-"""
-            
-            send_email(
-                account_email=settings.maya_email,
-                to=booking['client_email'],
-                subject=subject,
-                body=body,
-                tenant_id=self.tenant_id,
-                trace_id=None
-            )
-            
-            # Mark reminder sent
-            with get_cursor(tenant_id=self.tenant_id) as cursor:
-                cursor.execute("""
-                    UPDATE bookings
-                    SET reminder_2_sent = TRUE, reminder_2_sent_at = NOW()
-                    WHERE booking_id = %s AND tenant_id = %s
-                """, (booking['booking_id'], self.tenant_id))
-            
-            self.audit.log_event(
-                action="payment_reminder_2_sent",
-                resource_type="booking",
-                resource_id=booking['booking_id'],
-                metadata={"client_email": booking['client_email']},
-                trace_id=None
-            )
+""",
+    3: """Hi there,
+
+This is a final notice that payment for your upcoming event on {event_date} is still pending.
+
+Your booking may be cancelled if payment is not received soon. Please complete your payment immediately:
+{payment_link}
+
+If you have any questions or concerns, please reply to this email right away.
+
+Thanks,
+Maya
+""",
+}
+
+
+class PaymentReminderWorker(QueueWorker):
+    """
+    Background worker for sending payment reminders
+
+    Due reminders are found through bookings.next_reminder_at (migration 018),
+    claimed with FOR UPDATE SKIP LOCKED so several worker processes can run
+    side by side, sent concurrently, and marked sent in one bulk UPDATE.
+    Between batches the worker sleeps until the earliest next_reminder_at;
+    new bookings NOTIFY it (migration 021) so it can reschedule.
+    """
+
+    name = "payment-reminder-worker"
+    channels = (PAYMENT_REMINDER_CHANNEL,)
+
+    def __init__(self, tenant_id: Optional[str] = None):
+        # None = all tenants
+        self.tenant_id = tenant_id
+        self.audit = get_audit_service(tenant_id)
+        self.batch_size = settings.payment_reminder_batch_size
+        self.min_batch_size = max(1, self.batch_size // 4)
+        self.max_batch_size = self.batch_size * 4
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.payment_reminder_concurrency,
+            thread_name_prefix="payment-reminder",
+        )
+
+    def run(self):
+        """
+        Main worker loop (until SIGTERM/SIGINT)
+        Sends due reminders, then sleeps until the next one is due
+        """
+        run_worker(self)
+
+    def close(self):
+        """Let in-flight sends finish, then stop the pool"""
+        self._executor.shutdown(wait=True)
+
+    def process_batch(self, batch_size: int) -> int:
+        """Claim and send one batch (runtime entry point)"""
+        try:
+            return self.run_once(batch_size)
         except Exception as e:
             self.audit.log_event(
-                action="payment_reminder_2_failed",
-                resource_type="booking",
-                resource_id=booking['booking_id'],
+                action="payment_reminder_worker_error",
+                resource_type="worker",
                 metadata={"error": str(e)},
                 trace_id=None
             )
-    
-    def _send_reminder_3(self, booking: Dict):
-        """Send final notice (Day 14)"""
-        try:
-            subject = f"FINAL NOTICE: Payment required to confirm your booking"
-            body = f"""Hi there,
+            raise
 
-This is a final notice that payment for your upcoming event on {booking['event_date'].strftime('%B %d, %Y') if booking.get('event_date') else 'your scheduled date'} is still pending.
+    def run_once(self, batch_size: Optional[int] = None) -> int:
+        """
+        Claim one batch of due reminders and send them
 
-Your booking may be cancelled if payment is not received soon. Please complete your payment immediately:
-{self._get_payment_link(booking)}
+        Args:
+            batch_size: Bookings to claim (defaults to the configured batch size)
 
-If you have any questions or concerns, please reply to this email right away.
+        Returns:
+            Number of bookings claimed
+        """
+        bookings = self._claim_due_reminders(batch_size or self.batch_size)
+        if not bookings:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        to_send: List[Tuple[Dict, int]] = []
+        expired: List[str] = []
+        for booking in bookings:
+            stage = self._stage_to_send(booking, now)
+            if stage is None:
+                expired.append(str(booking['id']))
+            else:
+                to_send.append((booking, stage))
+
+        results = list(self._executor.map(lambda item: self._send_reminder(*item), to_send))
+        sent = [
+            (str(booking['id']), stage)
+            for (booking, stage), ok in zip(to_send, results) if ok
+        ]
+
+        self._mark_sent(sent)
+        self._expire(expired)
+        return len(bookings)
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the earliest scheduled reminder (including claim leases) is due"""
+        tenant_filter = "AND tenant_id = %s" if self.tenant_id else ""
+        params = [self.tenant_id] if self.tenant_id else []
+        with get_cursor(tenant_id=self.tenant_id) as cursor:
+            cursor.execute(f"""
+                SELECT EXTRACT(EPOCH FROM MIN(next_reminder_at) - NOW()) AS due_in
+                FROM bookings
+                WHERE payment_status = 'pending'
+                AND next_reminder_at IS NOT NULL
+                {tenant_filter}
+            """, params)
+            row = cursor.fetchone()
+        due_in = row['due_in'] if row else None
+        return float(due_in) if due_in is not None else None
+
+    def _claim_due_reminders(self, batch_size: int) -> List[Dict]:
+        """
+        Claim due reminders across tenants
+
+        Claiming pushes next_reminder_at forward by the lease, so rows are
+        invisible to other workers until they are marked sent or the lease runs out.
+        """
+        tenant_filter = "AND tenant_id = %s" if self.tenant_id else ""
+        params: List = [self.tenant_id] if self.tenant_id else []
+        params.extend([batch_size, CLAIM_LEASE])
+
+        with get_cursor(tenant_id=self.tenant_id) as cursor:
+            cursor.execute(f"""
+                WITH due AS (
+                    SELECT id
+                    FROM bookings
+                    WHERE payment_status = 'pending'
+                    AND next_reminder_at IS NOT NULL
+                    AND next_reminder_at <= NOW()
+                    {tenant_filter}
+                    ORDER BY next_reminder_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE bookings b
+                SET next_reminder_at = NOW() + %s
+                FROM due
+                WHERE b.id = due.id
+                RETURNING
+                    b.id, b.booking_id, b.tenant_id, b.client_email, b.event_date,
+                    b.stripe_payment_link_id, b.created_at, b.next_reminder_stage
+            """, params)
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    @staticmethod
+    def _stage_to_send(booking: Dict, now: datetime) -> Optional[int]:
+        """
+        Pick the reminder to send for a claimed booking
+
+        If the worker fell behind past a later stage's due date, the stale
+        earlier reminder is skipped so a client never gets two at once.
+
+        Returns:
+            Stage number, or None if the booking is outside the reminder window
+        """
+        created_at = booking['created_at']
+        stage = booking.get('next_reminder_stage')
+        if stage is None or now - created_at > REMINDER_WINDOW:
+            return None
+        while stage < FINAL_STAGE and now >= created_at + timedelta(days=REMINDER_OFFSETS[stage + 1]):
+            stage += 1
+        return stage
+
+    def _send_reminder(self, booking: Dict, stage: int) -> bool:
+        """Send one reminder email (runs on the executor)"""
+        tenant_id = str(booking['tenant_id'])
+        audit = get_audit_service(tenant_id)
+        try:
+            event_date = (
+                booking['event_date'].strftime('%B %d, %Y')
+                if booking.get('event_date') else 'your scheduled date'
+            )
+            body = REMINDER_BODIES[stage].format(
+                event_date=event_date,
+                payment_link=self._get_payment_link(booking),
+            )
 
-Thanks,
-Maya
-"""
-            
             send_email(
                 account_email=settings.maya_email,
                 to=booking['client_email'],
-                subject=subject,
+                subject=REMINDER_SUBJECTS[stage],
                 body=body,
-                tenant_id=self.tenant_id,
+                tenant_id=tenant_id,
                 trace_id=None
             )
-            
-            # Mark reminder sent
-            with get_cursor(tenant_id=self.tenant_id) as cursor:
-                cursor.execute("""
-                    UPDATE bookings
-                    SET reminder_3_sent = TRUE, reminder_3_sent_at = NOW()
-                    WHERE booking_id = %s AND tenant_id = %s
-                """, (booking['booking_id'], self.tenant_id))
-            
-            self.audit.log_event(
-                action="payment_reminder_3_sent",
+
+            audit.log_event(
+                action=f"payment_reminder_{stage}_sent",
                 resource_type="booking",
                 resource_id=booking['booking_id'],
                 metadata={"client_email": booking['client_email']},
                 trace_id=None
             )
+            return True
         except Exception as e:
-            self.audit.log_event(
-                action="payment_reminder_3_failed",
+            # Lease expiry retries the send on a later tick
+            audit.log_event(
+                action=f"payment_reminder_{stage}_failed",
                 resource_type="booking",
                 resource_id=booking['booking_id'],
                 metadata={"error": str(e)},
                 trace_id=None
             )
-    
+            return False
+
+    def _mark_sent(self, sent: List[Tuple[str, int]]) -> None:
+        """Mark reminders sent and schedule each booking's next stage in one statement"""
+        if not sent:
+            return
+        with get_cursor(tenant_id=self.tenant_id) as cursor:
+            execute_values(cursor, """
+                UPDATE bookings b
+                SET reminder_1_sent = b.reminder_1_sent OR v.stage = 1,
+                    reminder_1_sent_at = CASE WHEN v.stage = 1 THEN NOW() ELSE b.reminder_1_sent_at END,
+                    reminder_2_sent = b.reminder_2_sent OR v.stage = 2,
+                    reminder_2_sent_at = CASE WHEN v.stage = 2 THEN NOW() ELSE b.reminder_2_sent_at END,
+                    reminder_3_sent = b.reminder_3_sent OR v.stage = 3,
+                    reminder_3_sent_at = CASE WHEN v.stage = 3 THEN NOW() ELSE b.reminder_3_sent_at END,
+                    next_reminder_stage = CASE WHEN v.stage < 3 THEN v.stage + 1 END,
+                    next_reminder_at = CASE v.stage
+                        WHEN 1 THEN b.created_at + INTERVAL '7 days'
+                        WHEN 2 THEN b.created_at + INTERVAL '14 days'
+                    END
+                FROM (VALUES %s) AS v(id, stage)
+                WHERE b.id = v.id
+            """, sent, template="(%s::uuid, %s::smallint)")
+
+    def _expire(self, booking_ids: List[str]) -> None:
+        """Stop scheduling reminders for bookings outside the reminder window"""
+        if not booking_ids:
+            return
+        with get_cursor(tenant_id=self.tenant_id) as cursor:
+            cursor.execute("""
+                UPDATE bookings
+                SET next_reminder_stage = NULL, next_reminder_at = NULL
+                WHERE id = ANY(%s::uuid[])
+            """, (booking_ids,))
+
     def _get_payment_link(self, booking: Dict) -> str:
         """Get payment link URL from booking"""
         # If we have stripe_payment_link_id, we'd need to fetch the URL from Stripe
@@ -236,11 +313,10 @@ Maya
 
 
 def start_worker(tenant_id: Optional[str] = None):
-    """Start the payment reminder worker"""
+    """Start the payment reminder worker (all tenants unless tenant_id is given)"""
     worker = PaymentReminderWorker(tenant_id)
     worker.run()
 
 
 if __name__ == "__main__":
     start_worker()
-
@@ -0,0 +1,348 @@
+"""
+OMEGA Core v3.0 - Worker Runtime
+Shared run loop for background workers: LISTEN/NOTIFY wakeups, a slow safety
+poll, adaptive batch sizing, graceful shutdown and throughput stats
+"""
+import logging
+import os
+import select
+import signal
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+import psycopg2
+from app.utils.metrics import get_registry, start_metrics_server
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BATCH_SECONDS = get_registry().histogram(
+    "worker_batch_seconds",
+    "Queue worker batch processing time",
+    labelnames=("worker",),
+)
+ITEMS = get_registry().counter(
+    "worker_items_total",
+    "Items claimed by queue workers",
+    labelnames=("worker",),
+)
+WAKEUPS = get_registry().counter(
+    "worker_wakeups_total",
+    "Queue worker wakeups by cause",
+    labelnames=("worker", "cause"),
+)
+
+# Wait before re-opening a lost LISTEN connection (the safety poll covers the gap)
+RECONNECT_DELAY_SECONDS = 5.0
+
+# Floor on scheduled sleeps, so overdue items that cannot be claimed (held by
+# another replica) do not turn the loop into a busy poll
+MIN_IDLE_SECONDS = 0.5
+
+# Minimum wait after a failed batch
+ERROR_BACKOFF_SECONDS = 30.0
+
+# How often a running worker logs its stats
+STATS_LOG_INTERVAL_SECONDS = 300
+
+
+class QueueWorker(ABC):
+    """
+    Base class for workers driven by WorkerRuntime
+
+    Subclasses implement process_batch() and may override seconds_until_due()
+    (so scheduled work runs on time without polling) and handle_notifications().
+    """
+
+    name: str = "worker"
+    channels: Sequence[str] = ()
+    batch_size: int = 10
+    min_batch_size: int = 1
+    max_batch_size: int = 10
+
+    @abstractmethod
+    def process_batch(self, batch_size: int) -> int:
+        """
+        Claim and process up to batch_size items
+
+        Returns:
+            Number of items claimed (the runtime keeps draining while this equals batch_size)
+        """
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the next scheduled item is due (None = nothing scheduled / unknown)"""
+        return None
+
+    def handle_notifications(self, payloads: List[str]) -> None:
+        """Receive NOTIFY payloads before the next batch"""
+
+    def close(self) -> None:
+        """Release worker resources on shutdown"""
+
+
+class WorkerRuntime:
+    """
+    Runs a QueueWorker until stopped.
+
+    The runtime holds one dedicated autocommit connection that LISTENs on the
+    worker's channels. Between batches it sleeps until whichever comes first:
+    a NOTIFY, the next scheduled item falling due, the safety poll interval,
+    or stop(). While batches come back full it keeps draining, doubling the
+    batch size while batches finish under the target time and halving it when
+    they run over. SIGTERM/SIGINT finish the current batch and exit cleanly.
+    """
+
+    def __init__(
+        self,
+        worker: QueueWorker,
+        poll_interval_seconds: Optional[float] = None,
+        target_batch_seconds: Optional[float] = None,
+        dsn: Optional[str] = None,
+    ):
+        self.worker = worker
+        self.poll_interval_seconds = poll_interval_seconds or settings.worker_poll_interval_seconds
+        self.target_batch_seconds = target_batch_seconds or settings.worker_target_batch_seconds
+        self.dsn = dsn or settings.database_url
+        self.batch_size = worker.batch_size
+        self._conn = None
+        self._listened = False
+        self._stop_event = threading.Event()
+        # Self-pipe so stop() (including from a signal handler) interrupts select()
+        self._wake_r, self._wake_w = os.pipe()
+        self._started_at: Optional[float] = None
+        self._last_stats_log = time.monotonic()
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "empty_batches": 0,
+            "errors": 0,
+            "busy_seconds": 0.0,
+            "wakeups_notify": 0,
+            "wakeups_due": 0,
+            "wakeups_poll": 0,
+            "notifications": 0,
+            "listen_reconnects": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def run(self) -> None:
+        """Run until stop() or SIGTERM/SIGINT"""
+        self._install_signal_handlers()
+        self._started_at = time.monotonic()
+        get_registry().register_stats(
+            f"worker_{self.worker.name.replace('-', '_')}", self.get_stats, f"{self.worker.name} runtime"
+        )
+        if settings.worker_metrics_port:
+            start_metrics_server(settings.worker_metrics_port)
+        logger.info(
+            f"{self.worker.name} started (channels: {', '.join(self.worker.channels) or 'none'}, "
+            f"safety poll: {self.poll_interval_seconds}s)"
+        )
+        try:
+            while not self._stop_event.is_set():
+                ok = self._drain()
+                if self._stop_event.is_set():
+                    break
+                timeout = self._next_timeout()
+                self._wait(timeout if ok else max(timeout, ERROR_BACKOFF_SECONDS))
+                self._maybe_log_stats()
+        finally:
+            self._close_listener()
+            try:
+                self.worker.close()
+            finally:
+                logger.info(f"{self.worker.name} stopped: {self.get_stats()}")
+
+    def stop(self) -> None:
+        """Ask the runtime to exit after the current batch"""
+        self._stop_event.set()
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def _install_signal_handlers(self) -> None:
+        """Route SIGTERM/SIGINT to stop() (main thread only)"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self.stop())
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+
+    def _drain(self) -> bool:
+        """
+        Process batches until one comes back short
+
+        Returns:
+            False if a batch raised
+        """
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                claimed = self.worker.process_batch(self.batch_size)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"{self.worker.name} batch error: {e}", exc_info=True)
+                return False
+            elapsed = time.perf_counter() - started
+
+            self._stats["batches"] += 1
+            self._stats["items"] += claimed
+            self._stats["busy_seconds"] += elapsed
+            BATCH_SECONDS.observe(elapsed, worker=self.worker.name)
+            ITEMS.inc(claimed, worker=self.worker.name)
+            if claimed == 0:
+                self._stats["empty_batches"] += 1
+
+            full = claimed >= self.batch_size
+            self._adapt(full, elapsed)
+            if not full:
+                return True
+        return True
+
+    def _adapt(self, full: bool, elapsed: float) -> None:
+        """Grow the batch while full batches are fast; shrink it when batches are slow"""
+        if elapsed > self.target_batch_seconds:
+            self.batch_size = max(self.worker.min_batch_size, self.batch_size // 2)
+        elif full and elapsed < self.target_batch_seconds / 2:
+            self.batch_size = min(self.worker.max_batch_size, self.batch_size * 2)
+
+    def _next_timeout(self) -> float:
+        """Sleep until the next scheduled item, capped by the safety poll"""
+        try:
+            due_in = self.worker.seconds_until_due()
+        except Exception as e:
+            logger.warning(f"{self.worker.name} due-time lookup failed: {e}")
+            due_in = None
+        if due_in is None:
+            return self.poll_interval_seconds
+        # Small margin so the item is due (by the DB clock) when we claim
+        return min(self.poll_interval_seconds, max(MIN_IDLE_SECONDS, due_in + 0.05))
+
+    # ------------------------------------------------------------------
+    # LISTEN / NOTIFY
+    # ------------------------------------------------------------------
+
+    def _listener(self):
+        """Get the LISTEN connection, (re)connecting if needed; None if the DB is unreachable"""
+        if not self.worker.channels:
+            return None
+        if self._conn is not None and not self._conn.closed:
+            return self._conn
+        try:
+            conn = psycopg2.connect(self.dsn)
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                for channel in self.worker.channels:
+                    cur.execute(f'LISTEN "{channel}"')
+        except Exception as e:
+            logger.warning(f"{self.worker.name} LISTEN connection failed, polling only: {e}")
+            self._conn = None
+            return None
+        if self._listened:
+            self._stats["listen_reconnects"] += 1
+        self._listened = True
+        self._conn = conn
+        return conn
+
+    def _close_listener(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def _wait(self, timeout: float) -> None:
+        """Block until a NOTIFY, the timeout, or stop()"""
+        scheduled = timeout < self.poll_interval_seconds
+        conn = self._listener()
+        if conn is None and self.worker.channels:
+            # Listener down: fall back to polling, retrying LISTEN shortly
+            timeout = min(timeout, RECONNECT_DELAY_SECONDS)
+
+        watched = [self._wake_r] + ([conn] if conn is not None else [])
+        try:
+            readable, _, _ = select.select(watched, [], [], timeout)
+        except (OSError, ValueError) as e:
+            logger.warning(f"{self.worker.name} wait failed: {e}")
+            self._close_listener()
+            return
+
+        if self._wake_r in readable:
+            os.read(self._wake_r, 1024)
+        if conn is not None and conn in readable:
+            payloads = self._read_notifications(conn)
+            if payloads:
+                self._stats["wakeups_notify"] += 1
+                WAKEUPS.inc(worker=self.worker.name, cause="notify")
+                self._stats["notifications"] += len(payloads)
+                try:
+                    self.worker.handle_notifications(payloads)
+                except Exception as e:
+                    logger.warning(f"{self.worker.name} notification handler failed: {e}")
+                return
+        if not readable:
+            cause = "due" if scheduled else "poll"
+            self._stats[f"wakeups_{cause}"] += 1
+            WAKEUPS.inc(worker=self.worker.name, cause=cause)
+
+    def _read_notifications(self, conn) -> List[str]:
+        """Drain pending notifications (drops the connection on error)"""
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.warning(f"{self.worker.name} LISTEN connection lost: {e}")
+            self._close_listener()
+            return []
+        payloads = [notify.payload for notify in conn.notifies]
+        conn.notifies.clear()
+        return payloads
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get throughput stats
+
+        Returns:
+            Dict with batch/item counters, wakeup sources, current batch size and items/second
+        """
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["worker"] = self.worker.name
+        stats["batch_size"] = self.batch_size
+        stats["listening"] = self._conn is not None and not self._conn.closed
+        stats["uptime_seconds"] = time.monotonic() - self._started_at if self._started_at else 0.0
+        busy = stats["busy_seconds"]
+        stats["items_per_busy_second"] = stats["items"] / busy if busy else None
+        uptime = stats["uptime_seconds"]
+        stats["items_per_second"] = stats["items"] / uptime if uptime else None
+        return stats
+
+    def _maybe_log_stats(self) -> None:
+        now = time.monotonic()
+        if now - self._last_stats_log >= STATS_LOG_INTERVAL_SECONDS:
+            self._last_stats_log = now
+            logger.info(f"{self.worker.name} stats: {self.get_stats()}")
+
+
+def run_worker(worker: QueueWorker, **kwargs) -> WorkerRuntime:
+    """
+    Run a worker in the current thread until it is stopped
+
+    Returns:
+        The runtime (for its final stats)
+    """
+    runtime = WorkerRuntime(worker, **kwargs)
+    runtime.run()
+    return runtime
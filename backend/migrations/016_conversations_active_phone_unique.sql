@@ -0,0 +1,24 @@
+-- Migration 016: One active conversation per phone number
+-- Purpose: Allow ConversationService.get_or_create_conversation to use a single
+--          INSERT ... ON CONFLICT upsert instead of SELECT-then-INSERT
+
+-- Step 1: Close out duplicate active conversations (keep the newest per phone)
+UPDATE conversations c
+SET conversation_state = 'cancelled',
+    updated_at = NOW()
+WHERE c.conversation_state NOT IN ('completed', 'cancelled')
+  AND EXISTS (
+    SELECT 1
+    FROM conversations newer
+    WHERE newer.tenant_id = c.tenant_id
+      AND newer.phone_number = c.phone_number
+      AND newer.conversation_state NOT IN ('completed', 'cancelled')
+      AND (newer.created_at, newer.id) > (c.created_at, c.id)
+  );
+
+-- Step 2: Partial unique index used as the upsert conflict target
+CREATE UNIQUE INDEX IF NOT EXISTS idx_conversations_active_phone
+ON conversations (tenant_id, phone_number)
+WHERE conversation_state NOT IN ('completed', 'cancelled');
+
+COMMENT ON INDEX idx_conversations_active_phone IS 'At most one active SMS conversation per tenant and phone number';
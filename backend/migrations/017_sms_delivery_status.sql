@@ -0,0 +1,22 @@
+-- Migration 017: SMS delivery status tracking
+-- Purpose: Track outbound SMS queue attempts and Twilio delivery status callbacks
+
+ALTER TABLE sms_messages
+    ADD COLUMN IF NOT EXISTS delivery_status TEXT,
+    ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS error_code TEXT,
+    ADD COLUMN IF NOT EXISTS status_updated_at TIMESTAMPTZ;
+
+-- Status callbacks look messages up by Twilio SID
+CREATE INDEX IF NOT EXISTS idx_sms_messages_message_sid
+ON sms_messages (message_sid)
+WHERE message_sid IS NOT NULL;
+
+-- Outbound messages that have not reached a final status
+CREATE INDEX IF NOT EXISTS idx_sms_messages_undelivered
+ON sms_messages (tenant_id, created_at)
+WHERE direction = 'outbound'
+  AND delivery_status IN ('queued', 'retrying', 'sent', 'sending');
+
+COMMENT ON COLUMN sms_messages.delivery_status IS 'received (inbound), twiml, queued, retrying, sent, delivered, undelivered, failed';
+COMMENT ON COLUMN sms_messages.attempts IS 'Outbound send attempts made by the SMS queue';
@@ -0,0 +1,54 @@
+-- Migration 018: Payment reminder schedule on bookings
+-- Purpose: Let PaymentReminderWorker find due reminders with one indexed query
+--          instead of scanning every pending booking each hour
+
+-- Step 1: Schedule columns
+ALTER TABLE bookings
+ADD COLUMN IF NOT EXISTS next_reminder_stage SMALLINT,
+ADD COLUMN IF NOT EXISTS next_reminder_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN bookings.next_reminder_stage IS 'Next payment reminder to send (1 = day 3, 2 = day 7, 3 = day 14); NULL when done';
+COMMENT ON COLUMN bookings.next_reminder_at IS 'When the next reminder is due (also used as the worker claim lease)';
+
+-- Step 2: Keep the schedule in sync with payment status
+CREATE OR REPLACE FUNCTION bookings_schedule_reminder()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF COALESCE(NEW.payment_status, 'pending') = 'pending' AND NEW.next_reminder_stage IS NULL THEN
+            NEW.next_reminder_stage := 1;
+            NEW.next_reminder_at := COALESCE(NEW.created_at, NOW()) + INTERVAL '3 days';
+        END IF;
+    ELSIF NEW.payment_status IS DISTINCT FROM 'pending' THEN
+        NEW.next_reminder_stage := NULL;
+        NEW.next_reminder_at := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_bookings_schedule_reminder ON bookings;
+CREATE TRIGGER trg_bookings_schedule_reminder
+    BEFORE INSERT OR UPDATE OF payment_status ON bookings
+    FOR EACH ROW
+    EXECUTE FUNCTION bookings_schedule_reminder();
+
+-- Step 3: Backfill pending bookings from the reminders already sent
+UPDATE bookings
+SET next_reminder_stage = CASE
+        WHEN NOT COALESCE(reminder_1_sent, FALSE) THEN 1
+        WHEN NOT COALESCE(reminder_2_sent, FALSE) THEN 2
+        WHEN NOT COALESCE(reminder_3_sent, FALSE) THEN 3
+    END,
+    next_reminder_at = CASE
+        WHEN NOT COALESCE(reminder_1_sent, FALSE) THEN created_at + INTERVAL '3 days'
+        WHEN NOT COALESCE(reminder_2_sent, FALSE) THEN created_at + INTERVAL '7 days'
+        WHEN NOT COALESCE(reminder_3_sent, FALSE) THEN created_at + INTERVAL '14 days'
+    END
+WHERE payment_status = 'pending'
+  AND created_at > NOW() - INTERVAL '30 days';
+
+-- Step 4: Due-reminder index (pending bookings only)
+CREATE INDEX IF NOT EXISTS idx_bookings_next_reminder
+ON bookings (next_reminder_at)
+WHERE payment_status = 'pending' AND next_reminder_at IS NOT NULL;
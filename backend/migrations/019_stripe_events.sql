@@ -0,0 +1,41 @@
+-- Migration 019: Stripe webhook event store
+-- Purpose: Deduplicate Stripe redeliveries by event id and let webhook events be
+--          applied asynchronously, in order per booking
+
+-- Step 1: Event store
+CREATE TABLE IF NOT EXISTS stripe_events (
+    event_id TEXT PRIMARY KEY,
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    event_type TEXT NOT NULL,
+    booking_id TEXT,
+    stripe_created_at TIMESTAMPTZ NOT NULL,
+    payload JSONB NOT NULL,
+
+    -- Processing
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'processed', 'ignored', 'failed')),
+    error TEXT,
+    received_at TIMESTAMPTZ DEFAULT NOW(),
+    processed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_stripe_events_pending
+ON stripe_events (received_at)
+WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_stripe_events_booking
+ON stripe_events (tenant_id, booking_id, stripe_created_at);
+
+ALTER TABLE stripe_events ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS stripe_events_tenant_isolation ON stripe_events;
+CREATE POLICY stripe_events_tenant_isolation ON stripe_events
+    FOR ALL
+    USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+
+COMMENT ON TABLE stripe_events IS 'Received Stripe webhook events (idempotency key = Stripe event id)';
+
+-- Step 2: Ordering guard on bookings
+ALTER TABLE bookings
+ADD COLUMN IF NOT EXISTS last_stripe_event_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN bookings.last_stripe_event_at IS 'Stripe created time of the newest payment event applied; older events are no-ops';
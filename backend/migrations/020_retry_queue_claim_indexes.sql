@@ -0,0 +1,11 @@
+-- Migration 020: Retry queue claim indexes
+-- Purpose: Let EmailRetryWorker claim due items across tenants with
+--          FOR UPDATE SKIP LOCKED and reclaim items abandoned by dead workers
+
+CREATE INDEX IF NOT EXISTS idx_retry_queue_due
+ON email_retry_queue (scheduled_at)
+WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_retry_queue_processing
+ON email_retry_queue (started_at)
+WHERE status = 'processing';
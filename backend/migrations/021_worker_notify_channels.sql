@@ -0,0 +1,23 @@
+-- Migration 021: NOTIFY payment reminder worker when a reminder is scheduled
+-- Purpose: PaymentReminderWorker sleeps until the earliest next_reminder_at and
+--          LISTENs on 'payment_reminders'; a new booking may be due sooner, so
+--          wake the worker to recompute its schedule (delivered on commit)
+
+CREATE OR REPLACE FUNCTION bookings_schedule_reminder()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF COALESCE(NEW.payment_status, 'pending') = 'pending' AND NEW.next_reminder_stage IS NULL THEN
+            NEW.next_reminder_stage := 1;
+            NEW.next_reminder_at := COALESCE(NEW.created_at, NOW()) + INTERVAL '3 days';
+        END IF;
+        IF NEW.next_reminder_at IS NOT NULL THEN
+            PERFORM pg_notify('payment_reminders', NEW.id::text);
+        END IF;
+    ELSIF NEW.payment_status IS DISTINCT FROM 'pending' THEN
+        NEW.next_reminder_stage := NULL;
+        NEW.next_reminder_at := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
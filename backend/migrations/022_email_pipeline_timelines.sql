@@ -0,0 +1,31 @@
+-- Migration 022: Sampled email pipeline timelines
+-- Purpose: Keep per-stage timings of slow (and a random sample of) emails
+--          processed by EmailProcessorV3 for latency forensics
+
+CREATE TABLE IF NOT EXISTS email_pipeline_timelines (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    email_id UUID NOT NULL,
+    trace_id TEXT,
+    status TEXT NOT NULL,
+    total_ms DOUBLE PRECISION NOT NULL,
+    slow BOOLEAN NOT NULL DEFAULT FALSE,
+    spans JSONB NOT NULL,  -- [{stage, offset_ms, duration_ms, error}]
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_pipeline_timelines_slow
+ON email_pipeline_timelines (tenant_id, created_at DESC)
+WHERE slow;
+
+CREATE INDEX IF NOT EXISTS idx_email_pipeline_timelines_trace
+ON email_pipeline_timelines (trace_id);
+
+ALTER TABLE email_pipeline_timelines ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS email_pipeline_timelines_tenant_isolation ON email_pipeline_timelines;
+CREATE POLICY email_pipeline_timelines_tenant_isolation ON email_pipeline_timelines
+    FOR ALL
+    USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+
+COMMENT ON TABLE email_pipeline_timelines IS 'Per-stage timings of slow/sampled emails (see EmailProcessorV3._record_timeline)';
@@ -0,0 +1,34 @@
+-- Migration 023: LLM usage accounting
+-- Purpose: One row per Claude call (tokens, prompt-cache reads/writes, cost,
+--          latency) for per-tenant cost and cache-effectiveness reports
+
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    model TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_write_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd NUMERIC(12, 6),  -- NULL for models without a known price
+    latency_ms DOUBLE PRECISION NOT NULL,
+    success BOOLEAN NOT NULL DEFAULT TRUE,
+    trace_id TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_usage_tenant_created
+ON llm_usage (tenant_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created
+ON llm_usage (created_at);
+
+ALTER TABLE llm_usage ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS llm_usage_tenant_isolation ON llm_usage;
+CREATE POLICY llm_usage_tenant_isolation ON llm_usage
+    FOR ALL
+    USING (tenant_id = current_setting('app.current_tenant_id', true)::UUID);
+
+COMMENT ON TABLE llm_usage IS 'Per-call LLM token/cache/latency accounting (see app/services/llm_usage.py)';
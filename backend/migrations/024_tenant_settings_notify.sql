@@ -0,0 +1,31 @@
+-- Migration 024: Tenant feature flags and settings change notifications
+-- Purpose: TenantSettingsCache keeps per-tenant settings (timezone, safe mode,
+--          feature flags) in memory; NOTIFY 'tenant_settings' with the tenant id
+--          whenever they change so every process drops its cached copy
+
+ALTER TABLE tenants
+ADD COLUMN IF NOT EXISTS feature_flags JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+COMMENT ON COLUMN tenants.feature_flags IS 'Per-tenant feature flags (see app.services.tenant_settings.TenantSettings)';
+
+CREATE OR REPLACE FUNCTION notify_tenant_settings_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'tenants' THEN
+        PERFORM pg_notify('tenant_settings', COALESCE(NEW.id, OLD.id)::text);
+    ELSIF COALESCE(NEW.state_key, OLD.state_key) = 'safe_mode' THEN
+        PERFORM pg_notify('tenant_settings', COALESCE(NEW.tenant_id, OLD.tenant_id)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tenants_settings_changed ON tenants;
+CREATE TRIGGER tenants_settings_changed
+AFTER UPDATE OR DELETE ON tenants
+FOR EACH ROW EXECUTE FUNCTION notify_tenant_settings_changed();
+
+DROP TRIGGER IF EXISTS system_state_settings_changed ON system_state;
+CREATE TRIGGER system_state_settings_changed
+AFTER INSERT OR UPDATE OR DELETE ON system_state
+FOR EACH ROW EXECUTE FUNCTION notify_tenant_settings_changed();
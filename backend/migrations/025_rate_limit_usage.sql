@@ -0,0 +1,17 @@
+-- Migration 025: Cross-host rate limit reconciliation
+-- Purpose: Each host keeps token buckets in a shared-memory file; when
+--          RATE_LIMIT_RECONCILE_SECONDS > 0 one process per host adds the
+--          host's consumption here and charges its buckets for other hosts'
+
+CREATE TABLE IF NOT EXISTS rate_limit_usage (
+    key_hash BIGINT NOT NULL,  -- blake2b of "tenant_id:route" (not tenant data)
+    host TEXT NOT NULL,
+    consumed_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (key_hash, host)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_usage_updated
+ON rate_limit_usage (updated_at);
+
+COMMENT ON TABLE rate_limit_usage IS 'Cumulative per-host rate limit consumption (see app/services/rate_limiter.py)';
@@ -0,0 +1,41 @@
+-- Migration 026: Deferred Archivus thread summaries
+-- Purpose: ArchivusService.enqueue_thread_summary() upserts one job per thread;
+--          repeated updates within the debounce window coalesce into it and
+--          ArchivusSummaryWorker summarizes due jobs in batches. Threads whose
+--          content hash matches the stored summary are not re-summarized.
+
+ALTER TABLE archivus_threads ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE TABLE IF NOT EXISTS archivus_summary_jobs (
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    gmail_thread_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    raw_email_body TEXT NOT NULL,
+    structured_context JSONB,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'processing', 'failed')),
+    version INTEGER NOT NULL DEFAULT 1,  -- bumped by every coalesced update
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_after TIMESTAMPTZ NOT NULL,
+    first_queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    error_message TEXT,
+    trace_id TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, gmail_thread_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_archivus_summary_jobs_due
+ON archivus_summary_jobs (run_after)
+WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_archivus_summary_jobs_processing
+ON archivus_summary_jobs (started_at)
+WHERE status = 'processing';
+
+ALTER TABLE archivus_summary_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY archivus_summary_jobs_tenant_isolation ON archivus_summary_jobs
+    FOR ALL
+    USING (tenant_id = current_setting('app.current_tenant_id', TRUE)::UUID);
+
+COMMENT ON TABLE archivus_summary_jobs IS 'Pending Archivus thread summaries, one per thread (see app/workers/archivus_summary_worker.py)';
@@ -0,0 +1,158 @@
+-- Migration 027: Materialized Archivus client and venue profiles
+-- Purpose: ArchivusService.get_client_profile()/get_venue_profile() read one
+--          archivus_profiles row instead of querying archivus_threads and
+--          archivus_memories. Triggers on both tables rebuild only the
+--          profiles whose key was written, so rows are always current.
+
+CREATE TABLE IF NOT EXISTS archivus_profiles (
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    profile_type TEXT NOT NULL CHECK (profile_type IN ('client', 'venue')),
+    profile_key TEXT NOT NULL,  -- client_id or venue_name
+    thread_summaries JSONB NOT NULL DEFAULT '[]'::jsonb,  -- latest 10, in response shape
+    memories JSONB NOT NULL DEFAULT '[]'::jsonb,  -- latest 5, in response shape
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, profile_type, profile_key)
+);
+
+ALTER TABLE archivus_profiles ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY archivus_profiles_tenant_isolation ON archivus_profiles
+    FOR ALL
+    USING (tenant_id = current_setting('app.current_tenant_id', TRUE)::UUID);
+
+-- Rebuild one profile (deleted when nothing references the key any more).
+-- The two thread queries are spelled out so each uses its expression index.
+CREATE OR REPLACE FUNCTION archivus_refresh_profile(p_tenant_id UUID, p_type TEXT, p_key TEXT)
+RETURNS VOID AS $$
+DECLARE
+    v_threads JSONB;
+    v_memories JSONB;
+BEGIN
+    IF p_tenant_id IS NULL OR p_key IS NULL OR p_key = '' THEN
+        RETURN;
+    END IF;
+
+    -- Serialize rebuilds of one profile; the queries below then run on a
+    -- snapshot that includes the other writer's committed rows
+    PERFORM pg_advisory_xact_lock(hashtext('archivus_profile:' || p_tenant_id::text || ':' || p_type || ':' || p_key));
+
+    IF p_type = 'client' THEN
+        SELECT jsonb_agg(jsonb_build_object(
+                   'summary', t.summary, 'key_points', t.key_points, 'created_at', t.created_at
+               ) ORDER BY t.created_at DESC)
+        INTO v_threads
+        FROM (
+            SELECT summary, key_points, created_at
+            FROM archivus_threads
+            WHERE tenant_id = p_tenant_id AND key_points->>'client_id' = p_key
+            ORDER BY created_at DESC
+            LIMIT 10
+        ) t;
+    ELSE
+        SELECT jsonb_agg(jsonb_build_object(
+                   'summary', t.summary, 'key_points', t.key_points, 'created_at', t.created_at
+               ) ORDER BY t.created_at DESC)
+        INTO v_threads
+        FROM (
+            SELECT summary, key_points, created_at
+            FROM archivus_threads
+            WHERE tenant_id = p_tenant_id AND key_points->>'venue_name' = p_key
+            ORDER BY created_at DESC
+            LIMIT 10
+        ) t;
+    END IF;
+
+    SELECT jsonb_agg(jsonb_build_object(
+               'type', m.memory_type, 'key', m.key, 'value', m.value, 'confidence', m.confidence
+           ) ORDER BY m.updated_at DESC)
+    INTO v_memories
+    FROM (
+        SELECT memory_type, key, value, confidence, updated_at
+        FROM archivus_memories
+        WHERE tenant_id = p_tenant_id AND memory_type = p_type || '_profile' AND key = p_key
+        ORDER BY updated_at DESC
+        LIMIT 5
+    ) m;
+
+    IF v_threads IS NULL AND v_memories IS NULL THEN
+        DELETE FROM archivus_profiles
+        WHERE tenant_id = p_tenant_id AND profile_type = p_type AND profile_key = p_key;
+        RETURN;
+    END IF;
+
+    INSERT INTO archivus_profiles (tenant_id, profile_type, profile_key, thread_summaries, memories, updated_at)
+    VALUES (p_tenant_id, p_type, p_key, COALESCE(v_threads, '[]'::jsonb), COALESCE(v_memories, '[]'::jsonb), NOW())
+    ON CONFLICT (tenant_id, profile_type, profile_key)
+    DO UPDATE SET
+        thread_summaries = EXCLUDED.thread_summaries,
+        memories = EXCLUDED.memories,
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION archivus_threads_refresh_profiles()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM archivus_refresh_profile(OLD.tenant_id, 'client', OLD.key_points->>'client_id');
+        PERFORM archivus_refresh_profile(OLD.tenant_id, 'venue', OLD.key_points->>'venue_name');
+        RETURN NULL;
+    END IF;
+    PERFORM archivus_refresh_profile(NEW.tenant_id, 'client', NEW.key_points->>'client_id');
+    PERFORM archivus_refresh_profile(NEW.tenant_id, 'venue', NEW.key_points->>'venue_name');
+    IF TG_OP = 'UPDATE' THEN
+        -- Profiles the row moved out of
+        IF OLD.key_points->>'client_id' IS DISTINCT FROM NEW.key_points->>'client_id' THEN
+            PERFORM archivus_refresh_profile(OLD.tenant_id, 'client', OLD.key_points->>'client_id');
+        END IF;
+        IF OLD.key_points->>'venue_name' IS DISTINCT FROM NEW.key_points->>'venue_name' THEN
+            PERFORM archivus_refresh_profile(OLD.tenant_id, 'venue', OLD.key_points->>'venue_name');
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION archivus_memories_refresh_profiles()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.memory_type IN ('client_profile', 'venue_profile') THEN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM archivus_refresh_profile(OLD.tenant_id, split_part(OLD.memory_type, '_', 1), OLD.key);
+            RETURN NULL;
+        END IF;
+        IF (OLD.memory_type, OLD.key) IS DISTINCT FROM (NEW.memory_type, NEW.key) THEN
+            PERFORM archivus_refresh_profile(OLD.tenant_id, split_part(OLD.memory_type, '_', 1), OLD.key);
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.memory_type IN ('client_profile', 'venue_profile') THEN
+        PERFORM archivus_refresh_profile(NEW.tenant_id, split_part(NEW.memory_type, '_', 1), NEW.key);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS archivus_threads_profiles ON archivus_threads;
+CREATE TRIGGER archivus_threads_profiles
+AFTER INSERT OR UPDATE OR DELETE ON archivus_threads
+FOR EACH ROW EXECUTE FUNCTION archivus_threads_refresh_profiles();
+
+DROP TRIGGER IF EXISTS archivus_memories_profiles ON archivus_memories;
+CREATE TRIGGER archivus_memories_profiles
+AFTER INSERT OR UPDATE OR DELETE ON archivus_memories
+FOR EACH ROW EXECUTE FUNCTION archivus_memories_refresh_profiles();
+
+-- Backfill existing profiles
+SELECT archivus_refresh_profile(k.tenant_id, k.profile_type, k.profile_key)
+FROM (
+    SELECT DISTINCT tenant_id, 'client' AS profile_type, key_points->>'client_id' AS profile_key
+    FROM archivus_threads WHERE key_points->>'client_id' IS NOT NULL
+    UNION
+    SELECT DISTINCT tenant_id, 'venue', key_points->>'venue_name'
+    FROM archivus_threads WHERE key_points->>'venue_name' IS NOT NULL
+    UNION
+    SELECT DISTINCT tenant_id, split_part(memory_type, '_', 1), key
+    FROM archivus_memories WHERE memory_type IN ('client_profile', 'venue_profile')
+) k;
+
+COMMENT ON TABLE archivus_profiles IS 'Materialized Archivus client/venue profiles, maintained by triggers (see app/services/archivus_service.py)';
@@ -0,0 +1,25 @@
+-- Migration 028: Stripe event claiming and retries
+-- Purpose: Events are claimed before they are applied, so the periodic recovery
+--          sweep running in every web process applies each event once. Events
+--          stuck in 'processing' (dead process) are reclaimed, and failed events
+--          are retried with exponential backoff until they run out of attempts.
+
+-- Step 1: Claim / retry bookkeeping
+ALTER TABLE stripe_events ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE stripe_events ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+ALTER TABLE stripe_events ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ;  -- NULL on a failed event = out of attempts
+
+COMMENT ON COLUMN stripe_events.claimed_at IS 'When the current attempt was claimed; processing rows older than the stale window are reclaimed';
+COMMENT ON COLUMN stripe_events.next_attempt_at IS 'When a failed event is retried (NULL once attempts are exhausted)';
+
+-- Step 2: 'processing' status
+ALTER TABLE stripe_events DROP CONSTRAINT IF EXISTS stripe_events_status_check;
+ALTER TABLE stripe_events ADD CONSTRAINT stripe_events_status_check
+    CHECK (status IN ('pending', 'processing', 'processed', 'ignored', 'failed'));
+
+-- Step 3: Recovery index (replaces the pending-only index)
+DROP INDEX IF EXISTS idx_stripe_events_pending;
+
+CREATE INDEX IF NOT EXISTS idx_stripe_events_recoverable
+ON stripe_events (received_at)
+WHERE status IN ('pending', 'processing', 'failed');
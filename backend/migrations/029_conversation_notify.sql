@@ -0,0 +1,30 @@
+-- Migration 029: SMS conversation change notifications
+-- Purpose: ConversationService caches conversation state per process; NOTIFY
+--          'sms_conversations' with "<tenant_id>:<phone_number>" whenever a
+--          conversation's state or booking fields change so every process drops
+--          its cached copy. last_message_at-only touches (message flushes) leave
+--          updated_at alone and do not notify.
+
+CREATE OR REPLACE FUNCTION notify_conversation_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('sms_conversations', OLD.tenant_id::text || ':' || OLD.phone_number);
+    ELSE
+        PERFORM pg_notify('sms_conversations', NEW.tenant_id::text || ':' || NEW.phone_number);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS conversations_changed ON conversations;
+CREATE TRIGGER conversations_changed
+AFTER UPDATE ON conversations
+FOR EACH ROW
+WHEN (OLD.updated_at IS DISTINCT FROM NEW.updated_at)
+EXECUTE FUNCTION notify_conversation_changed();
+
+DROP TRIGGER IF EXISTS conversations_deleted ON conversations;
+CREATE TRIGGER conversations_deleted
+AFTER DELETE ON conversations
+FOR EACH ROW EXECUTE FUNCTION notify_conversation_changed();
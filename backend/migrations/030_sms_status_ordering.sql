@@ -0,0 +1,51 @@
+-- Migration 030: SMS delivery status ordering and early status callbacks
+-- Purpose: Message rows are written by a batched flush, so a Twilio status
+--          callback can arrive (on any worker) before the row exists, and a late
+--          flush can carry an older status than a callback already applied.
+--          Statuses only move forward (sms_delivery_status_supersedes), and a
+--          callback for a row that does not exist yet is parked in
+--          sms_status_callbacks until the flush that inserts the row applies it.
+
+-- Step 1: Status order (queued < retrying < sending < sent < final)
+CREATE OR REPLACE FUNCTION sms_delivery_status_rank(status TEXT)
+RETURNS INTEGER AS $$
+    SELECT CASE status
+        WHEN 'queued' THEN 1
+        WHEN 'accepted' THEN 1
+        WHEN 'scheduled' THEN 1
+        WHEN 'retrying' THEN 2
+        WHEN 'sending' THEN 3
+        WHEN 'sent' THEN 4
+        WHEN 'delivered' THEN 5
+        WHEN 'undelivered' THEN 5
+        WHEN 'failed' THEN 5
+        WHEN 'read' THEN 5
+        WHEN 'canceled' THEN 5
+        ELSE 0
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- A new status replaces the stored one unless it is older or the stored one is final
+CREATE OR REPLACE FUNCTION sms_delivery_status_supersedes(new_status TEXT, old_status TEXT)
+RETURNS BOOLEAN AS $$
+    SELECT sms_delivery_status_rank(old_status) < 5
+       AND sms_delivery_status_rank(new_status) >= sms_delivery_status_rank(old_status)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Step 2: Callbacks received before their message row was written
+CREATE TABLE IF NOT EXISTS sms_status_callbacks (
+    message_sid TEXT PRIMARY KEY,
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    delivery_status TEXT NOT NULL,
+    error_code TEXT,
+    received_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE sms_status_callbacks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS sms_status_callbacks_tenant_isolation ON sms_status_callbacks;
+CREATE POLICY sms_status_callbacks_tenant_isolation ON sms_status_callbacks
+    FOR ALL
+    USING (tenant_id = current_setting('app.current_tenant_id', TRUE)::UUID);
+
+COMMENT ON TABLE sms_status_callbacks IS 'Twilio status callbacks waiting for their sms_messages row (removed once the flush applies them)';
@@ -0,0 +1,93 @@
+"""
+OMEGA Core v3.0 - Archivus Recall Index Benchmark
+Builds a tenant index of synthetic thread summaries and measures indexing
+throughput, top-k search latency and how often a misspelled venue still
+recalls a thread about that venue
+
+Usage:
+    python scripts/benchmark_archivus_recall.py [items ...]
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.utils.vector_index import VectorIndex  # noqa: E402
+
+QUERIES = 300
+DIM = 512
+
+VENUES = [
+    "The Grand Ballroom", "Riverside Brewery", "Magnolia Gardens", "Harbor View Loft",
+    "St. Anselm Chapel", "The Copper Kettle", "Lakeshore Country Club", "Union Station Hall",
+    "Bellwether Vineyard", "Crescent Park Pavilion", "The Foundry", "Willow Creek Barn",
+]
+EVENTS = ["wedding", "birthday party", "corporate gala", "rehearsal dinner", "anniversary", "fundraiser"]
+DETAILS = [
+    "asked about a 6 hour package with uplighting",
+    "needs ceremony audio and a wireless mic for toasts",
+    "wants a jazz set during cocktail hour then dance music",
+    "coordinator will send the run of show next week",
+    "load-in is through the side entrance after 3pm",
+    "deposit invoice requested, date still tentative",
+]
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """Drop or swap one letter in a word of the venue name"""
+    words = name.split()
+    i = max(range(len(words)), key=lambda j: len(words[j]))
+    word = words[i]
+    k = rng.randrange(1, len(word) - 1)
+    words[i] = word[:k] + word[k + 1:] if rng.random() < 0.5 else word[:k] + word[k + 1] + word[k] + word[k + 2:]
+    return " ".join(words).lower()
+
+
+def run(items: int) -> None:
+    rng = random.Random(items)
+    entries = []
+    for i in range(items):
+        venue = rng.choice(VENUES)
+        text = f"{venue} {rng.choice(EVENTS)} for client {i}: {rng.choice(DETAILS)}"
+        entries.append((f"thread:{i}", "thread", text, {"thread_id": str(i), "venue": venue}))
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(directory, dim=DIM)
+        started = time.perf_counter()
+        index.add_many(entries)
+        build = time.perf_counter() - started
+
+        latencies = []
+        hits = 0
+        for _ in range(QUERIES):
+            venue = rng.choice(VENUES)
+            query = f"{misspell(venue, rng)} {rng.choice(EVENTS)}"
+            started = time.perf_counter()
+            results = index.search(query, k=5, kind="thread")
+            latencies.append(time.perf_counter() - started)
+            hits += bool(results) and results[0][1]["venue"] == venue
+        index.close()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{items:>7} items  build {items / build:>8.0f} items/s  "
+        f"search p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  misspelled-venue top-1 {hits / QUERIES:6.1%}"
+    )
+
+
+def main(sizes) -> None:
+    print(f"dim={DIM}, {QUERIES} queries per size")
+    for items in sizes:
+        run(items)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
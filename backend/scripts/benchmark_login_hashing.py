@@ -0,0 +1,81 @@
+"""
+OMEGA Core v3.0 - Login Password Hashing Benchmark
+Compares bcrypt verification inline on the event loop with the bounded
+PasswordHasher pool used by /api/auth/login
+
+Runs offline (no database): each simulated login verifies one bcrypt hash
+while a heartbeat task measures how long the event loop is blocked.
+
+Usage:
+    python scripts/benchmark_login_hashing.py [concurrent_logins] [bcrypt_rounds]
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.services.password_hasher import PasswordHasher  # noqa: E402
+from app.utils.password_policy import make_crypt_context  # noqa: E402
+
+PASSWORD = "Correct-Horse-Battery-9"
+HEARTBEAT_SECONDS = 0.01
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list) -> None:
+    """Record how late each 10 ms tick fires (event loop blocking)"""
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_SECONDS
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _run(label: str, login, logins: int) -> None:
+    stop = asyncio.Event()
+    lags: list = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+    await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+    assert all(results)
+    max_lag = max(lags) * 1000 if lags else elapsed * 1000
+    print(
+        f"{label:<28} {elapsed * 1000:9.1f} ms  {logins / elapsed:8.1f} logins/s  "
+        f"max loop stall {max_lag:8.1f} ms  ({len(lags)} heartbeats)"
+    )
+
+
+async def main(logins: int = 16, rounds: int = 12) -> None:
+    context = make_crypt_context(rounds)
+    stored_hash = context.hash(PASSWORD)
+    print(f"{logins} concurrent logins, bcrypt cost {rounds}\n")
+
+    async def inline_login() -> bool:
+        # Previous path: bcrypt directly inside the async handler
+        return context.verify(PASSWORD, stored_hash)
+
+    await _run("inline (event loop)", inline_login, logins)
+
+    for workers in (1, 2, 4):
+        hasher = PasswordHasher(max_workers=workers, max_pending=logins, bcrypt_rounds=rounds)
+
+        async def pooled_login() -> bool:
+            valid, _ = await hasher.verify_and_update(PASSWORD, stored_hash)
+            return valid
+
+        await _run(f"hasher pool ({workers} threads)", pooled_login, logins)
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    cost = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    asyncio.run(main(count, cost))
@@ -0,0 +1,172 @@
+"""
+OMEGA Core v3.0 - Middleware Stack Benchmark
+Compares the previous two BaseHTTPMiddleware layers (SecurityMiddleware +
+TenantContextMiddleware) with the fused pure-ASGI RequestContextMiddleware
+
+Drives the ASGI apps in-process (no sockets) so only framework and
+middleware overhead is measured. Also reports time to first body chunk of
+a streaming response.
+
+Usage:
+    python scripts/benchmark_middleware.py [requests] [concurrency]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.middleware.request_context import RequestContextMiddleware  # noqa: E402
+
+DEFAULT_TENANT_ID = "00000000-0000-0000-0000-000000000001"
+STREAM_CHUNKS = 5
+STREAM_CHUNK_DELAY_SECONDS = 0.01
+
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    """Previous SecurityMiddleware"""
+
+    async def dispatch(self, request, call_next):
+        trace_id = str(uuid.uuid4())
+        request.state.trace_id = trace_id
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Content-Security-Policy"] = "default-src 'self'"
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+
+
+class LegacyTenantContextMiddleware(BaseHTTPMiddleware):
+    """Previous TenantContextMiddleware"""
+
+    async def dispatch(self, request, call_next):
+        request.state.tenant_id = DEFAULT_TENANT_ID
+        request.state.user_id = None
+        request.state.user_role = None
+        return await call_next(request)
+
+
+async def _json(request: Request):
+    return JSONResponse({"trace_id": request.state.trace_id, "tenant_id": request.state.tenant_id})
+
+
+async def _stream(request: Request):
+    async def chunks():
+        for i in range(STREAM_CHUNKS):
+            yield f"chunk {i}\n".encode()
+            await asyncio.sleep(STREAM_CHUNK_DELAY_SECONDS)
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def _build_app(fused: bool) -> Starlette:
+    app = Starlette(routes=[Route("/json", _json), Route("/stream", _stream)])
+    if fused:
+        app.add_middleware(RequestContextMiddleware)
+    else:
+        app.add_middleware(LegacySecurityMiddleware)
+        app.add_middleware(LegacyTenantContextMiddleware)
+    return app
+
+
+async def _request(app, path: str) -> tuple:
+    """
+    One in-process GET
+
+    Returns:
+        (total seconds, seconds to first body chunk, response headers)
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"authorization", b"Bearer token")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+    started = time.perf_counter()
+    first_chunk = None
+    headers = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        nonlocal first_chunk, headers
+        if message["type"] == "http.response.start":
+            headers = message["headers"]
+        elif message["type"] == "http.response.body" and message.get("body") and first_chunk is None:
+            first_chunk = time.perf_counter() - started
+
+    await app(scope, receive, send)
+    return time.perf_counter() - started, first_chunk, headers
+
+
+async def _load(app, path: str, requests: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await _request(app, path)
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:7.3f} ms"
+
+
+async def main(requests: int = 5000, concurrency: int = 50) -> None:
+    for fused in (False, True):
+        label = "fused pure-ASGI" if fused else "BaseHTTPMiddleware x2"
+        app = _build_app(fused)
+
+        _, _, headers = await _request(app, "/json")
+        assert (b"x-frame-options", b"DENY") in headers
+        await _load(app, "/json", 200, concurrency)  # warm-up
+
+        started = time.perf_counter()
+        results = await _load(app, "/json", requests, concurrency)
+        elapsed = time.perf_counter() - started
+        latencies = sorted(r[0] for r in results)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(
+            f"{label:<24} /json   {requests / elapsed:9.0f} req/s  "
+            f"p50 {_ms(statistics.median(latencies))}  p99 {_ms(p99)}"
+        )
+
+        streams = await _load(app, "/stream", 50, 10)
+        ttfb = statistics.median(r[1] for r in streams)
+        total = statistics.median(r[0] for r in streams)
+        print(f"{label:<24} /stream first chunk {_ms(ttfb)}  complete {_ms(total)}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(count, parallel))
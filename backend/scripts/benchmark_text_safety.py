@@ -0,0 +1,97 @@
+"""
+OMEGA Core v3.0 - Text Safety Scanner Benchmark
+Compares the previous sanitizer (four re.sub calls) plus Sentra static-rule
+checks with the single-pass scan_text, on normal and adversarial inputs
+
+For each input the size is doubled; a linear implementation roughly doubles
+its time, a quadratic one quadruples it.
+
+Usage:
+    python scripts/benchmark_text_safety.py [max_kilobytes]
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+from app.utils.text_safety import scan_text  # noqa: E402
+
+# Stop timing the previous implementation once one run takes this long
+LEGACY_BUDGET_SECONDS = 5.0
+
+REPLY = (
+    "Hi Sarah,\n\nThanks for reaching out about your wedding on June 14th! I believe we have "
+    "availability. Could you share the venue address and the start time? You can also reach "
+    "Greg at greg@skinnymanmusic.com or see https://skinnymanmusic.com/packages.\n\nBest,\nMaya\n"
+)
+
+INPUTS = {
+    "normal reply": lambda size: (REPLY * (size // len(REPLY) + 1))[:size],
+    "dotted words, no @": lambda size: ("a." * size)[:size],
+    "'@' without domains": lambda size: (("a" * 60 + "@") * size)[:size],
+    "unclosed '<'": lambda size: "<" * size,
+    "unclosed <script>": lambda size: ("<script>x" * size)[:size],
+    "url char soup": lambda size: "http://" + ("a-$_." * size)[: size - 7] + " ",
+    "'$' and times": lambda size: ("$1 10:30  pm " * size)[:size],
+}
+
+
+def legacy_sanitize(response: str) -> str:
+    """Previous ClaudeService._sanitize_response"""
+    response = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+])+', '[URL_REMOVED]', response)
+    response = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_REMOVED]', response)
+    response = re.sub(r'<[^>]+>', '', response)
+    response = re.sub(r'<script[^>]*>.*?</script>', '', response, flags=re.DOTALL | re.IGNORECASE)
+    return response.strip()
+
+
+def legacy_rules(text: str) -> list:
+    """Previous SentraSafety static-rule checks (one scan per rule)"""
+    lower = text.lower()
+    found = []
+    if any(p in lower for p in ["system prompt", "here is my system", "i am an ai assistant"]):
+        found.append("system_prompt_reveal")
+    if any(p in lower for p in ["i'm not sure but", "i believe", "probably"]):
+        found.append("ai_hallucination")
+    urls = re.findall(r'https?://[^\s]+', text)
+    if [u for u in urls if not any(d in u for d in ["skinnymanmusic.com", "levelthree.io"])]:
+        found.append("external_urls")
+    if re.search(r'\$\d+', text) or re.search(r'\d{1,2}:\d{2}\s*(AM|PM|am|pm)', text):
+        found.append("invented_details")
+    return found
+
+
+def _time(fn, text: str) -> float:
+    started = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - started
+
+
+def main(max_kb: int = 256) -> None:
+    sizes = []
+    size = 8 * 1024
+    while size <= max_kb * 1024:
+        sizes.append(size)
+        size *= 2
+
+    print(f"{'input':<22} {'size':>7}  {'previous':>12}  {'scan_text':>12}")
+    for label, build in INPUTS.items():
+        legacy_done = False
+        for size in sizes:
+            text = build(size)
+            new = _time(scan_text, text)
+            if legacy_done:
+                legacy = "skipped"
+            else:
+                seconds = _time(lambda t: (legacy_sanitize(t), legacy_rules(t)), text)
+                legacy = f"{seconds * 1000:9.2f} ms"
+                legacy_done = seconds > LEGACY_BUDGET_SECONDS
+            print(f"{label:<22} {size // 1024:>5} KB  {legacy:>12}  {new * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -0,0 +1,132 @@
+"""
+OMEGA Core v3.0 - Archivus Recall Index Sync Tests
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import threading
+import time
+import pytest
+from app.services import archivus_index
+from app.services.archivus_index import ArchivusIndex
+
+START = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+class FakeCursor:
+    """Serves archivus_threads / archivus_memories pages with the keyset filter applied"""
+
+    def __init__(self):
+        self.threads = []
+        self.memories = []
+        self.queries = 0
+        self._result = []
+
+    def execute(self, query, params):
+        self.queries += 1
+        if "FROM archivus_threads" in query:
+            _, since, after_id, limit = params
+            rows = self.threads
+        else:
+            _, types, since, after_id, limit = params
+            rows = [row for row in self.memories if row["memory_type"] in types]
+        rows = sorted((row for row in rows if (row["updated_at"], row["cursor_id"]) > (since, after_id)),
+                      key=lambda row: (row["updated_at"], row["cursor_id"]))
+        self._result = rows[:limit]
+
+    def fetchall(self):
+        return self._result
+
+
+def _thread(thread_id, summary, venue, minutes):
+    return {
+        "cursor_id": thread_id,
+        "gmail_thread_id": thread_id,
+        "summary": summary,
+        "key_points": {"venue_name": venue},
+        "updated_at": START + timedelta(minutes=minutes),
+    }
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    cursor = FakeCursor()
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield cursor
+
+    monkeypatch.setattr(archivus_index, "get_cursor", get_cursor)
+    monkeypatch.setattr(archivus_index, "SYNC_PAGE_SIZE", 2)
+    return cursor
+
+
+def test_sync_pages_and_resumes_from_watermark(fake_db, tmp_path):
+    """Test: Sync pages through changes, persists its watermark and only re-reads the overlap"""
+    fake_db.threads = [
+        _thread("t1", "Wedding at the Grand Ballroom", "Grand Ballroom", 1),
+        _thread("t2", "Birthday party at Riverside Brewery", "Riverside Brewery", 2),
+        _thread("t3", "Gala dinner at the Art Museum", "Art Museum", 3),
+    ]
+    fake_db.memories = [
+        {"cursor_id": "m1", "memory_id": "m1", "memory_type": "venue_profile", "key": "Grand Ballroom",
+         "value": {"notes": "freight elevator load-in"}, "updated_at": START},
+        {"cursor_id": "m2", "memory_id": "m2", "memory_type": "system_note", "key": "guardian_daemon",
+         "value": {"summary": "run completed"}, "updated_at": START},
+    ]
+    index = ArchivusIndex(str(tmp_path), dim=128, sync_seconds=3600)
+    try:
+        assert index.sync("tenant-1") == 4
+        state = index._index("tenant-1").read_state()
+        assert state["threads"] == (START + timedelta(minutes=3)).isoformat()
+
+        # Throttled until forced; unchanged rows in the overlap are not rewritten
+        assert index.sync("tenant-1") == 0
+        fake_db.threads.append(_thread("t4", "Wedding at the Grand Ballroom, second date", "Grand Ballroom", 90))
+        assert index.sync("tenant-1", force=True) == 1
+
+        related = index.related_threads("tenant-1", "grand ballroom wedding", limit=5, exclude_thread_id="t4")
+        assert related[0]["thread_id"] == "t1"
+        assert all(result["thread_id"] != "t4" for result in related)
+        memories = index.search("tenant-1", "ballroom elevator", kind="memory")
+        assert [memory["key"] for memory in memories] == ["Grand Ballroom"]
+    finally:
+        index.close()
+
+
+def test_sync_failure_keeps_serving(monkeypatch, tmp_path):
+    """Test: A database error during sync is swallowed and search still answers"""
+    @contextmanager
+    def broken_cursor(tenant_id=None):
+        raise RuntimeError("db down")
+        yield
+
+    monkeypatch.setattr(archivus_index, "get_cursor", broken_cursor)
+    index = ArchivusIndex(str(tmp_path), dim=128)
+    try:
+        index.add_thread("tenant-1", "t1", "Jazz trio for a cocktail hour", {"event_type": "cocktail"})
+        assert index.sync("tenant-1") == 0
+        assert index.get_stats()["sync_errors"] == 1
+        assert index.related_threads("tenant-1", "jazz trio")[0]["thread_id"] == "t1"
+    finally:
+        index.close()
+
+
+def test_search_syncs_in_the_background(fake_db, tmp_path):
+    """Test: search() never syncs inline; it wakes the sync thread, which picks up the rows"""
+    fake_db.threads = [_thread("t1", "Wedding at the Grand Ballroom", "Grand Ballroom", 1)]
+    index = ArchivusIndex(str(tmp_path), dim=128, sync_seconds=3600)
+    sync, sync_threads = index.sync, []
+    index.sync = lambda tenant_id, force=False: sync_threads.append(threading.current_thread().name) or sync(tenant_id, force)
+    try:
+        index.search("tenant-1", "grand ballroom")
+        deadline = time.monotonic() + 5
+        while index.get_stats()["syncs"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert index.get_stats()["synced_items"] == 1
+
+        # Synced within sync_seconds: further searches do not wake the thread
+        assert index.related_threads("tenant-1", "grand ballroom wedding")[0]["thread_id"] == "t1"
+        assert sync_threads == ["archivus-index-sync"]
+    finally:
+        index.close()
+    assert not index.get_stats()["sync_running"]
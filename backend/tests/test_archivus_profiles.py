@@ -0,0 +1,102 @@
+"""
+OMEGA Core v3.0 - Archivus Profile Cache Tests
+"""
+import inspect
+from contextlib import contextmanager
+import pytest
+from app.services import archivus_service
+from app.services.archivus_service import ArchivusService, invalidate_profiles
+from app.services.audit_service import AuditService
+
+THREADS = [{"summary": "Wedding at The Loft", "key_points": {"client_id": "c-1"}, "created_at": "2025-06-01T12:00:00+00:00"}]
+
+
+class FakeCursor:
+    """Returns one materialized profile row and counts queries"""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    def execute(self, query, params):
+        self.queries += 1
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeAudit:
+    def __init__(self):
+        self.events = []
+
+    def log_event(self, **kwargs):
+        # Same arguments as the real service accepts
+        inspect.signature(AuditService.log_event).bind(None, **kwargs)
+        self.events.append(kwargs["action"])
+
+
+@pytest.fixture
+def service(monkeypatch):
+    cursor = FakeCursor({"thread_summaries": THREADS, "memories": []})
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield cursor
+
+    monkeypatch.setattr(archivus_service, "get_cursor", get_cursor)
+    archivus_service._profile_cache.clear()
+    archivus = ArchivusService.__new__(ArchivusService)
+    archivus.tenant_id = "t-1"
+    archivus.audit = FakeAudit()
+    archivus.cursor = cursor
+    yield archivus
+    archivus_service._profile_cache.clear()
+
+
+def test_profile_is_one_cached_row_read(service):
+    """Test: The first lookup reads the profile row, later ones hit the cache"""
+    profile = service.get_client_profile("c-1")
+    assert profile == {"client_id": "c-1", "thread_summaries": THREADS, "memories": []}
+    service.get_client_profile("c-1")
+    assert service.cursor.queries == 1
+
+
+def test_summary_write_invalidates_profiles(service):
+    """Test: Invalidating a thread's key points drops its client and venue profiles"""
+    service.get_client_profile("c-1")
+    service.get_venue_profile("The Loft")
+    invalidate_profiles("t-1", {"client_id": "c-1", "venue_name": "The Loft"})
+    service.get_client_profile("c-1")
+    service.get_venue_profile("The Loft")
+    assert service.cursor.queries == 4
+
+
+def test_missing_profile_is_empty(service):
+    """Test: A key with no profile row returns empty lists"""
+    service.cursor.row = None
+    assert service.get_venue_profile("Nowhere") == {"venue_name": "Nowhere", "thread_summaries": [], "memories": []}
+
+
+def test_lookup_failure_fails_open(service, monkeypatch):
+    """Test: Database errors return an empty profile and are audited"""
+    @contextmanager
+    def broken_cursor(tenant_id=None):
+        raise RuntimeError("db down")
+        yield
+
+    monkeypatch.setattr(archivus_service, "get_cursor", broken_cursor)
+    assert service.get_client_profile("c-2")["thread_summaries"] == []
+    assert service.audit.events == ["archivus.client_profile.error"]
+
+
+def test_profile_lookup_error_returns_empty_profile(service, monkeypatch):
+    """Test: A DB error is audited and the lookup fails open with an empty profile"""
+    @contextmanager
+    def broken_cursor(tenant_id=None):
+        raise RuntimeError("db down")
+        yield
+
+    monkeypatch.setattr(archivus_service, "get_cursor", broken_cursor)
+    assert service.get_client_profile("c-9") == {"client_id": "c-9", "thread_summaries": [], "memories": []}
+    assert service.get_venue_profile("The Loft") == {"venue_name": "The Loft", "thread_summaries": [], "memories": []}
+    assert service.audit.events == ["archivus.client_profile.error", "archivus.venue_profile.error"]
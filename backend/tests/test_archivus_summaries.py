@@ -0,0 +1,119 @@
+"""
+OMEGA Core v3.0 - Archivus Deferred Summary Tests
+"""
+import inspect
+from contextlib import contextmanager
+import pytest
+from app.services import archivus_service
+from app.services.archivus_service import SUMMARY_BODY_CHARS, ArchivusService, extract_key_points, thread_content_hash
+from app.services.audit_service import AuditService
+from app.workers.archivus_summary_worker import RETRY, SUMMARIZED, UNCHANGED, ArchivusSummaryWorker
+
+
+def test_content_hash_covers_summarized_text_only():
+    """Test: The hash changes with the summarized prefix and ignores text past it"""
+    body = "x" * SUMMARY_BODY_CHARS
+    assert thread_content_hash(body) == thread_content_hash(body)
+    assert thread_content_hash(body) == thread_content_hash(body + "later reply")
+    assert thread_content_hash("Hi, June 14th?") != thread_content_hash("Hi, June 15th?")
+
+
+def test_key_points_keep_lookup_fields():
+    """Test: Only populated profile lookup fields become key points"""
+    context = {"client_id": "c-1", "venue_name": "", "event_type": "wedding", "client_context": {"a": 1}}
+    assert extract_key_points(context) == {"client_id": "c-1", "event_type": "wedding"}
+    assert extract_key_points(None) == {}
+
+
+def _job(thread_id: str, content_hash: str) -> dict:
+    return {
+        "tenant_id": "t-1",
+        "gmail_thread_id": thread_id,
+        "content_hash": content_hash,
+        "raw_email_body": f"body of {thread_id}",
+        "structured_context": None,
+        "version": 3,
+        "attempts": 1,
+        "trace_id": None,
+    }
+
+
+def test_batch_summarizes_only_changed_threads():
+    """Test: Unchanged hashes skip the LLM; failed summaries are retried"""
+    worker = ArchivusSummaryWorker(batch_size=10, concurrency=2)
+    jobs = [_job("same", "h1"), _job("new", "h2"), _job("broken", "h3")]
+    summarized = []
+    applied = []
+
+    def summarize(job):
+        summarized.append(job["gmail_thread_id"])
+        return None if job["gmail_thread_id"] == "broken" else "Summary"
+
+    worker._claim_batch = lambda batch_size: jobs
+    worker._stored_hashes = lambda claimed: {("t-1", "same", "h1"), ("t-1", "new", "old-hash")}
+    worker._summarize = summarize
+    worker._apply_outcomes = applied.extend
+    try:
+        assert worker.process_batch() == 3
+    finally:
+        worker._executor.shutdown(wait=True)
+
+    assert sorted(summarized) == ["broken", "new"]
+    assert [(job["gmail_thread_id"], outcome, summary) for job, outcome, summary in applied] == [
+        ("same", UNCHANGED, None),
+        ("new", SUMMARIZED, "Summary"),
+        ("broken", RETRY, None),
+    ]
+
+
+class SignatureCheckedAudit:
+    """Audit stub that rejects arguments AuditService.log_event does not accept"""
+
+    def __init__(self):
+        self.actions = []
+
+    def log_event(self, **kwargs):
+        inspect.signature(AuditService.log_event).bind(None, **kwargs)
+        self.actions.append(kwargs["action"])
+
+
+class SummaryCursor:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.connection = self
+
+    def execute(self, query, params):
+        if self.fail:
+            raise RuntimeError("db down")
+
+    def commit(self):
+        pass
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_synchronous_summary_returns_and_audits(monkeypatch, fail):
+    """Test: record_thread_summary returns an id (or None on a DB error) and both audits succeed"""
+    cursor = SummaryCursor(fail=fail)
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield cursor
+
+    class Claude:
+        def generate_summary(self, prompt):
+            return "Wedding inquiry for June 14th"
+
+    class Index:
+        def add_thread(self, *args):
+            return True
+
+    monkeypatch.setattr(archivus_service, "get_cursor", get_cursor)
+    monkeypatch.setattr(archivus_service, "get_archivus_index", lambda: Index())
+    service = ArchivusService.__new__(ArchivusService)
+    service.tenant_id = "t-1"
+    service.audit = SignatureCheckedAudit()
+    service.claude = Claude()
+
+    result = service.record_thread_summary("thread-1", "Hi, are you free June 14th?", {"client_id": "c-1"})
+    assert (result is None) is fail
+    assert service.audit.actions == ["archivus.thread_summary.error" if fail else "archivus.thread_summary.recorded"]
@@ -0,0 +1,163 @@
+"""
+OMEGA Core v3.0 - SMS Conversation Cache and Message Buffer Tests
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import psycopg2
+import pytest
+from app.services import conversation_service
+from app.services.conversation_service import ConversationCacheListener, ConversationService, MessageWriteBuffer
+
+START = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _row(tenant_id, message_id, conversation_id, minutes, status="received", sid=None):
+    return (tenant_id, message_id, conversation_id, "+15550100", sid, "inbound", "hi", status, 0, None,
+            START + timedelta(minutes=minutes))
+
+
+def test_flush_touches_last_message_at(monkeypatch):
+    """Test: A flush inserts the messages and advances last_message_at to each conversation's newest message"""
+    statements = []
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield tenant_id
+
+    monkeypatch.setattr(conversation_service, "get_cursor", get_cursor)
+    monkeypatch.setattr(conversation_service, "execute_values",
+                        lambda cursor, sql, rows: statements.append((cursor, sql, list(rows))))
+
+    buffer = MessageWriteBuffer()
+    buffer._pending = [
+        _row("t-1", "m1", "c-1", 1),
+        _row("t-1", "m2", "c-1", 3),
+        _row("t-1", "m3", None, 4),
+        _row("t-1", "m1", "c-1", 9, status="sent"),
+        _row("t-2", "m4", "c-2", 2),
+    ]
+    assert buffer.flush() == 4
+
+    touches = {cursor: rows for cursor, sql, rows in statements if "UPDATE conversations" in sql}
+    assert touches == {
+        "t-1": [("t-1", "c-1", START + timedelta(minutes=3))],
+        "t-2": [("t-2", "c-2", START + timedelta(minutes=2))],
+    }
+
+
+@pytest.fixture
+def flaky_db(monkeypatch):
+    """Batches containing a row id in db.bad raise db.error; db.written collects the rest"""
+    db = type("FlakyDB", (), {"bad": set(), "error": None, "written": [], "audits": []})()
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield tenant_id
+
+    def execute_values(cursor, sql, rows):
+        rows = list(rows)
+        if "INSERT INTO sms_messages" in sql:
+            if db.error is not None or any(row[1] in db.bad for row in rows):
+                raise db.error or psycopg2.IntegrityError("violates foreign key constraint")
+            db.written.extend(row[1] for row in rows)
+
+    class Audit:
+        def log_event(self, **kwargs):
+            db.audits.append(kwargs)
+
+    monkeypatch.setattr(conversation_service, "get_cursor", get_cursor)
+    monkeypatch.setattr(conversation_service, "execute_values", execute_values)
+    monkeypatch.setattr(conversation_service, "get_audit_service", lambda tenant_id: Audit())
+    return db
+
+
+def test_failed_flush_keeps_rows_and_isolates_bad_ones(flaky_db):
+    """Test: A transient error requeues the batch; a bad row is retried alone, then dropped and audited"""
+    buffer = MessageWriteBuffer()
+    buffer._pending = [_row("t-1", "m1", None, 1), _row("t-1", "bad", None, 2), _row("t-1", "m3", None, 3)]
+
+    flaky_db.error = psycopg2.OperationalError("server closed the connection")
+    assert buffer.flush() == 0
+    assert [row[1] for row in buffer._pending] == ["m1", "bad", "m3"]
+    assert buffer._retry_delay > 0
+
+    # Newer rows queue behind the retried ones
+    flaky_db.error = None
+    flaky_db.bad = {"bad"}
+    buffer._pending.append(_row("t-1", "m4", None, 4))
+    assert buffer.flush() == 3
+    assert flaky_db.written == ["m1", "m3", "m4"]
+    assert [row[1] for row in buffer._pending] == ["bad"]
+
+    for _ in range(conversation_service.MESSAGE_FLUSH_MAX_ATTEMPTS - 2):
+        buffer.flush()
+    assert buffer._pending == []
+    assert [audit["resource_id"] for audit in flaky_db.audits] == ["bad"]
+    assert buffer._retry_delay == 0.0
+
+
+def test_listener_evicts_changed_conversation():
+    """Test: A change notification drops only that tenant's conversation for the phone number"""
+    cache = conversation_service._conversation_cache
+    cache.set(("t-1", "+15550100"), {"conversation_state": "initial"})
+    cache.set(("t-2", "+15550100"), {"conversation_state": "initial"})
+    try:
+        ConversationCacheListener(dsn="unused").handle_notify("t-1:+15550100")
+        assert cache.get(("t-1", "+15550100")) is None
+        assert cache.get(("t-2", "+15550100")) == {"conversation_state": "initial"}
+    finally:
+        cache.clear()
+
+
+class RecordingCursor:
+    def __init__(self, rowcount=0):
+        self.rowcount = rowcount
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((" ".join(query.split()), params))
+
+
+def test_flush_locks_outbound_sids_and_applies_parked_callbacks(monkeypatch):
+    """Test: Outbound rows are written under their status locks, then early callbacks are applied"""
+    cursor = RecordingCursor()
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield cursor
+
+    monkeypatch.setattr(conversation_service, "get_cursor", get_cursor)
+    monkeypatch.setattr(conversation_service, "execute_values",
+                        lambda cur, sql, rows: cur.statements.append((" ".join(sql.split()), list(rows))))
+
+    outbound = ("t-1", "m2", None, "+15550100", "SM2", "outbound", "reply", "sent", 1, None, START)
+    buffer = MessageWriteBuffer()
+    buffer._pending = [_row("t-1", "m1", None, 0, sid="SM1"), outbound]
+    buffer.flush()
+
+    queries = [query for query, params in cursor.statements]
+    assert queries[0].startswith("SELECT pg_advisory_xact_lock(key)")
+    assert cursor.statements[0][1] == ([conversation_service._status_lock_key("t-1", "SM2")],)
+    assert "sms_delivery_status_supersedes(EXCLUDED.delivery_status" in queries[1]
+    assert "DELETE FROM sms_status_callbacks" in queries[2]
+    assert cursor.statements[2][1] == ("t-1", ["SM2"], "t-1")
+
+
+def test_status_callback_is_parked_when_message_is_not_written_yet(monkeypatch):
+    """Test: A callback that matches no row is stored for the flush instead of being dropped"""
+    for rowcount, expected in ((1, True), (0, False)):
+        cursor = RecordingCursor(rowcount=rowcount)
+
+        @contextmanager
+        def get_cursor(tenant_id=None):
+            yield cursor
+
+        monkeypatch.setattr(conversation_service, "get_cursor", get_cursor)
+        service = ConversationService.__new__(ConversationService)
+        service.tenant_id = "t-1"
+        assert service.update_delivery_status("SM1", "delivered") is expected
+
+        queries = [query for query, params in cursor.statements]
+        assert queries[0] == "SELECT pg_advisory_xact_lock(%s)"
+        assert "sms_delivery_status_supersedes(%s, delivery_status)" in queries[1]
+        assert any("INSERT INTO sms_status_callbacks" in query for query in queries) is not expected
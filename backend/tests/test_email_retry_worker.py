@@ -0,0 +1,108 @@
+"""
+OMEGA Core v3.0 - Email Retry Worker Batch Tests
+"""
+from app.workers.email_retry_worker import COMPLETED, DEFER, EmailRetryWorker
+
+
+class FakeIdempotency:
+    """Records the batch idempotency calls for one tenant"""
+
+    def __init__(self, processed, held_elsewhere, calls):
+        self.processed = processed
+        self.held_elsewhere = held_elsewhere
+        self.calls = calls
+
+    def filter_unprocessed(self, gmail_message_ids):
+        self.calls.append(("filter", list(gmail_message_ids)))
+        return [message_id for message_id in gmail_message_ids if message_id not in self.processed]
+
+    def acquire_processor_locks(self, gmail_message_ids):
+        self.calls.append(("lock", list(gmail_message_ids)))
+        return [message_id for message_id in gmail_message_ids if message_id not in self.held_elsewhere]
+
+    def mark_processed_many(self, gmail_message_ids):
+        self.calls.append(("mark", list(gmail_message_ids)))
+        return len(gmail_message_ids)
+
+    def release_processor_locks(self, gmail_message_ids):
+        self.calls.append(("release", sorted(gmail_message_ids)))
+
+
+class FakeProcessor:
+    def __init__(self, idempotency, results):
+        self.idempotency = idempotency
+        self.results = results
+        self.ran = []
+
+    def retry_email(self, email_id, gmail_message_id, account_email, trace_id=None, idempotency_handled=False):
+        assert idempotency_handled is True
+        self.ran.append(gmail_message_id)
+        return self.results.get(gmail_message_id, {"status": "success"})
+
+
+def _item(item_id, gmail_message_id, tenant_id="t-1"):
+    return {
+        "id": item_id, "tenant_id": tenant_id, "email_id": f"e-{item_id}", "gmail_message_id": gmail_message_id,
+        "account_email": "greg@example.com", "retry_count": 0, "max_retries": 3, "trace_id": None,
+    }
+
+
+def test_batch_checks_locks_and_marks_once_per_tenant():
+    """Test: One filter, lock, mark and release per tenant; only locked, unprocessed messages run"""
+    calls = []
+    processor = FakeProcessor(
+        FakeIdempotency(processed={"done"}, held_elsewhere={"busy"}, calls=calls),
+        results={"replied": {"status": "skipped", "message": "Greg already replied"}},
+    )
+    items = [
+        _item("1", "new"), _item("2", "done"), _item("3", "busy"),
+        _item("4", "replied"), _item("5", "new"),
+    ]
+    worker = EmailRetryWorker(batch_size=10, concurrency=2)
+    worker._claim_batch = lambda batch_size: items
+    worker._get_processor = lambda tenant_id: processor
+    applied = []
+    worker._apply_outcomes = applied.extend
+    try:
+        assert worker.process_batch() == 5
+    finally:
+        worker._executor.shutdown(wait=True)
+
+    assert sorted(processor.ran) == ["new", "replied"]
+    assert calls == [
+        ("filter", ["new", "done", "busy", "replied", "new"]),
+        ("lock", ["new", "busy", "replied"]),
+        ("mark", ["new"]),
+        ("release", ["new", "replied"]),
+    ]
+    outcomes = {item["id"]: (outcome, error) for item, outcome, error in applied}
+    assert outcomes == {
+        "1": (COMPLETED, None),
+        "2": (COMPLETED, "Already processed"),
+        "3": (DEFER, "Lock already exists (idempotency)"),
+        "4": (COMPLETED, "Greg already replied"),
+        "5": (DEFER, "Lock already exists (idempotency)"),
+    }
+
+
+def test_locks_are_released_if_marking_fails():
+    """Test: Batch locks are released even if marking processed fails"""
+    calls = []
+
+    class BrokenIdempotency(FakeIdempotency):
+        def mark_processed_many(self, gmail_message_ids):
+            raise RuntimeError("db down")
+
+    processor = FakeProcessor(BrokenIdempotency(processed=set(), held_elsewhere=set(), calls=calls), results={})
+    worker = EmailRetryWorker(batch_size=10, concurrency=1)
+    worker._claim_batch = lambda batch_size: [_item("1", "m1")]
+    worker._get_processor = lambda tenant_id: processor
+    worker._apply_outcomes = lambda outcomes: None
+    try:
+        try:
+            worker.process_batch()
+        except RuntimeError:
+            pass
+    finally:
+        worker._executor.shutdown(wait=True)
+    assert calls[-1] == ("release", ["m1"])
@@ -0,0 +1,61 @@
+"""
+OMEGA Core v3.0 - Fingerprint Filter Tests
+"""
+import hashlib
+import pytest
+from app.utils import fingerprint_filter
+from app.utils.fingerprint_filter import BloomFilter, RotatingBloomFilter
+
+
+def _fingerprint(i: int) -> str:
+    return hashlib.sha256(f"message-{i}".encode()).hexdigest()
+
+
+def test_added_keys_are_always_found():
+    """Test: Bloom filter has no false negatives"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [_fingerprint(i) for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_false_positive_rate_within_bound():
+    """Test: False positive rate stays near the configured error rate"""
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    for i in range(2000):
+        bloom.add(_fingerprint(i))
+    false_positives = sum(_fingerprint(i) in bloom for i in range(2000, 12000))
+    assert false_positives / 10000 < 0.03
+
+
+def test_rotation_expires_old_generation(monkeypatch):
+    """Test: Keys fall out once the window rotates past them"""
+    clock = [1000.0]
+    monkeypatch.setattr(fingerprint_filter.time, "monotonic", lambda: clock[0])
+    rotating = RotatingBloomFilter(capacity=100, rotation_seconds=60, generations=2)
+
+    rotating.add("old")
+    clock[0] += 60
+    rotating.add("newer")  # rotates: "old" is now in the previous generation
+    assert rotating.might_contain("old")
+    assert rotating.might_contain("newer")
+
+    clock[0] += 60
+    assert not rotating.might_contain("old")  # its generation was dropped
+    assert rotating.might_contain("newer")
+
+
+def test_rotation_on_capacity():
+    """Test: A full generation rotates even inside the time window"""
+    rotating = RotatingBloomFilter(capacity=10, rotation_seconds=3600, generations=3)
+    rotating.add_many(_fingerprint(i) for i in range(25))
+    stats = rotating.stats()
+    assert stats["rotations"] == 2
+    assert len(stats["generations"]) == 3
+
+
+def test_requires_two_generations():
+    """Test: Single-generation filters are rejected"""
+    with pytest.raises(ValueError):
+        RotatingBloomFilter(generations=1)
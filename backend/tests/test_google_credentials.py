@@ -0,0 +1,104 @@
+"""
+OMEGA Core v3.0 - Google Credential Manager Tests
+"""
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.services import google_credentials
+from app.services.google_credentials import GMAIL_SCOPES, GoogleCredentialManager
+
+
+class FakeCredentials:
+    """Delegated credentials whose refresh() issues a token lasting lifetime (naive UTC expiry)"""
+
+    def __init__(self, subject, lifetime=timedelta(hours=1)):
+        self.subject = subject
+        self.lifetime = lifetime
+        self.token = None
+        self.expiry = None
+        self.refreshes = 0
+        self.fail = False
+
+    @property
+    def valid(self):
+        return bool(self.token) and self.expiry > datetime.utcnow()
+
+    def refresh(self, request):
+        if self.fail:
+            raise RuntimeError("invalid_grant")
+        self.refreshes += 1
+        self.token = f"token-{self.refreshes}"
+        self.expiry = datetime.utcnow() + self.lifetime
+
+
+class FakeServiceAccount:
+    def __init__(self, scopes):
+        self.scopes = scopes
+
+    def with_subject(self, subject):
+        return FakeCredentials(subject)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(
+        google_credentials.service_account.Credentials,
+        "from_service_account_file",
+        lambda path, scopes: FakeServiceAccount(scopes),
+    )
+    monkeypatch.setattr(google_credentials, "GoogleAuthRequest", lambda: None)
+    manager = GoogleCredentialManager("unused.json", refresh_margin_seconds=300, check_interval_seconds=3600)
+    yield manager
+    manager.stop()
+
+
+def test_refreshes_before_expiry(manager):
+    """Test: Tokens inside the refresh margin are refreshed ahead of time; others are left alone"""
+    expiring = manager.get_credentials("greg@example.com", GMAIL_SCOPES)
+    fresh = manager.get_credentials("ops@example.com", GMAIL_SCOPES)
+    assert expiring.refreshes == fresh.refreshes == 1
+
+    # Still valid, but within the 5 minute margin
+    expiring.expiry = datetime.utcnow() + timedelta(seconds=120)
+    assert expiring.valid
+    assert manager.refresh_due() == 1
+    assert expiring.refreshes == 2 and fresh.refreshes == 1
+    assert manager.get_stats()["refresh_count"] == 3
+
+
+def test_failed_background_refresh_falls_back_to_on_demand(manager):
+    """Test: A failed proactive refresh is recorded, and the next caller refreshes the expired token itself"""
+    credentials = manager.get_credentials("greg@example.com", GMAIL_SCOPES)
+    credentials.expiry = datetime.utcnow() + timedelta(seconds=60)
+    credentials.fail = True
+    assert manager.refresh_due() == 0
+    stats = manager.get_stats()
+    assert stats["refresh_failures"] == 1
+    assert stats["last_error_subject"] == "greg@example.com"
+
+    # The token lapses before the next sweep; the caller pays the round-trip
+    credentials.expiry = datetime.utcnow() - timedelta(seconds=1)
+    credentials.fail = False
+    assert manager.get_credentials("greg@example.com", GMAIL_SCOPES) is credentials
+    assert credentials.valid and credentials.refreshes == 2
+
+
+def test_refresher_thread_starts_once(manager):
+    """Test: Concurrent first calls share one credentials object and one refresher thread"""
+    results = []
+    barrier = threading.Barrier(8)
+
+    def call():
+        barrier.wait()
+        results.append(manager.get_credentials("greg@example.com", list(reversed(GMAIL_SCOPES))))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(credentials is results[0] for credentials in results)
+    assert results[0].refreshes == 1
+    refreshers = [thread for thread in threading.enumerate() if thread.name == "google-credential-refresher"]
+    assert refreshers == [manager._refresher]
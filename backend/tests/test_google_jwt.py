@@ -0,0 +1,19 @@
+"""
+OMEGA Core v3.0 - Google JWT Verifier Tests
+"""
+from app.services.google_jwt import GoogleJWTVerifier
+
+
+def test_refresh_delay_has_a_floor():
+    """Test: Short or zero max-age does not make the refresher fetch in a tight loop"""
+    verifier = GoogleJWTVerifier(refresh_ahead_seconds=600, min_refetch_interval_seconds=30)
+
+    verifier.load_jwks({"keys": []}, max_age_seconds=21600)
+    assert 20990 <= verifier._next_refresh_delay() <= 21000
+
+    verifier.load_jwks({"keys": []}, max_age_seconds=300)
+    assert 140 <= verifier._next_refresh_delay() <= 150
+
+    for max_age in (0, 10):
+        verifier.load_jwks({"keys": []}, max_age_seconds=max_age)
+        assert verifier._next_refresh_delay() == 30
@@ -0,0 +1,126 @@
+"""
+OMEGA Core v3.0 - Idempotency Service Batch Tests
+"""
+from contextlib import contextmanager
+import pytest
+from app.services import idempotency_service
+from app.services.idempotency_service import PROCESSOR_LOCK_NAMESPACE, IdempotencyService
+
+
+class FakeProcessedMessages:
+    """processed_messages rows (gmail_message_id is unique across tenants)"""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+        self._result = []
+
+    def execute(self, query, params):
+        self.queries.append(query)
+        assert "= ANY(%s)" in query
+        tenant_id, message_ids = params
+        assert isinstance(message_ids, list)
+        self._result = [
+            {"gmail_message_id": message_id} for message_id in message_ids
+            if self.rows.get(message_id) == tenant_id
+        ]
+
+    def fetchall(self):
+        return self._result
+
+
+class Audit:
+    def __init__(self):
+        self.events = []
+
+    def log_event(self, **kwargs):
+        self.events.append(kwargs)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeProcessedMessages()
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield fake
+
+    def execute_values(cur, query, rows, fetch=False):
+        cur.queries.append(query)
+        assert "VALUES %s" in query and "ON CONFLICT (gmail_message_id) DO NOTHING" in query
+        inserted = []
+        for _, tenant_id, message_id, _, _ in rows:
+            if message_id not in cur.rows:
+                cur.rows[message_id] = tenant_id
+                inserted.append((message_id,))
+        return inserted
+
+    monkeypatch.setattr(idempotency_service, "get_cursor", get_cursor)
+    monkeypatch.setattr(idempotency_service, "execute_values", execute_values)
+    monkeypatch.setattr(idempotency_service, "get_audit_service", lambda tenant_id: Audit())
+    idempotency_service._recently_processed.clear()
+    yield fake
+    idempotency_service._recently_processed.clear()
+
+
+def test_processed_ids_is_one_query_per_batch(db):
+    """Test: A batch is checked with one = ANY query, scoped to the tenant"""
+    db.rows = {"m1": "t-1", "m3": "t-1", "m4": "t-2"}
+    service = IdempotencyService("t-1")
+    assert service.processed_ids(["m1", "m2", "m3", "m4", "m1"]) == {"m1", "m3"}
+    assert service.filter_unprocessed(["m4", "m1", "m2"]) == ["m4", "m2"]
+    assert len(db.queries) == 2
+
+
+def test_recent_cache_skips_the_database(db):
+    """Test: Processed answers are cached; a batch of known ids makes no query"""
+    db.rows = {"m1": "t-1", "m2": "t-1"}
+    service = IdempotencyService("t-1")
+    assert service.processed_ids(["m1", "m2", "m3"]) == {"m1", "m2"}
+    assert service.processed_ids(["m1", "m2"]) == {"m1", "m2"}
+    assert service.is_processed("m1") is True
+    assert len(db.queries) == 1
+
+    # Unprocessed ids are not cached, and other tenants do not share entries
+    assert service.processed_ids(["m1", "m3"]) == {"m1"}
+    assert IdempotencyService("t-2").processed_ids(["m1"]) == set()
+    assert len(db.queries) == 3
+
+
+def test_mark_processed_many_is_one_insert(db):
+    """Test: One multi-row insert; duplicates and already-marked ids are not counted"""
+    db.rows = {"m1": "t-1"}
+    service = IdempotencyService("t-1")
+    assert service.mark_processed_many(["m1", "m2", "m3", "m2"]) == 2
+    assert db.rows == {"m1": "t-1", "m2": "t-1", "m3": "t-1"}
+    assert len(db.queries) == 1
+    assert service.audit.events[0]["metadata"] == {"requested": 3, "inserted": 2}
+
+    # Marked ids are answered from the cache
+    assert service.processed_ids(["m2", "m3"]) == {"m2", "m3"}
+    assert len(db.queries) == 1
+    assert service.mark_processed_many([]) == 0
+
+
+def test_processor_locks_batch(monkeypatch):
+    """Test: Locks are taken and released through the lock manager's batch calls"""
+    calls = []
+
+    class LockManager:
+        def try_acquire_many(self, namespace, resources, tenant_id):
+            calls.append(("acquire", namespace, list(resources), tenant_id))
+            return [resource for resource in resources if resource != "busy"]
+
+        def release_many(self, namespace, resources, tenant_id):
+            calls.append(("release", namespace, list(resources), tenant_id))
+            raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(idempotency_service, "get_lock_manager", lambda: LockManager())
+    monkeypatch.setattr(idempotency_service, "get_audit_service", lambda tenant_id: Audit())
+    service = IdempotencyService("t-1")
+    assert service.acquire_processor_locks(["m1", "busy", "m2"]) == ["m1", "m2"]
+    service.release_processor_locks(["m1", "m2"])
+    assert calls == [
+        ("acquire", PROCESSOR_LOCK_NAMESPACE, ["m1", "busy", "m2"], "t-1"),
+        ("release", PROCESSOR_LOCK_NAMESPACE, ["m1", "m2"], "t-1"),
+    ]
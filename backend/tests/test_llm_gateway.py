@@ -0,0 +1,126 @@
+"""
+OMEGA Core v3.0 - LLM Gateway Tests
+Routing, hedging and failover against local stub providers
+"""
+import threading
+import time
+import pytest
+from app.services.llm_gateway import LatencyTracker, LLMGateway, LLMGatewayError, LLMProvider, LLMResult
+
+
+class StubProvider(LLMProvider):
+    """Answers after a fixed delay, or raises"""
+
+    vendor = "stub"
+
+    def __init__(self, model: str, delay: float = 0.0, error: bool = False):
+        super().__init__(model)
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, system, messages, max_tokens):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(f"{self.model} unavailable")
+        return LLMResult(text=f"from {self.model}", provider=self.name, model=self.model, output_tokens=3)
+
+
+def _gateway(*providers, **kwargs) -> LLMGateway:
+    kwargs.setdefault("default_hedge_delay", 0.2)
+    return LLMGateway({"draft": list(providers)}, **kwargs)
+
+
+def _complete(gateway: LLMGateway) -> LLMResult:
+    return gateway.complete("draft", "system", [{"role": "user", "content": "hi"}], max_tokens=10)
+
+
+def test_primary_answers_without_hedging():
+    """Test: A fast primary is the only provider called"""
+    primary, backup = StubProvider("primary"), StubProvider("backup")
+    gateway = _gateway(primary, backup)
+    try:
+        result = _complete(gateway)
+        assert result.text == "from primary" and not result.fallback
+        assert backup.calls == 0
+        assert gateway.get_stats()["hedges"] == 0
+    finally:
+        gateway.shutdown()
+
+
+def test_slow_primary_is_hedged():
+    """Test: Past the hedge delay the backup is fired and its answer wins"""
+    primary, backup = StubProvider("primary", delay=1.0), StubProvider("backup")
+    gateway = _gateway(primary, backup)
+    try:
+        started = time.perf_counter()
+        result = _complete(gateway)
+        assert time.perf_counter() - started < 0.8
+        assert result.text == "from backup" and result.fallback
+        stats = gateway.get_stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    finally:
+        gateway.shutdown()
+
+
+def test_hedge_delay_follows_observed_percentile():
+    """Test: Once enough samples exist the hedge waits for the provider's percentile"""
+    primary = StubProvider("primary", delay=0.01)
+    gateway = _gateway(primary, StubProvider("backup"), min_samples=5, hedge_percentile=0.9, default_hedge_delay=9.0)
+    try:
+        assert gateway.hedge_delay(primary) == 9.0
+        for _ in range(5):
+            _complete(gateway)
+        assert 0.01 <= gateway.hedge_delay(primary) < 0.5
+    finally:
+        gateway.shutdown()
+
+
+def test_error_fails_over_immediately():
+    """Test: A failing primary hands over without waiting for the hedge delay"""
+    primary, backup = StubProvider("primary", error=True), StubProvider("backup")
+    gateway = _gateway(primary, backup, default_hedge_delay=5.0)
+    try:
+        started = time.perf_counter()
+        result = _complete(gateway)
+        assert time.perf_counter() - started < 1.0
+        assert result.text == "from backup"
+        stats = gateway.get_stats()
+        assert stats["failovers"] == 1
+        assert stats["providers"]["stub:primary"]["errors"] == 1
+    finally:
+        gateway.shutdown()
+
+
+def test_all_providers_failing_raises():
+    """Test: LLMGatewayError names every failed provider"""
+    gateway = _gateway(StubProvider("a", error=True), StubProvider("b", error=True))
+    try:
+        with pytest.raises(LLMGatewayError) as excinfo:
+            _complete(gateway)
+        assert "stub:a" in str(excinfo.value) and "stub:b" in str(excinfo.value)
+    finally:
+        gateway.shutdown()
+
+
+def test_latency_tracker_percentiles():
+    """Test: p50/p99 over the rolling window"""
+    tracker = LatencyTracker(window=100)
+    assert tracker.quantile(0.5) is None
+    for ms in range(1, 101):
+        tracker.record(ms / 1000)
+    assert tracker.quantile(0.50) == pytest.approx(0.051)
+    assert tracker.quantile(0.99) == pytest.approx(0.100)
+
+
+def test_provider_must_implement_complete():
+    """Test: LLMProvider is abstract; a subclass without complete() cannot be built"""
+    class Incomplete(LLMProvider):
+        vendor = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete("m")
+    assert StubProvider("m").name == "stub:m"
@@ -0,0 +1,35 @@
+"""
+OMEGA Core v3.0 - LLM Pricing Tests
+"""
+import pytest
+from app.utils.llm_pricing import cache_hit_ratio, estimate_cost_usd, get_model_prices
+
+
+def test_dated_model_ids_resolve_to_family():
+    """Test: Longest matching prefix wins"""
+    assert get_model_prices("claude-sonnet-4-20250514") == (3.00, 15.00)
+    assert get_model_prices("claude-3-5-haiku-20241022") == (0.80, 4.00)
+    assert get_model_prices("gpt-4o") is None
+
+
+def test_cost_includes_cache_reads_and_writes():
+    """Test: Cache writes cost 1.25x input, cache reads 0.1x input"""
+    cost = estimate_cost_usd(
+        "claude-sonnet-4-20250514",
+        input_tokens=1_000_000,
+        output_tokens=100_000,
+        cache_read_tokens=1_000_000,
+        cache_write_tokens=1_000_000,
+    )
+    assert cost == pytest.approx(3.00 + 1.50 + 3.75 + 0.30)
+
+
+def test_unknown_model_has_no_cost():
+    """Test: Unknown models are not priced"""
+    assert estimate_cost_usd("mystery-model", 100, 100) is None
+
+
+def test_cache_hit_ratio():
+    """Test: Ratio of prompt tokens read from cache"""
+    assert cache_hit_ratio(250, 750) == pytest.approx(0.75)
+    assert cache_hit_ratio(0, 0) is None
@@ -0,0 +1,43 @@
+"""
+OMEGA Core v3.0 - Advisory Lock Key Tests
+"""
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from app.utils.lock_keys import advisory_lock_key
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def test_key_fits_signed_bigint():
+    """Test: Keys are valid PostgreSQL bigint values"""
+    for i in range(1000):
+        key = advisory_lock_key("email_processor", f"msg-{i}", "tenant-a")
+        assert -(2 ** 63) <= key < 2 ** 63
+
+
+def test_key_is_stable_across_processes():
+    """Test: Keys do not depend on per-process hash salting"""
+    code = (
+        "from app.utils.lock_keys import advisory_lock_key;"
+        "print(advisory_lock_key('email_processor', '18c2f0a9b', 'tenant-a'))"
+    )
+    outputs = {
+        subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=BACKEND_DIR).stdout.strip()
+        for _ in range(3)
+    }
+    assert outputs == {str(advisory_lock_key("email_processor", "18c2f0a9b", "tenant-a"))}
+
+
+def test_key_is_namespaced_by_tenant_and_namespace():
+    """Test: Same message ID maps to different keys per tenant and namespace"""
+    base = advisory_lock_key("email_processor", "msg-1", "tenant-a")
+    assert advisory_lock_key("email_processor", "msg-1", "tenant-b") != base
+    assert advisory_lock_key("gmail_webhook", "msg-1", "tenant-a") != base
+
+
+def test_no_collisions_in_sample():
+    """Test: No collisions across a large sample of message IDs"""
+    keys = {advisory_lock_key("email_processor", f"msg-{i}", "tenant-a") for i in range(50000)}
+    assert len(keys) == 50000
@@ -0,0 +1,107 @@
+"""
+OMEGA Core v3.0 - In-Process Metrics Tests
+"""
+import pytest
+from app.utils.metrics import Histogram, MetricsRegistry, Timeline
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test: Observations land in the first bucket whose bound is >= the value"""
+    hist = Histogram("stage_seconds", "Stage time", labelnames=("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        hist.observe(value, stage="claude")
+
+    series = hist.snapshot()[("claude",)]
+    assert series["buckets"] == [2, 3, 4]
+    assert series["count"] == 4
+    assert series["sum"] == pytest.approx(2.65)
+
+
+def test_histogram_rejects_wrong_labels():
+    """Test: Label names must match the histogram's labelnames"""
+    hist = Histogram("stage_seconds", "Stage time", labelnames=("stage",))
+    with pytest.raises(ValueError):
+        hist.observe(1.0, status="ok")
+
+
+def test_quantile_estimate():
+    """Test: Quantile returns the upper bound of the bucket holding the rank"""
+    hist = Histogram("t", "t", buckets=(0.1, 1.0, 10.0))
+    for _ in range(9):
+        hist.observe(0.05)
+    hist.observe(5.0)
+    assert hist.quantile(0.5) == 0.1
+    assert hist.quantile(0.99) == 10.0
+
+
+def test_registry_renders_prometheus_text():
+    """Test: Registry output follows the Prometheus text exposition format"""
+    registry = MetricsRegistry()
+    hist = registry.histogram("email_pipeline_stage_seconds", "Stage time", labelnames=("stage",), buckets=(0.5,))
+    hist.observe(0.25, stage='say "hi"')
+
+    text = registry.render()
+    assert "# TYPE email_pipeline_stage_seconds histogram" in text
+    assert 'email_pipeline_stage_seconds_bucket{stage="say \\"hi\\"",le="0.5"} 1' in text
+    assert 'email_pipeline_stage_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 1' in text
+    assert 'email_pipeline_stage_seconds_count{stage="say \\"hi\\""} 1' in text
+    assert registry.histogram("email_pipeline_stage_seconds", "Stage time", labelnames=("stage",)) is hist
+
+
+def test_timeline_records_spans_and_errors():
+    """Test: Spans are recorded in order, including ones that raise"""
+    hist = Histogram("stage_seconds", "Stage time", labelnames=("stage",))
+    timeline = Timeline(hist, trace_id="trace-1")
+
+    with timeline.span("fetch_email"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timeline.span("claude"):
+            raise RuntimeError("boom")
+
+    stages = [(span["stage"], span["error"]) for span in timeline.spans]
+    assert stages == [("fetch_email", None), ("claude", "RuntimeError")]
+    assert set(hist.snapshot()) == {("fetch_email",), ("claude",)}
+    assert timeline.to_dict()["trace_id"] == "trace-1"
+
+
+def test_counter_and_gauge_render():
+    """Test: Counters only go up; gauges are rendered with their labels"""
+    registry = MetricsRegistry()
+    counter = registry.counter("db_transactions_total", "Transactions", labelnames=("outcome",))
+    counter.inc(outcome="commit")
+    counter.inc(2, outcome="commit")
+    with pytest.raises(ValueError):
+        counter.inc(-1, outcome="commit")
+    gauge = registry.gauge("queue_depth", "Depth")
+    gauge.set(5)
+    gauge.dec()
+
+    text = registry.render()
+    assert "# TYPE db_transactions_total counter" in text
+    assert 'db_transactions_total{outcome="commit"} 3' in text
+    assert "queue_depth 4" in text
+
+
+def test_stats_collector_exports_numeric_values():
+    """Test: get_stats() dicts are exported at scrape time; non-numeric values are skipped"""
+    registry = MetricsRegistry()
+    stats = {"queued": 3, "in_flight": 1, "healthy": True, "workers": "n/a", "avg_ms": None}
+    registry.register_stats("sms_queue", lambda: stats, "Outbound SMS queue")
+
+    text = registry.render()
+    assert "sms_queue_queued 3" in text
+    assert "sms_queue_healthy 1" in text
+    assert "sms_queue_workers" not in text
+    assert "sms_queue_avg_ms" not in text
+
+    stats["queued"] = 7
+    assert "sms_queue_queued 7" in registry.render()
+
+
+def test_failing_stats_collector_does_not_break_scrape():
+    """Test: A collector that raises is skipped"""
+    registry = MetricsRegistry()
+    registry.register_stats("broken", lambda: 1 / 0, "Broken")
+    registry.counter("ok_total", "Ok").inc()
+    assert "ok_total 1" in registry.render()
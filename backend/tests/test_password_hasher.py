@@ -0,0 +1,57 @@
+"""
+OMEGA Core v3.0 - Password Hasher Pool Tests
+"""
+import asyncio
+import threading
+import pytest
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+from app.utils.password_policy import make_crypt_context
+
+PASSWORD = "Correct-Horse-Battery-9"
+
+
+@pytest.mark.asyncio
+async def test_verify_on_pool():
+    """Test: Correct and wrong passwords verify off the event loop"""
+    hasher = PasswordHasher(max_workers=1, bcrypt_rounds=4)
+    try:
+        stored = await hasher.hash(PASSWORD)
+        assert await hasher.verify_and_update(PASSWORD, stored) == (True, None)
+        assert await hasher.verify_and_update("wrong-password", stored) == (False, None)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rehash_when_cost_changes():
+    """Test: A hash made with a different cost is replaced on successful login"""
+    stored = make_crypt_context(4).hash(PASSWORD)
+    hasher = PasswordHasher(max_workers=1, bcrypt_rounds=5)
+    try:
+        valid, new_hash = await hasher.verify_and_update(PASSWORD, stored)
+        assert valid
+        assert new_hash is not None and new_hash.startswith("$2b$05$")
+        assert await hasher.verify_and_update(PASSWORD, new_hash) == (True, None)
+        assert hasher.get_stats()["rehashed"] == 1
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_full():
+    """Test: Operations beyond max_pending fail fast instead of queueing"""
+    hasher = PasswordHasher(max_workers=1, max_pending=1, bcrypt_rounds=4)
+    release = threading.Event()
+    hasher.policy.get_password_hash = lambda password: release.wait(5) and "hash"
+    try:
+        first = asyncio.ensure_future(hasher.hash(PASSWORD))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash(PASSWORD)
+        release.set()
+        assert await first == "hash"
+        assert hasher.get_stats()["rejected"] == 1
+        assert hasher.get_stats()["pending"] == 0
+    finally:
+        release.set()
+        hasher.shutdown()
@@ -0,0 +1,47 @@
+"""
+OMEGA Core v3.0 - Rate Limiter Endpoint Decorator Tests
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException, Request
+from app.services.rate_limiter import RateLimiter
+
+
+def _request(host, tenant_id="default-tenant", user_id=None):
+    return SimpleNamespace(state=SimpleNamespace(tenant_id=tenant_id, user_id=user_id), client=SimpleNamespace(host=host))
+
+
+@pytest.fixture
+def webhook(tmp_path):
+    limiter = RateLimiter(path=str(tmp_path / "rate-limits"), slots=64)
+
+    @limiter.limit("2/minute")
+    async def endpoint(request: Request):
+        return "ok"
+
+    def call(request):
+        return asyncio.run(endpoint(request=request))
+
+    yield call
+    limiter.stop()
+
+
+def test_anonymous_clients_do_not_share_a_bucket(webhook):
+    """Test: Requests without a user are limited per client address, not per default tenant"""
+    flooder = _request("203.0.113.9")
+    assert webhook(flooder) == webhook(flooder) == "ok"
+    with pytest.raises(HTTPException) as rejected:
+        webhook(flooder)
+    assert rejected.value.status_code == 429
+
+    assert webhook(_request("66.102.0.1")) == "ok"
+
+
+def test_authenticated_requests_share_their_tenant_bucket(webhook):
+    """Test: A signed-in tenant's users draw from one bucket whatever their address"""
+    assert webhook(_request("198.51.100.1", tenant_id="t-1", user_id="u-1")) == "ok"
+    assert webhook(_request("198.51.100.2", tenant_id="t-1", user_id="u-2")) == "ok"
+    with pytest.raises(HTTPException):
+        webhook(_request("198.51.100.3", tenant_id="t-1", user_id="u-3"))
+    assert webhook(_request("198.51.100.3", tenant_id="t-2", user_id="u-4")) == "ok"
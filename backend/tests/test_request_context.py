@@ -0,0 +1,58 @@
+"""
+OMEGA Core v3.0 - Request Context Middleware Tests
+"""
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.middleware.request_context import RequestContextMiddleware
+
+
+async def _state(request: Request):
+    return JSONResponse({
+        "trace_id": request.state.trace_id,
+        "tenant_id": request.state.tenant_id,
+        "user_id": request.state.user_id,
+    })
+
+
+async def _own_csp(request: Request):
+    return PlainTextResponse("ok", headers={"Content-Security-Policy": "default-src *"})
+
+
+async def _stream(request: Request):
+    async def chunks():
+        yield b"a"
+        yield b"b"
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def _client() -> TestClient:
+    app = Starlette(routes=[Route("/state", _state), Route("/csp", _own_csp), Route("/stream", _stream)])
+    app.add_middleware(RequestContextMiddleware)
+    return TestClient(app)
+
+
+def test_sets_state_and_trace_header():
+    """Test: Trace ID and tenant context reach the endpoint; trace ID is echoed"""
+    response = _client().get("/state")
+    body = response.json()
+    assert body["trace_id"] == response.headers["x-trace-id"]
+    assert body["tenant_id"]
+    assert body["user_id"] is None
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_security_headers_replace_app_values():
+    """Test: Security headers win over values set by the endpoint (no duplicates)"""
+    response = _client().get("/csp")
+    assert response.headers.get_list("content-security-policy") == ["default-src 'self'"]
+
+
+def test_streaming_responses_pass_through():
+    """Test: Streaming bodies are forwarded with headers applied"""
+    response = _client().get("/stream")
+    assert response.text == "ab"
+    assert "x-trace-id" in response.headers
@@ -0,0 +1,35 @@
+"""
+OMEGA Core v3.0 - Outbound SMS Queue Tests
+"""
+import heapq
+import time
+from app.services import sms_queue
+from app.services.rate_limiter import RateLimiter
+from app.services.sms_queue import OutboundSMS, SMSQueue
+
+
+def _queue_with_job(from_number):
+    queue = SMSQueue(workers=1, messages_per_second=20.0)
+    queue._running = True
+    job = OutboundSMS(message_id="m-1", tenant_id="t-1", to="+15550100", body="hi", from_number=from_number)
+    heapq.heappush(queue._heap, (time.monotonic(), next(queue._seq), job))
+    return queue
+
+
+def test_per_number_limit_is_shared_between_queues(monkeypatch, tmp_path):
+    """Test: Queues in different processes draw from one bucket per sending number"""
+    limiter = RateLimiter(path=str(tmp_path / "rate-limits"), slots=64)
+    monkeypatch.setattr(sms_queue, "get_rate_limiter", lambda: limiter)
+    try:
+        first, second, other = _queue_with_job("+15550001"), _queue_with_job("+15550001"), _queue_with_job("+15550002")
+        assert first._next_job().message_id == "m-1"
+        assert other._next_job().message_id == "m-1"
+        assert other.get_stats()["rate_limited_waits"] == 0
+
+        # Same number: the second queue waits for the shared bucket to refill
+        started = time.monotonic()
+        assert second._next_job().message_id == "m-1"
+        assert time.monotonic() - started >= 0.03
+        assert second.get_stats()["rate_limited_waits"] == 1
+    finally:
+        limiter.stop()
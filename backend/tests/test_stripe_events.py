@@ -0,0 +1,213 @@
+"""
+OMEGA Core v3.0 - Stripe Event Store and Processor Tests
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import stripe_event_processor, stripe_service
+from app.services.stripe_event_processor import (
+    MAX_ATTEMPTS,
+    RETRY_BASE_SECONDS,
+    RETRY_MAX_SECONDS,
+    StripeEventProcessor,
+    retry_delay_seconds,
+)
+from app.services.stripe_service import StripeService
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(event_id, booking_id="b-1", event_type="payment_intent.succeeded"):
+    return {
+        "id": event_id,
+        "type": event_type,
+        "created": int(NOW.timestamp()),
+        "data": {"object": {"id": f"pi_{event_id}", "metadata": {"booking_id": booking_id}}},
+    }
+
+
+class FakeEventStore:
+    """stripe_events rows; the claim query is evaluated with the row lock semantics of SKIP LOCKED"""
+
+    def __init__(self):
+        self.rows = {}
+        self._result = []
+
+    def add(self, event_id, status, received_minutes_ago, attempts=1, claimed_minutes_ago=None, next_attempt_in_minutes=None):
+        self.rows[event_id] = {
+            "event_id": event_id,
+            "payload": _event(event_id),
+            "tenant_id": "t-1",
+            "status": status,
+            "attempts": attempts,
+            "received_at": NOW - timedelta(minutes=received_minutes_ago),
+            "claimed_at": None if claimed_minutes_ago is None else NOW - timedelta(minutes=claimed_minutes_ago),
+            "next_attempt_at": None if next_attempt_in_minutes is None else NOW + timedelta(minutes=next_attempt_in_minutes),
+        }
+
+    def execute(self, query, params):
+        if "INSERT INTO stripe_events" in query:
+            assert "'processing', 1, NOW()" in query
+            event_id = params[0]
+            if event_id in self.rows:
+                self._result = []
+            else:
+                self.rows[event_id] = {"event_id": event_id, "status": "processing", "attempts": 1}
+                self._result = [{"event_id": event_id}]
+            return
+        assert "FOR UPDATE SKIP LOCKED" in query
+        age, stale, limit = params
+        due = sorted(
+            (row for row in self.rows.values() if (
+                (row["status"] == "pending" and row["received_at"] < NOW - timedelta(seconds=age))
+                or (row["status"] == "processing" and row["claimed_at"] < NOW - timedelta(seconds=stale))
+                or (row["status"] == "failed" and row["next_attempt_at"] is not None and row["next_attempt_at"] <= NOW)
+            )),
+            key=lambda row: row["received_at"],
+        )[:limit]
+        for row in due:
+            row.update(status="processing", claimed_at=NOW, attempts=row["attempts"] + 1)
+        # Postgres does not promise RETURNING order
+        self._result = [dict(row) for row in reversed(due)]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeEventStore()
+
+    @contextmanager
+    def get_cursor(tenant_id=None):
+        yield fake
+
+    monkeypatch.setattr(stripe_event_processor, "get_cursor", get_cursor)
+    monkeypatch.setattr(stripe_service, "get_cursor", get_cursor)
+    return fake
+
+
+def test_store_event_deduplicates_redeliveries(store):
+    """Test: The first delivery is stored claimed; a redelivery of the same id is a duplicate"""
+    service = StripeService.__new__(StripeService)
+    assert service.store_event(_event("evt_1"), "t-1") is True
+    assert service.store_event(_event("evt_1"), "t-1") is False
+    assert store.rows["evt_1"]["status"] == "processing"
+
+
+def test_recovery_claims_each_event_once(store):
+    """Test: Orphaned, stale and due-for-retry events are claimed once across processes, oldest first"""
+    store.add("orphaned", "pending", received_minutes_ago=30, attempts=0)
+    store.add("fresh", "pending", received_minutes_ago=0, attempts=0)
+    store.add("stale", "processing", received_minutes_ago=20, claimed_minutes_ago=10)
+    store.add("in_flight", "processing", received_minutes_ago=20, claimed_minutes_ago=1)
+    store.add("retry_due", "failed", received_minutes_ago=10, attempts=2, next_attempt_in_minutes=-1)
+    store.add("retry_later", "failed", received_minutes_ago=9, next_attempt_in_minutes=5)
+    store.add("exhausted", "failed", received_minutes_ago=8, attempts=MAX_ATTEMPTS)
+    store.add("done", "processed", received_minutes_ago=40)
+
+    submitted = []
+    first, second = StripeEventProcessor(), StripeEventProcessor()
+    for processor in (first, second):
+        processor.submit = lambda event, tenant_id, attempts=1: submitted.append((event["id"], attempts))
+
+    assert first.recover_pending(batch_size=2) == 3
+    assert second.recover_pending(batch_size=2) == 0
+    assert submitted == [("orphaned", 1), ("stale", 2), ("retry_due", 3)]
+    assert first.get_stats()["recovered"] == 3
+
+
+def test_failed_event_is_retried_with_backoff(monkeypatch):
+    """Test: A failure schedules a retry with backoff until attempts run out"""
+    marked = []
+
+    class FailingService:
+        def process_event(self, event, tenant_id):
+            raise RuntimeError("booking table locked")
+
+        def mark_event(self, event_id, tenant_id, status, error=None, retry_in_seconds=None):
+            marked.append((status, retry_in_seconds))
+
+    class Audit:
+        def log_event(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(stripe_event_processor, "get_stripe_service", lambda tenant_id: FailingService())
+    monkeypatch.setattr(stripe_event_processor, "get_audit_service", lambda tenant_id: Audit())
+
+    processor = StripeEventProcessor()
+    processor._process(_event("evt_1"), "t-1", attempts=1)
+    processor._process(_event("evt_1"), "t-1", attempts=MAX_ATTEMPTS)
+    assert marked == [("failed", RETRY_BASE_SECONDS), ("failed", None)]
+    assert processor.get_stats()["retries_scheduled"] == 1
+
+    assert retry_delay_seconds(2) == RETRY_BASE_SECONDS * 2
+    assert retry_delay_seconds(MAX_ATTEMPTS - 1) <= RETRY_MAX_SECONDS
+
+
+def test_error_outcome_is_retried(monkeypatch):
+    """Test: An event the service could not apply is marked failed with a retry, not processed"""
+    marked = []
+
+    class NotFoundService:
+        def process_event(self, event, tenant_id):
+            return {"status": "error", "message": "Booking not found or newer event already applied"}
+
+        def mark_event(self, event_id, tenant_id, status, error=None, retry_in_seconds=None):
+            marked.append((status, error, retry_in_seconds))
+
+    class Audit:
+        def log_event(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(stripe_event_processor, "get_stripe_service", lambda tenant_id: NotFoundService())
+    monkeypatch.setattr(stripe_event_processor, "get_audit_service", lambda tenant_id: Audit())
+
+    processor = StripeEventProcessor()
+    processor._process(_event("evt_1"), "t-1", attempts=1)
+    assert marked == [("failed", "Booking not found or newer event already applied", RETRY_BASE_SECONDS)]
+    assert processor.get_stats()["processed"] == 0
+
+
+def test_events_for_a_booking_apply_in_order(monkeypatch):
+    """Test: Events for one booking are applied in submission order on its shard"""
+    applied = []
+
+    class RecordingService:
+        def process_event(self, event, tenant_id):
+            applied.append(event["id"])
+            return {"status": "success"}
+
+        def mark_event(self, event_id, tenant_id, status, error=None, retry_in_seconds=None):
+            pass
+
+    monkeypatch.setattr(stripe_event_processor, "get_stripe_service", lambda tenant_id: RecordingService())
+    processor = StripeEventProcessor(shards=4)
+    ids = [f"evt_{i}" for i in range(20)]
+    for event_id in ids:
+        processor.submit(_event(event_id, booking_id="b-7"), "t-1")
+    processor.stop()
+    assert applied == ids
+    assert processor.get_stats()["processed"] == 20
+
+
+def test_payment_failed_keeps_booking_pending(monkeypatch):
+    """Test: A declined payment does not change payment_status (reminders keep running)"""
+    calls = []
+    service = StripeService.__new__(StripeService)
+    service._apply_booking_event = lambda *args, **kwargs: calls.append((args, kwargs)) or {"booking_id": "b-1"}
+
+    class Audit:
+        def log_event(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(stripe_service, "get_audit_service", lambda tenant_id: Audit())
+    result = service.process_payment_failed(_event("evt_1", event_type="payment_intent.payment_failed"), "t-1")
+
+    (event, tenant_id, booking_id, set_clause, params), kwargs = calls[0]
+    assert "payment_status" not in set_clause
+    assert "'pending'" in kwargs["extra_where"]
+    assert result["status"] == "success"
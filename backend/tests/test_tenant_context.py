@@ -0,0 +1,53 @@
+"""
+OMEGA Core v3.0 - Tenant Context Tests
+"""
+from datetime import datetime, timedelta, timezone
+import jwt
+from app.config import get_settings
+from app.middleware.tenant_context import set_tenant_context
+
+settings = get_settings()
+
+
+def _token(**overrides) -> str:
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": "user-1",
+        "tenant_id": "tenant-1",
+        "role": "admin",
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(minutes=5)).timestamp()),
+        "type": "access",
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, settings.jwt_secret_key, algorithm="HS256")
+
+
+def _context(authorization: str = None) -> dict:
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    state = {}
+    set_tenant_context({"type": "http", "headers": headers}, state)
+    return state
+
+
+def test_access_token_sets_tenant_and_user():
+    """Test: A valid access token supplies tenant, user and role"""
+    state = _context(f"Bearer {_token()}")
+    assert state == {"tenant_id": "tenant-1", "user_id": "user-1", "user_role": "admin"}
+
+
+def test_missing_token_uses_default_tenant():
+    """Test: Anonymous requests keep the default tenant and no user"""
+    state = _context()
+    assert state["tenant_id"] == settings.default_tenant_id
+    assert state["user_id"] is None
+
+
+def test_rejected_tokens_do_not_set_user():
+    """Test: Expired, refresh and forged tokens are ignored"""
+    expired = _token(exp=int((datetime.now(timezone.utc) - timedelta(minutes=1)).timestamp()))
+    forged = jwt.encode({"sub": "user-1", "tenant_id": "tenant-2", "type": "access"}, "wrong-key", algorithm="HS256")
+    for token in (expired, _token(type="refresh"), forged):
+        state = _context(f"Bearer {token}")
+        assert state["user_id"] is None
+        assert state["tenant_id"] == settings.default_tenant_id
@@ -0,0 +1,44 @@
+"""
+OMEGA Core v3.0 - Tenant Settings Dependency Tests
+"""
+import asyncio
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers import gmail
+from app.services import tenant_settings as tenant_settings_module
+from app.services.auth_service import get_token_user
+from app.services.tenant_settings import TenantSettings, TenantSettingsCache, get_request_tenant_settings
+
+
+def test_request_settings_come_from_the_cache(monkeypatch):
+    """Test: A cached tenant is served without a load and kept on request.state"""
+    cache = TenantSettingsCache(dsn="postgresql://unused")
+    cache._cache.set("t-1", TenantSettings(tenant_id="t-1", safe_mode=True))
+    cache._load = lambda tenant_id: (_ for _ in ()).throw(AssertionError("loaded a cached tenant"))
+    monkeypatch.setattr(tenant_settings_module, "get_tenant_settings_cache", lambda: cache)
+
+    request = SimpleNamespace(state=SimpleNamespace(tenant_id="t-1"))
+    loaded = asyncio.run(get_request_tenant_settings(request))
+    assert loaded.safe_mode is True
+    assert request.state.tenant_settings is loaded
+
+
+def _client(settings: TenantSettings) -> TestClient:
+    app = FastAPI()
+    app.include_router(gmail.router)
+    app.dependency_overrides[get_token_user] = lambda: SimpleNamespace(tenant_id=settings.tenant_id)
+    app.dependency_overrides[get_request_tenant_settings] = lambda: settings
+    return TestClient(app)
+
+
+def test_stream_draft_respects_safe_mode_and_flag(monkeypatch):
+    """Test: Safe Mode and a disabled draft_streaming flag are refused before the processor runs"""
+    monkeypatch.setattr(gmail, "EmailProcessorV3", lambda tenant_id: (_ for _ in ()).throw(AssertionError("ran")))
+    url = "/api/gmail/emails/e-1/draft/stream?account_email=greg@example.com"
+
+    response = _client(TenantSettings(tenant_id="t-1", safe_mode=True)).get(url)
+    assert response.status_code == 503
+
+    disabled = TenantSettings(tenant_id="t-1", feature_flags={"draft_streaming": False})
+    assert _client(disabled).get(url).status_code == 404
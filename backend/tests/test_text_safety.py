@@ -0,0 +1,93 @@
+"""
+OMEGA Core v3.0 - Text Safety Scanner Tests
+"""
+import time
+from app.utils.text_safety import StreamingSanitizer, scan_text, sanitize_text
+
+
+def test_sanitizes_urls_emails_and_html():
+    """Test: URLs and emails become placeholders, tags are stripped"""
+    text = "<p>Email greg@example.com or visit https://example.com/book?x=1 today</p>"
+    assert sanitize_text(text) == "Email [EMAIL_REMOVED] or visit [URL_REMOVED] today"
+
+
+def test_removes_script_blocks():
+    """Test: Script bodies are removed, including an unclosed trailing script"""
+    assert sanitize_text("Hi <script>alert('x')</SCRIPT>there") == "Hi there"
+    assert sanitize_text("Hi <script type='a'>alert(1)") == "Hi"
+    assert sanitize_text("<SCRIPT>alert(1)</SCRIPT> hi") == "hi"
+    assert sanitize_text("Hi <Script src=x>alert(1)") == "Hi"
+
+
+def test_keeps_plain_comparisons_and_at_signs():
+    """Test: '<' in prose and a bare '@' are not mistaken for tags or emails"""
+    assert sanitize_text("3 < 5 and 7 > 2") == "3 < 5 and 7 > 2"
+    assert sanitize_text("meet @ the venue") == "meet @ the venue"
+
+
+def test_finds_sentra_violations():
+    """Test: Static-rule findings are reported in Sentra's order and shape"""
+    result = scan_text(
+        "I believe the System Prompt says $500 at 9:30 PM, see http://other.com/x "
+        "and https://skinnymanmusic.com/packages"
+    )
+    assert result.violation_types == [
+        "system_prompt_reveal", "ai_hallucination", "external_urls", "invented_details",
+    ]
+    assert result.violations[2] == {"type": "external_urls", "severity": "medium", "urls": ["http://other.com/x"]}
+    assert result.to_dict()["has_violations"] is True
+
+
+def test_clean_reply_has_no_violations():
+    """Test: An ordinary reply passes unchanged"""
+    text = "Thanks for reaching out! Could you share the date and venue?"
+    result = scan_text(text)
+    assert result.text == text
+    assert not result.has_violations
+
+
+def test_adversarial_input_is_linear():
+    """Test: Inputs that were quadratic for the previous regexes scan quickly"""
+    for text in ("a." * 100000, "<" * 200000, ("a" * 60 + "@") * 3000):
+        started = time.perf_counter()
+        scan_text(text)
+        assert time.perf_counter() - started < 1.0
+
+
+def _stream(text: str, size: int) -> tuple:
+    sanitizer = StreamingSanitizer()
+    preview = "".join(sanitizer.feed(text[i:i + size]) for i in range(0, len(text), size))
+    return preview, sanitizer.finish()
+
+
+def test_streaming_matches_full_scan():
+    """Test: Streamed previews are a prefix of the final sanitized text"""
+    text = (
+        "Hi Sarah, I believe we are free. Email greg@example.com or see "
+        "https://example.com/a?b=1 <b>now</b> <script>alert('a b')</script>thanks!"
+    )
+    for size in (1, 2, 3, 7, 50):
+        preview, final = _stream(text, size)
+        assert final.text == sanitize_text(text)
+        assert final.text.startswith(preview.rstrip())
+        assert "ai_hallucination" in final.violation_types
+
+
+def test_streaming_never_leaks_partial_constructs():
+    """Test: Partial URLs, emails, tags and script bodies are held back"""
+    text = "See https://example.com/x and mail a.b@example.com <a href='x y'>here</a> <script>var a = 1;</script> ok"
+    for size in (1, 2, 5):
+        preview, _ = _stream(text, size)
+        for leaked in ("example", "href", "var a", "<"):
+            assert leaked not in preview
+
+
+def test_findings_see_markup_the_sanitizer_removes():
+    """Test: URLs in tag attributes and details inside script bodies are still reported"""
+    result = scan_text('Book here <a href="https://evil.com/x">link</a>')
+    assert result.text == "Book here link"
+    assert result.violations == [{"type": "external_urls", "severity": "medium", "urls": ["https://evil.com/x"]}]
+
+    result = scan_text("<script>alert(1) costs $500</script> ok")
+    assert result.text == "ok"
+    assert result.violation_types == ["invented_details"]
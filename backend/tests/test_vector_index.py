@@ -0,0 +1,75 @@
+"""
+OMEGA Core v3.0 - Local Vector Index Tests
+"""
+import numpy as np
+from app.utils.vector_index import INITIAL_CAPACITY, VectorIndex, embed_text
+
+
+def test_embedding_is_deterministic_and_normalized():
+    """Test: Same text, same unit vector; no words, zero vector"""
+    first = embed_text("Wedding at The Loft on June 14th")
+    assert np.array_equal(first, embed_text("Wedding at The Loft on June 14th"))
+    assert abs(float(np.linalg.norm(first)) - 1.0) < 1e-5
+    assert not embed_text("!!! ...").any()
+
+
+def test_similar_spelling_ranks_first(tmp_path):
+    """Test: A differently spelled venue still finds its thread"""
+    index = VectorIndex(str(tmp_path), dim=256)
+    index.add("thread:a", "thread", "Wedding reception at The Grand Ballroom, 200 guests", thread_id="a")
+    index.add("thread:b", "thread", "Corporate holiday party at Riverside Brewery", thread_id="b")
+    index.add("memory:c", "memory", "Grand Ballroom load-in via freight elevator", key="Grand Ballroom")
+
+    results = index.search("grand ballrom wedding", k=2)
+    assert results[0][1]["thread_id"] == "a"
+
+    only_threads = index.search("grand ballroom", k=5, kind="thread", exclude_ids=["thread:a"])
+    assert [item["thread_id"] for _, item in only_threads] == ["b"]
+    assert index.search("grand ballroom", k=5, min_score=0.99) == []
+    index.close()
+
+
+def test_updates_in_place_and_skips_unchanged(tmp_path):
+    """Test: Re-adding an id overwrites its row; unchanged items are not rewritten"""
+    index = VectorIndex(str(tmp_path), dim=128)
+    assert index.add("thread:a", "thread", "first summary", thread_id="a")
+    assert not index.add("thread:a", "thread", "first summary", thread_id="a")
+    assert index.add("thread:a", "thread", "revised summary about a jazz trio", thread_id="a")
+    assert len(index) == 1
+    assert index.search("jazz trio")[0][1]["thread_id"] == "a"
+    index.close()
+
+
+def test_persists_grows_and_shares_between_instances(tmp_path):
+    """Test: A second mapping (another process) sees writes, growth and saved state"""
+    writer = VectorIndex(str(tmp_path), dim=64)
+    reader = VectorIndex(str(tmp_path), dim=64)
+    count = INITIAL_CAPACITY + 10
+    writer.add_many((f"thread:{i}", "thread", f"summary number {i} venue{i}", {"thread_id": str(i)}) for i in range(count))
+    with writer.locked():
+        writer.write_state({"threads": "2025-06-01T00:00:00+00:00"})
+
+    assert len(reader.search("venue1033", k=1)) == 1
+    assert len(reader) == count
+    assert reader.read_state()["threads"] == "2025-06-01T00:00:00+00:00"
+    writer.close()
+    reader.close()
+
+    reopened = VectorIndex(str(tmp_path), dim=64)
+    assert len(reopened) == count
+    reopened.close()
+    assert len(VectorIndex(str(tmp_path), dim=32)) == 0
+
+
+def test_sync_lock_is_exclusive(tmp_path):
+    """Test: A non-blocking lock attempt fails while another instance holds it"""
+    first = VectorIndex(str(tmp_path), dim=64)
+    second = VectorIndex(str(tmp_path), dim=64)
+    with first.locked() as held:
+        assert held
+        with second.locked(blocking=False) as acquired:
+            assert not acquired
+    with second.locked(blocking=False) as acquired:
+        assert acquired
+    first.close()
+    second.close()